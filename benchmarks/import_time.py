@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Import-Time Benchmark - Cold-start budget per CLI entry point
+
+Runs each entry point in a fresh interpreter under `python -X importtime`
+and checks:
+
+- the cumulative import time of its top-level imports against a budget
+- that quick commands (--help, --show-schedule, --list, monitors) do not
+  load the heavy clients (requests, supabase/postgrest, psycopg2); those
+  are imported only by commands that actually fetch or write
+
+The fastest of --repeat runs is used (disk cache warm). Exit status 1 when
+an entry point is over budget or imports a forbidden module, so the check can
+run in CI or before deploying.
+
+Usage:
+    python3 benchmarks/import_time.py
+    python3 benchmarks/import_time.py --entry main_help --top 15
+    python3 benchmarks/import_time.py --json logs/import_time.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).parent.parent
+
+# Modules quick commands must not import
+HEAVY_MODULES = ('requests', 'supabase', 'postgrest', 'psycopg2', 'httpx', 'numpy')
+
+# Entry point -> command (relative to the project root), import budget and forbidden modules
+ENTRY_POINTS = {
+    'main_help': {
+        'argv': ['main.py', '--help'],
+        'budget_ms': 300,
+        'forbid': HEAVY_MODULES,
+    },
+    'controller_show_schedule': {
+        'argv': ['fetchers/master_fetcher_controller.py', '--show-schedule'],
+        'budget_ms': 300,
+        'forbid': HEAVY_MODULES,
+    },
+    'controller_list': {
+        'argv': ['fetchers/master_fetcher_controller.py', '--list'],
+        'budget_ms': 300,
+        'forbid': HEAVY_MODULES,
+    },
+    'run_scheduled_updates_help': {
+        'argv': ['workers/orchestrators/run_scheduled_updates.py', '--help'],
+        'budget_ms': 400,
+        'forbid': HEAVY_MODULES,
+    },
+    'api_usage_help': {
+        'argv': ['monitors/api_usage.py', '--help'],
+        'budget_ms': 250,
+        'forbid': HEAVY_MODULES,
+    },
+    'compare_runs_help': {
+        'argv': ['monitors/compare_runs.py', '--help'],
+        'budget_ms': 250,
+        'forbid': HEAVY_MODULES,
+    },
+    # The worker needs its clients at startup; only the budget applies
+    'start_worker_import': {
+        'argv': ['-c', 'import start_worker'],
+        'budget_ms': 1500,
+        'forbid': (),
+    },
+}
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """'import time: self | cumulative | name' lines -> [{module, self_us, cumulative_us, depth}]"""
+    modules = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules.append({
+                'module': match.group(4),
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2)),
+                'depth': (len(match.group(3)) - 1) // 2,
+            })
+    return modules
+
+
+def measure(argv: List[str]) -> Dict:
+    """Run one command under -X importtime"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+    env.setdefault('RACING_LOG_FILE', 'off')
+    completed = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=120)
+    modules = parse_importtime(completed.stderr)
+    top_level = [m for m in modules if m['depth'] == 0]
+    errors = [line for line in completed.stderr.splitlines() if not line.startswith('import time:')]
+    return {
+        'returncode': completed.returncode,
+        'import_ms': round(sum(m['cumulative_us'] for m in top_level) / 1000, 1),
+        'modules': {m['module'] for m in modules},
+        'top_level': sorted(top_level, key=lambda m: -m['cumulative_us']),
+        'errors': errors[-5:],
+    }
+
+
+def check(name: str, entry: Dict, repeat: int) -> Dict:
+    runs = [measure(entry['argv']) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run['import_ms'])
+    forbidden = sorted(m for m in entry['forbid'] if m in best['modules'])
+    result = {
+        'entry': name,
+        'command': ' '.join(entry['argv']),
+        'import_ms': best['import_ms'],
+        'budget_ms': entry['budget_ms'],
+        'modules_loaded': len(best['modules']),
+        'forbidden_loaded': forbidden,
+        'returncode': best['returncode'],
+        'slowest': [{'module': m['module'], 'ms': round(m['cumulative_us'] / 1000, 1)} for m in best['top_level'][:25]],
+        'errors': best['errors'] if best['returncode'] else [],
+    }
+    result['passed'] = best['returncode'] == 0 and not forbidden and best['import_ms'] <= entry['budget_ms']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time budget per CLI entry point')
+    parser.add_argument('--entry', nargs='+', choices=list(ENTRY_POINTS), help='Entry points to check (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per entry point; the fastest counts (default 3)')
+    parser.add_argument('--top', type=int, default=5, help='Slowest top-level imports to show per entry point')
+    parser.add_argument('--json', type=Path, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = [check(name, ENTRY_POINTS[name], args.repeat) for name in (args.entry or ENTRY_POINTS)]
+
+    print(f"\n{'Entry point':<30} {'Import ms':>10} {'Budget':>8} {'Modules':>8}  Result")
+    for result in results:
+        status = 'ok' if result['passed'] else 'FAIL'
+        print(f"{result['entry']:<30} {result['import_ms']:>10.1f} {result['budget_ms']:>8} "
+              f"{result['modules_loaded']:>8}  {status}")
+        if result['forbidden_loaded']:
+            print(f"    imports {', '.join(result['forbidden_loaded'])}")
+        if result['returncode']:
+            print(f"    exited with {result['returncode']}: " + ' | '.join(result['errors']))
+        for row in result['slowest'][:args.top]:
+            print(f"    {row['ms']:>8.1f} ms  {row['module']}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, indent=2))
+
+    failed = [r['entry'] for r in results if not r['passed']]
+    if failed:
+        print(f"\nOver budget or importing heavy clients: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"\nAll {len(results)} entry points within budget")
+
+
+if __name__ == '__main__':
+    main()
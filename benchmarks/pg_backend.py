@@ -0,0 +1,380 @@
+"""
+Local Postgres Backend - The supabase-py query builder subset, over psycopg2
+
+Lets SupabaseReferenceClient, EntityIndex, the fetchers' validation queries
+and the statistics scans run unmodified against a local Postgres, so write
+and lookup paths can be benchmarked without touching Supabase. Supported:
+
+    client.table(name)
+        .select(columns, count=None) / .insert(rows) / .upsert(rows, on_conflict=) / .update(values)
+        .eq / .neq / .gt / .gte / .lt / .lte / .in_ / .is_ / .like / .ilike   (and .not_.<filter>)
+        .or_('col.op.value,and(col.op.value,...)')   (eq/neq/gt/gte/lt/lte/is, values optionally "quoted")
+        .order(column, desc=False) / .limit(n) / .range(start, end)
+        .execute() -> response with .data and .count
+
+Everything lives in one scratch schema (dropped and recreated by
+reset_schema()). Tables are created from the first rows written to them:
+column types are inferred from the values (text, bigint, double precision,
+boolean, jsonb), the on_conflict columns get a unique index, and later
+writes add any new columns. Selecting a table that does not exist yet
+returns no rows, like an empty production table.
+
+Never point BENCH_DATABASE_URL at a shared database: the schema is dropped
+on every run.
+"""
+
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SCHEMA = 'racing_bench'
+
+_psycopg2 = None
+
+
+def _pg():
+    """psycopg2 is only needed for the database benchmarks"""
+    global _psycopg2
+    if _psycopg2 is None:
+        import psycopg2
+        import psycopg2.extras
+        import psycopg2.sql
+        _psycopg2 = psycopg2
+    return _psycopg2
+
+
+def connect(url: str):
+    conn = _pg().connect(url)
+    conn.autocommit = True
+    return conn
+
+
+def reset_schema(conn, schema: str = DEFAULT_SCHEMA):
+    """Drop and recreate the scratch schema and make it the search path"""
+    sql = _pg().sql
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL('DROP SCHEMA IF EXISTS {} CASCADE').format(sql.Identifier(schema)))
+        cur.execute(sql.SQL('CREATE SCHEMA {}').format(sql.Identifier(schema)))
+        cur.execute(sql.SQL('SET search_path TO {}').format(sql.Identifier(schema)))
+
+
+def _pg_type(values: List[Any]) -> str:
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return 'text'
+    if kinds <= {bool}:
+        return 'boolean'
+    if kinds <= {int}:
+        return 'bigint'
+    if kinds <= {int, float}:
+        return 'double precision'
+    if kinds <= {dict, list}:
+        return 'jsonb'
+    return 'text'
+
+
+_LOGIC_OPERATORS = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split a PostgREST logic tree on commas outside parentheses and quotes"""
+    parts, depth, quoted, current = [], 0, False, ''
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _logic_tree(operator: str, filters: str):
+    """(composable, params) for an or()/and() filter string"""
+    sql = _pg().sql
+    fragments, params = [], []
+    for part in _split_top_level(filters):
+        for nested in ('and', 'or'):
+            if part.startswith(nested + '(') and part.endswith(')'):
+                fragment, nested_params = _logic_tree(nested, part[len(nested) + 1:-1])
+                break
+        else:
+            column, op, value = part.split('.', 2)
+            value = value[1:-1] if value.startswith('"') and value.endswith('"') else value
+            if op == 'is':
+                fragment = sql.SQL('{} IS ' + {'null': 'NULL', 'true': 'TRUE', 'false': 'FALSE'}[value])\
+                    .format(sql.Identifier(column))
+                nested_params = []
+            else:
+                fragment = sql.SQL('{} ' + _LOGIC_OPERATORS[op] + ' %s').format(sql.Identifier(column))
+                nested_params = [value]
+        fragments.append(fragment)
+        params += nested_params
+    return sql.SQL('(') + sql.SQL(f' {operator.upper()} ').join(fragments) + sql.SQL(')'), params
+
+
+class Response:
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalPostgresClient:
+    """Stands in for supabase.Client (only .table() is used by the repo's clients)"""
+
+    def __init__(self, conn, schema: str = DEFAULT_SCHEMA):
+        self.conn = conn
+        self.schema = schema
+        self._columns: Dict[str, Dict[str, str]] = {}   # table -> {column: type}
+        self._unique: Dict[str, set] = {}                # table -> on_conflict keys with an index
+
+    def table(self, name: str) -> 'Query':
+        return Query(self, name)
+
+    # ------------------------------------------------------------------
+    # Schema
+    # ------------------------------------------------------------------
+
+    def columns(self, table: str) -> Dict[str, str]:
+        if table not in self._columns:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT column_name, data_type FROM information_schema.columns "
+                            "WHERE table_schema = %s AND table_name = %s", (self.schema, table))
+                self._columns[table] = dict(cur.fetchall())
+        return self._columns[table]
+
+    def ensure_table(self, table: str, rows: List[Dict], unique_key: Optional[str] = None):
+        """Create table / add columns / add the unique index needed for rows"""
+        sql = _pg().sql
+        existing = self.columns(table)
+        names = list(dict.fromkeys(k for row in rows for k in row))
+        missing = [n for n in names if n not in existing]
+        with self.conn.cursor() as cur:
+            if not existing:
+                columns = [sql.SQL('{} {}').format(sql.Identifier(n), sql.SQL(_pg_type([r.get(n) for r in rows])))
+                           for n in names]
+                if not unique_key:
+                    columns.insert(0, sql.SQL('_row_id bigserial PRIMARY KEY'))
+                cur.execute(sql.SQL('CREATE TABLE {} ({})').format(sql.Identifier(table), sql.SQL(', ').join(columns)))
+            else:
+                for n in missing:
+                    cur.execute(sql.SQL('ALTER TABLE {} ADD COLUMN {} {}').format(
+                        sql.Identifier(table), sql.Identifier(n), sql.SQL(_pg_type([r.get(n) for r in rows]))))
+            if unique_key and unique_key not in self._unique.setdefault(table, set()):
+                keys = [k.strip() for k in unique_key.split(',')]
+                cur.execute(sql.SQL('CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({})').format(
+                    sql.Identifier(f"{table}_{'_'.join(keys)}_key"), sql.Identifier(table),
+                    sql.SQL(', ').join(map(sql.Identifier, keys))))
+                self._unique[table].add(unique_key)
+        self._columns.pop(table, None)
+
+
+class Query:
+    """One builder chain; executed with execute()"""
+
+    def __init__(self, client: LocalPostgresClient, table: str):
+        self.client = client
+        self.table = table
+        self.operation = 'select'
+        self.columns = '*'
+        self.count = None
+        self.rows: List[Dict] = []
+        self.values: Dict = {}
+        self.on_conflict: Optional[str] = None
+        self.filters = []           # (sql fragment composable, params)
+        self.ordering = []
+        self.limit_n: Optional[int] = None
+        self.offset_n: Optional[int] = None
+        self._negate = False
+
+    # Operations
+
+    def select(self, columns: str = '*', count: Optional[str] = None) -> 'Query':
+        self.columns, self.count = columns, count
+        return self
+
+    def insert(self, rows) -> 'Query':
+        self.operation, self.rows = 'insert', rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = 'id', **_) -> 'Query':
+        self.operation, self.rows, self.on_conflict = 'upsert', rows if isinstance(rows, list) else [rows], on_conflict
+        return self
+
+    def update(self, values: Dict) -> 'Query':
+        self.operation, self.values = 'update', values
+        return self
+
+    # Filters
+
+    @property
+    def not_(self) -> 'Query':
+        self._negate = True
+        return self
+
+    def _filter(self, column: str, template: str, *params) -> 'Query':
+        sql = _pg().sql
+        fragment = sql.SQL(template).format(sql.Identifier(column))
+        if self._negate:
+            fragment = sql.SQL('NOT ({})').format(fragment)
+            self._negate = False
+        self.filters.append((fragment, list(params)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, '{} = %s', value)
+
+    def neq(self, column, value):
+        return self._filter(column, '{} <> %s', value)
+
+    def gt(self, column, value):
+        return self._filter(column, '{} > %s', value)
+
+    def gte(self, column, value):
+        return self._filter(column, '{} >= %s', value)
+
+    def lt(self, column, value):
+        return self._filter(column, '{} < %s', value)
+
+    def lte(self, column, value):
+        return self._filter(column, '{} <= %s', value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(column, '{} = ANY(%s)', values) if values else self._filter(column, 'FALSE')
+
+    def is_(self, column, value):
+        keyword = {'null': 'NULL', None: 'NULL', True: 'TRUE', 'true': 'TRUE', False: 'FALSE', 'false': 'FALSE'}[value]
+        return self._filter(column, '{} IS ' + keyword)
+
+    def or_(self, filters: str) -> 'Query':
+        fragment, params = _logic_tree('or', filters)
+        self.filters.append((fragment, params))
+        return self
+
+    def like(self, column, pattern):
+        return self._filter(column, '{}::text LIKE %s', pattern.replace('*', '%'))
+
+    def ilike(self, column, pattern):
+        return self._filter(column, '{}::text ILIKE %s', pattern.replace('*', '%'))
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, **_) -> 'Query':
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, n: int) -> 'Query':
+        self.limit_n = n
+        return self
+
+    def range(self, start: int, end: int) -> 'Query':
+        self.offset_n, self.limit_n = start, end - start + 1
+        return self
+
+    # Execution
+
+    def execute(self) -> Response:
+        if self.operation == 'select':
+            return self._select()
+        if self.operation in ('insert', 'upsert'):
+            return self._write()
+        return self._update()
+
+    def _where(self):
+        sql = _pg().sql
+        if not self.filters:
+            return sql.SQL(''), []
+        params = [p for _, ps in self.filters for p in ps]
+        return sql.SQL(' WHERE ') + sql.SQL(' AND ').join(f for f, _ in self.filters), params
+
+    def _select(self) -> Response:
+        pg = _pg()
+        sql = pg.sql
+        available = self.client.columns(self.table)
+        if not available:
+            return Response([], 0 if self.count else None)
+
+        if self.columns.strip() == '*':
+            wanted = [c for c in available if c != '_row_id']
+        else:
+            wanted = [c.strip() for c in self.columns.split(',') if c.strip()]
+        # Columns the scratch table never received read as NULL
+        fields = sql.SQL(', ').join(
+            sql.Identifier(c) if c in available else sql.SQL('NULL AS {}').format(sql.Identifier(c)) for c in wanted)
+
+        where, params = self._where()
+        query = sql.SQL('SELECT {} FROM {}').format(fields, sql.Identifier(self.table)) + where
+        if self.ordering:
+            query += sql.SQL(' ORDER BY ') + sql.SQL(', ').join(
+                sql.SQL('{} DESC' if desc else '{}').format(sql.Identifier(c)) for c, desc in self.ordering)
+        if self.limit_n is not None:
+            query += sql.SQL(' LIMIT %s')
+            params.append(self.limit_n)
+        if self.offset_n:
+            query += sql.SQL(' OFFSET %s')
+            params.append(self.offset_n)
+
+        with self.client.conn.cursor(cursor_factory=pg.extras.RealDictCursor) as cur:
+            cur.execute(query, params)
+            data = [dict(row) for row in cur.fetchall()]
+            total = None
+            if self.count:
+                where, params = self._where()
+                cur.execute(sql.SQL('SELECT count(*) AS n FROM {}').format(sql.Identifier(self.table)) + where, params)
+                total = cur.fetchone()['n']
+        return Response(data, total)
+
+    def _write(self) -> Response:
+        pg = _pg()
+        sql = pg.sql
+        if not self.rows:
+            return Response([])
+        self.client.ensure_table(self.table, self.rows, self.on_conflict)
+
+        names = list(dict.fromkeys(k for row in self.rows for k in row))
+        values = [tuple(pg.extras.Json(v) if isinstance(v, (dict, list)) else v for v in
+                        (row.get(n) for n in names)) for row in self.rows]
+        query = sql.SQL('INSERT INTO {} ({}) VALUES %s').format(
+            sql.Identifier(self.table), sql.SQL(', ').join(map(sql.Identifier, names)))
+        if self.operation == 'upsert':
+            keys = [k.strip() for k in self.on_conflict.split(',')]
+            updates = [n for n in names if n not in keys]
+            query += sql.SQL(' ON CONFLICT ({}) ').format(sql.SQL(', ').join(map(sql.Identifier, keys)))
+            query += (sql.SQL('DO UPDATE SET ') + sql.SQL(', ').join(
+                sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(n)) for n in updates)) if updates \
+                else sql.SQL('DO NOTHING')
+
+        with self.client.conn.cursor() as cur:
+            pg.extras.execute_values(cur, query.as_string(cur), values, page_size=max(len(values), 1))
+        return Response([])
+
+    def _update(self) -> Response:
+        pg = _pg()
+        sql = pg.sql
+        if not self.client.columns(self.table):
+            return Response([])
+        self.client.ensure_table(self.table, [self.values])
+        assignments = sql.SQL(', ').join(sql.SQL('{} = %s').format(sql.Identifier(n)) for n in self.values)
+        where, params = self._where()
+        values = [pg.extras.Json(v) if isinstance(v, (dict, list)) else v for v in self.values.values()]
+        with self.client.conn.cursor() as cur:
+            cur.execute(sql.SQL('UPDATE {} SET ').format(sql.Identifier(self.table)) + assignments + where,
+                        values + params)
+        return Response([])
+
+
+def reference_client(conn, schema: str = DEFAULT_SCHEMA, batch_size: int = 100):
+    """SupabaseReferenceClient whose .client is a LocalPostgresClient"""
+    from utils.supabase_client import SupabaseReferenceClient
+
+    db_client = SupabaseReferenceClient.__new__(SupabaseReferenceClient)
+    db_client.url = f"postgresql (schema {schema})"
+    db_client.batch_size = batch_size
+    db_client.client = LocalPostgresClient(conn, schema)
+    db_client.stats = {'inserted': 0, 'updated': 0, 'errors': 0, 'skipped': 0}
+    return db_client
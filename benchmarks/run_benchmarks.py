@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - Race-day pipeline stages on synthetic data, with regression gates
+
+Generates a deterministic race day (benchmarks/synthetic.py) and times the
+stages a real fetch runs, each repeated --repeat times after one warm-up:
+
+    transform.racecards      RacesFetcher._transform_racecard over the day's cards
+    transform.results        ResultsFetcher._transform_result + _prepare_runner_records
+    entities.extract         EntityExtractor.extract_from_runners
+    stats.performance_cube   PerformanceCube build + horse/jockey/trainer rollups
+    stats.combinations       CombinationEngine (all pair types) + records
+    stats.horse_form         HorseFormStore.rebuild (writes discarded)
+
+With BENCH_DATABASE_URL (or --db-url) pointing at a local Postgres, also:
+
+    pedigree.validate        RacesFetcher._validate_pedigree_ids
+    db.upsert_races          upsert_batch into ra_mst_races
+    db.upsert_runners        insert_runners (ra_mst_runners, race_id,horse_id)
+    db.upsert_changed        upsert_changed of unchanged runners (diff read path)
+    entities.store           extract_and_store_from_runners (name lookups + writes)
+    stats.*.db               the statistics engines scanning Postgres
+
+The database benchmarks use a scratch schema (benchmarks/pg_backend.py)
+that is dropped on every run - never use a shared database.
+
+Results are compared with a JSON baseline (benchmarks/baselines/<size>.json);
+a benchmark whose median is more than --threshold above the baseline median
+fails the run (exit 1). Baselines are per machine: record them with
+--save-baseline on the machine that runs the gate. None are committed, so
+until one is recorded (or when it was recorded with another --seed) the
+run only reports timings: it warns that the gate was not applied and exits
+0, or exits 3 with --require-baseline (use that in CI).
+
+Usage:
+    python3 benchmarks/run_benchmarks.py                          # medium day, compare with baseline
+    python3 benchmarks/run_benchmarks.py --size small --repeat 3
+    python3 benchmarks/run_benchmarks.py --only 'stats.*' --threshold 0.1
+    python3 benchmarks/run_benchmarks.py --save-baseline           # Record medians as the new baseline
+    python3 benchmarks/run_benchmarks.py --require-baseline        # Exit 3 instead of passing without one
+    BENCH_DATABASE_URL=postgresql://localhost/racing_bench python3 benchmarks/run_benchmarks.py
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import logging
+import argparse
+import platform
+import statistics
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault('RACING_LOG_FILE', 'off')
+
+from benchmarks.synthetic import SIZES, RaceDayGenerator
+
+BASELINE_DIR = Path(__file__).parent / 'baselines'
+DEFAULT_THRESHOLD = 0.20
+MIN_ABSOLUTE_S = 0.005          # Ignore slowdowns smaller than this (timer noise on tiny stages)
+RACE_DAY = date(2025, 6, 14)
+
+# ANSI colors
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+DIM = '\033[2m'
+
+
+class Context:
+    """Generated data shared by the benchmarks (built once, outside the timings)"""
+
+    def __init__(self, generator: RaceDayGenerator, history_days: int, db_client=None):
+        self.generator = generator
+        self.history_days = history_days
+        self.db_client = db_client
+        self.racecards = generator.racecards(RACE_DAY)
+        self.results = generator.results(RACE_DAY)
+        self._history = None
+        self._transformed = None
+
+    @property
+    def history(self) -> Tuple[List[Dict], List[Dict]]:
+        if self._history is None:
+            self._history = self.generator.history(self.history_days, end=RACE_DAY)
+        return self._history
+
+    @property
+    def transformed(self) -> Tuple[List[Dict], List[Dict]]:
+        """(race_records, runner_records) from the day's racecards"""
+        if self._transformed is None:
+            fetcher = races_fetcher()
+            races, runners = [], []
+            for card in self.racecards:
+                race, race_runners = fetcher._transform_racecard(card)
+                races.append(race)
+                runners.extend(race_runners)
+            self._transformed = races, runners
+        return self._transformed
+
+
+class MemorySource:
+    """Completed runners from generated history, in iter_completed_runners' duck type"""
+
+    def __init__(self, race_rows: List[Dict], runner_rows: List[Dict]):
+        self.races = {race['id']: race for race in race_rows}
+        self.runners = sorted(runner_rows, key=lambda r: r['race_id'])
+
+    def iter_completed_runners(self, runner_columns, race_columns, page_size=1000):
+        for runner in self.runners:
+            if runner.get('position') is None:
+                continue
+            row = {c: runner.get(c) for c in runner_columns}
+            if race_columns is None:
+                yield row, {}
+                continue
+            race = self.races.get(runner['race_id'])
+            if race:
+                yield row, {c: race.get(c) for c in race_columns}
+
+
+class DiscardWrites:
+    """db_client stand-in for engines that finish with an upsert"""
+
+    def upsert_batch(self, table, records, unique_key='id'):
+        return {'inserted': len(records), 'updated': 0, 'errors': 0}
+
+
+def races_fetcher(db_client=None):
+    """RacesFetcher without config, API client or connections (transform methods only)"""
+    from fetchers.races_fetcher import RacesFetcher
+    fetcher = RacesFetcher.__new__(RacesFetcher)
+    fetcher.db_client = db_client
+    return fetcher
+
+
+def results_fetcher(db_client=None):
+    from fetchers.results_fetcher import ResultsFetcher
+    fetcher = ResultsFetcher.__new__(ResultsFetcher)
+    fetcher.db_client = db_client
+    return fetcher
+
+
+# ----------------------------------------------------------------------
+# Benchmarks: setup(ctx) -> (callable timed, items processed per call)
+# ----------------------------------------------------------------------
+
+def bench_transform_racecards(ctx: Context):
+    fetcher = races_fetcher()
+    items = sum(len(card['runners']) for card in ctx.racecards)
+    return lambda: [fetcher._transform_racecard(card) for card in ctx.racecards], items
+
+
+def bench_transform_results(ctx: Context):
+    fetcher = results_fetcher()
+    items = sum(len(result['runners']) for result in ctx.results)
+
+    def run():
+        transformed = [fetcher._transform_result(result) for result in ctx.results]
+        return fetcher._prepare_runner_records([t for t in transformed if t])
+    return run, items
+
+
+def bench_entities_extract(ctx: Context):
+    from utils.entity_extractor import EntityExtractor
+    _, runners = ctx.transformed
+    extractor = EntityExtractor(ctx.db_client)
+    return lambda: extractor.extract_from_runners(runners), len(runners)
+
+
+def _stats_source(ctx: Context, from_db: bool):
+    return ctx.db_client if from_db else MemorySource(*ctx.history)
+
+
+def bench_performance_cube(ctx: Context, from_db: bool = False):
+    from utils.performance_cube import PerformanceCube
+    source = _stats_source(ctx, from_db)
+
+    def run():
+        cube = PerformanceCube.from_database(source)
+        return [cube.rollup(entity, ('course_id',)) for entity in ('horse', 'jockey', 'trainer')]
+    return run, len(ctx.history[1])
+
+
+def bench_combinations(ctx: Context, from_db: bool = False):
+    from utils.combination_engine import PAIR_TYPES, CombinationEngine
+    source = _stats_source(ctx, from_db)
+
+    def run():
+        engine = CombinationEngine.from_database(source, list(PAIR_TYPES))
+        return [engine.records(pair_type, min_runs=3) for pair_type in PAIR_TYPES]
+    return run, len(ctx.history[1])
+
+
+def bench_horse_form(ctx: Context, from_db: bool = False):
+    from utils.horse_form import HorseFormStore
+    store = HorseFormStore(DiscardWrites())
+    source = _stats_source(ctx, from_db)
+    return lambda: store.rebuild(source=source), len(ctx.history[1])
+
+
+def bench_pedigree_validate(ctx: Context):
+    fetcher = races_fetcher(ctx.db_client)
+    _, runners = ctx.transformed
+    return lambda: fetcher._validate_pedigree_ids([dict(r) for r in runners]), len(runners)
+
+
+def bench_upsert_races(ctx: Context):
+    races, _ = ctx.transformed
+    return lambda: ctx.db_client.upsert_batch('ra_mst_races', races, 'id'), len(races)
+
+
+def bench_upsert_runners(ctx: Context):
+    _, runners = ctx.transformed
+    return lambda: ctx.db_client.insert_runners(runners), len(runners)
+
+
+def bench_upsert_changed(ctx: Context):
+    _, runners = ctx.transformed
+    ctx.db_client.insert_runners(runners)
+    return lambda: ctx.db_client.upsert_changed('ra_mst_runners', runners, 'race_id,horse_id'), len(runners)
+
+
+def bench_entities_store(ctx: Context):
+    from utils.entity_extractor import EntityExtractor
+    _, runners = ctx.transformed
+    # A fresh extractor per call, so name lookups are not served from the previous call's cache
+    return lambda: EntityExtractor(ctx.db_client).extract_and_store_from_runners(runners), len(runners)
+
+
+# name -> (setup, needs database)
+BENCHMARKS: Dict[str, Tuple[Callable, bool]] = {
+    'transform.racecards': (bench_transform_racecards, False),
+    'transform.results': (bench_transform_results, False),
+    'entities.extract': (bench_entities_extract, False),
+    'stats.performance_cube': (bench_performance_cube, False),
+    'stats.combinations': (bench_combinations, False),
+    'stats.horse_form': (bench_horse_form, False),
+    'pedigree.validate': (bench_pedigree_validate, True),
+    'db.upsert_races': (bench_upsert_races, True),
+    'db.upsert_runners': (bench_upsert_runners, True),
+    'db.upsert_changed': (bench_upsert_changed, True),
+    'entities.store': (bench_entities_store, True),
+    'stats.performance_cube.db': (lambda ctx: bench_performance_cube(ctx, from_db=True), True),
+    'stats.combinations.db': (lambda ctx: bench_combinations(ctx, from_db=True), True),
+    'stats.horse_form.db': (lambda ctx: bench_horse_form(ctx, from_db=True), True),
+}
+
+
+# ----------------------------------------------------------------------
+# Database
+# ----------------------------------------------------------------------
+
+def _region(name: str) -> Optional[str]:
+    return name[name.rindex('(') + 1:-1] if name.endswith(')') else None
+
+
+def seed_database(ctx: Context):
+    """Reference tables and completed history the database benchmarks read"""
+    generator, db = ctx.generator, ctx.db_client
+    pedigree = {'ra_mst_sires': generator.sires, 'ra_mst_dams': generator.dams, 'ra_mst_damsires': generator.damsires}
+    horses = {h['horse_id']: {'id': h['horse_id'], 'name': h['horse'], 'region': h['region'], 'sex_code': h['sex_code']}
+              for h in generator.horses}
+    for table, pool in pedigree.items():
+        # One in ten pedigree IDs is unknown, as for newly seen sires/dams in production
+        known = [e for i, e in enumerate(pool.entities) if i % 10]
+        db.upsert_batch(table, [{'id': e['id'], 'name': e['name']} for e in known], 'id')
+        for e in known:
+            horses.setdefault(e['id'], {'id': e['id'], 'name': e['name'], 'region': _region(e['name']),
+                                        'sex_code': None})
+    db.upsert_batch('ra_mst_horses', list(horses.values()), 'id')
+
+    race_rows, runner_rows = ctx.history
+    db.batch_size = 1000
+    db.upsert_batch('ra_mst_races', race_rows, 'id')
+    db.upsert_batch('ra_mst_runners', runner_rows, 'race_id,horse_id')
+    db.batch_size = 100
+
+
+def open_database(url: str):
+    from benchmarks.pg_backend import connect, reference_client, reset_schema
+    conn = connect(url)
+    reset_schema(conn)
+    return reference_client(conn)
+
+
+# ----------------------------------------------------------------------
+# Running and comparing
+# ----------------------------------------------------------------------
+
+def run_benchmark(name: str, setup: Callable, ctx: Context, repeat: int) -> Dict:
+    fn, items = setup(ctx)
+    fn()    # Warm-up: imports, caches, first-write table setup
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    median = statistics.median(times)
+    return {
+        'name': name,
+        'items': items,
+        'median_s': round(median, 6),
+        'min_s': round(min(times), 6),
+        'max_s': round(max(times), 6),
+        'items_per_s': round(items / median) if median else None,
+        'runs': repeat,
+    }
+
+
+def compare(results: List[Dict], baseline: Optional[Dict], threshold: float) -> List[Dict]:
+    """Annotate results with their change against the baseline; return the regressions"""
+    regressions = []
+    recorded = (baseline or {}).get('benchmarks', {})
+    for result in results:
+        base = recorded.get(result['name'])
+        if not base or base.get('items') != result['items']:
+            result['status'] = 'new' if not base else 'resized'
+            continue
+        change = result['median_s'] / base['median_s'] - 1 if base['median_s'] else 0.0
+        result['baseline_s'] = base['median_s']
+        result['change'] = round(change, 3)
+        slower = result['median_s'] - base['median_s']
+        result['status'] = 'regressed' if change > threshold and slower > MIN_ABSOLUTE_S else 'ok'
+        if result['status'] == 'regressed':
+            regressions.append(result)
+    return regressions
+
+
+def print_results(results: List[Dict], threshold: float):
+    print(f"\n{'Benchmark':<28} {'Items':>8} {'Median ms':>10} {'Min ms':>9} {'Items/s':>10} "
+          f"{'Baseline':>9} {'Change':>8}  Result")
+    for r in results:
+        color = {'ok': GREEN, 'regressed': RED}.get(r['status'], DIM)
+        baseline = f"{r['baseline_s'] * 1000:>9.1f}" if 'baseline_s' in r else f"{'-':>9}"
+        change = f"{r['change']:>+8.0%}" if 'change' in r else f"{'-':>8}"
+        print(f"{r['name']:<28} {r['items']:>8,} {r['median_s'] * 1000:>10.1f} {r['min_s'] * 1000:>9.1f} "
+              f"{r['items_per_s'] or 0:>10,} {baseline} {change}  {color}{r['status']}{RESET}")
+    print(f"{DIM}Regression threshold: {threshold:.0%} above the baseline median{RESET}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages on a synthetic race day')
+    parser.add_argument('--size', choices=list(SIZES), default='medium', help='Race-day size (default medium)')
+    parser.add_argument('--seed', type=int, default=7, help='Generator seed (default 7)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark; the median counts')
+    parser.add_argument('--only', nargs='+', metavar='PATTERN', help="Benchmarks to run, e.g. 'stats.*'")
+    parser.add_argument('--db-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help='Local Postgres for the database benchmarks (default BENCH_DATABASE_URL)')
+    parser.add_argument('--baseline', type=Path, help='Baseline file (default benchmarks/baselines/<size>.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the baseline')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='Exit 3 when there is no baseline to compare with, instead of passing')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Fail when a median is this fraction above the baseline (default 0.20)')
+    parser.add_argument('--json', type=Path, help='Also write the results to this JSON file')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, needs_db) in BENCHMARKS.items():
+            print(f"{name:<28} {'(database)' if needs_db else ''}")
+        return
+
+    selected = [name for name in BENCHMARKS
+                if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    if not args.db_url:
+        skipped = [name for name in selected if BENCHMARKS[name][1]]
+        selected = [name for name in selected if not BENCHMARKS[name][1]]
+        if skipped:
+            print(f"{DIM}No BENCH_DATABASE_URL - skipping {len(skipped)} database benchmarks{RESET}")
+    if not selected:
+        print(f"{RED}No benchmarks selected{RESET}")
+        sys.exit(2)
+
+    # Logging from the stages under test would dominate the timings
+    logging.disable(logging.INFO)
+
+    meetings, races, runners, history_days = SIZES[args.size]
+    print(f"{BOLD}Generating {args.size} race day{RESET} ({meetings} meetings x {races} races x ~{runners} runners, "
+          f"{history_days} days of history, seed {args.seed})")
+    generator = RaceDayGenerator(args.seed, meetings, races, runners)
+    db_client = open_database(args.db_url) if args.db_url else None
+    ctx = Context(generator, history_days, db_client)
+    if db_client:
+        print(f"{DIM}Seeding {db_client.url}...{RESET}")
+        seed_database(ctx)
+
+    results = []
+    for name in selected:
+        if sys.stdout.isatty():
+            print(f"{DIM}  {name}...{RESET}", end='\r', flush=True)
+        results.append(run_benchmark(name, BENCHMARKS[name][0], ctx, args.repeat))
+    if sys.stdout.isatty():
+        print(' ' * 40, end='\r')
+
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.size}.json"
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    if baseline and baseline.get('seed') != args.seed:
+        print(f"{YELLOW}Baseline {baseline_path} was recorded with seed {baseline.get('seed')} - not comparing{RESET}")
+        baseline = None
+    regressions = compare(results, baseline, args.threshold)
+    print_results(results, args.threshold)
+
+    report = {
+        'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'size': args.size,
+        'seed': args.seed,
+        'generator': generator.summary(),
+        'history_days': history_days,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': {r['name']: r for r in results},
+    }
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        if baseline:
+            # Keep entries for benchmarks not run this time (e.g. database ones)
+            report['benchmarks'] = dict(baseline.get('benchmarks', {}), **report['benchmarks'])
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + '\n')
+        print(f"\nBaseline written to {baseline_path}")
+        return
+
+    if baseline is None:
+        print(f"\n{YELLOW}Regression gate NOT applied: no usable baseline at {baseline_path}{RESET}")
+        print(f"{YELLOW}Record one on this machine with --save-baseline{RESET}")
+        if args.require_baseline:
+            sys.exit(3)
+        return
+    if regressions:
+        print(f"\n{RED}Regressed:{RESET} " + ', '.join(f"{r['name']} ({r['change']:+.0%})" for r in regressions))
+        sys.exit(1)
+    print(f"\n{GREEN}No regressions{RESET}")
+
+
+if __name__ == '__main__':
+    main()
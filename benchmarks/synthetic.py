@@ -0,0 +1,423 @@
+"""
+Synthetic Race Days - Deterministic racecard and result payloads for benchmarks
+
+Generates N meetings x M races x ~K runners per day in the shape the Racing
+API returns (/v1/racecards/pro and /v1/results), so fetcher transforms,
+entity extraction and writes can be benchmarked without API calls.
+
+Distributions follow the real data closely enough to exercise the same code
+paths: jockeys, trainers, owners and sires are drawn from skewed
+(Zipf-like) popularity pools so a few IDs recur across many races, dams are
+mostly unique, horses rarely run twice on the same day, names carry
+"(IRE)"/"(FR)" style suffixes, jumps races produce non-finishers ("PU",
+"F", "UR") and prize strings use the API's "£4,187" format.
+
+The same seed always produces the same payloads.
+
+Usage:
+    generator = RaceDayGenerator(seed=7, meetings=30, races_per_meeting=8, runners_per_race=12)
+    racecards = generator.racecards(date(2025, 6, 14))
+    results = generator.results(date(2025, 6, 14))
+    races, runners = generator.history(days=30)       # Stored-row shape for ra_mst_races / ra_mst_runners
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Benchmark sizes: (meetings, races per meeting, runners per race, history days)
+SIZES = {
+    'small': (6, 7, 10, 7),
+    'medium': (30, 8, 12, 30),      # A busy Saturday across GB and IRE
+    'large': (120, 8, 12, 30),
+}
+
+COURSES = [
+    ('Ascot', 'gb'), ('Ayr', 'gb'), ('Bath', 'gb'), ('Brighton', 'gb'), ('Carlisle', 'gb'),
+    ('Catterick', 'gb'), ('Chelmsford City', 'gb'), ('Cheltenham', 'gb'), ('Chepstow', 'gb'),
+    ('Doncaster', 'gb'), ('Epsom', 'gb'), ('Exeter', 'gb'), ('Fakenham', 'gb'), ('Goodwood', 'gb'),
+    ('Hamilton', 'gb'), ('Haydock', 'gb'), ('Hexham', 'gb'), ('Huntingdon', 'gb'), ('Kelso', 'gb'),
+    ('Kempton', 'gb'), ('Leicester', 'gb'), ('Lingfield', 'gb'), ('Ludlow', 'gb'), ('Market Rasen', 'gb'),
+    ('Musselburgh', 'gb'), ('Newbury', 'gb'), ('Newcastle', 'gb'), ('Newmarket', 'gb'), ('Nottingham', 'gb'),
+    ('Plumpton', 'gb'), ('Pontefract', 'gb'), ('Redcar', 'gb'), ('Ripon', 'gb'), ('Salisbury', 'gb'),
+    ('Sandown', 'gb'), ('Southwell', 'gb'), ('Thirsk', 'gb'), ('Uttoxeter', 'gb'), ('Wetherby', 'gb'),
+    ('Wincanton', 'gb'), ('Windsor', 'gb'), ('Wolverhampton', 'gb'), ('Worcester', 'gb'), ('York', 'gb'),
+    ('Ballinrobe', 'ire'), ('Bellewstown', 'ire'), ('Clonmel', 'ire'), ('Cork', 'ire'), ('Curragh', 'ire'),
+    ('Down Royal', 'ire'), ('Dundalk', 'ire'), ('Fairyhouse', 'ire'), ('Galway', 'ire'), ('Gowran Park', 'ire'),
+    ('Leopardstown', 'ire'), ('Limerick', 'ire'), ('Listowel', 'ire'), ('Naas', 'ire'), ('Navan', 'ire'),
+    ('Punchestown', 'ire'), ('Roscommon', 'ire'), ('Sligo', 'ire'), ('Thurles', 'ire'), ('Tipperary', 'ire'),
+    ('Tramore', 'ire'), ('Wexford', 'ire'),
+]
+
+# (race type, share of races, distances in furlongs, field size spread)
+RACE_TYPES = [
+    ('Flat', 0.55, [5, 5, 6, 6, 7, 7, 8, 8, 9, 10, 10, 11, 12, 12, 14, 16], 0.35),
+    ('Hurdle', 0.25, [16, 16, 17, 19, 20, 21, 22, 24], 0.30),
+    ('Chase', 0.15, [16, 17, 20, 21, 24, 25, 26, 29, 32], 0.30),
+    ('NH Flat', 0.05, [16, 17, 18], 0.25),
+]
+
+GOINGS = {
+    'Flat': [('Good', 30), ('Good To Firm', 20), ('Good To Soft', 15), ('Standard', 20), ('Soft', 8),
+             ('Firm', 3), ('Heavy', 2), ('Standard To Slow', 2)],
+    'Jumps': [('Good', 18), ('Good To Soft', 25), ('Soft', 30), ('Heavy', 15), ('Good To Firm', 7),
+              ('Yielding', 5)],
+}
+
+NON_FINISHES = ['PU', 'F', 'UR', 'BD', 'RO', 'SU']
+SEXES = [('gelding', 'G', 50), ('mare', 'M', 15), ('filly', 'F', 15), ('colt', 'C', 15), ('horse', 'H', 5)]
+COLOURS = [('b', 45), ('br', 15), ('ch', 25), ('gr', 12), ('bl', 3)]
+HEADGEAR = [('', 70), ('p', 9), ('t', 8), ('h', 5), ('b', 4), ('v', 2), ('tp', 2)]
+REGIONS = [('IRE', 40), ('GB', 30), ('FR', 15), ('', 10), ('USA', 3), ('GER', 2)]
+
+_SYLLABLES = ['ar', 'bel', 'ca', 'dor', 'el', 'fin', 'gal', 'har', 'is', 'jen', 'kel', 'lor', 'mar', 'nor',
+              'or', 'pen', 'quin', 'ros', 'sel', 'tam', 'ur', 'val', 'wes', 'yar', 'zen', 'bry', 'cor', 'dan']
+_HORSE_WORDS = ['Golden', 'Silver', 'Storm', 'Star', 'King', 'Queen', 'Shadow', 'River', 'Dancer', 'Dream',
+                'Thunder', 'Lady', 'Lord', 'Night', 'Flying', 'Royal', 'Wild', 'Blue', 'Red', 'Spirit', 'Moon',
+                'Harbour', 'Legend', 'Echo', 'Glory', 'Mist', 'Valley', 'Fire', 'Arrow', 'Crown', 'Rebel',
+                'Winter', 'Summer', 'Ocean', 'Bold', 'Captain', 'Secret', 'Lucky', 'Brave', 'Sky']
+_FIRST_NAMES = ['James', 'William', 'Oisin', 'Rachael', 'Paul', 'Harry', 'Sean', 'Hollie', 'Tom', 'Danny',
+                'Jack', 'Ryan', 'David', 'Callum', 'Adam', 'Rob', 'Kieran', 'Aidan', 'Joseph', 'Saffie',
+                'Richard', 'Luke', 'Ben', 'Shane', 'Billy', 'Mark', 'Colin', 'Hayley', 'Jamie', 'Gavin']
+_SURNAMES = ['Murphy', 'Doyle', 'Moore', 'Buick', 'Kingscote', 'Fanning', 'Townend', 'Blackmore', 'Skelton',
+             'Cobden', 'Russell', 'Mullins', 'Walsh', 'Elliott', "O'Brien", 'Henderson', 'Nicholls', 'Johnston',
+             'Appleby', 'Gosden', 'Haggas', 'Balding', 'Hannon', 'Fahey', 'Easterby', 'Twiston-Davies',
+             'Keighley', 'Crowley', 'Spencer', 'Havlin', 'Kennedy', 'Geraghty', 'Power', 'Carberry']
+_OWNER_FORMS = ['{surname} Racing', 'Mr {first} {surname}', 'Mrs {first} {surname}',
+                'The {word} Partnership', '{word} Syndicate', '{surname} & {surname2}', 'Godolphin',
+                'Juddmonte', 'J P McManus', 'Gigginstown House Stud', 'Cheveley Park Stud']
+
+
+def _zipf_weights(n: int, s: float) -> List[float]:
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def _weighted(rng: random.Random, choices: Sequence[Tuple]) -> Tuple:
+    """Pick from (value..., weight) tuples"""
+    return rng.choices(choices, weights=[c[-1] for c in choices])[0]
+
+
+def format_distance(furlongs: int) -> str:
+    """16 -> '2m', 10 -> '1m2f', 6 -> '6f'"""
+    miles, rest = divmod(furlongs, 8)
+    if not miles:
+        return f"{rest}f"
+    return f"{miles}m" + (f"{rest}f" if rest else '')
+
+
+def format_prize(amount: int, region: str) -> str:
+    return ('€' if region == 'ire' else '£') + f"{amount:,}"
+
+
+def format_fraction(decimal_odds: float) -> str:
+    """Decimal odds -> the nearest common fractional price ('9/4', '11/2', 'Evs')"""
+    if abs(decimal_odds - 2.0) < 0.05:
+        return 'Evs'
+    best = min(_FRACTIONS, key=lambda f: abs(1 + f[0] / f[1] - decimal_odds))
+    return f"{best[0]}/{best[1]}"
+
+
+_FRACTIONS = [(1, 5), (1, 4), (2, 7), (1, 3), (4, 11), (2, 5), (4, 9), (1, 2), (8, 15), (4, 7), (8, 13),
+              (4, 6), (8, 11), (4, 5), (5, 6), (10, 11), (11, 10), (6, 5), (5, 4), (11, 8), (6, 4), (13, 8),
+              (7, 4), (15, 8), (2, 1), (9, 4), (5, 2), (11, 4), (3, 1), (10, 3), (7, 2), (4, 1), (9, 2), (5, 1),
+              (11, 2), (6, 1), (13, 2), (7, 1), (15, 2), (8, 1), (17, 2), (9, 1), (10, 1), (11, 1), (12, 1),
+              (14, 1), (16, 1), (18, 1), (20, 1), (25, 1), (28, 1), (33, 1), (40, 1), (50, 1), (66, 1),
+              (80, 1), (100, 1)]
+
+
+class _Pool:
+    """Entity pool ({id, name}) with Zipf-skewed selection (skew 0 = uniform)"""
+
+    def __init__(self, rng: random.Random, prefix: str, size: int, make_name, skew: float, id_digits: int = 6):
+        self.rng = rng
+        ids = rng.sample(range(10 ** (id_digits - 1), 10 ** id_digits), size)
+        self.entities = [{'id': f"{prefix}_{i}", 'name': make_name()} for i in ids]
+        self.weights = _zipf_weights(size, skew) if skew else None
+        self._cumulative = None
+        if self.weights:
+            total, self._cumulative = 0.0, []
+            for weight in self.weights:
+                total += weight
+                self._cumulative.append(total)
+
+    def pick(self) -> Dict:
+        if self._cumulative is None:
+            return self.rng.choice(self.entities)
+        return self.rng.choices(self.entities, cum_weights=self._cumulative)[0]
+
+
+class RaceDayGenerator:
+    """Deterministic synthetic race days"""
+
+    def __init__(self, seed: int = 7, meetings: int = 30, races_per_meeting: int = 8,
+                 runners_per_race: int = 12):
+        """
+        Initialize generator
+
+        Args:
+            seed: Random seed; the same seed gives the same payloads
+            meetings: Meetings per day
+            races_per_meeting: Races per meeting
+            runners_per_race: Mean declared runners per race
+        """
+        self.seed = seed
+        self.meetings = meetings
+        self.races_per_meeting = races_per_meeting
+        self.runners_per_race = runners_per_race
+        self.rng = random.Random(seed)
+
+        runners_per_day = meetings * races_per_meeting * runners_per_race
+        rng = self.rng
+        self.jockeys = _Pool(rng, 'jky', max(60, runners_per_day // 5), self._person_name, 0.4)
+        self.trainers = _Pool(rng, 'trn', max(80, runners_per_day // 5), self._trainer_name, 0.5)
+        self.owners = _Pool(rng, 'own', max(200, runners_per_day), self._owner_name, 0.3)
+        self.sires = _Pool(rng, 'sir', max(50, runners_per_day // 10), self._horse_name, 0.8, id_digits=8)
+        self.damsires = _Pool(rng, 'dsi', max(50, runners_per_day // 10), self._horse_name, 0.7, id_digits=8)
+        self.dams = _Pool(rng, 'dam', max(500, runners_per_day * 3), self._horse_name, 0, id_digits=8)
+        # Horses: several days' worth, so history runs repeat horses like the real calendar does
+        horse_count = max(300, runners_per_day * 6)
+        self.horses = [self._make_horse(f"hrs_{i}") for i in rng.sample(range(10_000_000, 100_000_000), horse_count)]
+
+    # ------------------------------------------------------------------
+    # Names and entities
+    # ------------------------------------------------------------------
+
+    def _syllable_word(self) -> str:
+        return ''.join(self.rng.choice(_SYLLABLES) for _ in range(self.rng.randint(2, 3))).capitalize()
+
+    def _horse_name(self) -> str:
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.45:
+            name = f"{rng.choice(_HORSE_WORDS)} {rng.choice(_HORSE_WORDS)}"
+        elif roll < 0.8:
+            name = f"{rng.choice(_HORSE_WORDS)} {self._syllable_word()}"
+        else:
+            name = self._syllable_word()
+        region = _weighted(rng, REGIONS)[0]
+        return f"{name} ({region})" if region and rng.random() < 0.6 else name
+
+    def _person_name(self) -> str:
+        return f"{self.rng.choice(_FIRST_NAMES)} {self.rng.choice(_SURNAMES)}"
+
+    def _trainer_name(self) -> str:
+        if self.rng.random() < 0.15:
+            return f"{self._person_name()} & {self.rng.choice(_FIRST_NAMES)} {self.rng.choice(_SURNAMES)}"
+        return self._person_name()
+
+    def _owner_name(self) -> str:
+        form = self.rng.choice(_OWNER_FORMS)
+        return form.format(first=self.rng.choice(_FIRST_NAMES), surname=self.rng.choice(_SURNAMES),
+                           surname2=self.rng.choice(_SURNAMES), word=self.rng.choice(_HORSE_WORDS))
+
+    def _make_horse(self, horse_id: str) -> Dict:
+        rng = self.rng
+        sex, sex_code, _ = _weighted(rng, SEXES)
+        age = rng.choices([2, 3, 4, 5, 6, 7, 8, 9, 10, 11], weights=[8, 18, 16, 14, 12, 10, 8, 6, 5, 3])[0]
+        sire, dam, damsire = self.sires.pick(), self.dams.pick(), self.damsires.pick()
+        trainer = self.trainers.pick()
+        return {
+            'horse_id': horse_id,
+            'horse': self._horse_name(),
+            'age': age,
+            'sex': sex,
+            'sex_code': sex_code,
+            'colour': _weighted(rng, COLOURS)[0],
+            'region': _weighted(rng, REGIONS)[0] or 'GB',
+            'dob': (date(2025, 1, 1) - timedelta(days=365 * age + rng.randint(0, 150))).isoformat(),
+            'sire_id': sire['id'], 'sire': sire['name'],
+            'dam_id': dam['id'], 'dam': dam['name'],
+            'damsire_id': damsire['id'], 'damsire': damsire['name'],
+            'trainer': trainer,
+            'owner': self.owners.pick(),
+            'rating': rng.randint(40, 140),
+        }
+
+    # ------------------------------------------------------------------
+    # Cards
+    # ------------------------------------------------------------------
+
+    def _card(self, day: date) -> List[Tuple[Dict, List[Dict]]]:
+        """One day's (race, horses) pairs; shared by racecards() and results()"""
+        rng = random.Random(f"{self.seed}:{day.isoformat()}")
+        courses = rng.sample(COURSES, min(self.meetings, len(COURSES)))
+        while len(courses) < self.meetings:
+            courses.append(rng.choice(COURSES))
+        horses = rng.sample(self.horses, min(len(self.horses), self.meetings * self.races_per_meeting
+                                             * self.runners_per_race * 2))
+        next_horse = 0
+        card = []
+
+        for meeting_no, (course, region) in enumerate(courses):
+            course_id = f"crs_{COURSES.index((course, region)) * 26 + 52}"
+            jumps_meeting = rng.random() < 0.4
+            start = datetime(day.year, day.month, day.day, 12 + rng.randint(0, 5), rng.choice([0, 5, 10, 15]))
+            for race_no in range(self.races_per_meeting):
+                types = [t for t in RACE_TYPES if (t[0] == 'Flat') != jumps_meeting] or RACE_TYPES
+                race_type, _, distances, spread = rng.choices(types, weights=[t[1] for t in types])[0]
+                furlongs = rng.choice(distances)
+                field = max(2, int(rng.gauss(self.runners_per_race, self.runners_per_race * spread)))
+                if next_horse + field > len(horses):
+                    next_horse = 0
+                field_horses = horses[next_horse:next_horse + field]
+                next_horse += field
+                off = start + timedelta(minutes=35 * race_no)
+                race = {
+                    'race_id': f"rac_{day.toordinal() % 100_000:05d}{len(card):04d}",
+                    'course': course,
+                    'course_id': course_id,
+                    'region': region.upper() if region == 'gb' else 'IRE',
+                    'date': day.isoformat(),
+                    'off_time': f"{off.hour % 12 or 12}:{off.minute:02d}",
+                    'off_dt': off.isoformat() + '+00:00',
+                    'race_name': f"{rng.choice(_SURNAMES)} {rng.choice(['Handicap', 'Maiden Stakes', 'Novices Hurdle', 'Handicap Chase', 'Stakes', 'Conditions Stakes'])}",
+                    'type': race_type,
+                    'race_class': f"Class {rng.choices(range(1, 8), weights=[3, 5, 10, 18, 25, 25, 14])[0]}",
+                    'distance_f': float(furlongs),
+                    'distance': format_distance(furlongs),
+                    'dist_m': str(round(furlongs * 201.168)),
+                    'distance_round': format_distance(furlongs),
+                    'going': _weighted(rng, GOINGS['Flat' if race_type == 'Flat' else 'Jumps'])[0],
+                    'surface': 'AW' if race_type == 'Flat' and rng.random() < 0.3 else 'Turf',
+                    'prize': format_prize(rng.choice([2700, 3245, 4187, 5400, 7800, 12500, 25000, 85000]), region),
+                    'age_band': rng.choice(['2yo', '3yo+', '4yo+', '3yo']),
+                    'rating_band': rng.choice(['0-60', '0-75', '0-90', '', '0-105']),
+                    'pattern': rng.choices(['', 'Listed', 'Group 3', 'Group 2', 'Group 1'], weights=[90, 4, 3, 2, 1])[0],
+                    'big_race': False,
+                    'field_size': str(field),
+                    'meet_id': f"{course_id}_{day.isoformat()}",
+                    'race_number': race_no + 1,
+                }
+                card.append((race, field_horses))
+        return card
+
+    def racecards(self, day: date) -> List[Dict]:
+        """/v1/racecards/pro-shaped racecards for one day"""
+        rng = random.Random(f"{self.seed}:{day.isoformat()}:cards")
+        cards = []
+        for race, horses in self._card(day):
+            runners = []
+            for number, horse in enumerate(horses, 1):
+                jockey = self.jockeys.pick()
+                lbs = rng.randint(119, 168)
+                runners.append({
+                    'horse_id': horse['horse_id'], 'horse': horse['horse'],
+                    'age': str(horse['age']), 'sex': horse['sex'], 'sex_code': horse['sex_code'],
+                    'colour': horse['colour'], 'region': horse['region'], 'dob': horse['dob'],
+                    'sire_id': horse['sire_id'], 'sire': horse['sire'],
+                    'dam_id': horse['dam_id'], 'dam': horse['dam'],
+                    'damsire_id': horse['damsire_id'], 'damsire': horse['damsire'],
+                    'trainer_id': horse['trainer']['id'], 'trainer': horse['trainer']['name'],
+                    'trainer_location': rng.choice(['Newmarket', 'Lambourn', 'Malton', 'Closutton', 'Ballydoyle']),
+                    'owner_id': horse['owner']['id'], 'owner': horse['owner']['name'],
+                    'jockey_id': jockey['id'], 'jockey': jockey['name'],
+                    'number': str(number),
+                    'draw': str(rng.randint(1, len(horses))) if race['type'] == 'Flat' else '',
+                    'headgear': _weighted(rng, HEADGEAR)[0],
+                    'lbs': str(lbs),
+                    'weight': f"{lbs // 14}-{lbs % 14}",
+                    'ofr': str(horse['rating']) if rng.random() < 0.85 else '-',
+                    'rpr': str(horse['rating'] + rng.randint(-8, 8)),
+                    'ts': str(max(0, horse['rating'] + rng.randint(-20, 5))),
+                    'form': ''.join(rng.choice('1234567890P-/') for _ in range(rng.randint(0, 6))),
+                    'last_run': str(rng.randint(7, 120)),
+                    'comment': f"{rng.choice(['Consistent', 'Progressive', 'Needs to improve', 'Bounced back'])} last time.",
+                    'silk_url': f"https://www.rp-assets.com/svg/{rng.randint(1, 9)}/{rng.randint(10000, 99999)}.svg",
+                    'trainer_rtf': str(rng.randint(0, 60)),
+                })
+            cards.append(dict(race, runners=runners))
+        return cards
+
+    def results(self, day: date) -> List[Dict]:
+        """/v1/results-shaped results for one day (same races and horses as racecards(day))"""
+        rng = random.Random(f"{self.seed}:{day.isoformat()}:results")
+        results = []
+        for race, horses in self._card(day):
+            jumps = race['type'] != 'Flat'
+            odds = sorted((round(rng.lognormvariate(2.0, 0.8) + 1.1, 2) for _ in horses))
+            order = sorted(horses, key=lambda h: -h['rating'] - rng.gauss(0, 15))
+            base_time = race['distance_f'] * (12.2 if not jumps else 14.0)
+            runners, beaten = [], 0.0
+            for finish, horse in enumerate(order, 1):
+                jockey = self.jockeys.pick()
+                lbs = rng.randint(119, 168)
+                fell = jumps and rng.random() < 0.08
+                margin = 0.0 if finish == 1 else round(rng.choice([0.05, 0.1, 0.5, 0.75, 1, 1.5, 2, 3, 5, 8]), 2)
+                beaten += margin
+                seconds = base_time + beaten * 0.2
+                sp_dec = odds[(finish - 1 + rng.randint(0, 3)) % len(odds)]
+                runners.append({
+                    'horse_id': horse['horse_id'], 'horse': horse['horse'],
+                    'age': str(horse['age']), 'sex': horse['sex'], 'sex_code': horse['sex_code'],
+                    'colour': horse['colour'], 'region': horse['region'], 'dob': horse['dob'],
+                    'sire_id': horse['sire_id'], 'sire': horse['sire'],
+                    'dam_id': horse['dam_id'], 'dam': horse['dam'],
+                    'damsire_id': horse['damsire_id'], 'damsire': horse['damsire'],
+                    'trainer_id': horse['trainer']['id'], 'trainer': horse['trainer']['name'],
+                    'owner_id': horse['owner']['id'], 'owner': horse['owner']['name'],
+                    'jockey_id': jockey['id'], 'jockey': jockey['name'],
+                    'number': str(finish), 'draw': str(finish) if not jumps else '',
+                    'position': rng.choice(NON_FINISHES) if fell else str(finish),
+                    'btn': '0' if finish == 1 or fell else str(margin),
+                    'ovr_btn': '0' if finish == 1 or fell else str(round(beaten, 2)),
+                    'sp': format_fraction(sp_dec), 'sp_dec': f"{sp_dec:.2f}",
+                    'prize': f"{max(0, 5000 // finish - 400):.2f}" if finish <= 4 else '',
+                    'time': '-' if fell else f"{int(seconds // 60)}:{seconds % 60:05.2f}",
+                    'weight': f"{lbs // 14}-{lbs % 14}", 'weight_lbs': str(lbs),
+                    'headgear': _weighted(rng, HEADGEAR)[0],
+                    'or': str(horse['rating']) if rng.random() < 0.85 else '–',
+                    'rpr': str(horse['rating'] + rng.randint(-8, 8)),
+                    'tsr': str(max(0, horse['rating'] + rng.randint(-20, 5))),
+                    'comment': f"{rng.choice(['Led', 'Held up', 'Chased leaders', 'Prominent'])}, "
+                               f"{rng.choice(['kept on', 'no extra', 'ran on well', 'weakened'])}",
+                })
+            results.append(dict(race, race_date=race['date'], runners=runners,
+                                winning_time_detail=runners[0]['time'], is_abandoned=False))
+        return results
+
+    # ------------------------------------------------------------------
+    # Stored rows
+    # ------------------------------------------------------------------
+
+    def history(self, days: int, end: Optional[date] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        ra_mst_races / ra_mst_runners rows for `days` consecutive completed
+        race days, with the columns the statistics engines read
+
+        Returns:
+            (race_rows, runner_rows)
+        """
+        end = end or date(2025, 6, 30)
+        race_rows, runner_rows = [], []
+        for offset in range(days - 1, -1, -1):
+            for result in self.results(end - timedelta(days=offset)):
+                race_rows.append({
+                    'id': result['race_id'], 'date': result['date'], 'course_id': result['course_id'],
+                    'distance_f': result['distance'], 'going': result['going'], 'surface': result['surface'],
+                    'type': result['type'], 'race_class': result['race_class'], 'region': result['region'],
+                })
+                for runner in result['runners']:
+                    position = runner['position']
+                    runner_rows.append({
+                        'id': len(runner_rows) + 1,
+                        'race_id': result['race_id'], 'horse_id': runner['horse_id'],
+                        'jockey_id': runner['jockey_id'], 'trainer_id': runner['trainer_id'],
+                        'owner_id': runner['owner_id'],
+                        'position': int(position) if position.isdigit() else None,
+                        'finishing_time': None if runner['time'] == '-' else runner['time'],
+                        'starting_price_decimal': float(runner['sp_dec']),
+                        'prize_won': float(runner['prize']) if runner['prize'] else 0.0,
+                        'ofr': int(runner['or']) if runner['or'].isdigit() else None,
+                        'rpr': int(runner['rpr']),
+                    })
+        return race_rows, runner_rows
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'meetings': self.meetings, 'races_per_meeting': self.races_per_meeting,
+            'runners_per_race': self.runners_per_race, 'seed': self.seed,
+            'horses': len(self.horses), 'jockeys': len(self.jockeys.entities),
+            'trainers': len(self.trainers.entities), 'owners': len(self.owners.entities),
+            'sires': len(self.sires.entities), 'dams': len(self.dams.entities),
+            'damsires': len(self.damsires.entities),
+        }
@@ -20,6 +20,8 @@ class APIConfig:
     max_retries: int = 5
     retry_delay: float = 2.0
     rate_limit_per_second: int = 2
+    daily_call_budget: int = 150000     # 0 = unlimited
+    budget_reserve: int = 20000         # Calls only live/daily updates may use
 
 
 @dataclass
@@ -77,7 +79,9 @@ class ReferenceDataConfig:
             password=os.getenv('RACING_API_PASSWORD'),
             base_url=os.getenv('RACING_API_BASE_URL', 'https://api.theracingapi.com/v1'),
             timeout=int(os.getenv('RACING_API_TIMEOUT', '30')),
-            max_retries=int(os.getenv('RACING_API_MAX_RETRIES', '5'))
+            max_retries=int(os.getenv('RACING_API_MAX_RETRIES', '5')),
+            daily_call_budget=int(os.getenv('RACING_API_DAILY_BUDGET', '150000')),
+            budget_reserve=int(os.getenv('RACING_API_BUDGET_RESERVE', '20000'))
         )
 
         # Initialize Supabase configuration
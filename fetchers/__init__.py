@@ -1,18 +1,26 @@
-"""Fetchers package - Data collection from Racing API"""
+"""Fetchers package - Data collection from Racing API
 
-# Core API Fetchers (Legacy - Active)
-from .bookmakers_fetcher import BookmakersFetcher
-from .courses_fetcher import CoursesFetcher
-from .horses_fetcher import HorsesFetcher
-from .races_fetcher import RacesFetcher
-from .results_fetcher import ResultsFetcher
+Fetcher classes are imported on first access: importing one fetcher module
+(or the package) does not load every other fetcher and its clients.
+"""
 
-# New Consolidated Fetchers (Recommended)
-from .events_fetcher import EventsFetcher
-from .masters_fetcher import MastersFetcher
+import importlib
 
-# Statistics Wrapper
-from .statistics_fetcher import StatisticsFetcher
+_EXPORTS = {
+    # Core API Fetchers (Legacy - Active)
+    'BookmakersFetcher': '.bookmakers_fetcher',
+    'CoursesFetcher': '.courses_fetcher',
+    'HorsesFetcher': '.horses_fetcher',
+    'RacesFetcher': '.races_fetcher',
+    'ResultsFetcher': '.results_fetcher',
+
+    # New Consolidated Fetchers (Recommended)
+    'EventsFetcher': '.events_fetcher',
+    'MastersFetcher': '.masters_fetcher',
+
+    # Statistics Wrapper
+    'StatisticsFetcher': '.statistics_fetcher',
+}
 
 # Note: JockeysFetcher, TrainersFetcher, OwnersFetcher moved to _deprecated/
 # These fetchers have known API issues (require 'name' parameter)
@@ -31,3 +39,15 @@ __all__ = [
     # Utilities
     'StatisticsFetcher',
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -7,7 +7,8 @@ from datetime import datetime
 from typing import Dict, List
 from config.config import get_config
 from utils.logger import get_logger
-from utils.supabase_client import SupabaseReferenceClient
+from utils.instrumentation import instrumented_run
+from utils import resources
 
 logger = get_logger('bookmakers_fetcher')
 
@@ -41,12 +42,9 @@ class BookmakersFetcher:
     def __init__(self):
         """Initialize fetcher"""
         self.config = get_config()
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
+        self.db_client = resources.db_client()
 
+    @instrumented_run('bookmakers')
     def fetch_and_store(self) -> Dict:
         """
         Store bookmakers in database
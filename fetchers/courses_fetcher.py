@@ -11,8 +11,8 @@ from datetime import datetime
 from typing import Dict, List
 from config.config import get_config
 from utils.logger import get_logger
-from utils.api_client import RacingAPIClient
-from utils.supabase_client import SupabaseReferenceClient
+from utils.instrumentation import instrumented_run
+from utils import resources
 from utils.course_coordinates import assign_coordinates_to_course, get_coordinates_stats
 
 logger = get_logger('courses_fetcher')
@@ -24,19 +24,10 @@ class CoursesFetcher:
     def __init__(self):
         """Initialize fetcher"""
         self.config = get_config()
-        self.api_client = RacingAPIClient(
-            username=self.config.api.username,
-            password=self.config.api.password,
-            base_url=self.config.api.base_url,
-            timeout=self.config.api.timeout,
-            max_retries=self.config.api.max_retries
-        )
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
+        self.api_client = resources.api_client()
+        self.db_client = resources.db_client()
 
+    @instrumented_run('courses')
     def fetch_and_store(self, region_codes: List[str] = None) -> Dict:
         """
         Fetch courses from API and store in database
@@ -22,9 +22,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from config.config import get_config
 from utils.logger import get_logger
-from utils.api_client import RacingAPIClient
-from utils.supabase_client import SupabaseReferenceClient
+from utils.instrumentation import instrumented_run, timed
+from utils import resources
 from utils.entity_extractor import EntityExtractor
+from utils.chunk_ledger import ChunkLedger, monthly_chunks, run_chunks
 
 logger = get_logger('events_fetcher')
 
@@ -35,20 +36,10 @@ class EventsFetcher:
     def __init__(self):
         """Initialize fetcher with API and database clients"""
         self.config = get_config()
-        self.api_client = RacingAPIClient(
-            username=self.config.api.username,
-            password=self.config.api.password,
-            base_url=self.config.api.base_url,
-            timeout=self.config.api.timeout,
-            max_retries=self.config.api.max_retries
-        )
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
+        self.api_client = resources.api_client()
+        self.db_client = resources.db_client()
         # Pass API client to entity extractor for Pro enrichment
-        self.entity_extractor = EntityExtractor(self.db_client, self.api_client)
+        self.entity_extractor = EntityExtractor(self.db_client, self.api_client, resources.horse_index())
 
     # ========================================================================
     # HELPER METHODS
@@ -133,6 +124,7 @@ class EventsFetcher:
     # RACECARDS (Pre-race data)
     # ========================================================================
 
+    @timed('events.fetch_racecards')
     def fetch_racecards(
         self,
         start_date: Optional[str] = None,
@@ -251,6 +243,7 @@ class EventsFetcher:
     # RESULTS (Post-race data)
     # ========================================================================
 
+    @timed('events.fetch_results')
     def fetch_results(
         self,
         start_date: Optional[str] = None,
@@ -347,6 +340,7 @@ class EventsFetcher:
     # TRANSFORM METHODS (Simplified - use existing fetcher logic)
     # ========================================================================
 
+    @timed('events.transform_race')
     def _transform_race(self, racecard: Dict) -> Dict:
         """
         Transform racecard to race record
@@ -372,6 +366,7 @@ class EventsFetcher:
             'updated_at': datetime.utcnow().isoformat()
         }
 
+    @timed('events.transform_runners')
     def _transform_runners(self, racecard: Dict) -> List[Dict]:
         """
         Transform racecard runners to runner records
@@ -424,6 +419,7 @@ class EventsFetcher:
 
         return runners
 
+    @timed('events.transform_result_runners')
     def _transform_result_runners(self, result: Dict) -> List[Dict]:
         """
         Transform result data to runner records with positions
@@ -466,16 +462,20 @@ class EventsFetcher:
         end_date: Optional[str] = None,
         region_codes: List[str] = None,
         fetch_racecards: bool = True,
-        fetch_results: bool = True
+        fetch_results: bool = True,
+        workers: int = 1,
+        ledger: Optional[ChunkLedger] = None,
+        retry_failed: bool = True
     ) -> Dict:
         """
         Backfill historical race data from start_date to end_date
 
-        This method intelligently fetches missing data:
-        1. Identifies which dates already have complete data
-        2. Fetches only missing racecards/results
-        3. Automatically extracts entities to master tables
-        4. Processes data in monthly chunks for manageability
+        This method:
+        1. Splits the range into monthly chunks
+        2. Skips chunks the ledger already records as done (resume)
+        3. Fetches racecards/results for the remaining chunks, several at once
+           (all chunks share the API client and its rate limit)
+        4. Automatically extracts entities to master tables
 
         Args:
             start_date: Start date (YYYY-MM-DD)
@@ -483,6 +483,9 @@ class EventsFetcher:
             region_codes: Region filter (default: ['gb', 'ire'])
             fetch_racecards: Whether to fetch racecards (default: True)
             fetch_results: Whether to fetch results (default: True)
+            workers: Chunks processed concurrently (default: 1)
+            ledger: Chunk ledger for resume (default: in-memory, no resume)
+            retry_failed: Re-run chunks that failed in an earlier run
 
         Returns:
             Statistics dictionary with totals across all chunks
@@ -500,6 +503,7 @@ class EventsFetcher:
         logger.info(f"Regions: {region_codes}")
         logger.info(f"Fetch racecards: {fetch_racecards}")
         logger.info(f"Fetch results: {fetch_results}")
+        logger.info(f"Parallel chunks: {workers}")
 
         # Parse dates
         start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
@@ -510,79 +514,59 @@ class EventsFetcher:
         logger.info(f"Total days to process: {total_days}")
 
         # Generate monthly chunks
-        chunks = self._generate_monthly_chunks(start_dt, end_dt)
-        logger.info(f"Processing in {len(chunks)} monthly chunks")
+        ledger = ledger or ChunkLedger(name='events_backfill')
+        keys = ledger.plan(self._generate_monthly_chunks(start_dt, end_dt))
+        logger.info(f"Processing in {len(keys)} monthly chunks")
+
+        def process_chunk(chunk_start: str, chunk_end: str) -> Dict:
+            counts = {'success': True, 'races': 0, 'runners': 0, 'results': 0}
+
+            if fetch_racecards:
+                racecard_result = self.fetch_racecards(
+                    start_date=chunk_start,
+                    end_date=chunk_end,
+                    region_codes=region_codes
+                )
+                counts['races'] = racecard_result.get('races_fetched', 0)
+                counts['runners'] = racecard_result.get('runners_fetched', 0)
+                counts['days_with_data'] = racecard_result.get('days_with_data', 0)
+
+            if fetch_results:
+                results_result = self.fetch_results(
+                    start_date=chunk_start,
+                    end_date=chunk_end,
+                    region_codes=region_codes
+                )
+                counts['results'] = results_result.get('fetched', 0)
+                counts['runners_updated'] = results_result.get('runners_updated', 0)
+
+            return counts
+
+        run = run_chunks(ledger, keys, process_chunk, workers=workers, retry_failed=retry_failed)
+        totals = ledger.totals(keys)
+        chunk_counts = ledger.counts(keys)
 
-        # Statistics
         overall_stats = {
-            'success': True,
-            'total_chunks': len(chunks),
-            'chunks_processed': 0,
-            'total_races': 0,
-            'total_runners': 0,
+            'success': run['success'],
+            'total_chunks': len(keys),
+            'chunks_processed': chunk_counts['done'],
+            'chunks_failed': chunk_counts['failed'],
+            'chunks_skipped': run['skipped'],
+            'total_races': int(totals.get('races', 0)),
+            'total_runners': int(totals.get('runners', 0)),
             'total_days': total_days,
             'start_date': start_date,
             'end_date': end_date,
-            'chunks': []
+            'chunks': [dict(ledger.chunks[key], key=key) for key in keys]
         }
 
-        # Process each chunk
-        for idx, (chunk_start, chunk_end) in enumerate(chunks, 1):
-            chunk_start_str = chunk_start.strftime('%Y-%m-%d')
-            chunk_end_str = chunk_end.strftime('%Y-%m-%d')
-
-            logger.info(f"\n{'='*60}")
-            logger.info(f"CHUNK {idx}/{len(chunks)}: {chunk_start_str} to {chunk_end_str}")
-            logger.info(f"{'='*60}")
-
-            chunk_stats = {
-                'chunk_number': idx,
-                'start_date': chunk_start_str,
-                'end_date': chunk_end_str,
-                'racecards': None,
-                'results': None
-            }
-
-            try:
-                # Fetch racecards if requested
-                if fetch_racecards:
-                    logger.info(f"Fetching racecards for chunk {idx}...")
-                    racecard_result = self.fetch_racecards(
-                        start_date=chunk_start_str,
-                        end_date=chunk_end_str,
-                        region_codes=region_codes
-                    )
-                    chunk_stats['racecards'] = racecard_result
-                    overall_stats['total_races'] += racecard_result.get('races_fetched', 0)
-                    overall_stats['total_runners'] += racecard_result.get('runners_fetched', 0)
-
-                # Fetch results if requested
-                if fetch_results:
-                    logger.info(f"Fetching results for chunk {idx}...")
-                    results_result = self.fetch_results(
-                        start_date=chunk_start_str,
-                        end_date=chunk_end_str,
-                        region_codes=region_codes
-                    )
-                    chunk_stats['results'] = results_result
-
-                overall_stats['chunks_processed'] += 1
-                overall_stats['chunks'].append(chunk_stats)
-
-                logger.info(f"Chunk {idx} completed successfully")
-
-            except Exception as e:
-                logger.error(f"Error processing chunk {idx}: {e}", exc_info=True)
-                chunk_stats['error'] = str(e)
-                overall_stats['chunks'].append(chunk_stats)
-                overall_stats['success'] = False
-
         logger.info("\n" + "=" * 60)
         logger.info("BACKFILL COMPLETE")
         logger.info("=" * 60)
         logger.info(f"Chunks processed: {overall_stats['chunks_processed']}/{overall_stats['total_chunks']}")
         logger.info(f"Total races fetched: {overall_stats['total_races']}")
         logger.info(f"Total runners fetched: {overall_stats['total_runners']}")
+        ledger.log_summary(keys, logger)
 
         return overall_stats
 
@@ -597,27 +581,7 @@ class EventsFetcher:
         Returns:
             List of (chunk_start, chunk_end) tuples
         """
-        chunks = []
-        current = start_date
-
-        while current <= end_date:
-            # Start of month
-            chunk_start = current
-
-            # End of month or end_date, whichever comes first
-            if current.month == 12:
-                next_month = current.replace(year=current.year + 1, month=1, day=1)
-            else:
-                next_month = current.replace(month=current.month + 1, day=1)
-
-            chunk_end = min(next_month - timedelta(days=1), end_date)
-
-            chunks.append((chunk_start, chunk_end))
-
-            # Move to next month
-            current = next_month
-
-        return chunks
+        return monthly_chunks(start_date, end_date)
 
     # ========================================================================
     # CONVENIENCE METHODS
@@ -635,6 +599,7 @@ class EventsFetcher:
         """
         return self.fetch_racecards(days_back=0, region_codes=region_codes)
 
+    @instrumented_run('events')
     def fetch_and_store(self, event_type: str = 'racecards', **config) -> Dict:
         """
         Main entry point for fetching event data
@@ -12,9 +12,9 @@ import time
 from datetime import datetime
 from typing import Dict, List, Set
 from config.config import get_config
-from utils.logger import get_logger
-from utils.api_client import RacingAPIClient
-from utils.supabase_client import SupabaseReferenceClient
+from utils.logger import ProgressLogger, get_logger
+from utils.instrumentation import instrumented_run, timed
+from utils import resources
 from utils.regional_filter import RegionalFilter
 from utils.region_extractor import extract_region_from_name
 
@@ -27,35 +27,28 @@ class HorsesFetcher:
     def __init__(self):
         """Initialize fetcher"""
         self.config = get_config()
-        self.api_client = RacingAPIClient(
-            username=self.config.api.username,
-            password=self.config.api.password,
-            base_url=self.config.api.base_url,
-            timeout=self.config.api.timeout,
-            max_retries=self.config.api.max_retries
-        )
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
-
-    def _get_existing_horse_ids(self) -> Set[str]:
+        self.api_client = resources.api_client()
+        self.db_client = resources.db_client()
+
+    def _get_existing_horse_ids(self, horse_ids: List[str]) -> Set[str]:
         """
-        Get set of existing horse IDs from database
+        Get the given horse IDs that already exist in the database
+
+        Args:
+            horse_ids: Horse IDs to check
 
         Returns:
             Set of horse IDs already in database
         """
         try:
-            result = self.db_client.client.table('ra_horses').select('id').execute()
-            existing_ids = {row['id'] for row in result.data}
+            existing_ids = resources.horse_index().existing(horse_ids)
             logger.info(f"Found {len(existing_ids)} existing horses in database")
             return existing_ids
         except Exception as e:
             logger.error(f"Error fetching existing horse IDs: {e}")
             return set()
 
+    @timed('horses.fetch_horse_pro')
     def _fetch_horse_pro(self, horse_id: str) -> Dict:
         """
         Fetch complete horse data from Pro endpoint
@@ -69,7 +62,7 @@ class HorsesFetcher:
         try:
             response = self.api_client.get_horse_details(horse_id, tier='pro')
             if response:
-                logger.debug(f"Successfully fetched Pro data for {horse_id}")
+                logger.debug("Successfully fetched Pro data for %s", horse_id)
                 return response
             else:
                 logger.warning(f"No data returned from Pro endpoint for {horse_id}")
@@ -78,6 +71,7 @@ class HorsesFetcher:
             logger.error(f"Error fetching Pro data for {horse_id}: {e}")
             return None
 
+    @instrumented_run('horses')
     def fetch_and_store(self, limit_per_page: int = 500, max_pages: int = None,
                         filter_uk_ireland: bool = True) -> Dict:
         """
@@ -135,7 +129,7 @@ class HorsesFetcher:
             logger.info(f"After UK/Ireland filtering: {len(all_horses)} horses")
 
         # Get existing horse IDs from database
-        existing_ids = self._get_existing_horse_ids()
+        existing_ids = self._get_existing_horse_ids([h.get('id') for h in all_horses])
 
         # Separate new vs existing horses
         new_horses = [h for h in all_horses if h.get('id') not in existing_ids]
@@ -160,10 +154,11 @@ class HorsesFetcher:
         # Process NEW horses (Pro enrichment for complete data)
         if new_horses:
             logger.info(f"Enriching {len(new_horses)} new horses with Pro endpoint...")
+        progress = ProgressLogger(logger, 'Enriching new horses', total=len(new_horses))
 
         for idx, horse in enumerate(new_horses):
             horse_id = horse.get('id')
-            logger.info(f"[{idx+1}/{len(new_horses)}] New horse: {horse_id} - Fetching complete data...")
+            logger.debug("[%d/%d] New horse: %s - Fetching complete data...", idx + 1, len(new_horses), horse_id)
 
             # Fetch complete data from Pro endpoint
             horse_pro = self._fetch_horse_pro(horse_id)
@@ -195,7 +190,7 @@ class HorsesFetcher:
                 # Track pedigree capture statistics
                 if any([horse_pro.get('sire_id'), horse_pro.get('dam_id'), horse_pro.get('damsire_id')]):
                     pro_enrichment_stats['pedigrees_captured'] += 1
-                    logger.info(f"  ✓ Pedigree IDs captured for {horse_id}")
+                    logger.debug("  ✓ Pedigree IDs captured for %s", horse_id)
 
                 pro_enrichment_stats['success'] += 1
 
@@ -204,7 +199,7 @@ class HorsesFetcher:
 
             else:
                 # Fallback - insert basic data if Pro fetch fails
-                logger.warning(f"  ✗ Pro fetch failed for {horse_id}, using basic data")
+                logger.warning("  ✗ Pro fetch failed for %s, using basic data", horse_id)
                 horse_record = {
                     'id': horse.get('id'),  # RENAMED: horse_id → id
                     'name': horse.get('name'),
@@ -215,11 +210,18 @@ class HorsesFetcher:
                 horses_transformed.append(horse_record)
                 pro_enrichment_stats['failed'] += 1
 
+            progress.update()
+
+        if new_horses:
+            progress.finish()
+
         # Store in database
         results = {}
         if horses_transformed:
             horse_stats = self.db_client.insert_horses(horses_transformed)
             results['horses'] = horse_stats
+            if not horse_stats.get('errors'):
+                resources.horse_index().add(h['id'] for h in horses_transformed)
             logger.info(f"Horses inserted/updated: {horse_stats}")
 
         # Log Pro enrichment statistics
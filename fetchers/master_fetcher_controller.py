@@ -76,6 +76,7 @@ Usage:
 import sys
 import os
 import argparse
+import importlib
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
@@ -93,15 +94,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import get_config
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
-# Import fetchers
-from fetchers.courses_fetcher import CoursesFetcher
-from fetchers.bookmakers_fetcher import BookmakersFetcher
-from fetchers.jockeys_fetcher import JockeysFetcher
-from fetchers.trainers_fetcher import TrainersFetcher
-from fetchers.owners_fetcher import OwnersFetcher
-from fetchers.races_fetcher import RacesFetcher
-from fetchers.results_fetcher import ResultsFetcher
+# Fetchers are imported when a table is first run (load_fetcher), so --list and
+# --show-schedule do not load the API/database clients. The jockeys, trainers
+# and owners fetchers were moved to _deprecated/ and fail only when run.
 
 logger = get_logger('master_fetcher_controller')
 
@@ -140,7 +137,7 @@ SCHEDULE_CONFIG = {
 FETCHER_MAPPING = {
     # Master tables (reference data)
     'ra_mst_courses': {
-        'fetcher': CoursesFetcher,
+        'fetcher': 'fetchers.courses_fetcher:CoursesFetcher',
         'method': 'fetch_and_store',
         'type': 'bulk',
         'params': {},
@@ -149,7 +146,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'name', 'code', 'region', 'country', 'type', 'surface', 'latitude', 'longitude']
     },
     'ra_mst_bookmakers': {
-        'fetcher': BookmakersFetcher,
+        'fetcher': 'fetchers.bookmakers_fetcher:BookmakersFetcher',
         'method': 'fetch_and_store',
         'type': 'bulk',
         'params': {},
@@ -158,7 +155,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'name', 'url']
     },
     'ra_mst_jockeys': {
-        'fetcher': JockeysFetcher,
+        'fetcher': 'fetchers.jockeys_fetcher:JockeysFetcher',
         'method': 'fetch_and_store',
         'type': 'bulk',
         'params': {'region_codes': ['gb', 'ire']},
@@ -167,7 +164,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'name', 'region', 'nationality', 'dob', 'statistics...']
     },
     'ra_mst_trainers': {
-        'fetcher': TrainersFetcher,
+        'fetcher': 'fetchers.trainers_fetcher:TrainersFetcher',
         'method': 'fetch_and_store',
         'type': 'bulk',
         'params': {'region_codes': ['gb', 'ire']},
@@ -176,7 +173,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'name', 'region', 'location', 'statistics...']
     },
     'ra_mst_owners': {
-        'fetcher': OwnersFetcher,
+        'fetcher': 'fetchers.owners_fetcher:OwnersFetcher',
         'method': 'fetch_and_store',
         'type': 'bulk',
         'params': {'region_codes': ['gb', 'ire']},
@@ -187,7 +184,7 @@ FETCHER_MAPPING = {
 
     # Transaction tables (date-based)
     'ra_races': {
-        'fetcher': RacesFetcher,
+        'fetcher': 'fetchers.races_fetcher:RacesFetcher',
         'method': 'fetch_and_store',
         'type': 'date_range',
         'params': {'region_codes': ['gb', 'ire']},
@@ -196,7 +193,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'date', 'time', 'course_id', 'race_class', 'distance_f', 'going', 'prize_money...']
     },
     'ra_mst_runners': {
-        'fetcher': RacesFetcher,  # Same fetcher as races
+        'fetcher': 'fetchers.races_fetcher:RacesFetcher',  # Same fetcher as races
         'method': 'fetch_and_store',
         'type': 'date_range',
         'params': {'region_codes': ['gb', 'ire']},
@@ -205,7 +202,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'race_id', 'horse_id', 'jockey_id', 'trainer_id', 'draw', 'weight', 'odds...']
     },
     'ra_mst_horses': {
-        'fetcher': RacesFetcher,  # Extracted during races fetch
+        'fetcher': 'fetchers.races_fetcher:RacesFetcher',  # Extracted during races fetch
         'method': 'fetch_and_store',
         'type': 'date_range',
         'params': {'region_codes': ['gb', 'ire']},
@@ -214,7 +211,7 @@ FETCHER_MAPPING = {
         'columns': ['id', 'name', 'sex', 'dob', 'colour', 'region', 'sire_id', 'dam_id', 'damsire_id...']
     },
     'ra_horse_pedigree': {
-        'fetcher': RacesFetcher,  # Captured during horse enrichment
+        'fetcher': 'fetchers.races_fetcher:RacesFetcher',  # Captured during horse enrichment
         'method': 'fetch_and_store',
         'type': 'date_range',
         'params': {'region_codes': ['gb', 'ire']},
@@ -223,7 +220,7 @@ FETCHER_MAPPING = {
         'columns': ['horse_id', 'sire', 'sire_id', 'dam', 'dam_id', 'damsire', 'damsire_id', 'breeder...']
     },
     'ra_mst_race_results': {
-        'fetcher': ResultsFetcher,
+        'fetcher': 'fetchers.results_fetcher:ResultsFetcher',
         'method': 'fetch_and_store',
         'type': 'date_range',
         'params': {'region_codes': ['gb', 'ire']},
@@ -234,6 +231,12 @@ FETCHER_MAPPING = {
 }
 
 
+def load_fetcher(spec: str):
+    """Fetcher class for a FETCHER_MAPPING 'module:class' entry"""
+    module_name, class_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
 class MasterFetcherController:
     """Master controller for all fetcher operations"""
 
@@ -275,7 +278,6 @@ class MasterFetcherController:
             return {'success': False, 'error': f'Unknown table: {table}'}
 
         mapping = FETCHER_MAPPING[table]
-        fetcher_class = mapping['fetcher']
         method_name = mapping['method']
         fetcher_type = mapping['type']
         base_params = mapping['params'].copy()
@@ -290,6 +292,7 @@ class MasterFetcherController:
 
         try:
             # Initialize fetcher
+            fetcher_class = load_fetcher(mapping['fetcher'])
             fetcher = fetcher_class()
             method = getattr(fetcher, method_name)
 
@@ -494,7 +497,8 @@ class MasterFetcherController:
         # Run daily mode for all scheduled tables
         self.run_daily(tables=all_tables)
 
-    def show_schedule(self):
+    @staticmethod
+    def show_schedule():
         """Display the built-in schedule configuration"""
         print("\n" + "=" * 80)
         print("FETCHER SCHEDULE CONFIGURATION")
@@ -809,8 +813,7 @@ Examples:
 
     # Show schedule mode
     if args.show_schedule:
-        controller = MasterFetcherController()
-        controller.show_schedule()
+        MasterFetcherController.show_schedule()
         return
 
     # List mode
@@ -1043,4 +1046,4 @@ Examples:
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
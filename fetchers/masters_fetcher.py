@@ -24,8 +24,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from config.config import get_config
 from utils.logger import get_logger
-from utils.api_client import RacingAPIClient
-from utils.supabase_client import SupabaseReferenceClient
+from utils.instrumentation import instrumented_run, timed
+from utils import resources
 from utils.course_coordinates import assign_coordinates_to_course, get_coordinates_stats
 
 logger = get_logger('masters_fetcher')
@@ -60,23 +60,14 @@ class MastersFetcher:
     def __init__(self):
         """Initialize fetcher with API and database clients"""
         self.config = get_config()
-        self.api_client = RacingAPIClient(
-            username=self.config.api.username,
-            password=self.config.api.password,
-            base_url=self.config.api.base_url,
-            timeout=self.config.api.timeout,
-            max_retries=self.config.api.max_retries
-        )
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
+        self.api_client = resources.api_client()
+        self.db_client = resources.db_client()
 
     # ========================================================================
     # REFERENCE DATA (Monthly Updates)
     # ========================================================================
 
+    @timed('masters.fetch_bookmakers')
     def fetch_bookmakers(self) -> Dict:
         """
         Insert static bookmakers list
@@ -116,6 +107,7 @@ class MastersFetcher:
         else:
             return {'success': False, 'error': 'No bookmakers to insert'}
 
+    @timed('masters.fetch_courses')
     def fetch_courses(self, region_codes: List[str] = None) -> Dict:
         """
         Fetch all courses/venues
@@ -195,6 +187,7 @@ class MastersFetcher:
         else:
             return {'success': False, 'error': 'No courses to insert'}
 
+    @timed('masters.fetch_regions')
     def fetch_regions(self) -> Dict:
         """
         Fetch region reference data
@@ -227,6 +220,7 @@ class MastersFetcher:
     # PEOPLE DATA (Weekly Updates)
     # ========================================================================
 
+    @timed('masters.fetch_jockeys')
     def fetch_jockeys(self, limit_per_page: int = 500, max_pages: int = None) -> Dict:
         """
         Fetch all jockeys (bulk)
@@ -253,6 +247,7 @@ class MastersFetcher:
             'note': 'Jockeys should be extracted from races/results via EventsFetcher'
         }
 
+    @timed('masters.fetch_trainers')
     def fetch_trainers(self, limit_per_page: int = 500, max_pages: int = None) -> Dict:
         """
         Fetch all trainers (bulk)
@@ -275,6 +270,7 @@ class MastersFetcher:
             'note': 'Trainers should be extracted from races/results via EventsFetcher'
         }
 
+    @timed('masters.fetch_owners')
     def fetch_owners(self, limit_per_page: int = 500, max_pages: int = None) -> Dict:
         """
         Fetch all owners (bulk)
@@ -395,6 +391,7 @@ class MastersFetcher:
         # Fetch all reference data (bookmakers, courses, regions)
         return self.fetch_all_reference(region_codes=region_codes)
 
+    @instrumented_run('masters')
     def fetch_and_store(self, entity_type: str = 'all', **config) -> Dict:
         """
         Main entry point for fetching master data
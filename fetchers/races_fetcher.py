@@ -7,9 +7,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from config.config import get_config
 from utils.logger import get_logger
-from utils.api_client import RacingAPIClient
-from utils.supabase_client import SupabaseReferenceClient
+from utils.instrumentation import instrumented_run, timed
+from utils import freshness, resources
 from utils.entity_extractor import EntityExtractor
+from utils.job_runner import checkpoint
 from utils.position_parser import (
     parse_int_field,
     parse_rating,
@@ -19,6 +20,12 @@ from utils.position_parser import (
 
 logger = get_logger('races_fetcher')
 
+# Result columns a racecard sends as False/None - the stored value always wins
+RACE_RESULT_COLUMNS = (
+    'has_result', 'winning_time', 'winning_time_detail',
+    'tote_win', 'tote_pl', 'tote_ex', 'tote_csf', 'tote_tricast', 'tote_trifecta',
+)
+
 
 class RacesFetcher:
     """Fetcher for race and runner reference data from racecards"""
@@ -26,28 +33,22 @@ class RacesFetcher:
     def __init__(self):
         """Initialize fetcher"""
         self.config = get_config()
-        self.api_client = RacingAPIClient(
-            username=self.config.api.username,
-            password=self.config.api.password,
-            base_url=self.config.api.base_url,
-            timeout=self.config.api.timeout,
-            max_retries=self.config.api.max_retries
-        )
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
+        self.api_client = resources.api_client()
+        self.db_client = resources.db_client()
         # Pass API client to entity extractor for Pro enrichment
-        self.entity_extractor = EntityExtractor(self.db_client, self.api_client)
+        self.entity_extractor = EntityExtractor(self.db_client, self.api_client, resources.horse_index())
 
+    @instrumented_run('races')
     def fetch_and_store(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         days_back: int = 30,
         days_forward: int = 0,
-        region_codes: List[str] = None
+        region_codes: List[str] = None,
+        course_ids: Optional[List[str]] = None,
+        race_ids: Optional[List[str]] = None,
+        only_changed: bool = False
     ) -> Dict:
         """
         Fetch racecards from API and store races and runners in database
@@ -58,11 +59,17 @@ class RacesFetcher:
             days_back: Number of days to go back (default: 30). Ignored if start_date provided
             days_forward: Number of days to go forward from today (default: 0). Ignored if end_date provided
             region_codes: Optional list of region codes to filter (e.g., ['gb', 'ire'])
+            course_ids: Only fetch racecards for these courses
+            race_ids: Only keep these races from the fetched racecards
+            only_changed: Diff against stored rows and write only new/changed ones
+                (targeted live refresh - see SupabaseReferenceClient.filter_changed)
 
         Returns:
             Statistics dictionary
         """
         logger.info("Starting races and runners fetch from racecards")
+        if course_ids or race_ids:
+            logger.info(f"Targeted refresh: courses={course_ids or 'all'}, races={race_ids or 'all'}")
         logger.info(f"Region filtering: {region_codes if region_codes else 'None (all regions)'}")
 
         # Calculate date range
@@ -88,12 +95,14 @@ class RacesFetcher:
         # Iterate day by day (most efficient per API docs)
         current_date = start_dt
         while current_date <= end_dt:
+            checkpoint()
             date_str = current_date.strftime('%Y-%m-%d')
             logger.info(f"Fetching racecards for {date_str}")
 
             # Fetch racecards for this date
             api_response = self.api_client.get_racecards_pro(
                 date=date_str,
+                course_ids=course_ids,
                 region_codes=region_codes
             )
 
@@ -104,12 +113,15 @@ class RacesFetcher:
                 continue
 
             racecards = api_response.get('racecards', [])
+            freshness.racecards_seen(racecards)
             if racecards:
                 days_with_data += 1
                 logger.info(f"Fetched {len(racecards)} races for {date_str}")
 
                 # Process each race
                 for racecard in racecards:
+                    if race_ids and racecard.get('race_id') not in race_ids:
+                        continue
                     race_data, runners_data = self._transform_racecard(racecard)
                     if race_data:
                         all_races.append(race_data)
@@ -127,6 +139,16 @@ class RacesFetcher:
         # IMPORTANT: Entities (horses, jockeys, etc.) MUST be inserted BEFORE runners
         # because ra_mst_runners has foreign keys to these tables
         results = {}
+        races_fetched, runners_fetched = len(all_races), len(all_runners)
+
+        if only_changed:
+            # Racecard race records carry has_result=False and None result
+            # columns - never let them overwrite a stored result. Runner
+            # records carry no result columns, so there is nothing to keep.
+            all_races = self.db_client.filter_changed('ra_mst_races', all_races, 'id',
+                                                      preserve=RACE_RESULT_COLUMNS)
+            all_runners = self.db_client.filter_changed('ra_mst_runners', all_runners, 'race_id,horse_id')
+            logger.info(f"Changed since last fetch: {len(all_races)} races, {len(all_runners)} runners")
 
         # Step 1: Extract and store entities FIRST (horses, jockeys, trainers, owners)
         if all_runners:
@@ -147,13 +169,14 @@ class RacesFetcher:
             runner_stats = self.db_client.insert_runners(all_runners)
             results['runners'] = runner_stats
             logger.info(f"Runners inserted: {runner_stats}")
+            freshness.record_racecards(all_runners)
 
         return {
             'success': True,
-            'fetched': len(all_races),
+            'fetched': races_fetched,
             'inserted': len(all_races),  # For consistency with other fetchers
-            'races_fetched': len(all_races),
-            'runners_fetched': len(all_runners),
+            'races_fetched': races_fetched,
+            'runners_fetched': runners_fetched,
             'races_inserted': results.get('races', {}).get('inserted', 0),
             'runners_inserted': results.get('runners', {}).get('inserted', 0),
             'days_fetched': days_fetched,
@@ -162,6 +185,7 @@ class RacesFetcher:
             'db_stats': results
         }
 
+    @timed('races.transform_racecard')
     def _transform_racecard(self, racecard: Dict) -> tuple:
         """
         Transform API racecard data into database format
@@ -372,6 +396,7 @@ class RacesFetcher:
 
         return race_record, runner_records
 
+    @timed('races.validate_pedigree_ids')
     def _validate_pedigree_ids(self, runner_records: List[Dict]) -> List[Dict]:
         """
         Validate pedigree IDs exist in database, set to NULL if not found.
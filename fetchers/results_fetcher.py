@@ -7,9 +7,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from config.config import get_config
 from utils.logger import get_logger
-from utils.api_client import RacingAPIClient
-from utils.supabase_client import SupabaseReferenceClient
+from utils.instrumentation import instrumented_run, timed
+from utils import freshness, resources
 from utils.entity_extractor import EntityExtractor
+from utils.horse_form import update_horse_form
+from utils.job_runner import checkpoint
 from utils.position_parser import (
     extract_position_data,
     parse_rating,
@@ -27,28 +29,22 @@ class ResultsFetcher:
     def __init__(self):
         """Initialize fetcher"""
         self.config = get_config()
-        self.api_client = RacingAPIClient(
-            username=self.config.api.username,
-            password=self.config.api.password,
-            base_url=self.config.api.base_url,
-            timeout=self.config.api.timeout,
-            max_retries=self.config.api.max_retries
-        )
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key,
-            batch_size=self.config.supabase.batch_size
-        )
+        self.api_client = resources.api_client()
+        self.db_client = resources.db_client()
         # Pass API client to entity extractor for Pro enrichment
-        self.entity_extractor = EntityExtractor(self.db_client, self.api_client)
+        self.entity_extractor = EntityExtractor(self.db_client, self.api_client, resources.horse_index())
 
+    @instrumented_run('results')
     def fetch_and_store(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         days_back: int = 365,
         region_codes: List[str] = None,
-        skip_enrichment: bool = False
+        skip_enrichment: bool = False,
+        course_ids: Optional[List[str]] = None,
+        race_ids: Optional[List[str]] = None,
+        only_changed: bool = False
     ) -> Dict:
         """
         Fetch results from API and store in database
@@ -59,6 +55,10 @@ class ResultsFetcher:
             days_back: Number of days to go back (default: 365 = ~12 months, API limit)
             region_codes: Optional list of region codes to filter (e.g., ['gb', 'ire'])
             skip_enrichment: If True, skip entity enrichment (faster backfills)
+            course_ids: Only fetch results for these courses
+            race_ids: Only keep these races from the fetched results
+            only_changed: Diff against stored rows and write only new/changed ones
+                (targeted live refresh - see SupabaseReferenceClient.filter_changed)
 
         Returns:
             Statistics dictionary
@@ -92,12 +92,14 @@ class ResultsFetcher:
         # Iterate day by day
         current_date = start_dt
         while current_date <= end_dt:
+            checkpoint()
             date_str = current_date.strftime('%Y-%m-%d')
             logger.info(f"Fetching results for {date_str}")
 
             # Fetch results for this date
             api_response = self.api_client.get_results(
                 date=date_str,
+                course_ids=course_ids,
                 region_codes=region_codes
             )
 
@@ -114,6 +116,8 @@ class ResultsFetcher:
 
                 # Transform and store results
                 for result in results:
+                    if race_ids and result.get('race_id') not in race_ids:
+                        continue
                     result_data = self._transform_result(result)
                     if result_data:
                         all_results.append(result_data)
@@ -263,6 +267,19 @@ class ResultsFetcher:
                         if runner_data.get('horse_id') and runner_data.get('horse_name'):
                             all_runners.append(runner_data)
 
+            # Unfiltered: freshness and the form update need every race the
+            # stored runners ran in, changed or not
+            all_race_records = races_to_insert
+            if only_changed:
+                # ra_mst_race_results has no unique key - re-inserting a known
+                # runner result would duplicate it, so only new ones go in
+                races_to_insert = self.db_client.filter_changed('ra_mst_races', races_to_insert, 'id')
+                results_to_insert = self.db_client.filter_changed(
+                    'ra_mst_race_results', results_to_insert, 'race_id,horse_id', include_changed=False
+                )
+                logger.info(f"Changed since last fetch: {len(races_to_insert)} races, "
+                            f"{len(results_to_insert)} runner results")
+
             # Insert races into ra_races table
             if races_to_insert:
                 logger.info(f"Sample race before insert: {races_to_insert[0] if races_to_insert else 'NONE'}")
@@ -270,7 +287,7 @@ class ResultsFetcher:
                 race_stats = self.db_client.insert_races(races_to_insert)
                 results_dict['races'] = race_stats
                 logger.info(f"Races inserted: {race_stats}")
-            else:
+            elif not only_changed:
                 logger.warning(f"No races to insert! all_results count: {len(all_results)}")
 
             # Insert runner results into ra_mst_race_results table
@@ -286,12 +303,31 @@ class ResultsFetcher:
             if all_runners:
                 logger.info(f"Inserting {len(all_runners)} runner records with position data...")
                 runner_records = self._prepare_runner_records(all_results)
+                if only_changed:
+                    runner_records = self.db_client.filter_changed('ra_mst_runners', runner_records, 'race_id,horse_id')
+                    changed_horses = {r['horse_id'] for r in runner_records}
+                    all_runners = [r for r in all_runners if r.get('horse_id') in changed_horses]
+                    logger.info(f"Changed since last fetch: {len(runner_records)} runners")
                 if runner_records:
                     # Validate pedigree IDs to prevent foreign key violations
                     runner_records = self._validate_pedigree_ids(runner_records)
                     runner_stats = self.db_client.insert_runners(runner_records)
                     results_dict['runners'] = runner_stats
                     logger.info(f"Runners inserted: {runner_stats}")
+
+                    # Off -> result stored, for races whose runners are now written
+                    stored = {r['race_id'] for r in runner_records}
+                    freshness.record_results(r for r in all_race_records if r['id'] in stored)
+
+                    # Fold the new results into the per-horse form snapshots
+                    # (a failure here must not fail the results fetch)
+                    try:
+                        results_dict['horse_form'] = update_horse_form(
+                            self.db_client, runner_records, all_race_records
+                        )
+                    except Exception as e:
+                        logger.error(f"Horse form update failed: {e}")
+                        results_dict['horse_form'] = {'error': str(e)}
                 else:
                     logger.warning("No runner records prepared for insertion")
 
@@ -317,6 +353,7 @@ class ResultsFetcher:
             'db_stats': results_dict
         }
 
+    @timed('results.transform_result')
     def _transform_result(self, result: Dict) -> Optional[Dict]:
         """
         Transform API result data into database format
@@ -369,6 +406,7 @@ class ResultsFetcher:
 
         return result_record
 
+    @timed('results.validate_pedigree_ids')
     def _validate_pedigree_ids(self, runner_records: List[Dict]) -> List[Dict]:
         """
         Validate pedigree IDs exist in database, set to NULL if not found.
@@ -436,6 +474,7 @@ class ResultsFetcher:
 
         return runner_records
 
+    @timed('results.prepare_runner_records')
     def _prepare_runner_records(self, results: List[Dict]) -> List[Dict]:
         """
         Prepare runner records with position data for insertion into ra_mst_runners
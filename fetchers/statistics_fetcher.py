@@ -27,8 +27,9 @@ from typing import Dict
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import get_config
-from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.instrumentation import instrumented_run
+from utils import resources
 
 logger = get_logger('statistics_fetcher')
 
@@ -41,11 +42,9 @@ class StatisticsFetcher:
     def __init__(self):
         """Initialize fetcher"""
         self.config = get_config()
-        self.db_client = SupabaseReferenceClient(
-            url=self.config.supabase.url,
-            service_key=self.config.supabase.service_key
-        )
+        self.db_client = resources.db_client()
 
+    @instrumented_run('statistics')
     def fetch_and_store(self, recent_only: bool = True, entities: list = None) -> Dict:
         """
         Update statistics for entities
@@ -9,25 +9,23 @@ Use command-line arguments to control which entities to fetch.
 
 import sys
 import argparse
+import importlib
 import json
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
 from config.config import get_config
 from utils.logger import get_logger
+from utils.stage_dag import Stage, StageDAG
+from utils.job_runner import checkpoint, in_job_runner, shared
+from utils.instrumentation import log_breakdown
+from utils.metrics_server import mark_job
+from utils.run_ledger import track_run
+from utils.profiling import run_profiled
 
-# New consolidated fetchers (not yet in production - kept for future use)
-# from fetchers.masters_fetcher import MastersFetcher
-# from fetchers.events_fetcher import EventsFetcher
-
-# Legacy fetchers (currently in production)
-from fetchers.courses_fetcher import CoursesFetcher
-from fetchers.bookmakers_fetcher import BookmakersFetcher
-# Note: jockeys, trainers, owners are now extracted automatically via EntityExtractor during race/result fetching
-from fetchers.horses_fetcher import HorsesFetcher
-from fetchers.races_fetcher import RacesFetcher
-from fetchers.results_fetcher import ResultsFetcher
-# from fetchers.statistics_fetcher import StatisticsFetcher  # Not yet committed to repo
+# Fetchers (and the API/database clients they pull in) are imported when an
+# entity is first fetched - see ReferenceDataOrchestrator.fetcher_class()
 
 logger = get_logger('main')
 
@@ -82,41 +80,94 @@ class ReferenceDataOrchestrator:
         }
     }
 
-    # Fetcher registry
+    # Fetcher registry (entity -> 'module:class', imported on first use)
     FETCHERS = {
         # NEW: Consolidated fetchers (not yet in production)
-        # 'masters': MastersFetcher,
-        # 'events': EventsFetcher,
+        # 'masters': 'fetchers.masters_fetcher:MastersFetcher',
+        # 'events': 'fetchers.events_fetcher:EventsFetcher',
 
         # LEGACY: Individual fetchers (currently in production)
-        'courses': CoursesFetcher,
-        'bookmakers': BookmakersFetcher,
+        'courses': 'fetchers.courses_fetcher:CoursesFetcher',
+        'bookmakers': 'fetchers.bookmakers_fetcher:BookmakersFetcher',
         # jockeys, trainers, owners removed - now extracted automatically via EntityExtractor
-        'horses': HorsesFetcher,
-        'races': RacesFetcher,
-        'results': ResultsFetcher,
-        # 'statistics': StatisticsFetcher  # Not yet committed to repo
+        'horses': 'fetchers.horses_fetcher:HorsesFetcher',
+        'races': 'fetchers.races_fetcher:RacesFetcher',
+        'results': 'fetchers.results_fetcher:ResultsFetcher',
+        # 'statistics': 'fetchers.statistics_fetcher:StatisticsFetcher'  # Not yet committed to repo
     }
 
-    def __init__(self):
-        """Initialize orchestrator"""
+    # Tables each fetcher reads / writes and the shared resources it uses.
+    # StageDAG derives the execution order from these, so independent fetchers
+    # (e.g. courses and bookmakers) run concurrently.
+    STAGE_IO = {
+        'courses': {
+            'inputs': [],
+            'outputs': ['ra_mst_courses'],
+            'resources': ['api', 'db']
+        },
+        'bookmakers': {
+            'inputs': [],
+            'outputs': ['ra_mst_bookmakers'],
+            'resources': ['db']  # Static list, no API calls
+        },
+        'horses': {
+            'inputs': [],
+            'outputs': ['ra_mst_horses', 'ra_horse_pedigree'],
+            'resources': ['api', 'db']
+        },
+        'races': {
+            'inputs': ['ra_mst_courses'],
+            'outputs': ['ra_mst_races', 'ra_mst_runners', 'ra_mst_horses', 'ra_horse_pedigree',
+                        'ra_mst_jockeys', 'ra_mst_trainers', 'ra_mst_owners'],
+            'resources': ['api', 'db']
+        },
+        'results': {
+            'inputs': ['ra_mst_courses'],
+            'outputs': ['ra_mst_races', 'ra_mst_runners', 'ra_mst_race_results', 'ra_horse_form',
+                        'ra_mst_horses', 'ra_mst_jockeys', 'ra_mst_trainers', 'ra_mst_owners'],
+            'resources': ['api', 'db']
+        },
+    }
+
+    def __init__(self, warm: bool = False):
+        """
+        Initialize orchestrator
+
+        Args:
+            warm: Reuse fetchers across run_fetch() calls (long-running worker)
+        """
         self.config = get_config()
+        self.warm = warm
         self.results = {}
+        self.dag_report = None
         self.start_time = None
         self.end_time = None
 
-    def run_fetch(self, entities: Optional[List[str]] = None, custom_configs: Optional[Dict] = None) -> Dict:
+    @classmethod
+    def fetcher_class(cls, entity_name: str):
+        """Fetcher class for an entity (imports its module on first use)"""
+        module_name, class_name = cls.FETCHERS[entity_name].split(':')
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def run_fetch(self, entities: Optional[List[str]] = None, custom_configs: Optional[Dict] = None,
+                  budgets: Optional[Dict[str, int]] = None) -> Dict:
         """
         Run reference data fetch for specified entities
 
+        Entities run as a StageDAG: an entity waits only for entities whose
+        output tables it reads (or that write the same tables and were listed
+        earlier); the rest run concurrently within the resource budgets.
+
         Args:
             entities: List of entity names to fetch (None = all entities)
             custom_configs: Optional custom configuration overrides
+            budgets: Concurrency per resource, e.g. {'api': 1, 'db': 4}
 
         Returns:
             Complete results dictionary
         """
         self.start_time = datetime.utcnow()
+        self.results = {}
 
         # Determine which entities to fetch
         if entities is None:
@@ -129,65 +180,109 @@ class ReferenceDataOrchestrator:
         logger.info(f"Entities to fetch: {', '.join(entities)}")
         logger.info("=" * 80)
 
-        # Execute fetchers in order
+        # Every requested entity is attempted even if an upstream fetch fails
+        # (the tables it reads still hold the previous run's data)
+        dag = StageDAG(budgets=budgets, skip_on_failure=False)
         for entity_name in entities:
             if entity_name not in self.FETCHERS:
                 logger.warning(f"Unknown entity: {entity_name}, skipping")
                 continue
 
-            logger.info("\n" + "=" * 80)
-            logger.info(f"FETCHING: {entity_name.upper()}")
-            logger.info(f"Description: {self.PRODUCTION_CONFIGS[entity_name].get('description', 'N/A')}")
-            logger.info("=" * 80)
-
-            try:
-                # Get configuration
-                config = self.PRODUCTION_CONFIGS[entity_name].copy()
-                config.pop('description', None)  # Remove description from config
-
-                # Apply custom overrides
-                if custom_configs and entity_name in custom_configs:
-                    config.update(custom_configs[entity_name])
-
-                # Initialize fetcher and run
-                fetcher = self.FETCHERS[entity_name]()
-                result = fetcher.fetch_and_store(**config)
-
-                self.results[entity_name] = {
-                    'success': result.get('success', False),
-                    'fetched': result.get('fetched', 0),
-                    'inserted': result.get('inserted', 0),
-                    'error': result.get('error'),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-
-                if result.get('success'):
-                    logger.info(f"SUCCESS - {entity_name.upper()}")
-                    logger.info(f"   Fetched: {result.get('fetched', 0)}")
-                    logger.info(f"   Inserted: {result.get('inserted', 0)}")
-                else:
-                    logger.error(f"FAILED - {entity_name.upper()}")
-                    logger.error(f"   Error: {result.get('error', 'Unknown')}")
-
-            except Exception as e:
-                logger.error(f"EXCEPTION - {entity_name.upper()}: {e}", exc_info=True)
-                self.results[entity_name] = {
-                    'success': False,
-                    'error': str(e),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
+            io = self.STAGE_IO[entity_name]
+            dag.add(Stage(
+                name=entity_name,
+                func=lambda name=entity_name: self._run_entity(name, custom_configs),
+                inputs=io['inputs'],
+                outputs=io['outputs'],
+                resources=io['resources'],
+                description=self.PRODUCTION_CONFIGS[entity_name].get('description', '')
+            ))
+
+        self.dag_report = dag.run()
+
+        # Keep results in requested order; skipped stages never produced one
+        for entity_name, stage_result in self.dag_report.results.items():
+            self.results[entity_name] = stage_result.result or {
+                'success': False,
+                'error': stage_result.error,
+                'timestamp': datetime.utcnow().isoformat()
+            }
 
         self.end_time = datetime.utcnow()
         duration = (self.end_time - self.start_time).total_seconds()
 
         # Generate summary
         self._print_summary(duration)
+        self.dag_report.log(logger)
 
         # Save results
         self._save_results()
 
         return self.results
 
+    def _run_entity(self, entity_name: str, custom_configs: Optional[Dict] = None) -> Dict:
+        """Run one entity's fetcher and return its result summary"""
+        logger.info("\n" + "=" * 80)
+        logger.info(f"FETCHING: {entity_name.upper()}")
+        logger.info(f"Description: {self.PRODUCTION_CONFIGS[entity_name].get('description', 'N/A')}")
+        logger.info("=" * 80)
+        started = time.monotonic()
+
+        try:
+            # Get configuration
+            config = self.PRODUCTION_CONFIGS[entity_name].copy()
+            config.pop('description', None)  # Remove description from config
+
+            # Apply custom overrides
+            if custom_configs and entity_name in custom_configs:
+                config.update(custom_configs[entity_name])
+
+            checkpoint()
+
+            # Initialize fetcher and run (warm fetchers are reused across in-process jobs and worker ticks)
+            if self.warm or in_job_runner():
+                fetcher = shared(('fetcher', entity_name), self.fetcher_class(entity_name))
+            else:
+                fetcher = self.fetcher_class(entity_name)()
+            with track_run(f'fetch_{entity_name}') as run:
+                result = fetcher.fetch_and_store(**config)
+                run['status'] = 'success' if result.get('success') else 'failed'
+                run['error'] = result.get('error')
+                run['counts'] = {'fetched': result.get('fetched', 0), 'inserted': result.get('inserted', 0)}
+
+            summary = {
+                'success': result.get('success', False),
+                'fetched': result.get('fetched', 0),
+                'inserted': result.get('inserted', 0),
+                'error': result.get('error'),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            if result.get('instrumentation'):
+                summary['instrumentation'] = result['instrumentation']
+            mark_job(f'fetch_{entity_name}', summary['success'], time.monotonic() - started)
+
+            if result.get('success'):
+                logger.info(f"SUCCESS - {entity_name.upper()}")
+                logger.info(f"   Fetched: {result.get('fetched', 0)}")
+                logger.info(f"   Inserted: {result.get('inserted', 0)}")
+                if result.get('instrumentation'):
+                    logger.info("   Time by stage:")
+                    log_breakdown(result['instrumentation'], logger, top=8)
+            else:
+                logger.error(f"FAILED - {entity_name.upper()}")
+                logger.error(f"   Error: {result.get('error', 'Unknown')}")
+
+            return summary
+
+        except Exception as e:
+            logger.error(f"EXCEPTION - {entity_name.upper()}: {e}", exc_info=True)
+            mark_job(f'fetch_{entity_name}', False, time.monotonic() - started)
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+
     def _print_summary(self, duration: float):
         """Print execution summary"""
         logger.info("\n" + "=" * 80)
@@ -234,7 +329,8 @@ class ReferenceDataOrchestrator:
             'start_time': self.start_time.isoformat(),
             'end_time': self.end_time.isoformat(),
             'duration_seconds': (self.end_time - self.start_time).total_seconds(),
-            'results': self.results
+            'results': self.results,
+            'stages': self.dag_report.to_dict() if self.dag_report else None
         }
 
         with open(results_file, 'w') as f:
@@ -243,7 +339,7 @@ class ReferenceDataOrchestrator:
         logger.info(f"\nResults saved to: {results_file}")
 
 
-def parse_args():
+def parse_args(argv=None):
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
         description='Racing API Reference Data Fetcher - Production',
@@ -304,12 +400,19 @@ Examples:
         help='Test mode with limited data (for testing)'
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        '--api-concurrency',
+        type=int,
+        default=1,
+        help='Fetchers allowed to call the Racing API at once (default: 1)'
+    )
+
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv=None):
     """Main execution function"""
-    args = parse_args()
+    args = parse_args(argv)
 
     # Determine which entities to fetch
     entities = None
@@ -341,7 +444,11 @@ def main():
     # Initialize and run orchestrator
     try:
         orchestrator = ReferenceDataOrchestrator()
-        results = orchestrator.run_fetch(entities=entities, custom_configs=custom_configs)
+        results = orchestrator.run_fetch(
+            entities=entities,
+            custom_configs=custom_configs,
+            budgets={'api': args.api_concurrency}
+        )
 
         # Exit with appropriate code
         all_success = all(r.get('success', False) for r in results.values())
@@ -353,4 +460,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -0,0 +1,55 @@
+-- Migration 031: Create ra_horse_form snapshot table
+-- Date: 2026-10-18
+-- Purpose: Per-horse career and form snapshot, maintained incrementally as
+--          results land (utils/horse_form.py). Racecard-ready form for any
+--          runner is a single primary-key lookup instead of a history scan.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ra_horse_form (
+    horse_id VARCHAR PRIMARY KEY,
+
+    -- Career totals
+    career_runs INT DEFAULT 0,
+    career_wins INT DEFAULT 0,
+    career_2nds INT DEFAULT 0,
+    career_3rds INT DEFAULT 0,
+    career_prize DECIMAL(12,2) DEFAULT 0,
+
+    -- Recent form: most recent runs first, [{race_id, date, position, course_id, ...}]
+    recent_runs JSONB DEFAULT '[]'::jsonb,
+    last_positions VARCHAR,                 -- e.g. '1-3-2-0-5' (0 = 10th or worse)
+    last_run_date DATE,
+    last_win_date DATE,
+    last_race_id VARCHAR,
+
+    -- Records keyed by course_id / distance in yards / normalised going:
+    -- {"crs_123": [runs, wins, 2nds, 3rds], ...}
+    course_records JSONB DEFAULT '{}'::jsonb,
+    distance_records JSONB DEFAULT '{}'::jsonb,
+    going_records JSONB DEFAULT '{}'::jsonb,
+
+    -- Ratings
+    best_ofr INT,
+    last_ofr INT,
+    best_rpr INT,
+    last_rpr INT,
+
+    -- Race IDs already applied (keeps incremental updates idempotent)
+    applied_race_ids JSONB DEFAULT '[]'::jsonb,
+
+    -- Metadata
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_horse_form_last_run_date ON ra_horse_form(last_run_date);
+
+COMMIT;
+
+-- Verification
+SELECT 'ra_horse_form created' as status,
+       EXISTS(
+           SELECT 1 FROM information_schema.tables
+           WHERE table_name = 'ra_horse_form'
+       ) as table_exists;
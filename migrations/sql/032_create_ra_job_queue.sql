@@ -0,0 +1,50 @@
+-- Migration 032: Create ra_job_queue table
+-- Date: 2026-10-18
+-- Purpose: Durable job queue shared by scheduler and worker processes
+--          (utils/job_queue.py). Workers claim jobs with
+--          SELECT ... FOR UPDATE SKIP LOCKED and hold a lease they renew by
+--          heartbeat; a crashed worker's job is reclaimed as soon as its
+--          lease expires. Replaces the /tmp lock files of the scheduler.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ra_job_queue (
+    id BIGSERIAL PRIMARY KEY,
+    job_type VARCHAR NOT NULL,              -- e.g. 'scheduled_update', 'fetch', 'script'
+    payload JSONB DEFAULT '{}'::jsonb,
+
+    -- One job per key, e.g. 'fetch:races:2015-01-01:2015-01-31'
+    idempotency_key VARCHAR UNIQUE,
+    -- At most one running job per key, e.g. 'live_data'
+    concurrency_key VARCHAR,
+
+    status VARCHAR NOT NULL DEFAULT 'pending',  -- pending / running / done / failed / cancelled
+    attempts INT DEFAULT 0,
+    max_attempts INT DEFAULT 5,
+    run_after TIMESTAMPTZ DEFAULT NOW(),
+
+    -- Lease
+    lease_owner VARCHAR,
+    lease_expires_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+
+    last_error TEXT,
+    result JSONB,
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_claimable ON ra_job_queue(status, run_after, id);
+-- At most one running job per concurrency key. The claim's NOT EXISTS check
+-- reads a snapshot, so two workers can both pass it under READ COMMITTED;
+-- this index makes the second claim fail instead (treated as not claimable).
+DROP INDEX IF EXISTS idx_job_queue_concurrency;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_queue_running_concurrency
+    ON ra_job_queue(concurrency_key) WHERE status = 'running';
+
+COMMIT;
+
+-- Verification
+SELECT status, COUNT(*) FROM ra_job_queue GROUP BY status;
@@ -0,0 +1,122 @@
+-- Migration 033: Coverage functions
+-- Date: 2026-10-18
+-- Purpose: Grouped coverage queries for backfill planning and monitoring
+--          (utils/coverage.py). Replaces per-year / per-race PostgREST count
+--          calls with one GROUP BY per date window, and provides a
+--          watermark (latest updated_at) so cached coverage is only
+--          recomputed for dates that changed.
+
+BEGIN;
+
+-- Watermark lookups and changed-date detection
+CREATE INDEX IF NOT EXISTS idx_races_updated_at ON ra_mst_races(updated_at);
+CREATE INDEX IF NOT EXISTS idx_runners_updated_at ON ra_mst_runners(updated_at);
+
+-- Per-date race, runner and result coverage
+CREATE OR REPLACE FUNCTION coverage_daily(p_start DATE, p_end DATE)
+RETURNS TABLE (
+    race_date DATE,
+    races BIGINT,
+    races_with_runners BIGINT,
+    races_with_result BIGINT,
+    runners BIGINT,
+    runners_with_position BIGINT
+)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        r.date::date,
+        COUNT(DISTINCT r.id),
+        COUNT(DISTINCT ru.race_id),
+        COUNT(DISTINCT r.id) FILTER (WHERE r.has_result),
+        COUNT(ru.race_id),
+        COUNT(ru.position)
+    FROM ra_mst_races r
+    LEFT JOIN ra_mst_runners ru ON ru.race_id = r.id
+    WHERE r.date BETWEEN p_start AND p_end
+    GROUP BY r.date::date
+    ORDER BY 1;
+$$;
+
+-- Latest change to races or runners
+CREATE OR REPLACE FUNCTION coverage_watermark()
+RETURNS TIMESTAMPTZ
+LANGUAGE sql STABLE AS $$
+    SELECT GREATEST(
+        (SELECT MAX(updated_at) FROM ra_mst_races),
+        (SELECT MAX(updated_at) FROM ra_mst_runners)
+    );
+$$;
+
+-- Race dates with races or runners changed after p_since
+CREATE OR REPLACE FUNCTION coverage_changed_dates(p_since TIMESTAMPTZ)
+RETURNS TABLE (race_date DATE)
+LANGUAGE sql STABLE AS $$
+    SELECT r.date::date FROM ra_mst_races r WHERE r.updated_at > p_since
+    UNION
+    SELECT r.date::date
+    FROM ra_mst_runners ru
+    JOIN ra_mst_races r ON r.id = ru.race_id
+    WHERE ru.updated_at > p_since;
+$$;
+
+-- Total and NULL counts for columns of an ra_* table in one scan
+CREATE OR REPLACE FUNCTION coverage_null_rates(
+    p_table TEXT,
+    p_columns TEXT[],
+    p_date_column TEXT DEFAULT NULL,
+    p_start DATE DEFAULT NULL,
+    p_end DATE DEFAULT NULL
+)
+RETURNS TABLE (column_name TEXT, total_rows BIGINT, null_rows BIGINT)
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    v_counts TEXT;
+    v_where TEXT := '';
+    v_total BIGINT;
+    v_non_null BIGINT[];
+BEGIN
+    IF p_table !~ '^ra_[a-z0-9_]+$' THEN
+        RAISE EXCEPTION 'coverage_null_rates: unsupported table %', p_table;
+    END IF;
+
+    SELECT string_agg(format('COUNT(%I)', c), ', ') INTO v_counts FROM unnest(p_columns) AS c;
+
+    IF p_date_column IS NOT NULL AND p_start IS NOT NULL THEN
+        v_where := format(' WHERE %I >= %L', p_date_column, p_start);
+        IF p_end IS NOT NULL THEN
+            v_where := v_where || format(' AND %I <= %L', p_date_column, p_end);
+        END IF;
+    END IF;
+
+    EXECUTE format('SELECT COUNT(*), ARRAY[%s]::bigint[] FROM %I%s', v_counts, p_table, v_where)
+        INTO v_total, v_non_null;
+
+    FOR i IN 1 .. array_length(p_columns, 1) LOOP
+        column_name := p_columns[i];
+        total_rows := v_total;
+        null_rows := v_total - v_non_null[i];
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
+
+-- Races since p_start with at least one runner lacking every rating
+CREATE OR REPLACE FUNCTION races_missing_ratings(p_start DATE, p_limit INT DEFAULT 1000, p_offset INT DEFAULT 0)
+RETURNS TABLE (race_id TEXT)
+LANGUAGE sql STABLE AS $$
+    SELECT DISTINCT ru.race_id::text
+    FROM ra_mst_runners ru
+    JOIN ra_mst_races r ON r.id = ru.race_id
+    WHERE r.date >= p_start
+      AND ru.official_rating IS NULL
+      AND ru.rpr IS NULL
+      AND ru.tsr IS NULL
+    ORDER BY 1
+    LIMIT p_limit OFFSET p_offset;
+$$;
+
+COMMIT;
+
+-- Verification
+SELECT * FROM coverage_daily(CURRENT_DATE - 7, CURRENT_DATE);
+SELECT coverage_watermark();
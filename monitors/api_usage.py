@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+API Usage - Racing API calls per job and endpoint, daily budget and estimates
+
+Shows:
+- Calls used today and left in the daily budget (for live/daily and for
+  backfill/enrichment work)
+- Calls and items per call for each job and endpoint
+- Recent runs with estimated vs actual calls
+- Estimates for a planned job (--estimate JOB UNITS)
+
+Usage:
+    python3 monitors/api_usage.py
+    python3 monitors/api_usage.py --day 2026-10-17
+    python3 monitors/api_usage.py --estimate jockeys_statistics 4200 --unit jockeys --default 3
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from datetime import date
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.config import get_config
+from utils.api_budget import ApiBudget
+
+# ANSI colors
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+DIM = '\033[2m'
+
+
+def print_budget(budget: ApiBudget, day: str):
+    used = budget.ledger.used(day)
+    print(f"\n{BOLD}API usage {day}{RESET}: {used:,} calls")
+    if not budget.daily_calls:
+        print(f"  Budget: {DIM}unlimited{RESET}")
+        return
+    share = used / budget.daily_calls
+    color = GREEN if share < 0.7 else YELLOW if share < 0.9 else RED
+    print(f"  Budget: {color}{share:.0%}{RESET} of {budget.daily_calls:,} "
+          f"(reserve {budget.reserve_calls:,} for live/daily)")
+    if day == date.today().isoformat():
+        print(f"  Left: {budget.remaining('live'):,} live/daily, {budget.remaining('backfill'):,} backfill/enrichment")
+
+
+def print_usage(budget: ApiBudget, day: str):
+    rows = budget.ledger.usage(day)
+    if not rows:
+        print(f"  {DIM}No calls recorded{RESET}")
+        return
+    print(f"\n  {'Job':<32} {'Endpoint':<28} {'Calls':>9} {'Items/call':>11}")
+    for row in rows:
+        print(f"  {row['job']:<32} {row['endpoint']:<28} {row['calls']:>9,} {row['items_per_call']:>11}")
+
+
+def print_runs(budget: ApiBudget, limit: int):
+    runs = budget.ledger.runs(limit=limit)
+    if not runs:
+        return
+    print(f"\n{BOLD}Recent runs{RESET}")
+    print(f"  {'Job':<32} {'Day':<11} {'Units':>12} {'Calls':>9} {'Estimated':>10} {'Time':>8}  Status")
+    for run in runs:
+        units = f"{run['units'] or 0:,} {run['unit'] or ''}"
+        estimated = f"{run['estimated_calls']:,}" if run['estimated_calls'] is not None else '-'
+        seconds = f"{(run['seconds'] or 0) / 60:.0f}m" if run['seconds'] is not None else '-'
+        print(f"  {run['job']:<32} {run['day']:<11} {units:>12} {run['calls'] or 0:>9,} {estimated:>10} "
+              f"{seconds:>8}  {run['status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Racing API usage, budget and estimates')
+    parser.add_argument('--day', default=date.today().isoformat(), help='Day to show (YYYY-MM-DD, default today)')
+    parser.add_argument('--runs', type=int, default=15, help='Recent runs to show')
+    parser.add_argument('--estimate', nargs=2, metavar=('JOB', 'UNITS'), help='Estimate a planned job')
+    parser.add_argument('--unit', default='items', help='Unit name for --estimate')
+    parser.add_argument('--default', type=float, default=1.0,
+                        help='Calls per unit for --estimate when the job has no recorded runs')
+    args = parser.parse_args()
+
+    budget = ApiBudget.from_config(get_config())
+
+    if args.estimate:
+        job, units = args.estimate[0], int(args.estimate[1])
+        decision = budget.check(budget.estimate(job, units, args.unit, args.default), priority='backfill')
+        print(f"\n{decision.estimate.describe()}")
+        if not decision.allowed:
+            print(f"{RED}Does not fit today{RESET}: {decision.reason}")
+        elif decision.reshaped:
+            print(f"{YELLOW}Fits partly{RESET}: {decision.reason}")
+        else:
+            print(f"{GREEN}Fits today's budget{RESET}")
+        return
+
+    print_budget(budget, args.day)
+    print_usage(budget, args.day)
+    print_runs(budget, args.runs)
+    print()
+
+
+if __name__ == '__main__':
+    main()
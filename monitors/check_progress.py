@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.supabase_client import SupabaseReferenceClient
+from utils.coverage import CoverageService
 from config.config import get_config
 from datetime import datetime
 
@@ -23,19 +24,13 @@ RESET = '\033[0m'
 
 
 def get_year_counts(db):
-    """Get race counts per year"""
-    counts = {}
-    for year in range(2015, 2026):
-        try:
-            result = db.client.table('ra_mst_races').select('*', count='exact') \
-                .gte('race_date', f'{year}-01-01') \
-                .lte('race_date', f'{year}-12-31') \
-                .limit(1).execute()
-            counts[year] = result.count or 0
-        except Exception as e:
-            print(f"Warning: Failed to get count for {year}: {e}")
-            counts[year] = 0
-    return counts
+    """Get race counts per year (grouped query, cached by watermark)"""
+    try:
+        by_year = CoverageService(db).by_year(2015, 2025)
+        return {year: totals['races'] for year, totals in by_year.items()}
+    except Exception as e:
+        print(f"Warning: Failed to get race counts: {e}")
+        return {year: 0 for year in range(2015, 2026)}
 
 
 def estimate_expected(year):
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compare Runs - Recent job runs from the run ledger and performance regressions
+
+Shows:
+- Recent runs per job: duration, API calls/bytes/retries, rows read and
+  written, peak RSS, cache hit rates
+- The latest run of each job (or --run-id) against the median of the job's
+  successful runs in the preceding window, e.g.
+  "fetch_results: duration 40% above the 7-day median"
+
+Usage:
+    python3 monitors/compare_runs.py
+    python3 monitors/compare_runs.py --job fetch_results --runs 20
+    python3 monitors/compare_runs.py --run-id 3f2a9c1b7d4e --detail
+    python3 monitors/compare_runs.py --fail-on-regression      # Exit 1 if anything regressed
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.run_ledger import DEFAULT_THRESHOLD, DEFAULT_WINDOW_DAYS, RunLedger, find_regressions
+
+# ANSI colors
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+DIM = '\033[2m'
+
+
+def _mb(n: float) -> str:
+    return f"{n / (1024 * 1024):.1f}"
+
+
+def _cache_rate(run: dict) -> str:
+    hits = sum(c['hits'] for c in run.get('cache', {}).values())
+    total = hits + sum(c['misses'] for c in run.get('cache', {}).values())
+    return f"{hits / total:.0%}" if total else '-'
+
+
+def print_runs(job: str, runs: list):
+    print(f"\n{BOLD}{job}{RESET}")
+    print(f"  {'Started (UTC)':<20} {'Time':>8} {'API':>7} {'MB':>7} {'Retry':>6} "
+          f"{'Read':>9} {'Written':>9} {'RSS MB':>7} {'Cache':>6}  Status")
+    for run in runs:
+        api, db = run.get('api', {}), run.get('db', {})
+        color = GREEN if run.get('status') == 'success' else RED
+        print(f"  {run.get('started_at', ''):<20} {run.get('duration_s', 0):>7.0f}s {api.get('calls', 0):>7,} "
+              f"{_mb(api.get('bytes', 0)):>7} {api.get('retries_total', 0):>6} "
+              f"{sum(db.get('rows_read', {}).values()):>9,} {sum(db.get('rows_written', {}).values()):>9,} "
+              f"{run.get('peak_rss_mb', 0):>7.0f} {_cache_rate(run):>6}  {color}{run.get('status')}{RESET}"
+              f" {DIM}{run.get('run_id', '')}{RESET}")
+
+
+def print_detail(run: dict):
+    print(f"\n{BOLD}Run {run.get('run_id')}{RESET} ({run.get('job')}, {run.get('host')} pid {run.get('pid')})")
+    print(f"  {run.get('started_at')} -> {run.get('finished_at')}  {run.get('duration_s', 0):.1f}s  "
+          f"{run.get('status')}" + (f"  {RED}{run['error']}{RESET}" if run.get('error') else ''))
+    if run.get('counts'):
+        print("  Counts: " + ', '.join(f"{k}={v:,}" for k, v in run['counts'].items()))
+
+    api = run.get('api', {})
+    print(f"  API: {api.get('calls', 0):,} calls, {_mb(api.get('bytes', 0))} MB, "
+          f"{api.get('request_s', 0):.1f}s in requests, {api.get('rate_limit_wait_s', 0):.1f}s rate-limit wait, "
+          f"retries {api.get('retries') or 0}, failures {api.get('failures', 0)}")
+
+    db = run.get('db', {})
+    tables = sorted(set(db.get('rows_read', {})) | set(db.get('rows_written', {})))
+    if tables:
+        print(f"\n  {'Table':<32} {'Read':>10} {'Written':>10} {'Failed':>8} {'Write s':>9}")
+        for table in tables:
+            print(f"  {table:<32} {db.get('rows_read', {}).get(table, 0):>10,} "
+                  f"{db.get('rows_written', {}).get(table, 0):>10,} {db.get('rows_failed', {}).get(table, 0):>8,} "
+                  f"{db.get('write_s', {}).get(table, 0):>9.1f}")
+
+    if run.get('cache'):
+        print(f"\n  {'Cache':<32} {'Hits':>10} {'Misses':>10} {'Hit rate':>9}")
+        for name, row in run['cache'].items():
+            rate = f"{row['hit_rate']:.0%}" if row['hit_rate'] is not None else '-'
+            print(f"  {name:<32} {row['hits']:>10,} {row['misses']:>10,} {rate:>9}")
+
+    if run.get('stages'):
+        print(f"\n  {'Stage':<45} {'Total':>9} {'Calls':>8} {'Mean ms':>9} {'p95 ms':>9}")
+        for name, row in list(run['stages'].items())[:15]:
+            print(f"  {name:<45} {row['total_s']:>8.1f}s {row['count']:>8,} {row['mean_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare job runs from the run ledger and flag regressions')
+    parser.add_argument('--ledger', help='Run ledger file (default data/run_ledger.jsonl or RACING_RUN_LEDGER)')
+    parser.add_argument('--job', help='Only this job (e.g. fetch_results, daily_fetch)')
+    parser.add_argument('--runs', type=int, default=5, help='Recent runs to show per job')
+    parser.add_argument('--run-id', help='Compare this run instead of the latest of each job')
+    parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS, help='Window of earlier runs to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Flag metrics this fraction above the median (default 0.25)')
+    parser.add_argument('--detail', action='store_true', help='Per-table, cache and stage detail for compared runs')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 if a run regressed')
+    args = parser.parse_args()
+
+    ledger = RunLedger(args.ledger)
+    since = datetime.utcnow() - timedelta(days=args.days + 1)
+    history = ledger.runs(job=args.job)
+    if not history:
+        print(f"{DIM}No runs recorded in {ledger.path}{RESET}")
+        return
+
+    if args.run_id:
+        targets = [run for run in history if run.get('run_id', '').startswith(args.run_id)]
+        if not targets:
+            print(f"{RED}No run {args.run_id} in {ledger.path}{RESET}")
+            sys.exit(2)
+    else:
+        jobs = sorted({run['job'] for run in history if run.get('job')})
+        targets = [[run for run in history if run.get('job') == job][-1] for job in jobs]
+        for job in jobs:
+            recent = [run for run in history if run.get('job') == job and run.get('started_at', '') >= since.isoformat()]
+            if recent:
+                print_runs(job, recent[-args.runs:])
+
+    print(f"\n{BOLD}Regressions{RESET} (vs {args.days}-day median, threshold {args.threshold:.0%})")
+    regressed = False
+    for run in targets:
+        regressions = find_regressions(run, history, args.threshold, args.days)
+        if regressions:
+            regressed = True
+            for regression in regressions:
+                print(f"  {RED}✗{RESET} {regression['message']}")
+        else:
+            print(f"  {GREEN}✓{RESET} {run['job']} {DIM}{run.get('run_id')}{RESET}")
+        if args.detail:
+            print_detail(run)
+    print()
+
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
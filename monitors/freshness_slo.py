@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Freshness SLO - Rolling live data lags against their targets
+
+Reads the freshness state recorded by the races and results fetchers
+(utils/freshness.py, data/freshness.json) and shows per stream:
+- result:   race off -> result stored
+- racecard: racecard first seen -> runners stored
+with p50/p90/p95/p99, max and the share of races within the SLO target over
+the rolling window. The worker's /metrics endpoint serves the same numbers.
+
+Usage:
+    python3 monitors/freshness_slo.py
+    python3 monitors/freshness_slo.py --json
+    python3 monitors/freshness_slo.py --fail-on-breach 0.95    # Exit 1 if under 95% within SLO
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.freshness import QUANTILES, get_tracker
+
+# ANSI colors
+GREEN = '\033[92m'
+RED = '\033[91m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+DIM = '\033[2m'
+
+
+def _duration(seconds) -> str:
+    if seconds is None:
+        return '-'
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling freshness lags against the SLO targets')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    parser.add_argument('--fail-on-breach', type=float, metavar='RATIO',
+                        help='Exit 1 if any stream has fewer than RATIO of races within its SLO')
+    args = parser.parse_args()
+
+    tracker = get_tracker()
+    summary = tracker.summary()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"\n{BOLD}Freshness over the last {tracker.window / 3600:.0f}h{RESET} "
+              f"{DIM}({tracker.state_path or 'this process only'}){RESET}")
+        columns = ''.join(f"{'p' + str(int(q * 100)):>8}" for q in QUANTILES)
+        print(f"  {'Stream':<10} {'Races':>6}{columns} {'Max':>8} {'Target':>8} {'Within':>8}")
+        for stream, row in summary.items():
+            quantiles = ''.join(f"{_duration(row.get(f'p{int(q * 100)}_s')):>8}" for q in QUANTILES)
+            within = row.get('within_slo')
+            color = GREEN if within is None or args.fail_on_breach is None or within >= args.fail_on_breach else RED
+            within_text = f"{within:.1%}" if within is not None else '-'
+            print(f"  {stream:<10} {row['samples']:>6}{quantiles} {_duration(row.get('max_s')):>8} "
+                  f"{_duration(row['slo_target_s']):>8} {color}{within_text:>8}{RESET}")
+
+    if args.fail_on_breach is not None:
+        breached = [stream for stream, row in summary.items()
+                    if row['samples'] and row['within_slo'] < args.fail_on_breach]
+        if breached:
+            if not args.json:
+                print(f"\n{RED}Below {args.fail_on_breach:.0%} within SLO: {', '.join(breached)}{RESET}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
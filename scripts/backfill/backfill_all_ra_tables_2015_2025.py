@@ -25,7 +25,8 @@ STRATEGY:
 3. Extract and enrich entities (horses, jockeys, trainers, owners)
 4. Capture pedigree data for new horses
 5. Respect Racing API rate limits (2 requests/second)
-6. Checkpoint and resume capability
+6. Chunk ledger: monthly chunks, resumable at chunk granularity, several
+   chunks in flight at once (--workers) under the shared API rate limit
 
 USAGE:
     # Full backfill from 2015
@@ -45,15 +46,17 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-import time
-import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict
 from config.config import get_config
 from utils.logger import get_logger
+from utils.api_scheduler import set_default_priority
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
 from fetchers.results_fetcher import ResultsFetcher
+from utils.chunk_ledger import ChunkLedger, chunk_days, fit_to_budget, monthly_chunks, run_chunks
+from utils.api_budget import ApiBudget
+from utils.coverage import CoverageService, date_runs
 
 logger = get_logger('backfill_all_ra_tables')
 
@@ -80,14 +83,15 @@ class HistoricalBackfiller:
         # Use ResultsFetcher for historical data (has complete race results with positions)
         self.results_fetcher = ResultsFetcher()
 
-        # Checkpoint file for resume capability
+        # Chunk ledger for resume capability (per-chunk status, timings, counts and errors)
         if checkpoint_file:
-            self.checkpoint_file = Path(checkpoint_file)
+            self.ledger_file = Path(checkpoint_file)
         else:
-            self.checkpoint_file = Path(__file__).parent.parent / 'logs' / 'backfill_all_tables_checkpoint.json'
+            self.ledger_file = Path(__file__).parent.parent / 'logs' / 'backfill_all_tables_ledger.json'
+        self.ledger = ChunkLedger(self.ledger_file, name='backfill_all_ra_tables')
 
-        # Error log file
-        self.error_log_file = Path(__file__).parent.parent / 'logs' / 'backfill_all_tables_errors.json'
+        self.coverage = CoverageService(self.db_client)
+        self.budget = ApiBudget.from_config(self.config)
 
         # Region codes for UK and Ireland
         self.region_codes = ['gb', 'ire']
@@ -96,6 +100,9 @@ class HistoricalBackfiller:
         """
         Analyze current coverage for each RA table by year
 
+        Races, runners and results come from one grouped coverage query per
+        date window (cached by watermark); master tables get a single count.
+
         Returns:
             Dictionary with coverage analysis
         """
@@ -105,57 +112,30 @@ class HistoricalBackfiller:
 
         analysis = {}
 
-        # Define tables to analyze
-        tables = [
-            ('ra_races', 'race_date', 'race_id'),
-            ('ra_mst_runners', 'fetched_at', 'runner_id'),  # Using fetched_at as date column
-            ('ra_horses', 'created_at', 'horse_id'),
-            ('ra_jockeys', 'created_at', 'jockey_id'),
-            ('ra_trainers', 'created_at', 'trainer_id'),
-            ('ra_owners', 'created_at', 'owner_id'),
-            ('ra_horse_pedigree', 'created_at', 'horse_id'),
-            ('ra_courses', None, 'course_id'),
-            ('ra_bookmakers', None, 'bookmaker_id')
-        ]
-
-        for table_name, date_column, id_column in tables:
-            try:
-                logger.info(f"\nAnalyzing {table_name}...")
-
-                # Get total count
-                result = self.db_client.client.table(table_name).select('*', count='exact').limit(1).execute()
-                total_count = result.count if hasattr(result, 'count') else 0
-
+        try:
+            by_year = self.coverage.by_year(2015, 2025)
+            for table_name, key in [('ra_mst_races', 'races'),
+                                    ('ra_mst_runners', 'runners'),
+                                    ('ra_mst_races (with result)', 'races_with_result'),
+                                    ('ra_mst_runners (with position)', 'runners_with_position')]:
                 analysis[table_name] = {
-                    'total_records': total_count,
-                    'by_year': {}
+                    'total_records': sum(totals[key] for totals in by_year.values()),
+                    'by_year': {year: totals[key] for year, totals in by_year.items()}
                 }
 
-                # Get counts by year if date column exists
-                if date_column and total_count > 0:
-                    for year in range(2015, 2026):
-                        start_date = f"{year}-01-01"
-                        end_date = f"{year}-12-31"
-
-                        # For timestamp columns (created_at, fetched_at), use ISO format
-                        if date_column in ['created_at', 'fetched_at']:
-                            start_date = f"{year}-01-01T00:00:00"
-                            end_date = f"{year}-12-31T23:59:59"
-
-                        year_result = self.db_client.client.table(table_name)\
-                            .select('*', count='exact')\
-                            .gte(date_column, start_date)\
-                            .lte(date_column, end_date)\
-                            .limit(1)\
-                            .execute()
-
-                        year_count = year_result.count if hasattr(year_result, 'count') else 0
-                        analysis[table_name]['by_year'][year] = year_count
-
-                        logger.info(f"  {year}: {year_count:,} records")
-                else:
-                    logger.info(f"  Total: {total_count:,} records (no date breakdown)")
+            analysis['ra_mst_runners']['null_rates'] = self.coverage.null_rates(
+                'ra_mst_runners', ['position', 'official_rating', 'rpr', 'tsr', 'starting_price', 'jockey_id']
+            )
+        except Exception as e:
+            logger.error(f"Error analyzing race coverage: {e}")
+            analysis['ra_mst_races'] = {'error': str(e)}
 
+        # Master tables: one count each
+        for table_name in ['ra_mst_horses', 'ra_mst_jockeys', 'ra_mst_trainers', 'ra_mst_owners',
+                           'ra_horse_pedigree', 'ra_mst_courses', 'ra_mst_bookmakers']:
+            try:
+                result = self.db_client.client.table(table_name).select('*', count='exact').limit(1).execute()
+                analysis[table_name] = {'total_records': result.count or 0, 'by_year': {}}
             except Exception as e:
                 logger.error(f"Error analyzing {table_name}: {e}")
                 analysis[table_name] = {'error': str(e)}
@@ -176,90 +156,62 @@ class HistoricalBackfiller:
         logger.info(f"\nIdentifying gaps from {start_date} to {end_date}...")
 
         try:
-            # Get dates that already have runner data
-            result = self.db_client.client.table('ra_mst_races')\
-                .select('race_date')\
-                .gte('race_date', start_date)\
-                .lte('race_date', end_date)\
-                .execute()
-
-            dates_with_races = set([row['race_date'] for row in result.data if row.get('race_date')])
-
-            # Check which races have runners
-            races_with_runners_result = self.db_client.client.table('ra_mst_runners')\
-                .select('race_id')\
-                .execute()
+            daily = self.coverage.daily(start_date, end_date)
+            missing_dates = self.coverage.missing_days(start_date, end_date)
 
-            race_ids_with_runners = set([row['race_id'] for row in races_with_runners_result.data])
+            races = sum(row['races'] for row in daily.values())
+            races_with_runners = sum(row['races_with_runners'] for row in daily.values())
 
-            logger.info(f"Found {len(dates_with_races)} unique race dates")
-            logger.info(f"Found {len(race_ids_with_runners)} races with runner data")
+            logger.info(f"Found {sum(1 for row in daily.values() if row['races'])} unique race dates")
+            logger.info(f"Found {races_with_runners:,}/{races:,} races with runner data")
+            logger.info(f"Dates to fetch: {len(missing_dates)} of {len(daily)}")
 
             return {
-                'total_dates': len(dates_with_races),
-                'dates_with_races': dates_with_races,
-                'races_with_runners_count': len(race_ids_with_runners)
+                'total_dates': len(daily),
+                'dates_with_races': {day for day, row in daily.items() if row['races']},
+                'missing_dates': missing_dates,
+                'races_count': races,
+                'races_with_runners_count': races_with_runners
             }
 
         except Exception as e:
             logger.error(f"Error identifying gaps: {e}")
             return {'error': str(e)}
 
-    def load_checkpoint(self) -> Optional[Dict]:
-        """Load checkpoint data if exists"""
-        if self.checkpoint_file.exists():
-            try:
-                with open(self.checkpoint_file, 'r') as f:
-                    checkpoint = json.load(f)
-                logger.info(f"Loaded checkpoint: {checkpoint.get('dates_processed', 0)} dates processed")
-                return checkpoint
-            except Exception as e:
-                logger.error(f"Error loading checkpoint: {e}")
-        return None
-
-    def save_checkpoint(self, stats: Dict, processed_dates: List[str]):
-        """Save checkpoint for resume capability"""
-        checkpoint = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'stats': {
-                'total_dates': stats.get('total_dates', 0),
-                'dates_processed': len(processed_dates),
-                'races_processed': stats.get('races_processed', 0),
-                'runners_processed': stats.get('runners_processed', 0),
-                'horses_enriched': stats.get('horses_enriched', 0),
-                'errors': stats.get('errors', 0),
-                'start_time': stats.get('start_time').isoformat() if isinstance(stats.get('start_time'), datetime) else stats.get('start_time'),
-            },
-            'processed_dates': processed_dates,
-            'last_date': processed_dates[-1] if processed_dates else None
-        }
-        try:
-            with open(self.checkpoint_file, 'w') as f:
-                json.dump(checkpoint, f, indent=2)
-            logger.debug(f"Checkpoint saved: {len(processed_dates)} dates")
-        except Exception as e:
-            logger.error(f"Error saving checkpoint: {e}")
-
-    def log_error(self, date: str, error: str):
-        """Log error to error file"""
-        error_entry = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'date': date,
-            'error': str(error)
-        }
-
-        try:
-            errors = []
-            if self.error_log_file.exists():
-                with open(self.error_log_file, 'r') as f:
-                    errors = json.load(f)
-
-            errors.append(error_entry)
+    def _process_chunk(self, start_date: str, end_date: str, skip_enrichment: bool) -> Dict:
+        """Fetch historical results for one chunk and return its counts"""
+        # Fetch historical results for this range using ResultsFetcher
+        result = self.results_fetcher.fetch_and_store(
+            start_date=start_date,
+            end_date=end_date,
+            region_codes=self.region_codes,
+            skip_enrichment=skip_enrichment
+        )
 
-            with open(self.error_log_file, 'w') as f:
-                json.dump(errors, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error logging to error file: {e}")
+        if not result.get('success'):
+            return {'success': False, 'error': result.get('error', 'Unknown error')}
+
+        # ResultsFetcher returns 'fetched' (number of races), not 'races_fetched'
+        races_fetched = result.get('fetched', 0)
+        db_stats = result.get('db_stats', {})
+        entity_stats = db_stats.get('entities', {}) or {}
+
+        counts = {
+            'success': True,
+            'days': result.get('days_fetched', 0),
+            'dates_with_data': result.get('days_with_data', 0),
+            'races_processed': races_fetched,
+            # Extract runner count from db_stats
+            'runners_processed': db_stats.get('runners', {}).get('inserted', 0),
+            'horses_enriched': entity_stats.get('horses', {}).get('inserted', 0),
+            'jockeys_processed': entity_stats.get('jockeys', {}).get('inserted', 0),
+            'trainers_processed': entity_stats.get('trainers', {}).get('inserted', 0),
+            'owners_processed': entity_stats.get('owners', {}).get('inserted', 0),
+            'pedigrees_captured': entity_stats.get('pedigrees', {}).get('inserted', 0),
+        }
+        logger.info(f"  ✓ {start_date} to {end_date}: {races_fetched} races, "
+                    f"{counts['runners_processed']} runners")
+        return counts
 
     def backfill_date_range(
         self,
@@ -267,7 +219,10 @@ class HistoricalBackfiller:
         end_date: str,
         resume: bool = False,
         non_interactive: bool = False,
-        skip_enrichment: bool = False
+        skip_enrichment: bool = False,
+        workers: int = 1,
+        only_missing: bool = False,
+        ignore_budget: bool = False
     ) -> Dict:
         """
         Backfill all data for a date range
@@ -275,9 +230,13 @@ class HistoricalBackfiller:
         Args:
             start_date: Start date (YYYY-MM-DD)
             end_date: End date (YYYY-MM-DD)
-            resume: Resume from checkpoint if available
+            resume: Skip monthly chunks the ledger records as done
             non_interactive: Don't prompt for confirmation
             skip_enrichment: Skip entity enrichment (24x faster, ~11 hours vs 11 days)
+            workers: Monthly chunks processed concurrently (API rate limit is shared)
+            only_missing: Fetch only dates the coverage service reports as missing
+                (no races, or races without runners)
+            ignore_budget: Run every chunk even if they exceed today's API budget
 
         Returns:
             Statistics dictionary
@@ -290,44 +249,54 @@ class HistoricalBackfiller:
         logger.info(f"Date Range: {start_date} to {end_date}")
         logger.info(f"Region Codes: {self.region_codes}")
         logger.info(f"Skip Enrichment: {skip_enrichment}")
-
-        # Check for existing checkpoint
-        checkpoint = None
-        processed_dates = []
-
-        if resume:
-            checkpoint = self.load_checkpoint()
-            if checkpoint:
-                processed_dates = checkpoint.get('processed_dates', [])
-                logger.info(f"Resuming from checkpoint: {len(processed_dates)} dates already processed")
-                logger.info(f"Last processed date: {checkpoint.get('last_date')}")
+        logger.info(f"Parallel chunks: {workers}")
 
         # Calculate date range
         start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
 
-        # Generate all dates in range
-        all_dates = []
-        current_dt = start_dt
-        while current_dt <= end_dt:
-            date_str = current_dt.strftime('%Y-%m-%d')
-            if date_str not in processed_dates:
-                all_dates.append(date_str)
-            current_dt += timedelta(days=1)
+        # Monthly chunks; without resume the range starts fresh
+        if only_missing:
+            gaps = self.identify_gaps(start_date, end_date)
+            if 'error' in gaps:
+                return {'success': False, 'error': gaps['error']}
+            # Contiguous runs of missing dates, split at month boundaries
+            ranges = [chunk for run_start, run_end in date_runs(gaps['missing_dates'])
+                      for chunk in monthly_chunks(datetime.strptime(run_start, '%Y-%m-%d').date(),
+                                                  datetime.strptime(run_end, '%Y-%m-%d').date())]
+        else:
+            ranges = monthly_chunks(start_dt, end_dt)
+        keys = self.ledger.plan(ranges, reset=not resume)
+        todo = self.ledger.todo(keys)
+        if resume:
+            logger.info(f"Resuming from ledger: {len(keys) - len(todo)} of {len(keys)} chunks already done")
+
+        # API cost per day from earlier runs; enrichment adds Pro calls for new horses
+        job = 'backfill_all_ra_tables' + ('_fast' if skip_enrichment else '')
+        calls_per_day = 2 if skip_enrichment else 20
+        if ignore_budget:
+            run_keys = keys
+            estimate = self.budget.estimate(job, sum(chunk_days(self.ledger.chunks[k]) for k in todo),
+                                            'days', calls_per_day)
+        else:
+            run_keys, estimate, decision = fit_to_budget(self.ledger, keys, self.budget, job, calls_per_day)
+            if not run_keys:
+                logger.warning(f"Daily API budget: no chunk fits today ({decision.reason or 'nothing to run'})")
+                return {'success': not todo, 'over_budget': bool(todo), 'error': decision.reason or None}
 
-        total_dates = len(all_dates)
-        logger.info(f"Total dates to process: {total_dates:,}")
+        total_dates = estimate.units
+        logger.info(f"Total dates to process: {total_dates:,} in {len(self.ledger.todo(run_keys))} monthly chunks")
 
         # Calculate estimated time
         # Average ~12 races per day in UK/IRE
         estimated_races = total_dates * 12
-        estimated_api_calls = total_dates  # 1 call per date for racecards
-        estimated_seconds = estimated_api_calls * 0.5  # 2 requests/second = 0.5s per request
+        estimated_api_calls = estimate.calls
+        estimated_seconds = estimate.seconds
         estimated_hours = estimated_seconds / 3600
         estimated_days = estimated_hours / 24
 
         logger.info(f"Estimated races: ~{estimated_races:,}")
-        logger.info(f"Estimated API calls: {estimated_api_calls:,}")
+        logger.info(f"Estimated API calls: {estimated_api_calls:,} ({estimate.calls_per_unit:.1f}/day, {estimate.source})")
         logger.info(f"Estimated time: {estimated_hours:.1f} hours ({estimated_days:.1f} days)")
 
         # Calculate ETA
@@ -342,131 +311,52 @@ class HistoricalBackfiller:
                 logger.info("Backfill cancelled by user")
                 return {'success': False, 'cancelled': True}
 
-        # Initialize stats
-        if checkpoint and 'stats' in checkpoint:
-            stats = checkpoint['stats']
-            stats['start_time'] = datetime.fromisoformat(stats['start_time']) if isinstance(stats['start_time'], str) else stats['start_time']
-            stats['session_start'] = datetime.utcnow()
-        else:
-            stats = {
-                'total_dates': total_dates,
-                'dates_processed': 0,
-                'dates_with_data': 0,
-                'dates_no_data': 0,
-                'races_processed': 0,
-                'runners_processed': 0,
-                'horses_enriched': 0,
-                'jockeys_processed': 0,
-                'trainers_processed': 0,
-                'owners_processed': 0,
-                'pedigrees_captured': 0,
-                'errors': 0,
-                'start_time': datetime.utcnow(),
-                'session_start': datetime.utcnow()
-            }
-
         logger.info("\nStarting backfill...")
-        logger.info("Progress will be reported every 10 dates")
-        logger.info("Checkpoint will be saved every 10 dates")
-        logger.info(f"Checkpoint file: {self.checkpoint_file}")
-        logger.info(f"Error log file: {self.error_log_file}")
-
-        # Process dates
-        for idx, date_str in enumerate(all_dates, 1):
-            try:
-                logger.info(f"\n[{idx}/{total_dates}] Processing {date_str}...")
-
-                # Fetch historical results for this date using ResultsFetcher
-                result = self.results_fetcher.fetch_and_store(
-                    start_date=date_str,
-                    end_date=date_str,
-                    region_codes=self.region_codes,
-                    skip_enrichment=skip_enrichment
-                )
-
-                # Update stats
-                stats['dates_processed'] += 1
-
-                if result.get('success'):
-                    # ResultsFetcher returns 'fetched' (number of races), not 'races_fetched'
-                    races_fetched = result.get('fetched', 0)
-                    # Extract runner count from db_stats
-                    runners_fetched = result.get('db_stats', {}).get('runners', {}).get('inserted', 0)
-
-                    if races_fetched > 0:
-                        stats['dates_with_data'] += 1
-                        stats['races_processed'] += races_fetched
-                        stats['runners_processed'] += runners_fetched
-
-                        # Extract entity stats from result
-                        entity_stats = result.get('db_stats', {}).get('entities', {})
-                        if entity_stats:
-                            stats['horses_enriched'] += entity_stats.get('horses', {}).get('inserted', 0)
-                            stats['jockeys_processed'] += entity_stats.get('jockeys', {}).get('inserted', 0)
-                            stats['trainers_processed'] += entity_stats.get('trainers', {}).get('inserted', 0)
-                            stats['owners_processed'] += entity_stats.get('owners', {}).get('inserted', 0)
-                            stats['pedigrees_captured'] += entity_stats.get('pedigrees', {}).get('inserted', 0)
-
-                        logger.info(f"  ✓ {races_fetched} races, {runners_fetched} runners")
-                    else:
-                        stats['dates_no_data'] += 1
-                        logger.info(f"  - No races on this date")
-                else:
-                    stats['errors'] += 1
-                    error_msg = result.get('error', 'Unknown error')
-                    logger.error(f"  ✗ Error: {error_msg}")
-                    self.log_error(date_str, error_msg)
-
-            except Exception as e:
-                stats['errors'] += 1
-                error_msg = str(e)
-                logger.error(f"  ✗ Exception: {error_msg}")
-                self.log_error(date_str, error_msg)
-
-            # Track processed dates
-            processed_dates.append(date_str)
-
-            # Progress logging and checkpoint saving every 10 dates
-            if idx % 10 == 0 or idx == total_dates:
-                elapsed = (datetime.utcnow() - stats['session_start']).total_seconds()
-                rate = stats['dates_processed'] / elapsed if elapsed > 0 else 0
-                remaining_dates = total_dates - idx
-                remaining_seconds = remaining_dates / rate if rate > 0 else 0
-                remaining_hours = remaining_seconds / 3600
-                remaining_days = remaining_hours / 24
-
-                # Calculate new ETA
-                eta_timestamp = datetime.utcnow().timestamp() + remaining_seconds
-                eta_str = datetime.fromtimestamp(eta_timestamp).strftime('%Y-%m-%d %H:%M:%S')
-
-                logger.info("\n" + "-" * 80)
-                logger.info(f"PROGRESS: {idx}/{total_dates} dates ({idx/total_dates*100:.1f}%)")
-                logger.info(f"  Dates with data: {stats['dates_with_data']:,}")
-                logger.info(f"  Races processed: {stats['races_processed']:,}")
-                logger.info(f"  Runners processed: {stats['runners_processed']:,}")
-                logger.info(f"  Horses enriched: {stats['horses_enriched']:,}")
-                logger.info(f"  Pedigrees captured: {stats['pedigrees_captured']:,}")
-                logger.info(f"  Errors: {stats['errors']}")
-                logger.info(f"  Rate: {rate:.2f} dates/sec")
-                logger.info(f"  Remaining: {remaining_days:.1f} days ({remaining_hours:.1f}h)")
-                logger.info(f"  ETA: {eta_str}")
-                logger.info("-" * 80)
-
-                # Save checkpoint
-                self.save_checkpoint(stats, processed_dates)
-
-        # Final statistics
-        stats['end_time'] = datetime.utcnow()
-        stats['duration_seconds'] = (stats['end_time'] - stats['session_start']).total_seconds()
+        logger.info(f"Chunk ledger: {self.ledger_file}")
+
+        session_start = datetime.utcnow()
+        run_todo = self.ledger.todo(run_keys)
+        with self.budget.track(job, total_dates, 'days', estimate) as usage:
+            run = run_chunks(
+                self.ledger, run_keys,
+                lambda chunk_start, chunk_end: self._process_chunk(chunk_start, chunk_end, skip_enrichment),
+                workers=workers
+            )
+            usage['units'] = sum(chunk_days(self.ledger.chunks[k]) for k in run_todo
+                                 if self.ledger.chunks[k]['status'] == 'done')
+
+        # Final statistics (totals over every done chunk in range, including earlier runs)
+        totals = self.ledger.totals(keys)
+        chunk_counts = self.ledger.counts(keys)
+        stats = {
+            'success': run['success'],
+            'total_chunks': len(keys),
+            'chunks_done': chunk_counts['done'],
+            'chunks_failed': chunk_counts['failed'],
+            'dates_processed': int(totals.get('days', 0)),
+            'dates_with_data': int(totals.get('dates_with_data', 0)),
+            'races_processed': int(totals.get('races_processed', 0)),
+            'runners_processed': int(totals.get('runners_processed', 0)),
+            'horses_enriched': int(totals.get('horses_enriched', 0)),
+            'jockeys_processed': int(totals.get('jockeys_processed', 0)),
+            'trainers_processed': int(totals.get('trainers_processed', 0)),
+            'owners_processed': int(totals.get('owners_processed', 0)),
+            'pedigrees_captured': int(totals.get('pedigrees_captured', 0)),
+            'errors': run['failed'],
+            'start_time': session_start,
+            'end_time': datetime.utcnow()
+        }
+        stats['duration_seconds'] = (stats['end_time'] - session_start).total_seconds()
         stats['duration_hours'] = stats['duration_seconds'] / 3600
         stats['duration_days'] = stats['duration_hours'] / 24
 
         logger.info("\n" + "=" * 80)
         logger.info("BACKFILL COMPLETE")
         logger.info("=" * 80)
+        logger.info(f"Chunks done: {stats['chunks_done']}/{stats['total_chunks']} "
+                    f"({stats['chunks_failed']} failed - rerun with --resume to retry)")
         logger.info(f"Total dates processed: {stats['dates_processed']:,}")
         logger.info(f"Dates with data: {stats['dates_with_data']:,}")
-        logger.info(f"Dates without data: {stats['dates_no_data']:,}")
         logger.info(f"Total races: {stats['races_processed']:,}")
         logger.info(f"Total runners: {stats['runners_processed']:,}")
         logger.info(f"Horses enriched: {stats['horses_enriched']:,}")
@@ -478,9 +368,6 @@ class HistoricalBackfiller:
         logger.info(f"Duration: {stats['duration_days']:.2f} days ({stats['duration_hours']:.1f} hours)")
         logger.info("=" * 80)
 
-        # Save final checkpoint
-        self.save_checkpoint(stats, processed_dates)
-
         return stats
 
 
@@ -505,6 +392,9 @@ Examples:
   # Resume from checkpoint
   python3 scripts/backfill_all_ra_tables_2015_2025.py --resume
 
+  # Fetch only dates missing races or runners
+  python3 scripts/backfill_all_ra_tables_2015_2025.py --only-missing --non-interactive
+
   # Test mode (7 days)
   python3 scripts/backfill_all_ra_tables_2015_2025.py --test
         """
@@ -523,12 +413,21 @@ Examples:
     parser.add_argument('--non-interactive', action='store_true',
                        help='Run without confirmation prompt (for background jobs)')
     parser.add_argument('--checkpoint-file', type=str,
-                       help='Custom checkpoint file path')
+                       help='Custom chunk ledger file path')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Monthly chunks processed concurrently (default: 1)')
+    parser.add_argument('--only-missing', action='store_true',
+                       help='Fetch only dates without races or without runner data')
     parser.add_argument('--fast', action='store_true',
                        help='Fast mode: skip entity enrichment (24x faster, ~11 hours vs 11 days)')
+    parser.add_argument('--ignore-budget', action='store_true',
+                       help='Run every chunk even if they exceed the daily API budget')
 
     args = parser.parse_args()
 
+    # Yield the shared API rate limit to live and daily updates
+    set_default_priority('backfill')
+
     backfiller = HistoricalBackfiller(checkpoint_file=args.checkpoint_file)
 
     # Analyze mode
@@ -552,6 +451,9 @@ Examples:
                         count = data['by_year'][year]
                         logger.info(f"  {year}: {count:,}")
 
+                for column, rates in (data.get('null_rates') or {}).items():
+                    logger.info(f"  {column}: {rates['null_pct']}% NULL ({rates['nulls']:,}/{rates['total']:,})")
+
         logger.info("=" * 80)
         return
 
@@ -572,7 +474,10 @@ Examples:
         end_date=end_date,
         resume=args.resume,
         non_interactive=args.non_interactive,
-        skip_enrichment=args.fast
+        skip_enrichment=args.fast,
+        workers=args.workers,
+        only_missing=args.only_missing,
+        ignore_budget=args.ignore_budget
     )
 
     return result
@@ -8,7 +8,9 @@ This script performs a comprehensive backfill of all racing event data:
 - Pedigree data (automatic capture for new horses)
 
 Features:
-- Resume capability (checkpoint/restart if interrupted)
+- Resume capability: a chunk ledger records every monthly chunk (pending,
+  running, done, failed with timings and counts); a restart skips done chunks
+- Parallel chunks (--workers) sharing the API client's rate limit
 - Progress tracking (monthly chunks with estimates)
 - Rate limit handling (2 requests/second)
 - Error logging and retry logic
@@ -31,9 +33,12 @@ Usage:
     # Specific date range
     python3 scripts/backfill_events.py --start-date 2020-01-01 --end-date 2020-12-31
 
-    # Resume from checkpoint
+    # Resume (skip chunks already done, retry failed ones)
     python3 scripts/backfill_events.py --resume
 
+    # Three monthly chunks at a time
+    python3 scripts/backfill_events.py --start-date 2015-01-01 --end-date 2025-12-31 --workers 3
+
     # Check status (dry run)
     python3 scripts/backfill_events.py --check-status --start-date 2015-01-01
 
@@ -49,77 +54,30 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 import argparse
-import json
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Optional
 from utils.logger import get_logger
+from utils.api_scheduler import set_default_priority
 from fetchers.events_fetcher import EventsFetcher
+from utils.chunk_ledger import ChunkLedger, chunk_key
 
 logger = get_logger('backfill_events')
 
 
 class EventsBackfillManager:
-    """Manager for events backfill with checkpoint/resume capability"""
+    """Manager for events backfill with chunk-level resume capability"""
 
     def __init__(self, checkpoint_file: str = None):
         """Initialize backfill manager"""
         self.fetcher = EventsFetcher()
 
-        # Checkpoint file
+        # Chunk ledger (per-chunk status, timings and counts)
         if checkpoint_file:
-            self.checkpoint_file = Path(checkpoint_file)
+            self.ledger_file = Path(checkpoint_file)
         else:
-            self.checkpoint_file = Path(__file__).parent.parent / 'logs' / 'backfill_events_checkpoint.json'
-
-        # Error log file
-        self.error_log_file = Path(__file__).parent.parent / 'logs' / 'backfill_events_errors.json'
-
-    def load_checkpoint(self) -> Optional[Dict]:
-        """Load checkpoint data if exists"""
-        if self.checkpoint_file.exists():
-            try:
-                with open(self.checkpoint_file, 'r') as f:
-                    checkpoint = json.load(f)
-                logger.info(f"Loaded checkpoint: {checkpoint.get('chunks_processed', 0)} chunks processed")
-                return checkpoint
-            except Exception as e:
-                logger.error(f"Error loading checkpoint: {e}")
-        return None
-
-    def save_checkpoint(self, stats: Dict):
-        """Save checkpoint for resume capability"""
-        checkpoint = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'stats': stats
-        }
-        try:
-            with open(self.checkpoint_file, 'w') as f:
-                json.dump(checkpoint, f, indent=2)
-            logger.debug(f"Checkpoint saved: {stats.get('chunks_processed', 0)} chunks processed")
-        except Exception as e:
-            logger.error(f"Error saving checkpoint: {e}")
-
-    def log_error(self, chunk_info: str, error: str):
-        """Log error to error file"""
-        error_entry = {
-            'timestamp': datetime.utcnow().isoformat(),
-            'chunk': chunk_info,
-            'error': str(error)
-        }
+            self.ledger_file = Path(__file__).parent.parent / 'logs' / 'backfill_events_ledger.json'
 
-        try:
-            errors = []
-            if self.error_log_file.exists():
-                with open(self.error_log_file, 'r') as f:
-                    errors = json.load(f)
-
-            errors.append(error_entry)
-
-            with open(self.error_log_file, 'w') as f:
-                json.dump(errors, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error logging to error file: {e}")
+        self.ledger = ChunkLedger(self.ledger_file, name='backfill_events')
 
     def check_status(self, start_date: str, end_date: str) -> Dict:
         """
@@ -156,16 +114,16 @@ class EventsBackfillManager:
         logger.info(f"Estimated time (at 2 req/sec): {estimated_time_hours:.1f} hours")
         logger.info("")
 
-        # Check for existing checkpoint
-        checkpoint = self.load_checkpoint()
-        if checkpoint:
-            logger.info("Checkpoint found:")
-            logger.info(f"  Chunks processed: {checkpoint['stats'].get('chunks_processed', 0)}")
-            logger.info(f"  Total races: {checkpoint['stats'].get('total_races', 0)}")
-            logger.info(f"  Total runners: {checkpoint['stats'].get('total_runners', 0)}")
-            logger.info(f"  Last updated: {checkpoint.get('timestamp')}")
+        # Ledger state of the chunks in range
+        keys = [chunk_key(start, end) for start, end in chunks]
+        known = [key for key in keys if key in self.ledger.chunks]
+        if known:
+            logger.info(f"Ledger: {self.ledger_file}")
+            self.ledger.log_summary(known, logger)
+            if len(known) < len(keys):
+                logger.info(f"  Not yet started: {len(keys) - len(known)} chunk(s)")
         else:
-            logger.info("No checkpoint found (fresh start)")
+            logger.info("No ledger entries for this range (fresh start)")
 
         logger.info("=" * 80)
 
@@ -174,7 +132,7 @@ class EventsBackfillManager:
             'total_chunks': len(chunks),
             'estimated_api_calls': estimated_api_calls,
             'estimated_time_hours': estimated_time_hours,
-            'checkpoint': checkpoint
+            'ledger': self.ledger.counts(known) if known else None
         }
 
     def run_backfill(
@@ -184,7 +142,8 @@ class EventsBackfillManager:
         region_codes: list = None,
         fetch_racecards: bool = True,
         fetch_results: bool = True,
-        resume: bool = False
+        resume: bool = False,
+        workers: int = 1
     ) -> Dict:
         """
         Run the backfill operation
@@ -195,7 +154,8 @@ class EventsBackfillManager:
             region_codes: Region filter (default: ['gb', 'ire'])
             fetch_racecards: Whether to fetch racecards
             fetch_results: Whether to fetch results
-            resume: Resume from checkpoint if available
+            resume: Skip chunks the ledger records as done (otherwise re-fetch all)
+            workers: Chunks processed concurrently
 
         Returns:
             Statistics dictionary
@@ -214,39 +174,27 @@ class EventsBackfillManager:
         logger.info(f"Fetch racecards: {fetch_racecards}")
         logger.info(f"Fetch results: {fetch_results}")
         logger.info(f"Resume mode: {resume}")
+        logger.info(f"Ledger: {self.ledger_file}")
 
         start_time = datetime.utcnow()
 
-        # Check for checkpoint if resume mode
-        resume_from_date = None
-        if resume:
-            checkpoint = self.load_checkpoint()
-            if checkpoint and checkpoint.get('stats', {}).get('chunks'):
-                # Get last processed chunk
-                chunks = checkpoint['stats']['chunks']
-                if chunks:
-                    last_chunk = chunks[-1]
-                    resume_from_date = last_chunk.get('end_date')
-                    logger.info(f"Resuming from: {resume_from_date}")
-
-                    # Adjust start date
-                    if resume_from_date:
-                        resume_dt = datetime.strptime(resume_from_date, '%Y-%m-%d').date() + timedelta(days=1)
-                        start_date = resume_dt.strftime('%Y-%m-%d')
-                        logger.info(f"Adjusted start date: {start_date}")
-
-        # Run backfill
+        if not resume:
+            # Fresh run over this range: forget earlier outcomes of its chunks
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+            self.ledger.plan(self.fetcher._generate_monthly_chunks(start_dt, end_dt), reset=True)
+
+        # Run backfill (the ledger is saved after every chunk)
         result = self.fetcher.backfill(
             start_date=start_date,
             end_date=end_date,
             region_codes=region_codes,
             fetch_racecards=fetch_racecards,
-            fetch_results=fetch_results
+            fetch_results=fetch_results,
+            workers=workers,
+            ledger=self.ledger
         )
 
-        # Save checkpoint after each chunk (already done in fetcher, but save final state)
-        self.save_checkpoint(result)
-
         # Calculate duration
         end_time = datetime.utcnow()
         duration = (end_time - start_time).total_seconds()
@@ -257,6 +205,7 @@ class EventsBackfillManager:
         logger.info(f"Success: {result.get('success')}")
         logger.info(f"Duration: {duration / 3600:.2f} hours ({duration / 60:.1f} minutes)")
         logger.info(f"Chunks processed: {result.get('chunks_processed')}/{result.get('total_chunks')}")
+        logger.info(f"Chunks failed: {result.get('chunks_failed', 0)}")
         logger.info(f"Total races: {result.get('total_races', 0):,}")
         logger.info(f"Total runners: {result.get('total_runners', 0):,}")
         logger.info("=" * 80)
@@ -299,7 +248,7 @@ def main():
     parser.add_argument(
         '--resume',
         action='store_true',
-        help='Resume from last checkpoint'
+        help='Resume: skip chunks the ledger records as done (failed chunks are retried)'
     )
     parser.add_argument(
         '--check-status',
@@ -308,11 +257,20 @@ def main():
     )
     parser.add_argument(
         '--checkpoint-file',
-        help='Custom checkpoint file path'
+        help='Custom chunk ledger file path'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Monthly chunks processed concurrently (API rate limit is shared; default: 1)'
     )
 
     args = parser.parse_args()
 
+    # Yield the shared API rate limit to live and daily updates
+    set_default_priority('backfill')
+
     # Validate arguments
     if not args.resume and not args.start_date and not args.check_status:
         parser.error('--start-date is required unless --resume or --check-status is used')
@@ -328,20 +286,28 @@ def main():
         manager.check_status(args.start_date, end_date)
         return 0
 
+    # Resume without dates: continue the range recorded in the ledger
+    start_date, end_date = args.start_date, args.end_date
+    if args.resume and not start_date and manager.ledger.chunks:
+        entries = manager.ledger.chunks.values()
+        start_date = min(entry['start_date'] for entry in entries)
+        end_date = end_date or max(entry['end_date'] for entry in entries)
+
     # Run backfill
     try:
         result = manager.run_backfill(
-            start_date=args.start_date or '2015-01-01',
-            end_date=args.end_date,
+            start_date=start_date or '2015-01-01',
+            end_date=end_date,
             region_codes=args.region_codes,
             fetch_racecards=not args.no_racecards,
             fetch_results=not args.no_results,
-            resume=args.resume
+            resume=args.resume,
+            workers=args.workers
         )
         return 0 if result.get('success') else 1
     except KeyboardInterrupt:
         logger.warning("\n\nBackfill interrupted by user (Ctrl+C)")
-        logger.info("Progress has been saved to checkpoint. Use --resume to continue.")
+        logger.info("Progress has been saved to the chunk ledger. Use --resume to continue.")
         return 130  # Standard exit code for Ctrl+C
     except Exception as e:
         logger.error(f"Backfill failed: {e}", exc_info=True)
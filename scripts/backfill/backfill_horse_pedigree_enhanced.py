@@ -14,6 +14,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from config.config import get_config
 from utils.logger import get_logger
+from utils.api_scheduler import get_api_scheduler, set_default_priority
+from utils.api_budget import ApiBudget
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
 from utils.region_extractor import extract_region_from_name
@@ -39,6 +41,7 @@ class HorsePedigreeBackfillEnhanced:
             service_key=self.config.supabase.service_key,
             batch_size=self.config.supabase.batch_size
         )
+        self.budget = ApiBudget.from_config(self.config)
 
         # Checkpoint file for resume capability
         if checkpoint_file:
@@ -257,7 +260,7 @@ class HorsePedigreeBackfillEnhanced:
             return {'success': True, 'has_pedigree': False}
 
     def run(self, max_horses: int = None, skip_horses: int = 0, resume: bool = False,
-            non_interactive: bool = False):
+            non_interactive: bool = False, ignore_budget: bool = False):
         """
         Run backfill process
 
@@ -266,6 +269,7 @@ class HorsePedigreeBackfillEnhanced:
             skip_horses: Number of horses to skip (for resuming)
             resume: Resume from checkpoint if available
             non_interactive: Don't prompt for confirmation (for background jobs)
+            ignore_budget: Run all horses even if they exceed today's API budget
 
         Returns:
             Statistics dictionary
@@ -301,11 +305,23 @@ class HorsePedigreeBackfillEnhanced:
             logger.info(f"Limiting to {max_horses} horses")
             horse_ids = horse_ids[:max_horses]
 
+        # One Pro call per horse (measured rate once earlier runs are recorded)
+        estimate = self.budget.estimate('horse_pedigree_backfill', len(horse_ids), 'horses')
+        if not ignore_budget:
+            decision = self.budget.check(estimate)
+            if not decision.allowed:
+                logger.warning(f"Daily API budget exhausted: {decision.reason}")
+                return {'success': False, 'over_budget': True, 'error': decision.reason}
+            if decision.reshaped:
+                logger.warning(f"Daily API budget: processing {decision.units} of {len(horse_ids)} horses")
+                horse_ids = horse_ids[:decision.units]
+                estimate = self.budget.estimate('horse_pedigree_backfill', len(horse_ids), 'horses')
+
         total_horses = len(horse_ids)
         logger.info(f"Processing {total_horses} horses")
 
         # Calculate estimated time
-        estimated_seconds = total_horses * 0.5  # 2 requests/second = 0.5s per request
+        estimated_seconds = estimate.seconds
         estimated_hours = estimated_seconds / 3600
         logger.info(f"Estimated time: {estimated_hours:.1f} hours ({estimated_seconds/60:.0f} minutes)")
 
@@ -349,45 +365,46 @@ class HorsePedigreeBackfillEnhanced:
         logger.info(f"Error log file: {self.error_log_file}")
 
         # Process horses
-        for idx, horse_id in enumerate(horse_ids, 1):
-            # Process horse
-            result = self.process_horse(horse_id)
-
-            # Update stats
-            stats['processed'] += 1
-            if result.get('success'):
-                if result.get('has_pedigree'):
-                    stats['with_pedigree'] += 1
+        with self.budget.track('horse_pedigree_backfill', total_horses, 'horses', estimate) as usage:
+            for idx, horse_id in enumerate(horse_ids, 1):
+                # Process horse
+                result = self.process_horse(horse_id)
+
+                # Update stats
+                stats['processed'] += 1
+                if result.get('success'):
+                    if result.get('has_pedigree'):
+                        stats['with_pedigree'] += 1
+                    else:
+                        stats['without_pedigree'] += 1
                 else:
-                    stats['without_pedigree'] += 1
-            else:
-                stats['errors'] += 1
+                    stats['errors'] += 1
 
-            # Track processed IDs
-            processed_ids.append(horse_id)
+                # Track processed IDs
+                processed_ids.append(horse_id)
 
-            # Progress logging and checkpoint saving every 100 horses
-            if idx % 100 == 0:
-                elapsed = (datetime.utcnow() - stats['session_start']).total_seconds()
-                rate = idx / elapsed if elapsed > 0 else 0
-                remaining = (total_horses - idx) / rate if rate > 0 else 0
-                remaining_hours = remaining / 3600
+                # Progress logging and checkpoint saving every 100 horses
+                if idx % 100 == 0:
+                    elapsed = (datetime.utcnow() - stats['session_start']).total_seconds()
+                    rate = idx / elapsed if elapsed > 0 else 0
+                    remaining = (total_horses - idx) / rate if rate > 0 else 0
+                    remaining_hours = remaining / 3600
 
-                # Calculate new ETA
-                eta_timestamp = datetime.utcnow().timestamp() + remaining
-                eta_str = datetime.fromtimestamp(eta_timestamp).strftime('%Y-%m-%d %H:%M:%S')
+                    # Calculate new ETA
+                    eta_timestamp = datetime.utcnow().timestamp() + remaining
+                    eta_str = datetime.fromtimestamp(eta_timestamp).strftime('%Y-%m-%d %H:%M:%S')
 
-                logger.info(f"Progress: {idx}/{total_horses} ({idx/total_horses*100:.1f}%) | "
-                          f"Pedigrees: {stats['with_pedigree']} | "
-                          f"Errors: {stats['errors']} | "
-                          f"Rate: {rate:.1f}/sec | "
-                          f"ETA: {remaining_hours:.1f}h ({eta_str})")
+                    logger.info(f"Progress: {idx}/{total_horses} ({idx/total_horses*100:.1f}%) | "
+                              f"Pedigrees: {stats['with_pedigree']} | "
+                              f"Errors: {stats['errors']} | "
+                              f"Rate: {rate:.1f}/sec | "
+                              f"ETA: {remaining_hours:.1f}h ({eta_str})")
 
-                # Save checkpoint
-                self.save_checkpoint(stats, processed_ids)
+                    # Save checkpoint
+                    self.save_checkpoint(stats, processed_ids)
 
-            # Rate limiting: 2 requests per second
-            time.sleep(0.5)
+                # Rate limiting is done by the API scheduler (backfill priority)
+                usage['units'] = idx
 
         # Final statistics
         stats['end_time'] = datetime.utcnow()
@@ -402,6 +419,7 @@ class HorsePedigreeBackfillEnhanced:
         logger.info(f"Without pedigree: {stats['without_pedigree']} ({stats['without_pedigree']/stats['processed']*100:.1f}%)")
         logger.info(f"Errors: {stats['errors']} ({stats['errors']/stats['processed']*100:.1f}%)")
         logger.info(f"Duration: {stats['duration_hours']:.2f} hours ({stats['duration_seconds']/60:.0f} minutes)")
+        get_api_scheduler().log_metrics(logger)
         logger.info("=" * 80)
 
         # Save final checkpoint
@@ -422,20 +440,26 @@ def main():
     parser.add_argument('--non-interactive', action='store_true',
                        help='Run without confirmation prompt (for background jobs)')
     parser.add_argument('--checkpoint-file', type=str, help='Custom checkpoint file path')
+    parser.add_argument('--ignore-budget', action='store_true', help='Run even if the daily API budget is exceeded')
 
     args = parser.parse_args()
 
+    # Yield the shared API rate limit to live and daily updates
+    set_default_priority('backfill')
+
     backfill = HorsePedigreeBackfillEnhanced(checkpoint_file=args.checkpoint_file)
 
     if args.test:
         logger.info("TEST MODE: Processing only 10 horses")
-        result = backfill.run(max_horses=10, non_interactive=args.non_interactive)
+        result = backfill.run(max_horses=10, non_interactive=args.non_interactive,
+                              ignore_budget=args.ignore_budget)
     else:
         result = backfill.run(
             max_horses=args.max,
             skip_horses=args.skip,
             resume=args.resume,
-            non_interactive=args.non_interactive
+            non_interactive=args.non_interactive,
+            ignore_budget=args.ignore_budget
         )
 
     return result
@@ -12,9 +12,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List
 from config.config import get_config
 from utils.logger import get_logger
+from utils.api_scheduler import set_default_priority
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
 from utils.position_parser import parse_rating
+from utils.coverage import CoverageService
 
 logger = get_logger('backfill_race_ratings')
 
@@ -37,6 +39,7 @@ class RaceRatingsBackfill:
             service_key=self.config.supabase.service_key,
             batch_size=self.config.supabase.batch_size
         )
+        self.coverage = CoverageService(self.db_client)
 
     def get_races_needing_ratings(self, days_back: int = 365) -> List[str]:
         """
@@ -52,31 +55,9 @@ class RaceRatingsBackfill:
 
         cutoff_date = (datetime.utcnow() - timedelta(days=days_back)).date()
 
-        # Query races where runners have NULL ratings
-        # Note: We can't do complex joins in Supabase client, so we'll get all races
-        # in the date range and then check their runners
+        # One grouped query (paged) instead of one runner query per race
         try:
-            # Get all races in date range
-            result = self.db_client.client.table('ra_mst_races').select('race_id, race_date').gte('race_date', cutoff_date.isoformat()).execute()
-
-            all_race_ids = [row['race_id'] for row in result.data]
-            logger.info(f"Found {len(all_race_ids)} total races in date range")
-
-            # For each race, check if it has runners with missing ratings
-            races_needing_update = []
-
-            logger.info("Checking which races have runners with missing ratings...")
-            for i, race_id in enumerate(all_race_ids, 1):
-                if i % 1000 == 0:
-                    logger.info(f"Checked {i}/{len(all_race_ids)} races...")
-
-                # Get runners for this race with NULL ratings
-                runners_result = self.db_client.client.table('ra_mst_runners').select('runner_id').eq('race_id', race_id).is_('official_rating', 'null').is_('rpr', 'null').is_('tsr', 'null').limit(1).execute()
-
-                # If this race has any runners with ALL ratings NULL, add to list
-                if runners_result.data:
-                    races_needing_update.append(race_id)
-
+            races_needing_update = self.coverage.races_missing_ratings(cutoff_date)
             logger.info(f"Found {len(races_needing_update)} races with missing ratings data")
             return races_needing_update
 
@@ -293,6 +274,9 @@ def main():
 
     args = parser.parse_args()
 
+    # Yield the shared API rate limit to live and daily updates
+    set_default_priority('backfill')
+
     backfill = RaceRatingsBackfill()
 
     result = backfill.run(
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Sync Local Analytics Mirror
+
+Brings the local columnar mirror of ra_mst_races and ra_mst_runners up to date
+(see utils/analytics_mirror.py). Only rows changed since the last sync are
+fetched, so this is cheap to run after every results fetch.
+
+Analytics scripts then read from disk with --from-mirror:
+    python3 scripts/population/populate_phase2_analytics.py --from-mirror
+    python3 scripts/population/populate_entity_combinations_v2.py --from-mirror
+
+Usage:
+    python3 scripts/maintenance/sync_analytics_mirror.py [--full] [--dir PATH]
+
+Options:
+    --full        Ignore the watermarks and re-mirror everything
+    --dir PATH    Mirror directory (default: $ANALYTICS_MIRROR_DIR or data/analytics_mirror)
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime
+import argparse
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config.config import get_config
+from utils.logger import get_logger
+from utils.supabase_client import SupabaseReferenceClient
+from utils.analytics_mirror import AnalyticsMirror
+
+logger = get_logger('sync_analytics_mirror')
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(
+        description='Sync the local columnar analytics mirror'
+    )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Ignore the watermarks and re-mirror everything'
+    )
+    parser.add_argument(
+        '--dir',
+        type=str,
+        default=None,
+        help='Mirror directory'
+    )
+
+    args = parser.parse_args()
+
+    config = get_config()
+    db_client = SupabaseReferenceClient(
+        url=config.supabase.url,
+        service_key=config.supabase.service_key,
+        batch_size=config.supabase.batch_size
+    )
+    mirror = AnalyticsMirror(args.dir)
+
+    logger.info(f"Syncing analytics mirror at {mirror.root}")
+    logger.info(f"Watermarks: {mirror.manifest['watermarks'] or 'none (initial sync)'}")
+    start_time = datetime.now()
+
+    try:
+        stats = mirror.sync(db_client, full=args.full)
+    except Exception as e:
+        logger.error(f"\n❌ FAILED: {e}", exc_info=True)
+        sys.exit(1)
+
+    logger.info("\n✅ SUCCESS")
+    for table, table_stats in stats.items():
+        rows = sum(mirror.manifest['partitions'].get(table, {}).values())
+        logger.info(f"{table}: {table_stats['fetched']} changed rows, "
+                    f"{table_stats['partitions_written']} partitions written, {rows} rows mirrored")
+    logger.info(f"Duration: {datetime.now() - start_time}")
+
+
+if __name__ == '__main__':
+    main()
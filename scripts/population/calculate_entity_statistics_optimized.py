@@ -20,6 +20,7 @@ from config.config import get_config
 import psycopg2
 from urllib.parse import urlparse
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('calculate_entity_statistics_optimized')
 
@@ -190,4 +191,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
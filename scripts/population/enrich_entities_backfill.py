@@ -31,6 +31,7 @@ from utils.logger import get_logger
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
 from utils.entity_extractor import EntityExtractor
+from utils.profiling import run_profiled
 
 logger = get_logger('enrich_entities_backfill')
 
@@ -362,4 +363,4 @@ Examples:
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
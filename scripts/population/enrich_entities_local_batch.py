@@ -3,11 +3,17 @@ Local Batch Entity Enrichment Script
 
 This script uses a highly optimized approach:
 1. Fetch all unique entities that need enrichment from database
-2. Enrich locally by fetching from API and storing in memory
-3. Batch write all enriched data to database at once
+2. Enrich locally by fetching from API and appending to a local cache
+3. Batch write all enriched data to database from the cache
 
 This eliminates per-entity database queries and uses bulk inserts for maximum speed.
 
+Enriched records are appended to JSON Lines files in logs/enrichment_cache
+rather than held in memory, and are inserted by streaming those files in
+batches. The in-memory buffer is flushed every 100 horses, or sooner when
+the process goes over its memory budget (--memory-budget-mb,
+RACING_MEMORY_BUDGET_MB or the container limit).
+
 USAGE:
     # Enrich all entities locally then bulk insert
     python3 scripts/enrich_entities_local_batch.py
@@ -17,6 +23,9 @@ USAGE:
 
     # Test mode (100 horses only)
     python3 scripts/enrich_entities_local_batch.py --test
+
+    # Flush buffered records sooner on a small instance
+    python3 scripts/enrich_entities_local_batch.py --memory-budget-mb 1200
 """
 
 import sys
@@ -26,19 +35,24 @@ sys.path.append(str(Path(__file__).parent.parent))
 import time
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set
 from config.config import get_config
 from utils.logger import get_logger
+from utils.memory_budget import BUFFER_CHECK_EVERY, BUFFER_MIN_ITEMS, MemoryBudget
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
+from utils.profiling import run_profiled
 
 logger = get_logger('enrich_entities_local_batch')
 
+FLUSH_EVERY = 100           # Horses between cache flushes (and progress saves)
+INSERT_BATCH_SIZE = 5000    # Cached records read back per bulk insert call
+
 
 class LocalBatchEnricher:
     """Local batch enrichment for maximum performance"""
 
-    def __init__(self, checkpoint_file: str = None):
+    def __init__(self, checkpoint_file: str = None, budget: Optional[MemoryBudget] = None):
         """Initialize local batch enricher"""
         self.config = get_config()
         self.api_client = RacingAPIClient(
@@ -63,6 +77,14 @@ class LocalBatchEnricher:
         # Local cache directory for intermediate results
         self.cache_dir = Path(__file__).parent.parent / 'logs' / 'enrichment_cache'
         self.cache_dir.mkdir(exist_ok=True)
+        self.horses_file = self.cache_dir / 'horses_cache.jsonl'
+        self.pedigrees_file = self.cache_dir / 'pedigrees_cache.jsonl'
+        self.progress_file = self.cache_dir / 'progress.json'
+
+        # Flush buffered records early when over budget. The buffer never
+        # holds more than a few hundred records, so RSS is sampled per horse
+        self.budget = budget if budget is not None else MemoryBudget.from_env(
+            check_every=BUFFER_CHECK_EVERY, min_items=BUFFER_MIN_ITEMS)
 
     def load_checkpoint(self) -> Optional[Dict]:
         """Load checkpoint"""
@@ -257,20 +279,24 @@ class LocalBatchEnricher:
     def enrich_horses_locally(
         self,
         horse_ids: List[str],
-        resume_from: Optional[str] = None
-    ) -> tuple[List[Dict], List[Dict]]:
+        resume_from: Optional[str] = None,
+        cached_horses: int = 0
+    ) -> tuple[int, int]:
         """
-        Enrich horses by fetching from API and building local lists
+        Enrich horses by fetching from API and appending to the local cache
 
         Args:
-            horse_ids: List of horse IDs to enrich
+            horse_ids: List of horse IDs to enrich (in a stable order)
             resume_from: Horse ID to resume from
+            cached_horses: Horses already in the cache (for progress)
 
         Returns:
-            Tuple of (horses_list, pedigrees_list)
+            Tuple of (horses_cached, pedigrees_cached) by this call
         """
         horses = []
         pedigrees = []
+        horses_cached = 0
+        pedigrees_cached = 0
 
         start_index = 0
         if resume_from:
@@ -281,112 +307,157 @@ class LocalBatchEnricher:
                 pass
 
         total = len(horse_ids)
+        last_horse_id = resume_from
         for idx, horse_id in enumerate(horse_ids[start_index:], start=start_index):
+            last_horse_id = horse_id
             try:
                 # Fetch horse details from Pro endpoint
                 logger.debug(f"[{idx+1}/{total}] Fetching horse {horse_id}...")
                 horse_data = self.api_client.get_horse_details(horse_id, tier='pro')
 
-                if not horse_data:
-                    continue
-
-                # Build horse record (matching EntityExtractor format)
-                horse_record = {
-                    'horse_id': horse_id,
-                    'name': horse_data.get('name'),
-                    'sex': horse_data.get('sex'),
-                    'dob': horse_data.get('dob'),
-                    'sex_code': horse_data.get('sex_code'),
-                    'colour': horse_data.get('colour'),
-                    'colour_code': horse_data.get('colour_code'),
-                    'region': horse_data.get('region'),
-                    'created_at': datetime.utcnow().isoformat(),
-                    'updated_at': datetime.utcnow().isoformat()
-                }
-                horses.append(horse_record)
-
-                # Build pedigree record if we have pedigree data (matching EntityExtractor format)
-                if horse_data.get('sire_id') or horse_data.get('dam_id') or horse_data.get('damsire_id'):
-                    pedigree_record = {
+                if horse_data:
+                    # Build horse record (matching EntityExtractor format)
+                    horse_record = {
                         'horse_id': horse_id,
-                        'sire_id': horse_data.get('sire_id'),
-                        'sire': horse_data.get('sire'),
-                        'dam_id': horse_data.get('dam_id'),
-                        'dam': horse_data.get('dam'),
-                        'damsire_id': horse_data.get('damsire_id'),
-                        'damsire': horse_data.get('damsire'),
-                        'breeder': horse_data.get('breeder'),
+                        'name': horse_data.get('name'),
+                        'sex': horse_data.get('sex'),
+                        'dob': horse_data.get('dob'),
+                        'sex_code': horse_data.get('sex_code'),
+                        'colour': horse_data.get('colour'),
+                        'colour_code': horse_data.get('colour_code'),
                         'region': horse_data.get('region'),
                         'created_at': datetime.utcnow().isoformat(),
                         'updated_at': datetime.utcnow().isoformat()
                     }
-                    pedigrees.append(pedigree_record)
-
-                # Rate limiting: 2 requests/second
-                time.sleep(0.5)
-
-                # Save progress every 100 horses
-                if (idx + 1) % 100 == 0:
-                    logger.info(f"Progress: {idx+1}/{total} horses enriched ({(idx+1)/total*100:.1f}%)")
-                    # Save intermediate results
-                    self._save_intermediate_results(horses, pedigrees, horse_id)
+                    horses.append(horse_record)
+
+                    # Build pedigree record if we have pedigree data (matching EntityExtractor format)
+                    if horse_data.get('sire_id') or horse_data.get('dam_id') or horse_data.get('damsire_id'):
+                        pedigree_record = {
+                            'horse_id': horse_id,
+                            'sire_id': horse_data.get('sire_id'),
+                            'sire': horse_data.get('sire'),
+                            'dam_id': horse_data.get('dam_id'),
+                            'dam': horse_data.get('dam'),
+                            'damsire_id': horse_data.get('damsire_id'),
+                            'damsire': horse_data.get('damsire'),
+                            'breeder': horse_data.get('breeder'),
+                            'region': horse_data.get('region'),
+                            'created_at': datetime.utcnow().isoformat(),
+                            'updated_at': datetime.utcnow().isoformat()
+                        }
+                        pedigrees.append(pedigree_record)
+
+                    # Rate limiting: 2 requests/second
+                    time.sleep(0.5)
 
             except Exception as e:
                 logger.error(f"Error enriching horse {horse_id}: {e}")
-                continue
 
-        return horses, pedigrees
+            # Append to the cache every 100 horses, or sooner when over the memory budget
+            over_budget = self.budget is not None and self.budget.should_spill(len(horses) + len(pedigrees))
+            if (idx + 1) % FLUSH_EVERY == 0 or over_budget:
+                horses_cached += len(horses)
+                pedigrees_cached += len(pedigrees)
+                self._save_intermediate_results(horses, pedigrees, horse_id, cached_horses + horses_cached)
+                horses, pedigrees = [], []
+                if over_budget:
+                    self.budget.spilled()
+                if (idx + 1) % FLUSH_EVERY == 0:
+                    logger.info(f"Progress: {idx+1}/{total} horses enriched ({(idx+1)/total*100:.1f}%)")
 
-    def _save_intermediate_results(self, horses: List[Dict], pedigrees: List[Dict], last_horse_id: str):
-        """Save intermediate results to cache files"""
-        try:
-            horses_file = self.cache_dir / 'horses_cache.json'
-            pedigrees_file = self.cache_dir / 'pedigrees_cache.json'
-            progress_file = self.cache_dir / 'progress.json'
+        if horses or pedigrees or last_horse_id != resume_from:
+            horses_cached += len(horses)
+            pedigrees_cached += len(pedigrees)
+            self._save_intermediate_results(horses, pedigrees, last_horse_id, cached_horses + horses_cached)
 
-            with open(horses_file, 'w') as f:
-                json.dump(horses, f)
+        return horses_cached, pedigrees_cached
 
-            with open(pedigrees_file, 'w') as f:
-                json.dump(pedigrees, f)
+    def _save_intermediate_results(self, horses: List[Dict], pedigrees: List[Dict], last_horse_id: str,
+                                   horses_cached: int):
+        """Append buffered records to the cache files and record progress"""
+        try:
+            self._append_jsonl(self.horses_file, horses)
+            self._append_jsonl(self.pedigrees_file, pedigrees)
 
-            with open(progress_file, 'w') as f:
-                json.dump({'last_horse_id': last_horse_id, 'count': len(horses)}, f)
+            # Progress is written after the records, so a resume never skips uncached horses
+            with open(self.progress_file, 'w') as f:
+                json.dump({'last_horse_id': last_horse_id, 'count': horses_cached}, f)
 
         except Exception as e:
             logger.error(f"Error saving intermediate results: {e}")
 
-    def load_intermediate_results(self) -> tuple[List[Dict], List[Dict], Optional[str]]:
-        """Load intermediate results from cache"""
-        horses_file = self.cache_dir / 'horses_cache.json'
-        pedigrees_file = self.cache_dir / 'pedigrees_cache.json'
-        progress_file = self.cache_dir / 'progress.json'
+    @staticmethod
+    def _append_jsonl(path: Path, records: List[Dict]):
+        if not records:
+            return
+        with open(path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
 
-        horses = []
-        pedigrees = []
+    def _iter_cached(self, path: Path, batch_size: int = INSERT_BATCH_SIZE,
+                     key: str = 'horse_id') -> Iterator[List[Dict]]:
+        """
+        Read a cache file back in batches, one record per key per batch
+
+        Records are appended before progress.json is written, so a crash
+        between the two makes the resumed run fetch and append the same
+        horses again. A batch holding one key twice would fail the whole
+        upsert ("cannot affect row a second time"), so the later record wins.
+        Copies in different batches are harmless - later batches upsert later.
+        """
+        if not path.exists():
+            return
+        batch: Dict[str, Dict] = {}
+        duplicates = 0
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partial last line from an interrupted run; the horse is re-fetched
+                    logger.warning(f"Skipping unreadable line in {path.name}")
+                    continue
+                if record.get(key) in batch:
+                    duplicates += 1
+                batch[record.get(key)] = record
+                if len(batch) >= batch_size:
+                    yield list(batch.values())
+                    batch = {}
+        if batch:
+            yield list(batch.values())
+        if duplicates:
+            logger.info(f"{path.name}: {duplicates} re-fetched record(s) merged (interrupted run)")
+
+    def load_intermediate_results(self) -> tuple[int, Optional[str]]:
+        """Load progress from cache (the cached records stay on disk until inserted)"""
+        horses_cached = 0
         last_horse_id = None
 
         try:
-            if horses_file.exists():
-                with open(horses_file, 'r') as f:
-                    horses = json.load(f)
-
-            if pedigrees_file.exists():
-                with open(pedigrees_file, 'r') as f:
-                    pedigrees = json.load(f)
-
-            if progress_file.exists():
-                with open(progress_file, 'r') as f:
+            if self.progress_file.exists():
+                with open(self.progress_file, 'r') as f:
                     progress = json.load(f)
                     last_horse_id = progress.get('last_horse_id')
+                    horses_cached = progress.get('count', 0)
 
-            if horses:
-                logger.info(f"Loaded {len(horses)} horses from cache, resume from {last_horse_id}")
+            if horses_cached:
+                logger.info(f"Found {horses_cached} horses in cache, resume from {last_horse_id}")
 
         except Exception as e:
             logger.error(f"Error loading intermediate results: {e}")
 
-        return horses, pedigrees, last_horse_id
+        return horses_cached, last_horse_id
+
+    def _insert_cached(self, path: Path, insert) -> int:
+        """Stream a cache file into the database in batches"""
+        inserted = 0
+        for batch in self._iter_cached(path):
+            result = insert(batch)
+            inserted += result.get('inserted', 0)
+        return inserted
 
     def enrich_all(self, test_mode: bool = False, resume: bool = False):
         """
@@ -409,7 +480,8 @@ class LocalBatchEnricher:
         existing_entities = self.get_existing_entities()
 
         # Step 3: Calculate what needs to be enriched
-        horses_to_enrich = list(all_entities['horses'] - existing_entities['horses'])
+        # Sorted so --resume finds its place in the same order
+        horses_to_enrich = sorted(all_entities['horses'] - existing_entities['horses'])
         jockeys_to_add = list(all_entities['jockeys'] - existing_entities['jockeys'])
         trainers_to_add = list(all_entities['trainers'] - existing_entities['trainers'])
         owners_to_add = list(all_entities['owners'] - existing_entities['owners'])
@@ -426,14 +498,15 @@ class LocalBatchEnricher:
             logger.info(f"\nTest mode: limiting to {len(horses_to_enrich)} horses")
 
         # Check for cached results
-        horses_enriched = []
-        pedigrees_enriched = []
+        horses_cached = 0
         resume_from = None
 
         if resume:
-            horses_enriched, pedigrees_enriched, resume_from = self.load_intermediate_results()
+            horses_cached, resume_from = self.load_intermediate_results()
+        else:
+            self._clear_cache()
 
-        # Step 4: Enrich horses locally (fetch from API, build lists)
+        # Step 4: Enrich horses locally (fetch from API, append to cache)
         if horses_to_enrich:
             logger.info(f"\nEnriching {len(horses_to_enrich)} horses from Racing API...")
             estimated_time = len(horses_to_enrich) * 0.5 / 60  # 0.5s per horse in minutes
@@ -442,13 +515,12 @@ class LocalBatchEnricher:
 
             new_horses, new_pedigrees = self.enrich_horses_locally(
                 horses_to_enrich,
-                resume_from=resume_from
+                resume_from=resume_from,
+                cached_horses=horses_cached
             )
 
-            horses_enriched.extend(new_horses)
-            pedigrees_enriched.extend(new_pedigrees)
-
-            logger.info(f"Enrichment complete: {len(horses_enriched)} horses, {len(pedigrees_enriched)} pedigrees")
+            logger.info(f"Enrichment complete: {horses_cached + new_horses} horses cached "
+                        f"({new_horses} horses, {new_pedigrees} pedigrees this run)")
 
         # Step 5: Bulk insert everything to database
         logger.info("\n" + "=" * 80)
@@ -464,17 +536,15 @@ class LocalBatchEnricher:
         }
 
         # Insert horses
-        if horses_enriched:
-            logger.info(f"\nInserting {len(horses_enriched)} horses...")
-            result = self.db_client.insert_horses(horses_enriched)
-            stats['horses_inserted'] = result.get('inserted', 0)
+        if self.horses_file.exists():
+            logger.info("\nInserting cached horses...")
+            stats['horses_inserted'] = self._insert_cached(self.horses_file, self.db_client.insert_horses)
             logger.info(f"Horses inserted: {stats['horses_inserted']}")
 
         # Insert pedigrees
-        if pedigrees_enriched:
-            logger.info(f"\nInserting {len(pedigrees_enriched)} pedigrees...")
-            result = self.db_client.insert_pedigree(pedigrees_enriched)
-            stats['pedigrees_inserted'] = result.get('inserted', 0)
+        if self.pedigrees_file.exists():
+            logger.info("\nInserting cached pedigrees...")
+            stats['pedigrees_inserted'] = self._insert_cached(self.pedigrees_file, self.db_client.insert_pedigree)
             logger.info(f"Pedigrees inserted: {stats['pedigrees_inserted']}")
 
         # Build basic records for jockeys/trainers/owners from runner data
@@ -487,6 +557,8 @@ class LocalBatchEnricher:
         logger.info(f"Duration: {duration/60:.1f} minutes ({duration/3600:.1f} hours)")
         logger.info(f"Horses enriched: {stats['horses_inserted']:,}")
         logger.info(f"Pedigrees captured: {stats['pedigrees_inserted']:,}")
+        if self.budget is not None:
+            logger.info(f"Memory budget: {self.budget.summary()}")
         logger.info("=" * 80)
 
         # Clear cache on successful completion
@@ -498,7 +570,7 @@ class LocalBatchEnricher:
     def _clear_cache(self):
         """Clear intermediate cache files"""
         try:
-            for file in self.cache_dir.glob('*.json'):
+            for file in list(self.cache_dir.glob('*.json')) + list(self.cache_dir.glob('*.jsonl')):
                 file.unlink()
             logger.info("Cache cleared")
         except Exception as e:
@@ -531,10 +603,15 @@ Examples:
                        help='Resume from cached progress')
     parser.add_argument('--checkpoint-file', type=str,
                        help='Custom checkpoint file path')
+    parser.add_argument('--memory-budget-mb', type=float,
+                       help='RSS budget; flush buffered records to the cache when exceeded '
+                            '(default: RACING_MEMORY_BUDGET_MB or 70%% of the container limit)')
 
     args = parser.parse_args()
 
-    enricher = LocalBatchEnricher(checkpoint_file=args.checkpoint_file)
+    budget = MemoryBudget(args.memory_budget_mb, check_every=BUFFER_CHECK_EVERY,
+                          min_items=BUFFER_MIN_ITEMS) if args.memory_budget_mb else None
+    enricher = LocalBatchEnricher(checkpoint_file=args.checkpoint_file, budget=budget)
 
     # Run enrichment
     result = enricher.enrich_all(
@@ -546,4 +623,4 @@ Examples:
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -33,6 +33,7 @@ from config.config import get_config
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('fill_missing_data')
 
@@ -823,4 +824,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -46,6 +46,7 @@ import argparse
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 # Import individual populate functions
 try:
@@ -53,6 +54,7 @@ try:
     from populate_runner_statistics import populate_runner_statistics
     from populate_performance_by_distance import populate_performance_by_distance
     from populate_performance_by_venue import populate_performance_by_venue
+    from populate_phase2_analytics import build_phase2_cube
 except ImportError as e:
     print(f"Error importing populate functions: {e}")
     print("Make sure all calculation scripts are in scripts/ directory")
@@ -93,10 +95,15 @@ def run_phase2(args):
 
     results = {}
 
+    # Shared aggregation: one runner scan feeds all three tables
+    cube, collector = None, None
+    if not (args.skip_runner_stats and args.skip_distance and args.skip_venue):
+        cube, collector = build_phase2_cube(include_runner_stats=not args.skip_runner_stats)
+
     # 1. Runner Statistics
     if not args.skip_runner_stats:
         logger.info("\n[1/3] Populating ra_runner_statistics...")
-        result = populate_runner_statistics(min_runs=args.min_runs_runner)
+        result = populate_runner_statistics(min_runs=args.min_runs_runner, cube=cube, collector=collector)
         results['runner_statistics'] = result
 
         if result['success']:
@@ -109,7 +116,7 @@ def run_phase2(args):
     # 2. Performance by Distance
     if not args.skip_distance:
         logger.info("\n[2/3] Populating ra_performance_by_distance...")
-        result = populate_performance_by_distance(min_runs=args.min_runs_distance)
+        result = populate_performance_by_distance(min_runs=args.min_runs_distance, cube=cube)
         results['performance_by_distance'] = result
 
         if result['success']:
@@ -122,7 +129,7 @@ def run_phase2(args):
     # 3. Performance by Venue
     if not args.skip_venue:
         logger.info("\n[3/3] Populating ra_performance_by_venue...")
-        result = populate_performance_by_venue(min_runs=args.min_runs_venue)
+        result = populate_performance_by_venue(min_runs=args.min_runs_venue, cube=cube)
         results['performance_by_venue'] = result
 
         if result['success']:
@@ -252,4 +259,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
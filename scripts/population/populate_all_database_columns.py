@@ -32,6 +32,8 @@ import os
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from utils.profiling import run_profiled
+
 # ====================================================================================
 # CONFIGURATION
 # ====================================================================================
@@ -528,4 +530,4 @@ Examples:
     sys.exit(1 if populator.stats['errors'] > 0 else 0)
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
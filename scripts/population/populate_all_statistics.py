@@ -55,6 +55,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.config import get_config
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
+from utils.profiling import run_profiled
 
 # Import statistics calculation functions
 from scripts.statistics_workers.jockeys_statistics_worker import calculate_jockey_statistics
@@ -677,4 +678,4 @@ Examples:
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
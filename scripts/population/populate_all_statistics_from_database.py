@@ -32,6 +32,15 @@ Usage:
 
     # Resume from checkpoint
     python3 scripts/populate_all_statistics_from_database.py --resume
+
+    # Capture EXPLAIN (ANALYZE, BUFFERS) for queries over 1s
+    python3 scripts/populate_all_statistics_from_database.py --test --explain-slow --slow-query-ms 1000
+
+Statistics are read over a direct PostgreSQL connection (DATABASE_URL or
+DIRECT_CONNECTION); updates go through Supabase. Each run writes
+logs/query_profiles/populate_all_statistics_from_database-<time>.json/.txt
+with per-query timings, the access patterns on ra_mst_runners / ra_races and
+index recommendations.
 """
 
 import sys
@@ -47,6 +56,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.profiling import run_profiled
+from utils.query_profiler import ProfiledConnection, QueryProfiler, database_url
 
 logger = get_logger('populate_all_statistics')
 
@@ -54,12 +65,17 @@ logger = get_logger('populate_all_statistics')
 class UnifiedStatisticsPopulator:
     """Unified statistics calculator for all tables"""
 
-    def __init__(self, test_mode: bool = False, start_date: str = '2015-01-01'):
+    def __init__(self, test_mode: bool = False, start_date: str = '2015-01-01',
+                 profiler: Optional[QueryProfiler] = None):
         self.config = get_config()
         self.db = SupabaseReferenceClient(
             self.config.supabase.url,
             self.config.supabase.service_key
         )
+        dsn = database_url()
+        if not dsn:
+            raise ValueError("DATABASE_URL (or DIRECT_CONNECTION) must be set for SQL statistics queries")
+        self.pg = ProfiledConnection(dsn, profiler)
         self.test_mode = test_mode
         self.start_date = start_date
         self.batch_size = 10 if test_mode else 100
@@ -91,8 +107,7 @@ class UnifiedStatisticsPopulator:
         if self.test_mode:
             jockeys_query += " LIMIT 10"
 
-        result = self.db.execute_query(jockeys_query)
-        jockeys = result.data if result.data else []
+        jockeys = self.pg.query(jockeys_query, label='jockeys_list')
 
         logger.info(f"Processing {len(jockeys)} jockeys...")
 
@@ -127,11 +142,11 @@ class UnifiedStatisticsPopulator:
                   AND rc.date >= '{self.start_date}'
             """
 
-            stats_result = self.db.execute_query(stats_query)
-            if not stats_result.data or len(stats_result.data) == 0:
+            stats_rows = self.pg.query(stats_query, label='jockey_statistics')
+            if not stats_rows:
                 continue
 
-            stats = stats_result.data[0]
+            stats = stats_rows[0]
 
             # Calculate derived fields
             total_rides = stats.get('total_rides', 0) or 0
@@ -217,8 +232,7 @@ class UnifiedStatisticsPopulator:
         if self.test_mode:
             trainers_query += " LIMIT 10"
 
-        result = self.db.execute_query(trainers_query)
-        trainers = result.data if result.data else []
+        trainers = self.pg.query(trainers_query, label='trainers_list')
 
         logger.info(f"Processing {len(trainers)} trainers...")
 
@@ -246,11 +260,11 @@ class UnifiedStatisticsPopulator:
                   AND rc.date >= '{self.start_date}'
             """
 
-            stats_result = self.db.execute_query(stats_query)
-            if not stats_result.data or len(stats_result.data) == 0:
+            stats_rows = self.pg.query(stats_query, label='trainer_statistics')
+            if not stats_rows:
                 continue
 
-            stats = stats_result.data[0]
+            stats = stats_rows[0]
 
             # Calculate derived fields
             total_runners = stats.get('total_runners', 0) or 0
@@ -335,8 +349,7 @@ class UnifiedStatisticsPopulator:
         if self.test_mode:
             owners_query += " LIMIT 10"
 
-        result = self.db.execute_query(owners_query)
-        owners = result.data if result.data else []
+        owners = self.pg.query(owners_query, label='owners_list')
 
         logger.info(f"Processing {len(owners)} owners...")
 
@@ -365,11 +378,11 @@ class UnifiedStatisticsPopulator:
                   AND rc.date >= '{self.start_date}'
             """
 
-            stats_result = self.db.execute_query(stats_query)
-            if not stats_result.data or len(stats_result.data) == 0:
+            stats_rows = self.pg.query(stats_query, label='owner_statistics')
+            if not stats_rows:
                 continue
 
-            stats = stats_result.data[0]
+            stats = stats_rows[0]
 
             # Calculate derived fields
             total_horses = stats.get('total_horses', 0) or 0
@@ -459,8 +472,7 @@ class UnifiedStatisticsPopulator:
         if self.test_mode:
             sires_query += " LIMIT 10"
 
-        result = self.db.execute_query(sires_query)
-        sires = result.data if result.data else []
+        sires = self.pg.query(sires_query, label='sires_list')
 
         logger.info(f"Processing {len(sires)} sires...")
 
@@ -495,8 +507,8 @@ class UnifiedStatisticsPopulator:
                   AND rc.date >= '{self.start_date}'
             """
 
-            career_result = self.db.execute_query(own_career_query)
-            career = career_result.data[0] if career_result.data else {}
+            career_rows = self.pg.query(own_career_query, label='sire_own_career')
+            career = career_rows[0] if career_rows else {}
 
             # Progeny statistics
             progeny_query = f"""
@@ -530,8 +542,8 @@ class UnifiedStatisticsPopulator:
                   AND (rc.date IS NULL OR rc.date >= '{self.start_date}')
             """
 
-            progeny_result = self.db.execute_query(progeny_query)
-            progeny = progeny_result.data[0] if progeny_result.data else {}
+            progeny_rows = self.pg.query(progeny_query, label='sire_progeny')
+            progeny = progeny_rows[0] if progeny_rows else {}
 
             # Calculate averages
             progeny_count = progeny.get('progeny_count', 0) or 0
@@ -637,8 +649,7 @@ class UnifiedStatisticsPopulator:
         if self.test_mode:
             dams_query += " LIMIT 10"
 
-        result = self.db.execute_query(dams_query)
-        dams = result.data if result.data else []
+        dams = self.pg.query(dams_query, label='dams_list')
 
         logger.info(f"Processing {len(dams)} dams...")
 
@@ -673,8 +684,8 @@ class UnifiedStatisticsPopulator:
                   AND rc.date >= '{self.start_date}'
             """
 
-            career_result = self.db.execute_query(own_career_query)
-            career = career_result.data[0] if career_result.data else {}
+            career_rows = self.pg.query(own_career_query, label='dam_own_career')
+            career = career_rows[0] if career_rows else {}
 
             progeny_query = f"""
                 SELECT
@@ -701,8 +712,8 @@ class UnifiedStatisticsPopulator:
                   AND (rc.date IS NULL OR rc.date >= '{self.start_date}')
             """
 
-            progeny_result = self.db.execute_query(progeny_query)
-            progeny = progeny_result.data[0] if progeny_result.data else {}
+            progeny_rows = self.pg.query(progeny_query, label='dam_progeny')
+            progeny = progeny_rows[0] if progeny_rows else {}
 
             progeny_count = progeny.get('progeny_count', 0) or 0
             progeny_runs = progeny.get('progeny_runs', 0) or 0
@@ -792,8 +803,7 @@ class UnifiedStatisticsPopulator:
         if self.test_mode:
             damsires_query += " LIMIT 10"
 
-        result = self.db.execute_query(damsires_query)
-        damsires = result.data if result.data else []
+        damsires = self.pg.query(damsires_query, label='damsires_list')
 
         logger.info(f"Processing {len(damsires)} damsires...")
 
@@ -836,8 +846,8 @@ class UnifiedStatisticsPopulator:
                   AND (rc.date IS NULL OR rc.date >= '{self.start_date}')
             """
 
-            progeny_result = self.db.execute_query(progeny_query)
-            progeny = progeny_result.data[0] if progeny_result.data else {}
+            progeny_rows = self.pg.query(progeny_query, label='damsire_progeny')
+            progeny = progeny_rows[0] if progeny_rows else {}
 
             progeny_count = progeny.get('progeny_count', 0) or 0
             progeny_runs = progeny.get('progeny_runs', 0) or 0
@@ -928,40 +938,50 @@ class UnifiedStatisticsPopulator:
         if tables:
             all_workers = [(name, func) for name, func in all_workers if name in tables]
 
-        # Execute each worker
-        for table_name, worker_func in all_workers:
+        # Execute each worker; the summary, query report and connection close
+        # also run when the loop is interrupted (Ctrl-C, job timeout)
+        try:
+            for table_name, worker_func in all_workers:
+                try:
+                    result = worker_func()
+                    results.append(result)
+                except Exception as e:
+                    logger.error(f"❌ Failed to calculate {table_name} statistics: {e}", exc_info=True)
+                    results.append({
+                        'table': f'ra_mst_{table_name}',
+                        'total': 0,
+                        'updated': 0,
+                        'duration': 0,
+                        'error': str(e)
+                    })
+        finally:
+            overall_duration = time.time() - overall_start
+
+            # Summary
+            logger.info("=" * 80)
+            logger.info("SUMMARY")
+            logger.info("=" * 80)
+
+            total_entities = sum(r.get('total', 0) for r in results)
+            total_updated = sum(r.get('updated', 0) for r in results)
+
+            for result in results:
+                status = "✅" if result.get('updated', 0) > 0 else "❌"
+                logger.info(f"{status} {result['table']}: {result.get('updated', 0)}/{result.get('total', 0)} "
+                           f"({result.get('duration', 0):.1f}s)")
+
+            logger.info("=" * 80)
+            logger.info(f"TOTAL: {total_updated}/{total_entities} entities updated")
+            logger.info(f"DURATION: {overall_duration:.1f}s ({overall_duration/60:.1f} minutes)")
+            logger.info("=" * 80)
+
             try:
-                result = worker_func()
-                results.append(result)
+                self.pg.profiler.log_summary(logger)
+                self.pg.write_report('populate_all_statistics_from_database')
             except Exception as e:
-                logger.error(f"❌ Failed to calculate {table_name} statistics: {e}", exc_info=True)
-                results.append({
-                    'table': f'ra_mst_{table_name}',
-                    'total': 0,
-                    'updated': 0,
-                    'duration': 0,
-                    'error': str(e)
-                })
-
-        overall_duration = time.time() - overall_start
-
-        # Summary
-        logger.info("=" * 80)
-        logger.info("SUMMARY")
-        logger.info("=" * 80)
-
-        total_entities = sum(r.get('total', 0) for r in results)
-        total_updated = sum(r.get('updated', 0) for r in results)
-
-        for result in results:
-            status = "✅" if result.get('updated', 0) > 0 else "❌"
-            logger.info(f"{status} {result['table']}: {result.get('updated', 0)}/{result.get('total', 0)} "
-                       f"({result.get('duration', 0):.1f}s)")
-
-        logger.info("=" * 80)
-        logger.info(f"TOTAL: {total_updated}/{total_entities} entities updated")
-        logger.info(f"DURATION: {overall_duration:.1f}s ({overall_duration/60:.1f} minutes)")
-        logger.info("=" * 80)
+                logger.warning(f"Could not write query profile: {e}")
+            finally:
+                self.pg.close()
 
         return {
             'success': True,
@@ -1000,13 +1020,18 @@ Examples:
     parser.add_argument('--tables', nargs='+',
                        choices=['jockeys', 'trainers', 'owners', 'sires', 'dams', 'damsires'],
                        help='Specific tables to update (default: all)')
+    parser.add_argument('--explain-slow', action='store_true', default=None,
+                       help='Capture EXPLAIN (ANALYZE, BUFFERS) for slow queries (default: RACING_EXPLAIN_SLOW_QUERIES)')
+    parser.add_argument('--slow-query-ms', type=float,
+                       help='Slow query threshold in milliseconds (default: RACING_SLOW_QUERY_MS or 500)')
 
     args = parser.parse_args()
 
     try:
         populator = UnifiedStatisticsPopulator(
             test_mode=args.test,
-            start_date=args.start_date
+            start_date=args.start_date,
+            profiler=QueryProfiler(slow_ms=args.slow_query_ms, explain=args.explain_slow)
         )
 
         result = populator.run_all(tables=args.tables)
@@ -1027,4 +1052,4 @@ Examples:
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
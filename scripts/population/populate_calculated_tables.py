@@ -32,6 +32,7 @@ import argparse
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 from populate_entity_combinations_from_runners import populate_entity_combinations
 from populate_runner_odds import populate_runner_odds
 
@@ -138,4 +139,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
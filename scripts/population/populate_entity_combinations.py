@@ -26,6 +26,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.config import get_config
 from utils.logger import get_logger
 from utils.supabase_client import SupabaseReferenceClient
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_entity_combinations')
 
@@ -276,4 +277,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
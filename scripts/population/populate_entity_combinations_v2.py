@@ -16,14 +16,17 @@ Usage:
 Options:
     --min-runs N       Minimum number of runs for a combination (default: 5)
     --pair-type TYPE   Combination type: jockey_horse, trainer_horse, owner_horse,
-                       jockey_trainer, or all (default: all)
+                       jockey_trainer, jockey_course, trainer_course, or all
+                       (default: all = the four runner-level pair types)
+    --from-mirror      Scan runners from the local analytics mirror (with --pair-type all)
+
+All pair types are computed in one scan by utils/combination_engine.py.
 """
 
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple
-from collections import defaultdict
+from typing import Dict, List, Optional
 import argparse
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -31,160 +34,18 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.config import get_config
 from utils.logger import get_logger
 from utils.supabase_client import SupabaseReferenceClient
+from utils.combination_engine import CombinationEngine, DEFAULT_PAIR_TYPES, PAIR_TYPES
+from utils.analytics_mirror import AnalyticsMirror
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_entity_combinations_v2')
 
 
-def analyze_entity_pairs(
-    db_client: SupabaseReferenceClient,
-    pair_type: str,
-    min_runs: int = 5
-) -> Dict:
-    """
-    Analyze runner data to find entity pair combinations
-
-    Args:
-        db_client: Database client
-        pair_type: Type of pair (jockey_horse, trainer_horse, etc.)
-        min_runs: Minimum number of runs for a combination to be included
-
-    Returns:
-        Dict with combination statistics
-    """
-    logger.info(f"Analyzing {pair_type} combinations...")
-    logger.info("Fetching runners data...")
-
-    # Fetch all runners with position data
-    response = db_client.client.table('ra_mst_runners')\
-        .select('jockey_id, trainer_id, owner_id, horse_id, position, race_id')\
-        .not_.is_('position', 'null')\
-        .execute()
-
-    if not response.data:
-        logger.error("No runner data found")
-        return {}
-
-    logger.info(f"Analyzing {len(response.data)} runner records...")
-
-    # Determine entity types based on pair_type
-    if pair_type == 'jockey_horse':
-        entity1_key, entity2_key = 'jockey_id', 'horse_id'
-        entity1_type, entity2_type = 'jockey', 'horse'
-    elif pair_type == 'trainer_horse':
-        entity1_key, entity2_key = 'trainer_id', 'horse_id'
-        entity1_type, entity2_type = 'trainer', 'horse'
-    elif pair_type == 'owner_horse':
-        entity1_key, entity2_key = 'owner_id', 'horse_id'
-        entity1_type, entity2_type = 'owner', 'horse'
-    elif pair_type == 'jockey_trainer':
-        entity1_key, entity2_key = 'jockey_id', 'trainer_id'
-        entity1_type, entity2_type = 'jockey', 'trainer'
-    else:
-        raise ValueError(f"Unknown pair type: {pair_type}")
-
-    # Track combinations
-    combinations = defaultdict(lambda: {
-        'total_runs': 0,
-        'wins': 0,
-        'places_2nd': 0,
-        'places_3rd': 0
-    })
-
-    for runner in response.data:
-        entity1_id = runner.get(entity1_key)
-        entity2_id = runner.get(entity2_key)
-        position = runner.get('position')
-
-        if not entity1_id or not entity2_id:
-            continue
-
-        # Create combination key
-        combo_key = f"{entity1_id}|{entity2_id}"
-
-        # Track run
-        combinations[combo_key]['total_runs'] += 1
-        combinations[combo_key]['entity1_id'] = entity1_id
-        combinations[combo_key]['entity2_id'] = entity2_id
-        combinations[combo_key]['entity1_type'] = entity1_type
-        combinations[combo_key]['entity2_type'] = entity2_type
-
-        # Track performance
-        if position:
-            try:
-                pos_int = int(position)
-                if pos_int == 1:
-                    combinations[combo_key]['wins'] += 1
-                elif pos_int == 2:
-                    combinations[combo_key]['places_2nd'] += 1
-                elif pos_int == 3:
-                    combinations[combo_key]['places_3rd'] += 1
-            except ValueError:
-                pass  # Skip non-numeric positions
-
-    # Filter combinations by minimum runs
-    filtered_combinations = {
-        key: data for key, data in combinations.items()
-        if data['total_runs'] >= min_runs
-    }
-
-    logger.info(f"Found {len(combinations)} total {pair_type} combinations")
-    logger.info(f"Filtered to {len(filtered_combinations)} combinations with {min_runs}+ runs")
-
-    return filtered_combinations
-
-
-def create_combination_records(combinations: Dict) -> List[Dict]:
-    """
-    Convert combination analysis to database records
-
-    Args:
-        combinations: Dictionary of combinations with statistics
-
-    Returns:
-        List of records ready for database insertion
-    """
-    records = []
-
-    for combo_key, data in combinations.items():
-        total_runs = data['total_runs']
-        wins = data['wins']
-        places_2nd = data['places_2nd']
-        places_3rd = data['places_3rd']
-        places_total = places_2nd + places_3rd
-
-        # Calculate percentages
-        win_percent = (wins / total_runs * 100) if total_runs > 0 else 0.0
-        place_percent = ((wins + places_total) / total_runs * 100) if total_runs > 0 else 0.0
-
-        record = {
-            # Schema doesn't have explicit 'id' field - it's auto-generated bigint
-            'entity1_type': data['entity1_type'],
-            'entity1_id': data['entity1_id'],
-            'entity2_type': data['entity2_type'],
-            'entity2_id': data['entity2_id'],
-            'total_runs': total_runs,
-            'wins': wins,
-            'places_2nd': places_2nd,
-            'places_3rd': places_3rd,
-            'win_percent': round(win_percent, 2),
-            'place_percent': round(place_percent, 2),
-            'ae_index': None,  # Would need odds data to calculate
-            'profit_loss_1u': None,  # Would need odds data to calculate
-            'query_filters': None,  # Optional JSON filters
-            'calculated_at': datetime.utcnow().isoformat()
-        }
-
-        records.append(record)
-
-    # Sort by total runs (most frequent first)
-    records.sort(key=lambda x: x['total_runs'], reverse=True)
-
-    return records
-
-
 def populate_entity_combinations(
     pair_type: str = 'jockey_horse',
-    min_runs: int = 5
+    min_runs: int = 5,
+    engine: Optional[CombinationEngine] = None,
+    db_client: Optional[SupabaseReferenceClient] = None
 ) -> Dict:
     """
     Populate entity combinations table
@@ -192,17 +53,19 @@ def populate_entity_combinations(
     Args:
         pair_type: Type of entity pair to analyze
         min_runs: Minimum number of runs for inclusion
+        engine: Prebuilt CombinationEngine (avoids a separate runner scan)
+        db_client: Optional existing database client
 
     Returns:
         Dict with operation statistics
     """
-    config = get_config()
-
-    db_client = SupabaseReferenceClient(
-        url=config.supabase.url,
-        service_key=config.supabase.service_key,
-        batch_size=config.supabase.batch_size
-    )
+    if db_client is None:
+        config = get_config()
+        db_client = SupabaseReferenceClient(
+            url=config.supabase.url,
+            service_key=config.supabase.service_key,
+            batch_size=config.supabase.batch_size
+        )
 
     logger.info("=" * 80)
     logger.info(f"POPULATING ra_entity_combinations TABLE - {pair_type}")
@@ -210,11 +73,14 @@ def populate_entity_combinations(
     logger.info(f"Minimum runs per combination: {min_runs}")
 
     try:
-        # Step 1: Analyze combinations
+        # Step 1: Analyze combinations (min_runs filter applied inside the engine)
         logger.info("\nStep 1: Analyzing entity pair combinations...")
-        combinations = analyze_entity_pairs(db_client, pair_type, min_runs)
+        if engine is None:
+            engine = CombinationEngine.from_database(db_client, [pair_type])
+
+        records = engine.records(pair_type, min_runs)
 
-        if not combinations:
+        if not records:
             logger.warning(f"No {pair_type} combinations found with min_runs={min_runs}")
             return {
                 'success': True,
@@ -224,11 +90,8 @@ def populate_entity_combinations(
                 'total_in_db': 0
             }
 
-        # Step 2: Create records
-        logger.info("\nStep 2: Creating combination records...")
-        records = create_combination_records(combinations)
-
-        logger.info(f"Created {len(records)} combination records")
+        # Step 2: Report records
+        logger.info(f"\nStep 2: Created {len(records)} combination records with {min_runs}+ runs")
 
         # Show top 10
         logger.info(f"\nTop 10 {pair_type} combinations by frequency:")
@@ -292,7 +155,7 @@ def populate_entity_combinations(
         return {
             'success': True,
             'pair_type': pair_type,
-            'combinations_analyzed': len(combinations),
+            'combinations_analyzed': len(engine.matrices[pair_type]),
             'records_created': len(records),
             'database_stats': stats,
             'total_in_db': verify_response.count
@@ -306,17 +169,32 @@ def populate_entity_combinations(
         }
 
 
-def populate_all_pair_types(min_runs: int = 5) -> Dict:
+def populate_all_pair_types(min_runs: int = 5, pair_types: Optional[List[str]] = None,
+                            from_mirror: bool = False) -> Dict:
     """
     Populate all entity pair types
 
+    All pair types are computed from a single runner scan.
+
     Args:
         min_runs: Minimum runs per combination
+        pair_types: Pair types to populate (default: DEFAULT_PAIR_TYPES)
+        from_mirror: Scan the local analytics mirror instead of the database
 
     Returns:
         Dict with results for all pair types
     """
-    pair_types = ['jockey_horse', 'trainer_horse', 'owner_horse', 'jockey_trainer']
+    pair_types = pair_types or DEFAULT_PAIR_TYPES
+
+    config = get_config()
+    db_client = SupabaseReferenceClient(
+        url=config.supabase.url,
+        service_key=config.supabase.service_key,
+        batch_size=config.supabase.batch_size
+    )
+
+    logger.info(f"Scanning runners once for {len(pair_types)} pair types...")
+    engine = CombinationEngine.from_database(AnalyticsMirror() if from_mirror else db_client, pair_types)
 
     results = {}
     for pair_type in pair_types:
@@ -324,7 +202,7 @@ def populate_all_pair_types(min_runs: int = 5) -> Dict:
         logger.info(f"Processing {pair_type} combinations...")
         logger.info('=' * 80)
 
-        result = populate_entity_combinations(pair_type, min_runs)
+        result = populate_entity_combinations(pair_type, min_runs, engine=engine, db_client=db_client)
         results[pair_type] = result
 
     return results
@@ -345,9 +223,14 @@ def main():
         '--pair-type',
         type=str,
         default='all',
-        choices=['all', 'jockey_horse', 'trainer_horse', 'owner_horse', 'jockey_trainer'],
+        choices=['all'] + list(PAIR_TYPES.keys()),
         help='Type of entity pair (default: all)'
     )
+    parser.add_argument(
+        '--from-mirror',
+        action='store_true',
+        help='Scan runners from the local analytics mirror instead of the database'
+    )
 
     args = parser.parse_args()
 
@@ -355,7 +238,7 @@ def main():
     start_time = datetime.now()
 
     if args.pair_type == 'all':
-        results = populate_all_pair_types(min_runs=args.min_runs)
+        results = populate_all_pair_types(min_runs=args.min_runs, from_mirror=args.from_mirror)
 
         # Summary
         logger.info("\n\n" + "=" * 80)
@@ -390,4 +273,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Populate ra_horse_form Table
+
+Rebuilds the per-horse career and form snapshots from ra_mst_runners +
+ra_mst_races. Run once after migration 031; after that ResultsFetcher keeps
+the snapshots up to date incrementally as results land.
+
+Usage:
+    python3 scripts/population/populate_horse_form.py
+    python3 scripts/population/populate_horse_form.py --horse-id hrs_123 hrs_456
+
+Options:
+    --horse-id ID [ID ...]    Print racecard form for these horses instead of rebuilding
+    --from-mirror             Scan runners from the local analytics mirror
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime
+import argparse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.config import get_config
+from utils.logger import get_logger
+from utils.supabase_client import SupabaseReferenceClient
+from utils.horse_form import HorseFormStore
+from utils.analytics_mirror import AnalyticsMirror
+from utils.profiling import run_profiled
+
+logger = get_logger('populate_horse_form')
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(
+        description='Rebuild per-horse career and form snapshots'
+    )
+    parser.add_argument(
+        '--horse-id',
+        nargs='+',
+        help='Show racecard form for these horses instead of rebuilding'
+    )
+    parser.add_argument(
+        '--from-mirror',
+        action='store_true',
+        help='Scan runners from the local analytics mirror instead of the database'
+    )
+
+    args = parser.parse_args()
+
+    config = get_config()
+    db_client = SupabaseReferenceClient(
+        url=config.supabase.url,
+        service_key=config.supabase.service_key,
+        batch_size=config.supabase.batch_size
+    )
+    store = HorseFormStore(db_client)
+
+    if args.horse_id:
+        form = store.get_form([{'horse_id': h} for h in args.horse_id])
+        for horse_id in args.horse_id:
+            logger.info(f"{horse_id}: {form.get(horse_id, 'no form snapshot')}")
+        return
+
+    logger.info("Rebuilding horse form snapshots...")
+    start_time = datetime.now()
+
+    try:
+        result = store.rebuild(source=AnalyticsMirror() if args.from_mirror else None)
+    except Exception as e:
+        logger.error(f"\n❌ FAILED: {e}", exc_info=True)
+        sys.exit(1)
+
+    logger.info("\n✅ SUCCESS")
+    logger.info(f"Runs applied: {result['runs']}")
+    logger.info(f"Horses: {result['horses_updated']}")
+    logger.info(f"Duration: {datetime.now() - start_time}")
+
+
+if __name__ == '__main__':
+    run_profiled(main)
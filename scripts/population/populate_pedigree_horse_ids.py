@@ -21,6 +21,7 @@ import os
 from dotenv import load_dotenv
 import argparse
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_pedigree_horse_ids')
 
@@ -307,4 +308,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -35,6 +35,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_pedigree_statistics')
 
@@ -477,4 +478,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
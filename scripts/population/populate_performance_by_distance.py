@@ -16,63 +16,37 @@ Distance groupings:
 
 Plus exact distance tracking for all distances run.
 
+Cells are streamed one entity at a time. Under a memory budget
+(--memory-budget-mb, RACING_MEMORY_BUDGET_MB or the container limit) the
+cube spills to sorted runs on disk and is merged back entity by entity.
+
 Usage:
-    python3 scripts/populate_performance_by_distance.py [--min-runs N]
+    python3 scripts/populate_performance_by_distance.py [--min-runs N] [--memory-budget-mb MB]
 
 Options:
-    --min-runs N    Minimum runs at distance for inclusion (default: 5)
+    --min-runs N            Minimum runs at distance for inclusion (default: 5)
+    --memory-budget-mb MB   RSS budget for the cube (default: RACING_MEMORY_BUDGET_MB)
 """
 
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+from collections import Counter, defaultdict
 import argparse
-import re
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.config import get_config
 from utils.logger import get_logger
 from utils.supabase_client import SupabaseReferenceClient
+from utils.memory_budget import MemoryBudget
+from utils.performance_cube import CellStats, PerformanceCube
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_performance_by_distance')
 
 
-def parse_distance_to_yards(distance_str: str) -> int:
-    """
-    Parse distance string to yards
-
-    Examples:
-    - "16f" -> 3520 yards (16 * 220)
-    - "2m" -> 3520 yards (2 miles * 1760)
-    - "2m4f" -> 4400 yards (2 miles + 4 furlongs)
-    - "1m2f110y" -> 2090 yards
-    """
-    if not distance_str:
-        return 0
-
-    yards = 0
-    distance_str = str(distance_str).strip().lower()
-
-    # Extract miles
-    miles_match = re.search(r'(\d+)m', distance_str)
-    if miles_match:
-        yards += int(miles_match.group(1)) * 1760
-
-    # Extract furlongs
-    furlongs_match = re.search(r'(\d+)f', distance_str)
-    if furlongs_match:
-        yards += int(furlongs_match.group(1)) * 220
-
-    # Extract yards
-    yards_match = re.search(r'(\d+)y', distance_str)
-    if yards_match:
-        yards += int(yards_match.group(1))
-
-    return yards
-
-
 def get_distance_category(yards: int) -> str:
     """Categorize distance"""
     if yards < 1400:
@@ -85,204 +59,44 @@ def get_distance_category(yards: int) -> str:
         return "Staying (12f+)"
 
 
-def parse_finishing_time(time_str: str) -> float:
-    """
-    Parse finishing time to seconds
-
-    Examples:
-    - "1:48.55" -> 108.55
-    - "2:05.32" -> 125.32
-    """
-    if not time_str:
-        return None
-
-    try:
-        parts = str(time_str).split(':')
-        if len(parts) == 2:
-            minutes = int(parts[0])
-            seconds = float(parts[1])
-            return minutes * 60 + seconds
-        elif len(parts) == 1:
-            return float(parts[0])
-    except:
-        return None
-
-    return None
-
-
 def calculate_performance_by_distance(
     db_client: SupabaseReferenceClient,
-    min_runs: int = 5
+    min_runs: int = 5,
+    cube: Optional[PerformanceCube] = None,
+    budget: Optional[MemoryBudget] = None
 ) -> List[Dict]:
     """
     Calculate performance by distance for all entity types
-    """
-    logger.info("Fetching runner and race data...")
 
+    Materialised from the shared PerformanceCube. Pass a prebuilt cube to reuse
+    a single runner scan across the Phase 2 tables.
+    """
+    own_cube = cube is None
     try:
-        # Fetch all runners with results
-        runners_response = db_client.client.table('ra_mst_runners')\
-            .select('race_id, horse_id, jockey_id, trainer_id, sire_id, position, finishing_time, starting_price_decimal')\
-            .not_.is_('position', 'null')\
-            .execute()
-
-        if not runners_response.data:
-            logger.warning("No runner data found")
-            return []
-
-        logger.info(f"Processing {len(runners_response.data)} completed runners...")
+        if own_cube:
+            logger.info("Building performance cube from runner and race data...")
+            cube = PerformanceCube.from_database(db_client, budget=budget)
 
-        # Get race details for all races
-        race_ids = list(set(r['race_id'] for r in runners_response.data))
-        logger.info(f"Fetching details for {len(race_ids)} races...")
-
-        # Fetch races in batches
-        races = []
-        batch_size = 1000
-        for i in range(0, len(race_ids), batch_size):
-            batch_ids = race_ids[i:i + batch_size]
-            race_batch = db_client.client.table('ra_mst_races')\
-                .select('id, distance_f, going')\
-                .in_('id', batch_ids)\
-                .execute()
-            races.extend(race_batch.data)
-            logger.info(f"  Fetched {len(races)}/{len(race_ids)} races...")
-
-        # Build race lookup
-        race_lookup = {race['id']: race for race in races}
-
-        # Aggregate by entity type and distance
-        from collections import defaultdict
-
-        # Structure: entity_type -> entity_id -> distance_yards -> stats
-        distance_stats = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {
-            'runs': 0,
-            'wins': 0,
-            'places_2nd': 0,
-            'places_3rd': 0,
-            'finishing_times': [],
-            'starting_prices': [],
-            'going_breakdown': defaultdict(int)
-        })))
-
-        logger.info("Aggregating performance by distance...")
-
-        for runner in runners_response.data:
-            race = race_lookup.get(runner['race_id'])
-            if not race:
-                continue
-
-            # Parse distance
-            distance_f = race.get('distance_f', '')
-            yards = parse_distance_to_yards(distance_f)
-            if yards == 0:
-                continue
-
-            position = runner['position']
-            going = race.get('going', 'Unknown')
-            finishing_time = parse_finishing_time(runner.get('finishing_time'))
-            starting_price = runner.get('starting_price_decimal')
-
-            # Track for multiple entity types
-            # NOTE: Table constraints may limit which entity_types are allowed
-            # Based on schema, we track horse, jockey, trainer
-            entities = [
-                ('horse', runner.get('horse_id')),
-                ('jockey', runner.get('jockey_id')),
-                ('trainer', runner.get('trainer_id'))
-            ]
-
-            for entity_type, entity_id in entities:
-                if not entity_id:
-                    continue
-
-                stats = distance_stats[entity_type][entity_id][yards]
-                stats['runs'] += 1
-                stats['going_breakdown'][going] += 1
-
-                if position == 1:
-                    stats['wins'] += 1
-                elif position == 2:
-                    stats['places_2nd'] += 1
-                elif position == 3:
-                    stats['places_3rd'] += 1
-
-                if finishing_time:
-                    stats['finishing_times'].append(finishing_time)
-
-                if starting_price:
-                    stats['starting_prices'].append(float(starting_price))
-
-        # Convert to records
         logger.info("Converting aggregated data to records...")
         records = []
 
-        for entity_type, entities in distance_stats.items():
-            for entity_id, distances in entities.items():
-                for yards, stats in distances.items():
-                    runs = stats['runs']
-                    if runs < min_runs:
-                        continue
-
-                    wins = stats['wins']
-                    places_2nd = stats['places_2nd']
-                    places_3rd = stats['places_3rd']
-                    places = places_2nd + places_3rd
-
-                    win_pct = (wins / runs * 100) if runs > 0 else 0
-                    place_pct = ((wins + places) / runs * 100) if runs > 0 else 0
-
-                    # Calculate A/E index (if we have odds data)
-                    ae_index = None
-                    if stats['starting_prices']:
-                        # A/E = Actual wins / Expected wins
-                        # Expected wins = sum(1/odds) for all runners
-                        expected_wins = sum(1/price for price in stats['starting_prices'] if price > 0)
-                        if expected_wins > 0:
-                            ae_index = round(wins / expected_wins, 2)
-
-                    # Calculate profit/loss at 1 unit level stakes
-                    profit_loss = None
-                    if stats['starting_prices']:
-                        # P/L = sum of (odds-1) for wins - number of losses
-                        pl = sum(price - 1 for i, price in enumerate(stats['starting_prices'])
-                                if i < wins) - (runs - wins)
-                        profit_loss = round(pl, 2)
-
-                    # Time statistics
-                    best_time = min(stats['finishing_times']) if stats['finishing_times'] else None
-                    avg_time = sum(stats['finishing_times']) / len(stats['finishing_times']) if stats['finishing_times'] else None
-                    last_time = stats['finishing_times'][-1] if stats['finishing_times'] else None
-
-                    # Distance display
-                    distance_display = get_distance_category(yards)
-
-                    records.append({
-                        'entity_type': entity_type,
-                        'entity_id': entity_id,
-                        'distance_yards': yards,
-                        'distance_display': distance_display,
-                        'total_runs': runs,
-                        'wins': wins,
-                        'places_2nd': places_2nd,
-                        'places_3rd': places_3rd,
-                        'win_percent': round(win_pct, 2),
-                        'place_percent': round(place_pct, 2),
-                        'ae_index': ae_index,
-                        'profit_loss_1u': profit_loss,
-                        'best_time_seconds': round(best_time, 2) if best_time else None,
-                        'avg_time_seconds': round(avg_time, 2) if avg_time else None,
-                        'last_time_seconds': round(last_time, 2) if last_time else None,
-                        'going_breakdown': dict(stats['going_breakdown']),
-                        'query_filters': None,
-                        'calculated_at': datetime.utcnow().isoformat(),
-                        'created_at': datetime.utcnow().isoformat()
-                    })
+        # NOTE: Table constraints may limit which entity_types are allowed
+        # Based on schema, we track horse, jockey, trainer
+        for entity_type in ('horse', 'jockey', 'trainer'):
+            for entity_id, by_going in cube.iter_entity_rollups(entity_type, ('distance_yards', 'going')):
+                # Distance totals and going breakdown from the same per-entity rollup
+                totals: Dict[int, CellStats] = defaultdict(CellStats)
+                going_breakdowns = defaultdict(dict)
+                for (yards, going), cell in by_going.items():
+                    totals[yards].merge(cell)
+                    going_breakdowns[yards][going] = cell.runs
+                records.extend(_distance_records(entity_type, entity_id, totals, going_breakdowns, min_runs))
 
         logger.info(f"Created {len(records)} distance performance records")
+        if budget is not None and budget.spills:
+            logger.info(f"Memory budget: {budget.summary()}")
 
         # Log breakdown by entity type
-        from collections import Counter
         entity_counts = Counter(r['entity_type'] for r in records)
         logger.info("\nBreakdown by entity type:")
         for entity_type, count in entity_counts.items():
@@ -294,10 +108,60 @@ def calculate_performance_by_distance(
         logger.error(f"Failed to calculate distance performance: {e}", exc_info=True)
         return []
 
-
-def populate_performance_by_distance(min_runs: int = 5):
+    finally:
+        if own_cube and cube is not None:
+            cube.close()
+
+
+def _distance_records(entity_type: str, entity_id: str, totals: Dict[int, CellStats],
+                      going_breakdowns: Dict[int, Dict], min_runs: int) -> List[Dict]:
+    """ra_performance_by_distance records for one entity"""
+    records = []
+    for yards, stats in totals.items():
+        if yards == 0 or stats.runs < min_runs:
+            continue
+
+        # A/E = Actual wins / Expected wins, P/L at 1 unit level stakes
+        # (both accumulated per run at SP inside the cube)
+        profit_loss = round(stats.profit_loss, 2) if stats.sp.count else None
+
+        best_time = stats.time.minimum
+        avg_time = stats.time.mean if stats.time.count else None
+        last_time = stats.time.last
+
+        records.append({
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'distance_yards': yards,
+            'distance_display': get_distance_category(yards),
+            'total_runs': stats.runs,
+            'wins': stats.wins,
+            'places_2nd': stats.places_2nd,
+            'places_3rd': stats.places_3rd,
+            'win_percent': round(stats.win_percent, 2),
+            'place_percent': round(stats.place_percent, 2),
+            'ae_index': stats.ae_index,
+            'profit_loss_1u': profit_loss,
+            'best_time_seconds': round(best_time, 2) if best_time else None,
+            'avg_time_seconds': round(avg_time, 2) if avg_time else None,
+            'last_time_seconds': round(last_time, 2) if last_time else None,
+            'going_breakdown': going_breakdowns[yards],
+            'query_filters': None,
+            'calculated_at': datetime.utcnow().isoformat(),
+            'created_at': datetime.utcnow().isoformat()
+        })
+    return records
+
+
+def populate_performance_by_distance(min_runs: int = 5, cube: Optional[PerformanceCube] = None,
+                                     budget: Optional[MemoryBudget] = None):
     """
     Populate ra_performance_by_distance table
+
+    Args:
+        min_runs: Minimum runs at distance for inclusion
+        cube: Optional prebuilt PerformanceCube (avoids a separate runner scan)
+        budget: Memory budget for the cube built here (default: MemoryBudget.from_env())
     """
     config = get_config()
 
@@ -314,7 +178,7 @@ def populate_performance_by_distance(min_runs: int = 5):
 
     try:
         # Calculate statistics
-        records = calculate_performance_by_distance(db_client, min_runs)
+        records = calculate_performance_by_distance(db_client, min_runs, cube, budget or MemoryBudget.from_env())
 
         if not records:
             logger.warning("No distance performance records calculated")
@@ -399,12 +263,19 @@ def main():
         help='Minimum runs at distance for inclusion (default: 5)'
     )
 
+    parser.add_argument(
+        '--memory-budget-mb',
+        type=float,
+        help='RSS budget before the cube spills to disk (default: RACING_MEMORY_BUDGET_MB or 70%% of the container limit)'
+    )
+
     args = parser.parse_args()
 
     logger.info("Starting distance performance calculation...")
     start_time = datetime.now()
 
-    result = populate_performance_by_distance(min_runs=args.min_runs)
+    budget = MemoryBudget(args.memory_budget_mb) if args.memory_budget_mb else None
+    result = populate_performance_by_distance(min_runs=args.min_runs, budget=budget)
 
     if result['success']:
         logger.info("\n✅ SUCCESS")
@@ -417,4 +288,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
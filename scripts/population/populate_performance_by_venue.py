@@ -20,7 +20,8 @@ Options:
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+from collections import Counter
 import argparse
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -28,161 +29,62 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.config import get_config
 from utils.logger import get_logger
 from utils.supabase_client import SupabaseReferenceClient
+from utils.performance_cube import PerformanceCube
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_performance_by_venue')
 
 
 def calculate_performance_by_venue(
     db_client: SupabaseReferenceClient,
-    min_runs: int = 5
+    min_runs: int = 5,
+    cube: Optional[PerformanceCube] = None
 ) -> List[Dict]:
     """
     Calculate performance by venue for all entity types
-    """
-    logger.info("Fetching runner and race data...")
 
+    Materialised from the shared PerformanceCube. Pass a prebuilt cube to reuse
+    a single runner scan across the Phase 2 tables.
+    """
     try:
-        # Fetch all runners with results
-        runners_response = db_client.client.table('ra_mst_runners')\
-            .select('race_id, horse_id, jockey_id, trainer_id, sire_id, position, starting_price_decimal')\
-            .not_.is_('position', 'null')\
-            .execute()
-
-        if not runners_response.data:
-            logger.warning("No runner data found")
-            return []
-
-        logger.info(f"Processing {len(runners_response.data)} completed runners...")
-
-        # Get race details for all races (need course_id)
-        race_ids = list(set(r['race_id'] for r in runners_response.data))
-        logger.info(f"Fetching details for {len(race_ids)} races...")
-
-        # Fetch races in batches
-        races = []
-        batch_size = 1000
-        for i in range(0, len(race_ids), batch_size):
-            batch_ids = race_ids[i:i + batch_size]
-            race_batch = db_client.client.table('ra_mst_races')\
-                .select('id, course_id, course_name')\
-                .in_('id', batch_ids)\
-                .execute()
-            races.extend(race_batch.data)
-            logger.info(f"  Fetched {len(races)}/{len(race_ids)} races...")
-
-        # Build race lookup
-        race_lookup = {race['id']: race for race in races}
-
-        # Aggregate by entity type and venue
-        from collections import defaultdict
-
-        # Structure: entity_type -> entity_id -> venue_id -> stats
-        venue_stats = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {
-            'runs': 0,
-            'wins': 0,
-            'places_2nd': 0,
-            'places_3rd': 0,
-            'starting_prices': []
-        })))
-
-        logger.info("Aggregating performance by venue...")
-
-        for runner in runners_response.data:
-            race = race_lookup.get(runner['race_id'])
-            if not race:
-                continue
-
-            venue_id = race.get('course_id')
-            if not venue_id:
-                continue
-
-            position = runner['position']
-            starting_price = runner.get('starting_price_decimal')
-
-            # Track for multiple entity types
-            # NOTE: Table constraints may limit which entity_types are allowed
-            # Based on schema, we track jockey and trainer (most common for venue analysis)
-            entities = [
-                ('jockey', runner.get('jockey_id')),
-                ('trainer', runner.get('trainer_id'))
-            ]
-
-            for entity_type, entity_id in entities:
-                if not entity_id:
-                    continue
-
-                stats = venue_stats[entity_type][entity_id][venue_id]
-                stats['runs'] += 1
+        if cube is None:
+            logger.info("Building performance cube from runner and race data...")
+            cube = PerformanceCube.from_database(db_client)
 
-                if position == 1:
-                    stats['wins'] += 1
-                elif position == 2:
-                    stats['places_2nd'] += 1
-                elif position == 3:
-                    stats['places_3rd'] += 1
-
-                if starting_price:
-                    stats['starting_prices'].append(float(starting_price))
-
-        # Convert to records
         logger.info("Converting aggregated data to records...")
         records = []
 
-        for entity_type, entities in venue_stats.items():
-            for entity_id, venues in entities.items():
-                for venue_id, stats in venues.items():
-                    runs = stats['runs']
-                    if runs < min_runs:
-                        continue
-
-                    wins = stats['wins']
-                    places_2nd = stats['places_2nd']
-                    places_3rd = stats['places_3rd']
-                    places = places_2nd + places_3rd
-
-                    win_pct = (wins / runs * 100) if runs > 0 else 0
-                    place_pct = ((wins + places) / runs * 100) if runs > 0 else 0
-
-                    # Calculate A/E index (if we have odds data)
-                    ae_index = None
-                    if stats['starting_prices']:
-                        # A/E = Actual wins / Expected wins
-                        # Expected wins = sum(1/odds) for all runners
-                        expected_wins = sum(1/price for price in stats['starting_prices'] if price > 0)
-                        if expected_wins > 0:
-                            ae_index = round(wins / expected_wins, 2)
-
-                    # Calculate profit/loss at 1 unit level stakes
-                    profit_loss = None
-                    if stats['starting_prices']:
-                        # Simple calculation: sum of returns minus stakes
-                        total_return = 0
-                        for i, price in enumerate(stats['starting_prices']):
-                            if i < wins:  # This is approximate - we don't track which specific runs won
-                                total_return += price
-                        profit_loss = round(total_return - runs, 2)
-
-                    records.append({
-                        'entity_type': entity_type,
-                        'entity_id': entity_id,
-                        'venue_id': venue_id,
-                        'total_runs': runs,
-                        'wins': wins,
-                        'places_2nd': places_2nd,
-                        'places_3rd': places_3rd,
-                        'win_percent': round(win_pct, 2),
-                        'place_percent': round(place_pct, 2),
-                        'ae_index': ae_index,
-                        'profit_loss_1u': profit_loss,
-                        'query_filters': None,
-                        'calculated_at': datetime.utcnow().isoformat(),
-                        'created_at': datetime.utcnow().isoformat()
-                    })
+        # NOTE: Table constraints may limit which entity_types are allowed
+        # Based on schema, we track jockey and trainer (most common for venue analysis)
+        for entity_type in ('jockey', 'trainer'):
+            for (entity_id, venue_id), stats in cube.rollup(entity_type, ('course_id',)).items():
+                if not venue_id or stats.runs < min_runs:
+                    continue
+
+                # A/E = Actual wins / Expected wins, P/L at 1 unit level stakes
+                # (both accumulated per run at SP inside the cube)
+                profit_loss = round(stats.profit_loss, 2) if stats.sp.count else None
+
+                records.append({
+                    'entity_type': entity_type,
+                    'entity_id': entity_id,
+                    'venue_id': venue_id,
+                    'total_runs': stats.runs,
+                    'wins': stats.wins,
+                    'places_2nd': stats.places_2nd,
+                    'places_3rd': stats.places_3rd,
+                    'win_percent': round(stats.win_percent, 2),
+                    'place_percent': round(stats.place_percent, 2),
+                    'ae_index': stats.ae_index,
+                    'profit_loss_1u': profit_loss,
+                    'query_filters': None,
+                    'calculated_at': datetime.utcnow().isoformat(),
+                    'created_at': datetime.utcnow().isoformat()
+                })
 
         logger.info(f"Created {len(records)} venue performance records")
 
         # Log breakdown by entity type
-        from collections import Counter
         entity_counts = Counter(r['entity_type'] for r in records)
         logger.info("\nBreakdown by entity type:")
         for entity_type, count in entity_counts.items():
@@ -195,9 +97,13 @@ def calculate_performance_by_venue(
         return []
 
 
-def populate_performance_by_venue(min_runs: int = 5):
+def populate_performance_by_venue(min_runs: int = 5, cube: Optional[PerformanceCube] = None):
     """
     Populate ra_performance_by_venue table
+
+    Args:
+        min_runs: Minimum runs at venue for inclusion
+        cube: Optional prebuilt PerformanceCube (avoids a separate runner scan)
     """
     config = get_config()
 
@@ -214,7 +120,7 @@ def populate_performance_by_venue(min_runs: int = 5):
 
     try:
         # Calculate statistics
-        records = calculate_performance_by_venue(db_client, min_runs)
+        records = calculate_performance_by_venue(db_client, min_runs, cube)
 
         if not records:
             logger.warning("No venue performance records calculated")
@@ -345,4 +251,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -25,6 +25,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 from populate_regions import populate_regions
 from populate_entity_combinations import populate_entity_combinations
 
@@ -128,4 +129,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -30,6 +30,8 @@ Options:
     --skip-distance          Skip distance performance calculation
     --skip-venue             Skip venue performance calculation
     --min-runs N             Minimum runs for inclusion (default: varies by table)
+    --from-mirror            Scan runners from the local analytics mirror
+                             (scripts/maintenance/sync_analytics_mirror.py)
 """
 
 import sys
@@ -39,14 +41,52 @@ import argparse
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from config.config import get_config
 from utils.logger import get_logger
-from populate_runner_statistics import populate_runner_statistics
+from utils.memory_budget import MemoryBudget
+from utils.performance_cube import PerformanceCube
+from utils.analytics_mirror import AnalyticsMirror
+from utils.supabase_client import SupabaseReferenceClient
+from utils.profiling import run_profiled
+from populate_runner_statistics import populate_runner_statistics, build_runner_statistics_cube
 from populate_performance_by_distance import populate_performance_by_distance
 from populate_performance_by_venue import populate_performance_by_venue
 
 logger = get_logger('populate_phase2_analytics')
 
 
+def build_phase2_cube(include_runner_stats: bool = True, from_mirror: bool = False):
+    """
+    Build the shared PerformanceCube used by all Phase 2 tables
+
+    Args:
+        include_runner_stats: Also collect runner statistics state
+        from_mirror: Scan the local analytics mirror instead of the database
+
+    Returns:
+        (cube, collector) - collector is None when runner statistics are skipped
+    """
+    config = get_config()
+    db_client = SupabaseReferenceClient(
+        url=config.supabase.url,
+        service_key=config.supabase.service_key,
+        batch_size=config.supabase.batch_size
+    )
+    source = AnalyticsMirror() if from_mirror else db_client
+
+    # Spill cube cells to disk rather than run out of memory on small instances
+    budget = MemoryBudget.from_env()
+
+    cube_start = datetime.now()
+    if include_runner_stats:
+        cube, collector = build_runner_statistics_cube(source, budget)
+    else:
+        cube, collector = PerformanceCube.from_database(source, budget=budget), None
+    logger.info(f"Performance cube: {len(cube)} cells built in {datetime.now() - cube_start}")
+
+    return cube, collector
+
+
 def main():
     """Main execution"""
     parser = argparse.ArgumentParser(
@@ -85,6 +125,11 @@ def main():
         default=5,
         help='Minimum runs per venue for venue stats (default: 5)'
     )
+    parser.add_argument(
+        '--from-mirror',
+        action='store_true',
+        help='Scan runners from the local analytics mirror instead of the database'
+    )
 
     args = parser.parse_args()
 
@@ -97,6 +142,14 @@ def main():
 
     results = {}
 
+    # Shared aggregation: one runner scan feeds all three tables
+    cube, collector = None, None
+    if not (args.skip_runner_stats and args.skip_distance and args.skip_venue):
+        cube, collector = build_phase2_cube(
+            include_runner_stats=not args.skip_runner_stats,
+            from_mirror=args.from_mirror
+        )
+
     # 1. Runner Statistics
     if not args.skip_runner_stats:
         logger.info("\n" + "=" * 80)
@@ -104,7 +157,7 @@ def main():
         logger.info("=" * 80)
 
         table_start = datetime.now()
-        result = populate_runner_statistics(min_runs=args.min_runs_runner)
+        result = populate_runner_statistics(min_runs=args.min_runs_runner, cube=cube, collector=collector)
         results['runner_statistics'] = result
         table_duration = datetime.now() - table_start
 
@@ -123,7 +176,7 @@ def main():
         logger.info("=" * 80)
 
         table_start = datetime.now()
-        result = populate_performance_by_distance(min_runs=args.min_runs_distance)
+        result = populate_performance_by_distance(min_runs=args.min_runs_distance, cube=cube)
         results['performance_by_distance'] = result
         table_duration = datetime.now() - table_start
 
@@ -142,7 +195,7 @@ def main():
         logger.info("=" * 80)
 
         table_start = datetime.now()
-        result = populate_performance_by_venue(min_runs=args.min_runs_venue)
+        result = populate_performance_by_venue(min_runs=args.min_runs_venue, cube=cube)
         results['performance_by_venue'] = result
         table_duration = datetime.now() - table_start
 
@@ -154,6 +207,9 @@ def main():
     else:
         logger.info("\n⏭️  Skipping venue performance")
 
+    if cube is not None:
+        cube.close()    # Spilled runs, if the cube went over its memory budget
+
     # Final summary
     end_time = datetime.now()
     duration = end_time - start_time
@@ -199,4 +255,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -14,7 +14,8 @@ Statistics calculated for each runner:
 - Recent form: last 10 runs, last 12 months
 - Partnership stats: with this jockey
 
-Uses efficient SQL aggregation via database joins.
+Aggregated from the shared PerformanceCube (utils/performance_cube.py) in a
+single paginated scan of ra_mst_runners + ra_mst_races.
 
 Usage:
     python3 scripts/populate_runner_statistics.py [--min-runs N]
@@ -27,24 +28,104 @@ Options:
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
 import argparse
+import heapq
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.config import get_config
 from utils.logger import get_logger
 from utils.supabase_client import SupabaseReferenceClient
+from utils.memory_budget import MemoryBudget
+from utils.performance_cube import CellStats, PerformanceCube, parse_distance_to_yards
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_runner_statistics')
 
 
+# Going / surface buckets (substring match on going, exact match on surface)
+GOING_BUCKETS = ('firm', 'good', 'soft', 'heavy')
+AW_SURFACES = ['aw', 'all weather', 'tapeta', 'polytrack']
+JUMPS_SURFACES = ['hurdle', 'chase', 'nh flat']
+
+EMPTY_COUNTS = (0, 0, 0, 0)
+
+
+def _counts(cell: Optional[CellStats]) -> Tuple[int, int, int, int]:
+    """(runs, wins, 2nds, 3rds) for a cube cell, zeros if missing"""
+    if cell is None:
+        return EMPTY_COUNTS
+    return (cell.runs, cell.wins, cell.places_2nd, cell.places_3rd)
+
+
+def _add_counts(totals: List[int], position, runs: int = 1):
+    """Accumulate a run into a [runs, wins, 2nds, 3rds] list"""
+    totals[0] += runs
+    if position in (1, 2, 3):
+        totals[position] += 1
+
+
+class RunnerStatsCollector:
+    """
+    Per-runner state gathered alongside the PerformanceCube scan
+
+    The cube already holds horse career/course/distance/going/surface totals;
+    this only keeps what the cube can't: the runner rows themselves (as compact
+    tuples), jockey partnerships, the 10 most recent runs per horse and
+    last-12-month totals.
+    """
+
+    def __init__(self, twelve_months_ago: str):
+        self.twelve_months_ago = twelve_months_ago
+        self.runners: List[Tuple] = []
+        self.horse_jockey = defaultdict(lambda: [0, 0, 0, 0])
+        self.recent = defaultdict(list)  # horse_id -> min-heap of (created_at, position), max 10
+        self.last_12m = defaultdict(lambda: [0, 0, 0, 0])
+        self.last_raced: Dict[str, str] = {}
+        self.last_won: Dict[str, str] = {}
+
+    def __call__(self, runner: Dict, race: Dict):
+        horse_id = runner.get('horse_id')
+        if not horse_id:
+            return
+
+        jockey_id = runner.get('jockey_id')
+        position = runner.get('position')
+        created_at = runner.get('created_at')
+
+        self.runners.append((
+            runner['id'], horse_id, jockey_id, race.get('course_id'),
+            parse_distance_to_yards(race.get('distance_f'))
+        ))
+
+        if jockey_id:
+            _add_counts(self.horse_jockey[(horse_id, jockey_id)], position)
+
+        if created_at:
+            recent = self.recent[horse_id]
+            heapq.heappush(recent, (created_at, position))
+            if len(recent) > 10:
+                heapq.heappop(recent)
+
+            if created_at >= self.twelve_months_ago:
+                _add_counts(self.last_12m[horse_id], position)
+
+            if created_at > self.last_raced.get(horse_id, ''):
+                self.last_raced[horse_id] = created_at
+            if position == 1 and created_at > self.last_won.get(horse_id, ''):
+                self.last_won[horse_id] = created_at
+
+
 def calculate_runner_statistics(
     db_client: SupabaseReferenceClient,
-    min_runs: int = 3
+    min_runs: int = 3,
+    cube: Optional[PerformanceCube] = None,
+    collector: Optional['RunnerStatsCollector'] = None
 ) -> List[Dict]:
     """
-    Calculate runner statistics using SQL aggregation
+    Calculate runner statistics from the shared PerformanceCube
 
     For each runner (individual race entry), calculate:
     - Career performance of the horse
@@ -52,266 +133,107 @@ def calculate_runner_statistics(
     - Distance-specific performance
     - Going-specific performance
     - Recent form
-    """
-    logger.info("Fetching runner and race data...")
 
-    # Fetch all runners with their race details
-    # Join with races to get course, distance, going, surface
+    Per-runner rows, jockey partnerships and recent form are collected during
+    the cube scan, so a prebuilt cube must be passed together with the
+    RunnerStatsCollector it was built with (see build_runner_statistics_cube).
+    """
     try:
-        # Get all runners with race context
-        runners_response = db_client.client.table('ra_mst_runners')\
-            .select('id, race_id, horse_id, horse_name, jockey_id, position, prize_won, created_at')\
-            .not_.is_('position', 'null')\
-            .execute()
-
-        if not runners_response.data:
-            logger.warning("No runner data found")
-            return []
-
-        logger.info(f"Processing {len(runners_response.data)} completed runners...")
+        if cube is None or collector is None:
+            logger.info("Building performance cube from runner and race data...")
+            cube, collector = build_runner_statistics_cube(db_client)
 
-        # Get race details for all races
-        race_ids = list(set(r['race_id'] for r in runners_response.data))
-        logger.info(f"Fetching details for {len(race_ids)} races...")
-
-        # Fetch races in batches (1000 at a time)
-        races = []
-        batch_size = 1000
-        for i in range(0, len(race_ids), batch_size):
-            batch_ids = race_ids[i:i + batch_size]
-            race_batch = db_client.client.table('ra_mst_races')\
-                .select('id, course_id, distance_f, going, surface, off_time')\
-                .in_('id', batch_ids)\
-                .execute()
-            races.extend(race_batch.data)
-            logger.info(f"  Fetched {len(races)}/{len(race_ids)} races...")
+        logger.info("Calculating statistics per runner...")
 
-        # Build race lookup
-        race_lookup = {race['id']: race for race in races}
+        # Horse rollups from the cube
+        career = cube.rollup('horse')
+        by_course = cube.rollup('horse', ('course_id',))
+        by_course_distance = cube.rollup('horse', ('course_id', 'distance_yards'))
+        by_distance = cube.rollup('horse', ('distance_yards',))
+
+        by_going = defaultdict(lambda: {bucket: [0, 0, 0, 0] for bucket in GOING_BUCKETS})
+        for (horse_id, going), cell in cube.rollup('horse', ('going',)).items():
+            going = going.lower()
+            for bucket in GOING_BUCKETS:
+                if bucket in going:
+                    for i, value in enumerate(_counts(cell)):
+                        by_going[horse_id][bucket][i] += value
+
+        by_surface = defaultdict(lambda: {'aw': [0, 0, 0, 0], 'jumps': [0, 0, 0, 0]})
+        for (horse_id, surface), cell in cube.rollup('horse', ('surface',)).items():
+            surface = surface.lower()
+            bucket = 'aw' if surface in AW_SURFACES else 'jumps' if surface in JUMPS_SURFACES else None
+            if bucket:
+                for i, value in enumerate(_counts(cell)):
+                    by_surface[horse_id][bucket][i] += value
 
-        # Now calculate stats per runner
-        logger.info("Calculating statistics per runner...")
-        from collections import defaultdict
-
-        # Group runners by horse for career stats
-        horse_stats = defaultdict(lambda: {
-            'runs': [],
-            'total_prize': 0,
-            'wins': 0,
-            'places': 0,
-            'last_raced': None,
-            'last_won': None
-        })
-
-        # First pass: aggregate by horse
-        for runner in runners_response.data:
-            horse_id = runner['horse_id']
-            position = runner['position']
-            prize = runner.get('prize_won', 0) or 0
-            created_at = runner.get('created_at')
-
-            horse_stats[horse_id]['runs'].append(runner)
-            horse_stats[horse_id]['total_prize'] += float(prize)
-
-            if position == 1:
-                horse_stats[horse_id]['wins'] += 1
-                if created_at:
-                    current_won = horse_stats[horse_id]['last_won']
-                    if not current_won or created_at > current_won:
-                        horse_stats[horse_id]['last_won'] = created_at
-
-            if position in [1, 2, 3]:
-                horse_stats[horse_id]['places'] += 1
-
-            if created_at:
-                current_raced = horse_stats[horse_id]['last_raced']
-                if not current_raced or created_at > current_raced:
-                    horse_stats[horse_id]['last_raced'] = created_at
-
-        # Second pass: calculate per-runner statistics
         records = []
-        now = datetime.utcnow()
-        twelve_months_ago = now - timedelta(days=365)
-
-        for runner in runners_response.data:
-            runner_id = runner['id']
-            horse_id = runner['horse_id']
-            race_id = runner['race_id']
-            jockey_id = runner['jockey_id']
-
-            # Get race context
-            race = race_lookup.get(race_id)
-            if not race:
-                continue
-
-            course_id = race['course_id']
-            distance_f = race['distance_f']
-            going = race.get('going', '').lower()
-            surface = race.get('surface', '').lower()
 
-            # Get horse career stats
-            horse_data = horse_stats[horse_id]
-            career_runs = len(horse_data['runs'])
+        for runner_id, horse_id, jockey_id, course_id, yards in collector.runners:
+            horse_career = career.get((horse_id,))
+            career_runs = horse_career.runs if horse_career else 0
 
             # Skip horses with too few runs
             if career_runs < min_runs:
                 continue
 
-            career_wins = horse_data['wins']
-            career_places = horse_data['places']
-            career_prize = horse_data['total_prize']
-
-            career_win_pct = (career_wins / career_runs * 100) if career_runs > 0 else 0
-            career_place_pct = (career_places / career_runs * 100) if career_runs > 0 else 0
-
-            # Course stats (all races at this course)
-            course_runs = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('course_id') == course_id)
-            course_wins = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('course_id') == course_id and r['position'] == 1)
-            course_2nds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('course_id') == course_id and r['position'] == 2)
-            course_3rds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('course_id') == course_id and r['position'] == 3)
-
-            # Course + distance stats
-            course_dist_runs = sum(1 for r in horse_data['runs']
-                                   if race_lookup.get(r['race_id'], {}).get('course_id') == course_id
-                                   and race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f)
-            course_dist_wins = sum(1 for r in horse_data['runs']
-                                    if race_lookup.get(r['race_id'], {}).get('course_id') == course_id
-                                    and race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f
-                                    and r['position'] == 1)
-            course_dist_2nds = sum(1 for r in horse_data['runs']
-                                    if race_lookup.get(r['race_id'], {}).get('course_id') == course_id
-                                    and race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f
-                                    and r['position'] == 2)
-            course_dist_3rds = sum(1 for r in horse_data['runs']
-                                    if race_lookup.get(r['race_id'], {}).get('course_id') == course_id
-                                    and race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f
-                                    and r['position'] == 3)
-
-            # Distance stats (all races at this distance)
-            distance_runs = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f)
-            distance_wins = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f and r['position'] == 1)
-            distance_2nds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f and r['position'] == 2)
-            distance_3rds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('distance_f') == distance_f and r['position'] == 3)
-
-            # Going stats
-            firm_runs = sum(1 for r in horse_data['runs'] if 'firm' in race_lookup.get(r['race_id'], {}).get('going', '').lower())
-            firm_wins = sum(1 for r in horse_data['runs'] if 'firm' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 1)
-            firm_2nds = sum(1 for r in horse_data['runs'] if 'firm' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 2)
-            firm_3rds = sum(1 for r in horse_data['runs'] if 'firm' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 3)
-
-            good_runs = sum(1 for r in horse_data['runs'] if 'good' in race_lookup.get(r['race_id'], {}).get('going', '').lower())
-            good_wins = sum(1 for r in horse_data['runs'] if 'good' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 1)
-            good_2nds = sum(1 for r in horse_data['runs'] if 'good' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 2)
-            good_3rds = sum(1 for r in horse_data['runs'] if 'good' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 3)
-
-            soft_runs = sum(1 for r in horse_data['runs'] if 'soft' in race_lookup.get(r['race_id'], {}).get('going', '').lower())
-            soft_wins = sum(1 for r in horse_data['runs'] if 'soft' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 1)
-            soft_2nds = sum(1 for r in horse_data['runs'] if 'soft' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 2)
-            soft_3rds = sum(1 for r in horse_data['runs'] if 'soft' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 3)
-
-            heavy_runs = sum(1 for r in horse_data['runs'] if 'heavy' in race_lookup.get(r['race_id'], {}).get('going', '').lower())
-            heavy_wins = sum(1 for r in horse_data['runs'] if 'heavy' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 1)
-            heavy_2nds = sum(1 for r in horse_data['runs'] if 'heavy' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 2)
-            heavy_3rds = sum(1 for r in horse_data['runs'] if 'heavy' in race_lookup.get(r['race_id'], {}).get('going', '').lower() and r['position'] == 3)
-
-            # Surface stats
-            aw_runs = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['aw', 'all weather', 'tapeta', 'polytrack'])
-            aw_wins = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['aw', 'all weather', 'tapeta', 'polytrack'] and r['position'] == 1)
-            aw_2nds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['aw', 'all weather', 'tapeta', 'polytrack'] and r['position'] == 2)
-            aw_3rds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['aw', 'all weather', 'tapeta', 'polytrack'] and r['position'] == 3)
-
-            jumps_runs = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['hurdle', 'chase', 'nh flat'])
-            jumps_wins = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['hurdle', 'chase', 'nh flat'] and r['position'] == 1)
-            jumps_2nds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['hurdle', 'chase', 'nh flat'] and r['position'] == 2)
-            jumps_3rds = sum(1 for r in horse_data['runs'] if race_lookup.get(r['race_id'], {}).get('surface', '').lower() in ['hurdle', 'chase', 'nh flat'] and r['position'] == 3)
-
-            # Jockey partnership stats
-            jockey_runs = sum(1 for r in horse_data['runs'] if r['jockey_id'] == jockey_id) if jockey_id else 0
-            jockey_wins = sum(1 for r in horse_data['runs'] if r['jockey_id'] == jockey_id and r['position'] == 1) if jockey_id else 0
-            jockey_2nds = sum(1 for r in horse_data['runs'] if r['jockey_id'] == jockey_id and r['position'] == 2) if jockey_id else 0
-            jockey_3rds = sum(1 for r in horse_data['runs'] if r['jockey_id'] == jockey_id and r['position'] == 3) if jockey_id else 0
-
-            # Recent form (last 10 runs)
-            sorted_runs = sorted(horse_data['runs'],
-                               key=lambda x: x.get('created_at') or '1970-01-01',
-                               reverse=True)
-            last_10 = sorted_runs[:10]
-            last_10_wins = sum(1 for r in last_10 if r['position'] == 1)
-            last_10_2nds = sum(1 for r in last_10 if r['position'] == 2)
-            last_10_3rds = sum(1 for r in last_10 if r['position'] == 3)
-
-            # Last 12 months
-            last_12m = [r for r in horse_data['runs']
-                       if r.get('created_at') and r['created_at'] >= twelve_months_ago.isoformat()]
-            last_12m_runs = len(last_12m)
-            last_12m_wins = sum(1 for r in last_12m if r['position'] == 1)
-            last_12m_2nds = sum(1 for r in last_12m if r['position'] == 2)
-            last_12m_3rds = sum(1 for r in last_12m if r['position'] == 3)
-
-            # Winning distance range (not implemented - would need detailed distance parsing)
-
-            records.append({
+            course = _counts(by_course.get((horse_id, course_id)))
+            course_dist = _counts(by_course_distance.get((horse_id, course_id, yards)))
+            distance = _counts(by_distance.get((horse_id, yards)))
+            going = by_going.get(horse_id) or {bucket: EMPTY_COUNTS for bucket in GOING_BUCKETS}
+            surface = by_surface.get(horse_id) or {'aw': EMPTY_COUNTS, 'jumps': EMPTY_COUNTS}
+            jockey = tuple(collector.horse_jockey.get((horse_id, jockey_id), EMPTY_COUNTS)) if jockey_id else EMPTY_COUNTS
+            last_12m = tuple(collector.last_12m.get(horse_id, EMPTY_COUNTS))
+
+            last_10 = [position for _, position in collector.recent.get(horse_id, [])]
+            last_raced = collector.last_raced.get(horse_id)
+            last_won = collector.last_won.get(horse_id)
+
+            record = {
                 'runner_id': runner_id,
                 'horse_id': horse_id,
-                'career_prize': round(career_prize, 2),
-                'career_win_percent': round(career_win_pct, 2),
-                'career_place_percent': round(career_place_pct, 2),
-                'course_runs': course_runs,
-                'course_wins': course_wins,
-                'course_2nds': course_2nds,
-                'course_3rds': course_3rds,
-                'course_distance_runs': course_dist_runs,
-                'course_distance_wins': course_dist_wins,
-                'course_distance_2nds': course_dist_2nds,
-                'course_distance_3rds': course_dist_3rds,
-                'distance_runs': distance_runs,
-                'distance_wins': distance_wins,
-                'distance_2nds': distance_2nds,
-                'distance_3rds': distance_3rds,
-                'firm_runs': firm_runs,
-                'firm_wins': firm_wins,
-                'firm_2nds': firm_2nds,
-                'firm_3rds': firm_3rds,
-                'good_runs': good_runs,
-                'good_wins': good_wins,
-                'good_2nds': good_2nds,
-                'good_3rds': good_3rds,
-                'soft_runs': soft_runs,
-                'soft_wins': soft_wins,
-                'soft_2nds': soft_2nds,
-                'soft_3rds': soft_3rds,
-                'heavy_runs': heavy_runs,
-                'heavy_wins': heavy_wins,
-                'heavy_2nds': heavy_2nds,
-                'heavy_3rds': heavy_3rds,
-                'aw_runs': aw_runs,
-                'aw_wins': aw_wins,
-                'aw_2nds': aw_2nds,
-                'aw_3rds': aw_3rds,
-                'jockey_runs': jockey_runs,
-                'jockey_wins': jockey_wins,
-                'jockey_2nds': jockey_2nds,
-                'jockey_3rds': jockey_3rds,
-                'jumps_runs': jumps_runs,
-                'jumps_wins': jumps_wins,
-                'jumps_2nds': jumps_2nds,
-                'jumps_3rds': jumps_3rds,
+                'career_prize': round(horse_career.prize, 2),
+                'career_win_percent': round(horse_career.win_percent, 2),
+                'career_place_percent': round(horse_career.place_percent, 2),
+            }
+
+            for prefix, counts in (
+                ('course', course),
+                ('course_distance', course_dist),
+                ('distance', distance),
+                ('firm', going['firm']),
+                ('good', going['good']),
+                ('soft', going['soft']),
+                ('heavy', going['heavy']),
+                ('aw', surface['aw']),
+                ('jockey', jockey),
+                ('jumps', surface['jumps']),
+            ):
+                record[f'{prefix}_runs'] = counts[0]
+                record[f'{prefix}_wins'] = counts[1]
+                record[f'{prefix}_2nds'] = counts[2]
+                record[f'{prefix}_3rds'] = counts[3]
+
+            record.update({
                 'last_10_runs': len(last_10),
-                'last_10_wins': last_10_wins,
-                'last_10_2nds': last_10_2nds,
-                'last_10_3rds': last_10_3rds,
-                'last_12m_runs': last_12m_runs,
-                'last_12m_wins': last_12m_wins,
-                'last_12m_2nds': last_12m_2nds,
-                'last_12m_3rds': last_12m_3rds,
-                'last_raced': horse_data['last_raced'].split('T')[0] if horse_data['last_raced'] else None,
-                'last_won': horse_data['last_won'].split('T')[0] if horse_data['last_won'] else None,
+                'last_10_wins': last_10.count(1),
+                'last_10_2nds': last_10.count(2),
+                'last_10_3rds': last_10.count(3),
+                'last_12m_runs': last_12m[0],
+                'last_12m_wins': last_12m[1],
+                'last_12m_2nds': last_12m[2],
+                'last_12m_3rds': last_12m[3],
+                'last_raced': last_raced.split('T')[0] if last_raced else None,
+                'last_won': last_won.split('T')[0] if last_won else None,
+                # Winning distance range (not implemented - would need detailed distance parsing)
                 'min_winning_distance_yards': None,
                 'max_winning_distance_yards': None,
                 'created_at': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             })
 
+            records.append(record)
+
         logger.info(f"Calculated statistics for {len(records)} runners")
         return records
 
@@ -320,9 +242,40 @@ def calculate_runner_statistics(
         return []
 
 
-def populate_runner_statistics(min_runs: int = 3):
+def build_runner_statistics_cube(db_client: SupabaseReferenceClient,
+                                 budget: Optional[MemoryBudget] = None) -> Tuple[PerformanceCube, RunnerStatsCollector]:
+    """
+    Build the shared PerformanceCube with runner statistics state attached
+
+    The returned cube can be passed to all three Phase 2 populators; the
+    collector is only needed by populate_runner_statistics. With a budget,
+    the cube's cells spill to disk when the process goes over it.
+    """
+    twelve_months_ago = (datetime.utcnow() - timedelta(days=365)).isoformat()
+    collector = RunnerStatsCollector(twelve_months_ago)
+
+    cube = PerformanceCube.from_database(
+        db_client,
+        on_runner=collector,
+        extra_runner_columns=['id', 'created_at'],
+        budget=budget
+    )
+
+    return cube, collector
+
+
+def populate_runner_statistics(
+    min_runs: int = 3,
+    cube: Optional[PerformanceCube] = None,
+    collector: Optional[RunnerStatsCollector] = None
+):
     """
     Populate ra_runner_statistics table
+
+    Args:
+        min_runs: Minimum career runs for inclusion
+        cube, collector: Optional pair from build_runner_statistics_cube()
+            (avoids a separate runner scan)
     """
     config = get_config()
 
@@ -339,7 +292,7 @@ def populate_runner_statistics(min_runs: int = 3):
 
     try:
         # Calculate statistics
-        records = calculate_runner_statistics(db_client, min_runs)
+        records = calculate_runner_statistics(db_client, min_runs, cube, collector)
 
         if not records:
             logger.warning("No runner statistics calculated")
@@ -439,4 +392,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
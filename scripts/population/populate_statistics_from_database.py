@@ -51,6 +51,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('populate_statistics_from_database')
 
@@ -1000,4 +1001,4 @@ Examples:
 
 
 if __name__ == '__main__':
-    sys.exit(main())
+    sys.exit(run_profiled(main))
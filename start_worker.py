@@ -2,33 +2,82 @@
 """
 Render.com Worker - Scheduled Racing API Data Fetcher
 Runs as a long-running worker process with scheduled tasks
+
+The worker stays warm between ticks: one orchestrator with its fetchers, and
+the shared API client, database client, horse index and rate limiter from
+utils.resources, are created at startup and reused by every scheduled job.
+
+Metrics (API rates, 429s, rate-limit waits, DB batch latency, rows per
+table, queue depths, cache hits, last success per job) are served for
+Prometheus on http://127.0.0.1:9108/metrics (METRICS_PORT / METRICS_HOST).
 """
 
+import functools
 import sys
 import time
 import schedule
 from datetime import datetime
 
-from config.config import get_config
 from utils.logger import get_logger
-from utils.supabase_client import SupabaseReferenceClient
+from utils import freshness, resources
+from utils.job_runner import shared
+from utils.metrics_server import mark_job, register_collector, start_metrics_server
+from utils.run_ledger import track_run
+from utils.profiling import run_profiled
 from main import ReferenceDataOrchestrator
 
 logger = get_logger('render_worker')
 
 
+def get_orchestrator() -> ReferenceDataOrchestrator:
+    """Warm orchestrator shared by all scheduled jobs (fetchers are reused across ticks)"""
+    return shared(('worker', 'orchestrator'), lambda: ReferenceDataOrchestrator(warm=True))
+
+
+def tracked(job: str):
+    """Record each run (the function returns success) in the run ledger and the metrics endpoint"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            success = False
+            try:
+                with track_run(job) as run:
+                    success = bool(func(*args, **kwargs))
+                    run['status'] = 'success' if success else 'failed'
+                return success
+            finally:
+                mark_job(job, success, time.monotonic() - started)
+        return wrapper
+    return decorate
+
+
+def log_resource_stats():
+    """Log cumulative usage of the shared clients and caches"""
+    try:
+        stats = resources.stats()
+    except Exception as e:
+        logger.warning(f"Could not read shared resource stats: {e}")
+        return
+    api = stats['api']
+    index = stats['horse_index']
+    logger.info(f"Shared API client: {api.get('requests', 0):,} requests "
+                f"({api.get('errors', 0):,} errors) since worker start")
+    logger.info(f"Horse index: {index['id_hits']:,} cached ID checks, {index['id_queries']:,} ID queries, "
+                f"{index['name_hits']:,} cached name lookups, {index['name_queries']:,} name queries")
+    resources.api_scheduler().log_metrics(logger)
+
+
+@tracked('entity_statistics')
 def update_entity_statistics():
     """Update entity statistics (jockeys, trainers, owners)"""
     logger.info("-" * 80)
     logger.info("UPDATING ENTITY STATISTICS")
     logger.info("-" * 80)
 
+    success = False
     try:
-        config = get_config()
-        db_client = SupabaseReferenceClient(
-            url=config.supabase.url,
-            service_key=config.supabase.service_key
-        )
+        db_client = resources.db_client()
 
         # Call the database function to update statistics
         logger.info("Calling update_entity_statistics() function...")
@@ -44,6 +93,7 @@ def update_entity_statistics():
             logger.info(f"✓ Trainers updated: {trainers:,}")
             logger.info(f"✓ Owners updated:   {owners:,}")
             logger.info("Entity statistics update completed successfully")
+            success = True
         else:
             logger.warning("Statistics update returned no data")
 
@@ -53,16 +103,19 @@ def update_entity_statistics():
         logger.warning("Continuing despite statistics update failure (will retry on next run)")
 
     logger.info("-" * 80)
+    return success
 
 
+@tracked('daily_fetch')
 def run_daily_fetch():
     """Run daily fetch: races and results"""
     logger.info("=" * 80)
     logger.info(f"DAILY FETCH TRIGGERED - {datetime.utcnow().isoformat()}")
     logger.info("=" * 80)
 
+    success = False
     try:
-        orchestrator = ReferenceDataOrchestrator()
+        orchestrator = get_orchestrator()
         results = orchestrator.run_fetch(entities=['races', 'results'])
 
         success = all(r.get('success', False) for r in results.values())
@@ -102,15 +155,20 @@ def run_daily_fetch():
     except Exception as e:
         logger.error(f"Daily fetch failed: {e}", exc_info=True)
 
+    log_resource_stats()
+    return success
 
+
+@tracked('weekly_fetch')
 def run_weekly_fetch():
     """Run weekly fetch: horses (jockeys/trainers/owners auto-extracted from daily races)"""
     logger.info("=" * 80)
     logger.info(f"WEEKLY FETCH TRIGGERED - {datetime.utcnow().isoformat()}")
     logger.info("=" * 80)
 
+    success = False
     try:
-        orchestrator = ReferenceDataOrchestrator()
+        orchestrator = get_orchestrator()
         results = orchestrator.run_fetch(
             entities=['horses']  # jockeys, trainers, owners are auto-extracted during daily race fetching
         )
@@ -141,15 +199,20 @@ def run_weekly_fetch():
     except Exception as e:
         logger.error(f"Weekly fetch failed: {e}", exc_info=True)
 
+    log_resource_stats()
+    return success
+
 
+@tracked('monthly_fetch')
 def run_monthly_fetch():
     """Run monthly fetch: courses and bookmakers"""
     logger.info("=" * 80)
     logger.info(f"MONTHLY FETCH TRIGGERED - {datetime.utcnow().isoformat()}")
     logger.info("=" * 80)
 
+    success = False
     try:
-        orchestrator = ReferenceDataOrchestrator()
+        orchestrator = get_orchestrator()
         results = orchestrator.run_fetch(
             entities=['courses', 'bookmakers']
         )
@@ -176,15 +239,20 @@ def run_monthly_fetch():
     except Exception as e:
         logger.error(f"Monthly fetch failed: {e}", exc_info=True)
 
+    log_resource_stats()
+    return success
 
+
+@tracked('initial_sync')
 def run_initial_sync():
     """Run initial full sync on first startup"""
     logger.info("=" * 80)
     logger.info("INITIAL SYNC - Fetching all entities")
     logger.info("=" * 80)
 
+    success = False
     try:
-        orchestrator = ReferenceDataOrchestrator()
+        orchestrator = get_orchestrator()
         results = orchestrator.run_fetch(entities=None)  # Fetch all
 
         success = all(r.get('success', False) for r in results.values())
@@ -196,6 +264,8 @@ def run_initial_sync():
     except Exception as e:
         logger.error(f"Initial sync failed: {e}", exc_info=True)
 
+    return success
+
 
 def main():
     """Main worker process"""
@@ -204,6 +274,18 @@ def main():
     logger.info(f"Started at: {datetime.utcnow().isoformat()}")
     logger.info("=" * 80)
 
+    # Create the shared clients once; every scheduled job reuses them
+    try:
+        resources.warm_up()
+        get_orchestrator()
+    except Exception as e:
+        logger.warning(f"Warm-up failed, resources will be created on first use: {e}")
+
+    # Prometheus scrape endpoint (daemon thread)
+    register_collector(resources.metric_families)
+    register_collector(freshness.metric_families)
+    start_metrics_server()
+
     # Run initial sync on startup (optional - comment out if not needed)
     # logger.info("\nRunning initial sync...")
     # run_initial_sync()
@@ -242,4 +324,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
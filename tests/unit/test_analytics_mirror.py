@@ -0,0 +1,246 @@
+"""
+Analytics mirror: dictionaries, keyset paging, pending runners and crash consistency
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import re
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.analytics_mirror as analytics_mirror
+from utils.analytics_mirror import AnalyticsMirror, Dictionary, encode_partition, read_partition_columns
+
+_KEYSET = re.compile(r'updated_at\.gt\."(.*)",and\(updated_at\.eq\."(.*)",id\.gt\."(.*)"\)')
+
+
+def _key(value):
+    """Sort key matching Postgres ascending order with NULLs last"""
+    return (value is None, value if value is not None else 0)
+
+
+def _same_type(value, like):
+    return type(like)(value) if like is not None else value
+
+
+class FakeQuery:
+    """The PostgREST builder calls the mirror makes, over a list of dicts"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.ordering = []
+        self.limit_n = None
+
+    def select(self, columns):
+        self.columns = [c.strip() for c in columns.split(',')]
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r[column] >= value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r[column] > _same_type(value, r[column]))
+        return self
+
+    def is_(self, column, value):
+        assert value == 'null'
+        self.filters.append(lambda r: r.get(column) is None)
+        return self
+
+    def or_(self, expression):
+        updated_at, same, row_id = _KEYSET.fullmatch(expression).groups()
+        assert updated_at == same
+        self.filters.append(lambda r: r.get('updated_at') is not None and (
+            r['updated_at'] > updated_at
+            or (r['updated_at'] == updated_at and r['id'] > _same_type(row_id, r['id']))))
+        return self
+
+    def order(self, column):
+        self.ordering.append(column)
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def execute(self):
+        rows = [r for r in self.rows if all(f(r) for f in self.filters)]
+        rows.sort(key=lambda r: tuple(_key(r.get(c)) for c in self.ordering))
+        rows = rows[:self.limit_n]
+
+        class Response:
+            data = [{c: r.get(c) for c in self.columns} for r in rows]
+        return Response()
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.tables = {'ra_mst_races': [], 'ra_mst_runners': []}
+        self.client = self
+
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+
+
+def _race(i, updated_at='2025-01-01T10:00:00'):
+    return {'id': f'rac_{i}', 'date': f'2024-{i % 3 + 1:02d}-1{i % 9}', 'course_id': f'crs_{i % 4}',
+            'going': ['Good', 'Soft', None][i % 3], 'field_size': 8, 'updated_at': updated_at}
+
+
+def _runner(i, race, updated_at='2025-01-01T10:00:00', position=None):
+    return {'id': i, 'race_id': race, 'horse_id': f'hrs_{i}', 'jockey_id': f'jky_{i % 5}',
+            'position': position if position is not None else i % 9 + 1, 'prize_won': float(i),
+            'updated_at': updated_at}
+
+
+def _seed(db, races=12, runners_per_race=6):
+    for i in range(races):
+        db.tables['ra_mst_races'].append(_race(i))
+        for j in range(runners_per_race):
+            n = i * runners_per_race + j
+            db.tables['ra_mst_runners'].append(_runner(n, f'rac_{i}'))
+
+
+def _mirrored(mirror, table, columns):
+    return sorted(tuple(row[c] for c in columns) for row in AnalyticsMirror(mirror.root).scan(table, columns))
+
+
+def _expected(db, table, columns):
+    return sorted(tuple(row.get(c) for c in columns) for row in db.tables[table])
+
+
+RACE_COLUMNS = ['id', 'date', 'course_id', 'going', 'field_size']
+RUNNER_COLUMNS = ['id', 'race_id', 'horse_id', 'jockey_id', 'position', 'prize_won']
+
+
+def _assert_in_sync(mirror, db):
+    assert _mirrored(mirror, 'ra_mst_races', RACE_COLUMNS) == _expected(db, 'ra_mst_races', RACE_COLUMNS)
+    assert _mirrored(mirror, 'ra_mst_runners', RUNNER_COLUMNS) == _expected(db, 'ra_mst_runners', RUNNER_COLUMNS)
+
+
+def test_dictionary_round_trip(tmp_path):
+    dictionary = Dictionary()
+    values = ['jky_1', 'jky_2', None, 'jky_1', '', 'jky_3']
+    codes = [dictionary.encode(v) for v in values]
+    assert codes == [0, 1, -1, 0, -1, 2]
+    assert [dictionary.decode(c) for c in codes] == ['jky_1', 'jky_2', None, 'jky_1', None, 'jky_3']
+    assert Dictionary(list(dictionary.values)).codes == dictionary.codes
+
+    rows = [{'horse_id': v, 'position': i or None, 'prize_won': i * 1.5} for i, v in enumerate(values)]
+    columns = {'horse_id': 'dict:horse', 'position': 'int', 'prize_won': 'float'}
+    path = tmp_path / 'part.col'
+    path.write_bytes(encode_partition(rows, columns, {'horse': dictionary}))
+
+    count, raw = read_partition_columns(path, ['horse_id', 'position'])
+    assert count == len(rows) and set(raw) == {'horse_id', 'position'}
+    mirror = AnalyticsMirror(tmp_path / 'mirror')
+    mirror._dictionaries['horse'] = dictionary
+    assert mirror._decode(*raw['horse_id']) == [dictionary.decode(c) for c in codes]
+    assert mirror._decode(*raw['position']) == [None, 1, 2, 3, 4, 5]
+
+
+def test_sync_and_incremental_update(tmp_path):
+    db = FakeDatabase()
+    _seed(db)
+    mirror = AnalyticsMirror(tmp_path)
+    mirror.sync(db, page_size=7)
+    _assert_in_sync(mirror, db)
+
+    db.tables['ra_mst_runners'][3].update(position=1, updated_at='2025-01-02T08:00:00')
+    db.tables['ra_mst_races'].append(_race(99, '2025-01-02T08:00:00'))
+    db.tables['ra_mst_runners'].append(_runner(1000, 'rac_99', '2025-01-02T08:00:00'))
+    mirror.sync(db, page_size=7)
+    _assert_in_sync(mirror, db)
+    assert mirror.manifest['watermarks']['ra_mst_runners'] == '2025-01-02T08:00:00'
+
+
+def test_keyset_paging_reads_every_row_sharing_a_timestamp(tmp_path):
+    db = FakeDatabase()
+    _seed(db, races=5, runners_per_race=40)     # 200 runners, one updated_at
+    mirror = AnalyticsMirror(tmp_path)
+    stats = mirror.sync(db, page_size=9)
+    assert stats['ra_mst_runners']['fetched'] == 200
+    _assert_in_sync(mirror, db)
+
+
+def test_runner_waits_for_its_race(tmp_path):
+    db = FakeDatabase()
+    _seed(db, races=3)
+    db.tables['ra_mst_runners'].append(_runner(500, 'rac_late', '2025-01-03T09:00:00'))
+    mirror = AnalyticsMirror(tmp_path)
+    assert mirror.sync(db)['ra_mst_runners']['orphans'] == 1
+    assert mirror.manifest['watermarks']['ra_mst_runners'] == '2025-01-03T09:00:00'
+
+    late = _race(7, '2025-01-03T09:05:00')
+    late['id'] = 'rac_late'
+    db.tables['ra_mst_races'].append(late)
+    assert AnalyticsMirror(tmp_path).sync(db)['ra_mst_runners']['orphans'] == 0
+    _assert_in_sync(mirror, db)
+    assert not (tmp_path / 'pending_runners.json').read_text().strip('[]')
+
+
+def _count_writes(tmp_path, db, monkeypatch):
+    calls = []
+    real = analytics_mirror._write_atomic
+    monkeypatch.setattr(analytics_mirror, '_write_atomic', lambda path, data: (calls.append(path), real(path, data)))
+    AnalyticsMirror(tmp_path).sync(db, page_size=5)
+    monkeypatch.setattr(analytics_mirror, '_write_atomic', real)
+    return len(calls)
+
+
+def _crash_after(n, monkeypatch):
+    real = analytics_mirror._write_atomic
+    done = []
+
+    def write(path, data):
+        if len(done) == n:
+            raise KeyboardInterrupt('simulated crash')
+        done.append(path)
+        real(path, data)
+    monkeypatch.setattr(analytics_mirror, '_write_atomic', write)
+    return real
+
+
+@pytest.mark.parametrize('initial', [True, False])
+def test_interrupted_sync_then_rerun(tmp_path, monkeypatch, initial):
+    """A crash after any write leaves a readable mirror that the next sync completes"""
+    db = FakeDatabase()
+    _seed(db)
+    writes = _count_writes(tmp_path / 'probe', db, monkeypatch) if initial else None
+
+    if not initial:
+        AnalyticsMirror(tmp_path / 'base').sync(db, page_size=5)
+        for i in range(12, 20):
+            db.tables['ra_mst_races'].append(_race(i, '2025-02-01T00:00:00'))
+            for j in range(4):
+                db.tables['ra_mst_runners'].append(_runner(1000 + i * 4 + j, f'rac_{i}', '2025-02-01T00:00:00'))
+        for row in db.tables['ra_mst_runners'][:10]:
+            row.update(jockey_id='jky_new_' + str(row['id']), updated_at='2025-02-01T00:00:01')
+        probe = tmp_path / 'probe'
+        shutil.copytree(tmp_path / 'base', probe)
+        writes = _count_writes(probe, db, monkeypatch)
+    assert writes > 3
+
+    for n in range(writes):
+        root = tmp_path / f'crash_{n}'
+        if not initial:
+            shutil.copytree(tmp_path / 'base', root)
+        real = _crash_after(n, monkeypatch)
+        with pytest.raises(KeyboardInterrupt):
+            AnalyticsMirror(root).sync(db, page_size=5)
+        monkeypatch.setattr(analytics_mirror, '_write_atomic', real)
+
+        # Whatever was saved decodes without errors
+        survivor = AnalyticsMirror(root)
+        list(survivor.scan('ra_mst_races'))
+        list(survivor.scan('ra_mst_runners'))
+
+        AnalyticsMirror(root).sync(db, page_size=5)
+        _assert_in_sync(AnalyticsMirror(root), db)
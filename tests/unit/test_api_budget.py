@@ -0,0 +1,121 @@
+"""
+API budget: estimates from defaults and measured runs, the daily budget check
+with its reserve, and run tracking
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.api_budget as api_budget
+from utils.api_budget import ApiBudget, UsageLedger, UsageMeter, endpoint_key, pages, record_call
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    """Ledger in a temp dir, with a fresh meter writing to it"""
+    ledger = UsageLedger(str(tmp_path / 'api_usage.sqlite3'))
+    meter = UsageMeter()
+    meter.ledger = ledger
+    monkeypatch.setattr(api_budget, '_meter', meter)
+    monkeypatch.setattr(api_budget, '_default_label', None)
+    yield ledger
+    ledger.close()
+
+
+def _spend(calls, endpoint='/jockeys/jky_1/results'):
+    for _ in range(calls):
+        record_call(endpoint, items=50)
+
+
+def test_endpoint_key_and_pages():
+    assert endpoint_key('/jockeys/jky_301/results?page=2') == '/jockeys/{id}/results'
+    assert pages(0) == 1
+    assert pages(50) == 1
+    assert pages(51) == 2
+
+
+def test_estimate_defaults_without_history(ledger):
+    budget = ApiBudget(ledger, rate=2.0)
+    estimate = budget.estimate('jockeys_statistics', 100, 'jockeys', default_calls_per_unit=3)
+
+    assert estimate.source == 'default'
+    assert estimate.calls == 300
+    assert estimate.seconds == 150.0
+
+
+def test_estimate_uses_measured_runs(ledger):
+    budget = ApiBudget(ledger, rate=2.0)
+    with budget.track('jockeys_statistics', 10, 'jockeys'):
+        _spend(15)
+
+    estimate = budget.estimate('jockeys_statistics', 100, 'jockeys', default_calls_per_unit=3)
+    assert estimate.source == 'history'
+    assert estimate.calls_per_unit == 1.5
+    assert estimate.calls == 150
+
+
+def test_track_charges_calls_to_the_job_and_records_the_run(ledger):
+    budget = ApiBudget(ledger)
+    api_budget.set_usage_label('other_script')
+    _spend(2)
+    with budget.track('horse_enrichment', 5, 'horses') as run:
+        _spend(4)
+        run['units'] = 4
+    assert run['calls'] == 4
+
+    usage = {row['job']: row['calls'] for row in ledger.usage()}
+    assert usage == {'other_script': 2, 'horse_enrichment': 4}
+    [recorded] = ledger.runs('horse_enrichment')
+    assert (recorded['units'], recorded['calls'], recorded['status']) == (4, 4, 'done')
+
+
+def test_failed_run_is_recorded_but_not_used_for_estimates(ledger):
+    budget = ApiBudget(ledger)
+    with pytest.raises(RuntimeError):
+        with budget.track('horse_enrichment', 5, 'horses'):
+            _spend(50)
+            raise RuntimeError('API down')
+
+    assert ledger.runs('horse_enrichment')[0]['status'] == 'failed'
+    assert budget.estimate('horse_enrichment', 5, 'horses').source == 'default'
+
+
+def test_check_keeps_the_reserve_for_live_and_daily_work(ledger):
+    budget = ApiBudget(ledger, daily_calls=1000, reserve_calls=200)
+    _spend(300)
+    estimate = budget.estimate('backfill', 600, 'races')
+
+    backfill = budget.check(estimate, priority='backfill')
+    assert backfill.remaining == 500
+    assert backfill.allowed and backfill.reshaped and backfill.units == 500
+
+    daily = budget.check(estimate, priority='daily')
+    assert daily.remaining == 700
+    assert daily.allowed and not daily.reshaped and daily.units == 600
+
+
+def test_check_refuses_when_nothing_fits_or_reshaping_is_off(ledger):
+    budget = ApiBudget(ledger, daily_calls=1000, reserve_calls=200)
+    _spend(795)
+    estimate = budget.estimate('enrichment', 20, 'horses', default_calls_per_unit=2)
+
+    assert budget.check(estimate, priority='backfill').units == 2
+    assert not budget.check(estimate, priority='backfill', reshape=False).allowed
+    assert budget.check(estimate, priority='live').units == 20
+
+    _spend(5)
+    refused = budget.check(estimate, priority='backfill')
+    assert not refused.allowed and refused.units == 0 and refused.remaining == 0
+    assert 'needs 40 calls' in refused.reason
+
+
+def test_unlimited_budget_allows_everything(ledger):
+    budget = ApiBudget(ledger, daily_calls=0)
+    decision = budget.check(budget.estimate('backfill', 10 ** 6), priority='backfill')
+    assert decision.allowed and decision.remaining is None and decision.units == 10 ** 6
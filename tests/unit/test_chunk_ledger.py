@@ -0,0 +1,99 @@
+"""
+Chunk ledger: monthly planning, resuming a backfill and retrying failed chunks
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.chunk_ledger import ChunkLedger, chunk_days, monthly_chunks, run_chunks
+
+
+def _recorder(fail=()):
+    """Chunk function that records its calls and fails the given start dates"""
+    calls = []
+    lock = threading.Lock()
+
+    def func(start, end):
+        with lock:
+            calls.append(start)
+        if start in fail:
+            raise RuntimeError(f"API error for {start}")
+        return {'success': True, 'races': 10}
+    return func, calls
+
+
+def _plan(path, start=date(2015, 1, 15), end=date(2015, 4, 10)):
+    ledger = ChunkLedger(path, name='test')
+    return ledger, ledger.plan(monthly_chunks(start, end))
+
+
+def test_monthly_chunks_cover_the_range():
+    chunks = monthly_chunks(date(2015, 1, 15), date(2015, 4, 10))
+    assert chunks == [(date(2015, 1, 15), date(2015, 1, 31)), (date(2015, 2, 1), date(2015, 2, 28)),
+                      (date(2015, 3, 1), date(2015, 3, 31)), (date(2015, 4, 1), date(2015, 4, 10))]
+    ledger = ChunkLedger()
+    keys = ledger.plan(chunks)
+    assert sum(chunk_days(ledger.chunks[k]) for k in keys) == (date(2015, 4, 10) - date(2015, 1, 15)).days + 1
+
+
+def test_resume_skips_done_chunks(tmp_path):
+    path = tmp_path / 'ledger.json'
+    ledger, keys = _plan(path)
+    func, calls = _recorder()
+    ledger.start(keys[1])       # Left 'running' by a killed process
+    ledger.finish(keys[0], {'races': 10})
+
+    # A restarted backfill reloads the file and runs everything not done
+    ledger, keys = _plan(path)
+    summary = run_chunks(ledger, keys, func, workers=2)
+    assert sorted(calls) == ['2015-02-01', '2015-03-01', '2015-04-01']
+    assert (summary['ran'], summary['done'], summary['skipped']) == (3, 3, 1)
+    assert ledger.chunks[keys[1]]['attempts'] == 2
+
+    calls.clear()
+    summary = run_chunks(ChunkLedger(path), keys, func)
+    assert calls == [] and summary['skipped'] == 4
+    assert ChunkLedger(path).totals(keys) == {'races': 40}
+
+
+def test_failed_chunks_are_retried(tmp_path):
+    path = tmp_path / 'ledger.json'
+    ledger, keys = _plan(path)
+    func, calls = _recorder(fail={'2015-03-01'})
+    summary = run_chunks(ledger, keys, func, workers=3)
+    assert (summary['success'], summary['done'], summary['failed']) == (False, 3, 1)
+    failed = ChunkLedger(path).chunks[keys[2]]
+    assert failed['status'] == 'failed' and 'API error' in failed['error']
+
+    # Not retried when asked to skip failures, retried on the next normal run
+    calls.clear()
+    assert run_chunks(ChunkLedger(path), keys, func, retry_failed=False)['ran'] == 0
+    func, calls = _recorder()
+    summary = run_chunks(ChunkLedger(path), keys, func)
+    assert calls == ['2015-03-01'] and summary['success']
+    entry = ChunkLedger(path).chunks[keys[2]]
+    assert (entry['status'], entry['attempts'], entry['error']) == ('done', 2, None)
+
+
+def test_reported_failure_fails_the_chunk():
+    ledger = ChunkLedger()
+    keys = ledger.plan([('2015-01-01', '2015-01-31')])
+    summary = run_chunks(ledger, keys, lambda start, end: {'success': False, 'error': 'no data'})
+    assert summary['failed'] == 1
+    assert ledger.chunks[keys[0]]['error'] == 'no data'
+    assert ledger.counts(keys) == {'pending': 0, 'running': 0, 'done': 0, 'failed': 1}
+
+
+def test_reset_replans_done_chunks(tmp_path):
+    path = tmp_path / 'ledger.json'
+    ledger, keys = _plan(path)
+    run_chunks(ledger, keys, _recorder()[0])
+    ledger = ChunkLedger(path)
+    ledger.plan(monthly_chunks(date(2015, 1, 15), date(2015, 4, 10)), reset=True)
+    assert ledger.todo(keys) == keys
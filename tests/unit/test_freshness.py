@@ -0,0 +1,111 @@
+"""
+Freshness: per-race lag samples, rolling percentiles and SLO attainment
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.freshness as freshness
+from utils.freshness import MAX_RESULT_LAG, FreshnessTracker
+
+NOW = datetime(2025, 10, 18, 16, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _off(seconds_from_now):
+    return datetime.fromtimestamp(NOW + seconds_from_now, timezone.utc).isoformat()
+
+
+@pytest.fixture(autouse=True)
+def slo(monkeypatch):
+    monkeypatch.setenv('RACING_FRESHNESS_SLO_RESULT', '60')
+    monkeypatch.setenv('RACING_FRESHNESS_SLO_RACECARD', '600')
+
+
+def test_percentiles_mean_and_slo_share():
+    tracker = FreshnessTracker()
+    tracker.record('result', {f'rac_{n}': float(n) for n in range(1, 101)}, now=NOW)
+
+    row = tracker.summary(now=NOW)['result']
+    assert row['samples'] == 100
+    assert (row['p50_s'], row['p90_s'], row['p95_s'], row['p99_s']) == (51.0, 90.0, 95.0, 99.0)
+    assert row['mean_s'] == 50.5 and row['sum_s'] == 5050.0 and row['max_s'] == 100.0
+    assert row['slo_target_s'] == 60.0
+    assert row['within_slo'] == 0.6
+
+    assert tracker.summary(now=NOW)['racecard'] == {'samples': 0, 'slo_target_s': 600.0}
+
+
+def test_single_sample_is_every_percentile():
+    tracker = FreshnessTracker()
+    tracker.record('result', {'rac_1': 42.0}, now=NOW)
+    row = tracker.summary(now=NOW)['result']
+    assert row['p50_s'] == row['p99_s'] == row['max_s'] == 42.0
+
+
+def test_each_race_counts_once_and_old_samples_leave_the_window():
+    tracker = FreshnessTracker(window=3600)
+    assert tracker.record('result', {'rac_1': 30.0, 'rac_2': 90.0}, now=NOW) == 2
+    assert tracker.record('result', {'rac_1': 500.0}, now=NOW + 60) == 0
+    assert tracker.record('result', {'rac_3': 10.0}, now=NOW + 3000) == 1
+
+    assert tracker.summary(now=NOW + 60)['result']['max_s'] == 90.0
+    later = tracker.summary(now=NOW + 4000)['result']
+    assert later['samples'] == 1 and later['p50_s'] == 10.0
+
+
+def test_results_lag_from_the_off_skipping_backfill():
+    tracker = FreshnessTracker()
+    races = [
+        {'id': 'rac_1', 'off_dt': _off(-300), 'has_result': True},
+        {'id': 'rac_2', 'off_dt': _off(-MAX_RESULT_LAG - 60), 'has_result': True},    # Backfill
+        {'id': 'rac_3', 'off_dt': _off(-300), 'has_result': False},
+        {'id': 'rac_4', 'off_dt': _off(-300), 'has_result': True, 'is_abandoned': True},
+        {'id': 'rac_5', 'off_dt': _off(600), 'has_result': True},                     # Not off yet
+    ]
+    assert tracker.record_results(races, now=NOW) == 1
+    assert tracker.summary(now=NOW)['result']['p50_s'] == 300.0
+
+
+def test_racecard_lag_from_first_sighting_to_first_write():
+    tracker = FreshnessTracker()
+    tracker.racecards_seen([{'race_id': 'rac_1', 'off_dt': _off(3600)},
+                            {'race_id': 'rac_2', 'off_dt': _off(-60)}], now=NOW)         # Already off
+    tracker.racecards_seen([{'race_id': 'rac_1', 'off_dt': _off(3600)}], now=NOW + 100)
+
+    runners = [{'race_id': 'rac_1', 'horse_id': 'hrs_1'}, {'race_id': 'rac_1', 'horse_id': 'hrs_2'},
+               {'race_id': 'rac_2', 'horse_id': 'hrs_3'}]
+    assert tracker.record_racecards(runners, now=NOW + 240) == 1
+    assert tracker.record_racecards(runners, now=NOW + 900) == 0
+
+    row = tracker.summary(now=NOW + 900)['racecard']
+    assert row['samples'] == 1 and row['p50_s'] == 240.0 and row['within_slo'] == 1.0
+
+
+def test_processes_share_samples_through_the_state_file(tmp_path):
+    path = str(tmp_path / 'freshness.json')
+    FreshnessTracker(path).record('result', {'rac_1': 30.0}, now=NOW)
+    FreshnessTracker(path).record('result', {'rac_2': 90.0, 'rac_1': 999.0}, now=NOW)
+
+    row = FreshnessTracker(path).summary(now=NOW)['result']
+    assert row['samples'] == 2 and row['max_s'] == 90.0 and row['within_slo'] == 0.5
+
+
+def test_metric_families_report_quantiles_per_stream(monkeypatch):
+    tracker = FreshnessTracker()
+    tracker.record('result', {f'rac_{n}': float(n) for n in range(1, 11)})
+    monkeypatch.setattr(freshness, '_tracker', tracker)
+
+    lag, target, within = freshness.metric_families()
+    assert lag.name.endswith('_freshness_lag_seconds') and lag.type == 'summary'
+    quantiles = {labels['quantile']: value for suffix, labels, value in lag.samples if not suffix}
+    assert quantiles == {'0.5': 5.0, '0.9': 9.0, '0.95': 10.0, '0.99': 10.0}
+    assert {(suffix, value) for suffix, labels, value in lag.samples if suffix} == {('_sum', 55.0), ('_count', 10)}
+    assert all(labels['stream'] == 'result' for _, labels, _ in lag.samples + within.samples)
+    assert {labels['stream']: value for _, labels, value in target.samples} == {'result': 60.0, 'racecard': 600.0}
@@ -0,0 +1,162 @@
+"""
+Instrumentation: counters, timers and histograms, per-run scopes and the
+disabled fast path
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.instrumentation as instrumentation
+from utils.instrumentation import (SIZE_BUCKETS, Histogram, bound_scopes, count, current_scopes,
+                                   instrumented_run, measure, metric_key, observe, registry, timed,
+                                   timer)
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', True)
+    registry().reset()
+    yield
+    registry().reset()
+
+
+def test_counters_are_keyed_by_name_and_labels():
+    count('api.retries')
+    count('api.retries', 2)
+    count('db.rows', 100, table='ra_mst_runners')
+    count('db.rows', 5, table='ra_mst_races')
+
+    counters = registry().breakdown()['counters']
+    assert counters == {
+        'api.retries': 3,
+        'db.rows{table=ra_mst_races}': 5,
+        'db.rows{table=ra_mst_runners}': 100,
+    }
+    assert metric_key('db.rows', {'b': '2', 'a': '1'}) == ('db.rows', (('a', '1'), ('b', '2')))
+
+
+def test_timer_records_durations_and_counts_errors():
+    with timer('races.transform'):
+        pass
+    with pytest.raises(ValueError):
+        with timer('races.transform'):
+            raise ValueError('bad card')
+
+    counters, histograms = registry().snapshot()
+    histogram = histograms[('races.transform', ())]
+    assert histogram.count == 2
+    assert 0 <= histogram.min <= histogram.max
+    assert counters == {('races.transform.errors', ()): 1}
+
+    row = registry().breakdown()['timers']['races.transform']
+    assert row['count'] == 2
+    assert set(row) == {'count', 'total_s', 'mean_ms', 'p95_ms', 'max_ms'}
+
+
+def test_timed_defaults_to_the_qualified_name():
+    class Fetcher:
+        @timed()
+        def transform(self, x):
+            return x * 2
+
+    @timed('stats.rollup', entity='jockey')
+    def rollup():
+        return 'done'
+
+    assert Fetcher().transform(4) == 8
+    assert rollup() == 'done'
+    timers = registry().breakdown()['timers']
+    assert set(timers) == {Fetcher.transform.__qualname__, 'stats.rollup{entity=jockey}'}
+
+
+def test_histogram_quantiles_and_cumulative_buckets():
+    histogram = Histogram(SIZE_BUCKETS)
+    for value in (1, 3, 3, 8, 40, 7000):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 5          # Bucket (1, 5]
+    assert histogram.quantile(0.8) == 50
+    assert histogram.quantile(1.0) == 7000       # +Inf bucket reports the max
+    assert Histogram().quantile(0.5) is None
+
+    cumulative = dict(histogram.cumulative())
+    assert cumulative[1] == 1 and cumulative[5] == 3 and cumulative[50] == 5
+    assert cumulative[float('inf')] == 6
+
+
+def test_observe_with_size_buckets_goes_into_values():
+    observe('db.batch_rows', 100, buckets=SIZE_BUCKETS)
+    observe('db.batch_rows', 300, buckets=SIZE_BUCKETS)
+
+    breakdown = registry().breakdown()
+    assert breakdown['timers'] == {}
+    assert breakdown['values']['db.batch_rows'] == {'count': 2, 'total': 400, 'mean': 200.0, 'max': 300}
+
+
+def test_measure_scopes_nest_on_top_of_the_registry():
+    count('before')
+    with measure() as outer:
+        count('fetch')
+        with measure() as inner:
+            count('transform')
+        assert current_scopes() == (outer,)
+    assert current_scopes() == ()
+
+    assert outer.breakdown()['counters'] == {'fetch': 1, 'transform': 1}
+    assert inner.breakdown()['counters'] == {'transform': 1}
+    assert registry().breakdown()['counters'] == {'before': 1, 'fetch': 1, 'transform': 1}
+
+
+def test_worker_threads_record_into_bound_scopes():
+    with measure() as run:
+        scopes = current_scopes()
+
+        def work(bound):
+            if bound:
+                with bound_scopes(scopes):
+                    count('chunk')
+            else:
+                count('chunk')
+
+        threads = [threading.Thread(target=work, args=(bound,)) for bound in (True, True, False)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert run.breakdown()['counters'] == {'chunk': 2}
+    assert registry().breakdown()['counters'] == {'chunk': 3}
+
+
+def test_instrumented_run_attaches_the_breakdown():
+    @instrumented_run('races')
+    def fetch_and_store():
+        count('races.fetched', 12)
+        return {'success': True}
+
+    result = fetch_and_store()
+    assert result['instrumentation']['counters'] == {'races.fetched': 12}
+    assert 'races.run' in result['instrumentation']['timers']
+
+
+def test_disabled_recording_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', False)
+
+    @instrumented_run('races')
+    def fetch_and_store():
+        return {'success': True}
+
+    count('api.retries')
+    observe('db.batch_rows', 10, buckets=SIZE_BUCKETS)
+    with timer('races.transform'):
+        pass
+    assert timer('a') is timer('b')
+    assert fetch_and_store() == {'success': True}
+    assert registry().snapshot() == ({}, {})
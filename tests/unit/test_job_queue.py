@@ -0,0 +1,180 @@
+"""
+Job queue on the SQLite backend: claiming, lease expiry, concurrency keys and retries
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.job_queue as job_queue
+from utils.job_queue import JobQueue, JobWorker, SQLiteJobQueue, idempotency_key
+from utils.job_runner import JobContext, JobRunner, JobTimeout, bound_job, checkpoint
+
+
+class Clock:
+    """Stands in for time.time() so leases and backoff expire on demand"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = SQLiteJobQueue(str(tmp_path / 'queue.sqlite3'), retry_delay=10)
+    yield queue
+    queue.close()
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+
+def test_enqueue_is_idempotent(queue):
+    key = idempotency_key('fetch', 'races', '2015-01-01', None)
+    assert key == 'fetch:races:2015-01-01'
+    first = queue.enqueue('fetch', {'entity': 'races'}, idempotency_key=key)
+    assert first is not None
+    assert queue.enqueue('fetch', {'entity': 'races'}, idempotency_key=key) is None
+    assert queue.counts() == {'pending': 1}
+
+
+def test_claim_hands_each_job_to_one_worker(queue, clock):
+    queue.enqueue('fetch', {'n': 1}, idempotency_key='a')
+    queue.enqueue('fetch', {'n': 2}, idempotency_key='b', delay=60)
+    queue.enqueue('other', {'n': 3}, idempotency_key='c')
+
+    job = queue.claim('w1', ['fetch'])
+    assert (job.idempotency_key, job.payload, job.attempts, job.lease_owner) == ('a', {'n': 1}, 1, 'w1')
+    assert queue.claim('w2', ['fetch']) is None     # 'b' is delayed, 'c' is another type
+
+    clock.now += 61
+    assert queue.claim('w2', ['fetch']).idempotency_key == 'b'
+    assert queue.complete(job, {'rows': 5})
+    assert queue.counts() == {'done': 1, 'running': 1, 'pending': 1}
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    queue.enqueue('fetch', idempotency_key='a', max_attempts=2)
+    job = queue.claim('w1', lease_seconds=30)
+
+    clock.now += 20
+    assert queue.heartbeat(job, lease_seconds=30)
+    clock.now += 20
+    assert queue.claim('w2') is None                # Renewed lease still held
+
+    clock.now += 31
+    reclaimed = queue.claim('w2')
+    assert (reclaimed.id, reclaimed.attempts, reclaimed.lease_owner) == (job.id, 2, 'w2')
+    assert not queue.heartbeat(job)                 # w1 lost the lease
+    assert not queue.complete(job)
+
+    # Expiring on the last attempt fails the job instead of running it again
+    clock.now += 200
+    assert queue.claim('w3') is None
+    assert queue.counts() == {'failed': 1}
+
+
+def test_concurrency_key_is_exclusive(queue, clock):
+    queue.enqueue('update', idempotency_key='live:1', concurrency_key='live_data')
+    queue.enqueue('update', idempotency_key='live:2', concurrency_key='live_data')
+    queue.enqueue('update', idempotency_key='results:1', concurrency_key='results')
+
+    first = queue.claim('w1', lease_seconds=30)
+    second = queue.claim('w2', lease_seconds=30)
+    assert (first.idempotency_key, second.idempotency_key) == ('live:1', 'results:1')
+    assert queue.claim('w3') is None
+    assert queue.complete(second)
+
+    # An expired holder keeps its key until it is reclaimed and finishes
+    clock.now += 31
+    reclaimed = queue.claim('w3', lease_seconds=30)
+    assert reclaimed.idempotency_key == 'live:1'
+    assert queue.claim('w4') is None
+    assert queue.complete(reclaimed)
+    assert queue.claim('w4').idempotency_key == 'live:2'
+
+
+def test_replace_pending_cancels_older_slots(queue):
+    queue.enqueue('update', idempotency_key='live:1', concurrency_key='live_data')
+    queue.enqueue('update', idempotency_key='live:2', concurrency_key='live_data', replace_pending=True)
+    assert queue.counts() == {'cancelled': 1, 'pending': 1}
+    assert queue.claim('w1').idempotency_key == 'live:2'
+
+
+def test_failed_job_retries_with_backoff(queue, clock):
+    queue.enqueue('fetch', idempotency_key='a', max_attempts=3)
+    assert queue.fail(queue.claim('w1'), 'timeout') == 'pending'
+    assert queue.claim('w1') is None
+    clock.now += 10
+    assert queue.fail(queue.claim('w1'), 'timeout') == 'pending'
+    clock.now += 10
+    assert queue.claim('w1') is None                # Second retry waits 20s
+    clock.now += 10
+    assert queue.fail(queue.claim('w1'), 'timeout') == 'failed'
+    assert queue.counts() == {'failed': 1}
+
+
+def test_worker_runs_handlers_and_records_outcomes(queue, clock):
+    queue.enqueue('ok', {'n': 1}, idempotency_key='ok')
+    queue.enqueue('bad', idempotency_key='bad', max_attempts=1)
+    handlers = {'ok': lambda payload: {'success': True, 'n': payload['n']},
+                'bad': lambda payload: {'success': False, 'error': 'no data'}}
+
+    outcomes = JobWorker(queue, handlers, worker_id='w1', lease_seconds=60, heartbeat_seconds=30).run()
+    assert [(o['key'], o['status'], o['error']) for o in outcomes] == [('ok', 'done', None),
+                                                                       ('bad', 'failed', 'no data')]
+    assert queue.counts() == {'done': 1, 'failed': 1}
+
+
+def test_worker_stops_a_handler_whose_lease_was_lost(queue, clock, tmp_path, monkeypatch):
+    queue.enqueue('slow', idempotency_key='slow', max_attempts=3)
+    reached = []
+
+    def handler(payload):
+        # Stall past the lease; another worker reclaims the job meanwhile
+        clock.now += 100
+        assert queue.claim('w2', lease_seconds=60).lease_owner == 'w2'
+        for _ in range(200):
+            try:
+                checkpoint()
+            except JobTimeout:
+                reached.append('stopped')
+                raise
+            job_queue.time.sleep(0.01)
+        return {'success': True}
+
+    worker = JobWorker(queue, {'slow': handler}, worker_id='w1', lease_seconds=60, heartbeat_seconds=0.05)
+    outcome, = worker.run()
+    assert reached == ['stopped']
+    assert outcome['status'] == 'lease_lost'
+    assert worker.stats == {'claimed': 1, 'done': 0, 'retried': 0, 'failed': 0, 'lease_lost': 1}
+    # Nothing was retried or completed on w1's behalf; w2 still holds the job
+    assert queue.counts() == {'running': 1}
+
+    # A nested JobRunner job inherits the cancellation
+    monkeypatch.setenv('RACING_RUN_LEDGER', str(tmp_path / 'run_ledger.jsonl'))
+    outer = JobContext('outer')
+    runner = JobRunner(jobs={'nested.py': 'tests.unit.test_job_queue:_nested_job'})
+    outer.cancelled.set()
+    with bound_job(outer):
+        assert runner.run('nested.py', timeout=5)['success'] is False
+
+
+def _nested_job(argv):
+    checkpoint()
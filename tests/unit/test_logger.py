@@ -0,0 +1,129 @@
+"""
+Logging pipeline: records are queued and written by the listener thread,
+one rotating file per process, and ProgressLogger rate limiting
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import logging
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.logger import ProgressLogger, _LazyQueueHandler, get_logger, shutdown_logging
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """A fresh pipeline logging to tmp_path/test.log"""
+    shutdown_logging()
+    monkeypatch.setenv('RACING_LOG_FILE', 'test.log')
+    monkeypatch.setenv('LOG_LEVEL', 'INFO')
+    yield tmp_path
+    shutdown_logging()
+
+
+def _record(msg, *args):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_prepare_keeps_immutable_arguments_lazy():
+    handler = _LazyQueueHandler(None)
+    record = handler.prepare(_record('%d races at %s', 12, 'Ascot'))
+    assert record.args == (12, 'Ascot')
+    assert record.getMessage() == '12 races at Ascot'
+
+
+def test_prepare_renders_mutable_arguments_up_front():
+    handler = _LazyQueueHandler(None)
+    runners = ['hrs_1']
+    record = handler.prepare(_record('runners %s', runners))
+    runners.append('hrs_2')
+    assert record.args is None
+    assert record.getMessage() == "runners ['hrs_1']"
+
+    record = handler.prepare(_record('%(course)s', {'course': 'York'}))
+    assert record.getMessage() == 'York'
+
+
+def test_loggers_share_one_queued_file_pipeline(log_dir, capsys):
+    races = get_logger('test.races', log_dir)
+    results = get_logger('test.results', log_dir)
+    assert races.handlers == results.handlers
+    assert len(races.handlers) == 1 and isinstance(races.handlers[0], _LazyQueueHandler)
+
+    get_logger('test.races', log_dir)
+    assert len(races.handlers) == 1
+
+    races.debug('file only')
+    races.info('fetched %d races', 12)
+    results.warning('no results for %s', 'rac_1')
+    shutdown_logging()
+
+    assert [p.name for p in log_dir.iterdir()] == ['test.log']
+    lines = (log_dir / 'test.log').read_text().splitlines()
+    assert len(lines) == 3
+    assert re.search(r' - test\.races - DEBUG - test_loggers_share_one_queued_file_pipeline:\d+ - file only$',
+                     lines[0])
+    assert lines[1].endswith('fetched 12 races')
+    assert 'test.results - WARNING' in lines[2]
+
+    console = capsys.readouterr().out.splitlines()
+    assert len(console) == 2
+    assert console[0].endswith('test.races - INFO - fetched 12 races')
+
+
+def test_log_file_rotates(log_dir, monkeypatch):
+    monkeypatch.setenv('RACING_LOG_MAX_BYTES', '500')
+    monkeypatch.setenv('RACING_LOG_BACKUPS', '2')
+    logger = get_logger('test.rotation', log_dir)
+    for n in range(50):
+        logger.debug('line %d %s', n, 'x' * 40)
+    shutdown_logging()
+
+    assert sorted(p.name for p in log_dir.iterdir()) == ['test.log', 'test.log.1', 'test.log.2']
+    assert 'line 49' in (log_dir / 'test.log').read_text()
+
+
+def test_file_logging_can_be_switched_off(log_dir, monkeypatch, capsys):
+    monkeypatch.setenv('RACING_LOG_FILE', 'off')
+    get_logger('test.console', log_dir).info('console only')
+    shutdown_logging()
+
+    assert list(log_dir.iterdir()) == []
+    assert 'console only' in capsys.readouterr().out
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_progress_logger_is_rate_limited():
+    handler = _ListHandler()
+    logger = logging.getLogger('test.progress')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        progress = ProgressLogger(logger, 'Enriching horses', total=200, interval=3600)
+        for _ in range(200):
+            progress.update()
+        assert handler.messages == []
+        progress.finish()
+
+        unbounded = ProgressLogger(logger, 'Scanning', interval=0)
+        unbounded.update(5)
+    finally:
+        logger.removeHandler(handler)
+
+    assert len(handler.messages) == 2
+    assert handler.messages[0].startswith('Enriching horses: 200/200 (100%, ')
+    assert handler.messages[1].startswith('Scanning: 5 (')
@@ -0,0 +1,92 @@
+"""
+Memory budget: when should_spill() fires for the parameters each caller uses
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.memory_budget as memory_budget
+from utils.memory_budget import (BUFFER_CHECK_EVERY, BUFFER_MIN_ITEMS, MIN_ITEMS, MemoryBudget,
+                                 SortedRuns)
+
+FLUSH_EVERY = 100   # enrich_entities_local_batch's own flush interval
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """Settable RSS reading in MB"""
+    reading = {'mb': 2000.0}
+    monkeypatch.setattr(memory_budget, 'current_rss_mb', lambda: reading['mb'])
+    return reading
+
+
+def _buffer_flushes(budget, horses):
+    """The enrichment loop: flush every FLUSH_EVERY horses, or when the budget says so"""
+    buffered, early = 0, 0
+    for idx in range(horses):
+        buffered += 2                  # A horse and its pedigree
+        over_budget = budget.should_spill(buffered)
+        if (idx + 1) % FLUSH_EVERY == 0 or over_budget:
+            buffered = 0
+            if over_budget:
+                early += 1
+                budget.spilled()
+    return early
+
+
+def test_enrichment_buffer_flushes_early_when_over_budget(rss):
+    budget = MemoryBudget(1, check_every=BUFFER_CHECK_EVERY, min_items=BUFFER_MIN_ITEMS)
+    assert _buffer_flushes(budget, 150) > 10
+    assert budget.max_items == BUFFER_MIN_ITEMS     # Still over after every flush: cap halved to the floor
+    assert budget.spills > 10
+
+
+def test_enrichment_buffer_untouched_under_budget(rss):
+    rss['mb'] = 100.0
+    budget = MemoryBudget(1200, check_every=BUFFER_CHECK_EVERY, min_items=BUFFER_MIN_ITEMS)
+    assert _buffer_flushes(budget, 1000) == 0
+    assert budget.max_items is None and budget.peak_mb == 100.0
+
+
+def test_aggregation_defaults_never_fire_on_a_small_buffer(rss):
+    """Why the enrichment script needs the buffer parameters"""
+    assert _buffer_flushes(MemoryBudget(1), 100_000) == 0
+
+
+def test_aggregation_defaults_cap_a_growing_dict(rss):
+    budget = MemoryBudget(1)
+    spills, cells = [], 0
+    for _ in range(100_000):
+        cells += 1
+        if budget.should_spill(cells):
+            spills.append(cells)
+            cells = 0
+            budget.spilled()
+    assert spills[0] == MIN_ITEMS                   # First RSS sample above MIN_ITEMS partials
+    assert budget.max_items == MIN_ITEMS
+    assert all(size == MIN_ITEMS for size in spills)
+    assert len(spills) == 100_000 // MIN_ITEMS
+
+
+def test_from_env_passes_parameters(monkeypatch):
+    monkeypatch.setenv('RACING_MEMORY_BUDGET_MB', '512')
+    budget = MemoryBudget.from_env(check_every=BUFFER_CHECK_EVERY, min_items=BUFFER_MIN_ITEMS)
+    assert (budget.limit_mb, budget.check_every, budget.min_items) == (512.0, 1, 1)
+    monkeypatch.setenv('RACING_MEMORY_BUDGET_MB', '0')
+    assert MemoryBudget.from_env() is None
+
+
+def test_sorted_runs_merge_in_key_order(tmp_path):
+    with SortedRuns('test', str(tmp_path)) as runs:
+        runs.spill({('b', 1): [1], ('a', None): [2]})
+        runs.spill({('b', 1): [3], ('a', 2): [4]})
+        merged = list(runs.merge({('a', None): [5]}, lambda earlier, later: earlier + later))
+        assert len(list(tmp_path.iterdir())) == 2
+    assert merged == [(('a', 2), [4]), (('a', None), [2, 5]), (('b', 1), [1, 3])]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,83 @@
+"""
+Metrics endpoint: Prometheus exposition from instrumentation, jobs and collectors
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import utils.metrics_server as metrics_server
+from utils import instrumentation
+from utils.instrumentation import count, observe
+from utils.metrics_server import MetricFamily, mark_job, render
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    instrumentation.enable(True)
+    instrumentation.registry().reset()
+    monkeypatch.setattr(metrics_server, '_collectors', [])
+    yield
+    instrumentation.registry().reset()
+
+
+def _families(text):
+    """name -> type, checking the exposition's structure on the way"""
+    types, current = {}, None
+    for line in text.strip().split('\n'):
+        if line.startswith('# HELP '):
+            current = line.split()[2]
+        elif line.startswith('# TYPE '):
+            name, kind = line.split()[2:4]
+            assert name == current and name not in types, f"second TYPE block for {name}"
+            types[name] = kind
+        else:
+            name = _SAMPLE.match(line).group(1)
+            assert name.startswith(current), f"{name} outside its family block"
+    return types
+
+
+def test_render_has_one_type_line_per_family(monkeypatch):
+    # The entity index counts cache hits/misses; a collector repeating one
+    # of those names must not produce a second block
+    count('cache.hits', 3, cache='ra_mst_horses.ids')
+    count('cache.misses', 2, cache='ra_mst_horses.ids')
+    observe('api.request', 0.2, endpoint='/racecards')
+    mark_job('daily_fetch', success=True, duration=12.5)
+    metrics_server.register_collector(lambda: [
+        MetricFamily('racing_cache_hits_total', 'counter', 'Repeated').add(7, cache='other'),
+        MetricFamily('racing_cache_misses_total', 'gauge', 'Wrong type').add(1),
+        MetricFamily('racing_horse_index_hits_total', 'counter', 'Index hits').add(4, lookup='ids'),
+    ])
+    from utils import freshness
+    monkeypatch.setenv('RACING_FRESHNESS_STATE', 'off')
+    monkeypatch.setattr(freshness, '_tracker', None)
+    metrics_server.register_collector(freshness.metric_families)
+
+    text = render()
+    types = _families(text)
+    type_lines = [line.split()[2] for line in text.split('\n') if line.startswith('# TYPE ')]
+    assert not [name for name, n in Counter(type_lines).items() if n > 1]
+
+    assert types['racing_cache_hits_total'] == 'counter'
+    assert types['racing_cache_misses_total'] == 'counter'
+    assert 'racing_cache_hits_total{cache="ra_mst_horses.ids"} 3' in text
+    assert 'racing_cache_hits_total{cache="other"} 7' in text
+    assert 'racing_cache_misses_total 1' not in text
+    assert types['racing_api_request_seconds'] == 'histogram'
+    assert 'racing_api_request_seconds_count{endpoint="/racecards"} 1' in text
+    assert 'racing_job_runs_total{job="daily_fetch",status="success"} 1' in text
+
+
+def test_failing_collector_does_not_break_the_scrape():
+    metrics_server.register_collector(lambda: 1 / 0)
+    assert 'racing_process_start_time_seconds' in _families(render())
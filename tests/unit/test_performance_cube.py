@@ -0,0 +1,135 @@
+"""
+Performance cube: streaming moments and spill-to-disk rollups
+
+Pure Python, no database: python3 -m pytest tests/unit
+"""
+
+import math
+import random
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.performance_cube import CUBE_DIMENSIONS, PerformanceCube, RunningMoments
+
+
+def _runs(n: int, seed: int = 3):
+    """(runner, race) pairs over a few horses, jockeys and courses"""
+    rng = random.Random(seed)
+    for i in range(n):
+        race = {
+            'id': f"rac_{i // 8}",
+            'date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'course_id': f"crs_{rng.randint(1, 4)}",
+            'distance_f': rng.choice(['5f', '1m', '1m2f', '2m']),
+            'going': rng.choice(['Good', 'Soft', None]),
+            'surface': rng.choice(['Turf', 'AW']),
+        }
+        runner = {
+            'race_id': race['id'],
+            'horse_id': f"hrs_{rng.randint(1, 30)}",
+            'jockey_id': f"jky_{rng.randint(1, 10)}",
+            'trainer_id': f"trn_{rng.randint(1, 6)}",
+            'position': rng.randint(1, 12),
+            'finishing_time': f"{rng.randint(1, 3)}:{rng.uniform(0, 59):05.2f}",
+            'starting_price_decimal': round(rng.uniform(1.5, 50), 2),
+            'prize_won': rng.choice([0, 0, 0, 1500.0, 5200.0]),
+        }
+        yield runner, race
+
+
+def _snapshot(cells):
+    return {
+        key: (cell.runs, cell.wins, cell.places_2nd, cell.places_3rd, cell.prize,
+              cell.time.count, cell.time.mean, cell.time.m2,
+              cell.time.minimum, cell.time.maximum, cell.time.last, cell.time.last_at,
+              cell.sp.count, cell.sp.mean, cell.sp.m2, cell.expected_wins, cell.profit_loss)
+        for key, cell in cells
+    }
+
+
+def _assert_same_cells(actual, expected):
+    """Equal keys and values; floats only up to summation order"""
+    assert actual.keys() == expected.keys()
+    for key, values in actual.items():
+        for value, other in zip(values, expected[key]):
+            if isinstance(value, float) and isinstance(other, float):
+                assert math.isclose(value, other, rel_tol=1e-9, abs_tol=1e-9), key
+            else:
+                assert value == other, key
+
+
+def test_merged_moments_match_direct_computation():
+    rng = random.Random(11)
+    values = [rng.uniform(55, 250) for _ in range(1000)]
+
+    merged = RunningMoments()
+    for start in range(0, len(values), 137):
+        part = RunningMoments()
+        for value in values[start:start + 137]:
+            part.add(value)
+        merged.merge(part)
+
+    assert merged.count == len(values)
+    assert math.isclose(merged.mean, statistics.fmean(values), rel_tol=1e-12)
+    assert math.isclose(merged.variance, statistics.variance(values), rel_tol=1e-9)
+    assert merged.minimum == min(values)
+    assert merged.maximum == max(values)
+
+
+def test_merge_into_empty_and_with_empty():
+    moments = RunningMoments()
+    moments.merge(RunningMoments())
+    assert moments.count == 0 and moments.variance is None
+
+    other = RunningMoments()
+    other.add(2.0)
+    other.add(4.0)
+    moments.merge(other)
+    assert (moments.count, moments.mean, moments.variance) == (2, 3.0, 2.0)
+
+
+def test_latest_value_follows_race_date_not_scan_order():
+    moments = RunningMoments()
+    moments.add(70.0, '2024-05-01')
+    moments.add(65.0, '2024-09-01')
+    moments.add(80.0, '2024-01-01')
+    assert (moments.last, moments.last_at) == (65.0, '2024-09-01')
+
+    early, late = RunningMoments(), RunningMoments()
+    early.add(80.0, '2024-01-01')
+    late.add(65.0, '2024-09-01')
+    late.merge(early)
+    assert late.last == 65.0
+
+
+def test_spilled_rollups_equal_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setenv('RACING_SPILL_DIR', str(tmp_path))
+
+    in_memory = PerformanceCube()
+    spilled = PerformanceCube()
+    for i, (runner, race) in enumerate(_runs(3000), 1):
+        in_memory.add_runner(runner, race)
+        spilled.add_runner(runner, race)
+        if i % 700 == 0:
+            spilled.spill()
+    assert spilled.spilled and len(spilled.runs) == 4
+
+    try:
+        _assert_same_cells(_snapshot(spilled.iter_cells()), _snapshot(in_memory.iter_cells()))
+        for entity_type in ('horse', 'jockey', 'trainer'):
+            for dimensions in ((), ('course_id',), ('distance_yards', 'going')):
+                _assert_same_cells(_snapshot(spilled.rollup(entity_type, dimensions).items()),
+                                   _snapshot(in_memory.rollup(entity_type, dimensions).items()))
+
+        grouped = {(entity_id,) + key: cell
+                   for entity_id, cells in spilled.iter_entity_rollups('jockey', CUBE_DIMENSIONS[:1])
+                   for key, cell in cells.items()}
+        expected = {(entity_id,) + key: cell
+                    for entity_id, cells in in_memory.iter_entity_rollups('jockey', CUBE_DIMENSIONS[:1])
+                    for key, cell in cells.items()}
+        _assert_same_cells(_snapshot(grouped.items()), _snapshot(expected.items()))
+    finally:
+        spilled.close()
@@ -1,11 +1,19 @@
-"""Utils package - Utility modules and helper classes"""
+"""Utils package - Utility modules and helper classes
 
-from .api_client import RacingAPIClient
-from .entity_extractor import EntityExtractor
-from .logger import get_logger
-from .metadata_tracker import MetadataTracker
-from .regional_filter import RegionalFilter
-from .supabase_client import SupabaseReferenceClient
+The exports below are imported on first access, so `from utils.logger import
+get_logger` does not pull in requests or supabase.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'RacingAPIClient': '.api_client',
+    'EntityExtractor': '.entity_extractor',
+    'get_logger': '.logger',
+    'MetadataTracker': '.metadata_tracker',
+    'RegionalFilter': '.regional_filter',
+    'SupabaseReferenceClient': '.supabase_client',
+}
 
 __all__ = [
     'RacingAPIClient',
@@ -15,3 +23,15 @@ __all__ = [
     'RegionalFilter',
     'SupabaseReferenceClient',
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,589 @@
+"""
+Analytics Mirror - Local columnar copy of ra_mst_races and ra_mst_runners
+
+Analytics scripts re-read the runner and race tables over PostgREST on every
+run, which is slow and competes with ingestion for the same database. The
+mirror keeps a compressed, column-oriented copy on local disk, appended
+incrementally from an updated_at watermark:
+
+    <root>/
+        manifest.json               watermarks + partition row counts
+        dictionaries/<domain>.json  string dictionaries (code = list index)
+        race_partitions.bin         race code -> partition ordinal
+        pending_runners.json        runners whose race is not mirrored yet
+        ra_mst_races/<YYYY-MM>.col  one file per race-date month
+        ra_mst_runners/<YYYY-MM>.col
+
+Each .col file stores every column as a separately zlib-compressed block, so
+readers decompress only the columns they ask for. ID and category columns are
+dictionary-encoded to int32 codes shared across tables (runners.race_id and
+races.id both use the 'race' dictionary).
+
+A sync writes dictionaries first, then race_partitions.bin with the
+partition ordinals in the manifest, then the partitions, and the watermarks
+last. Every file only refers to codes and ordinals already saved, so an
+interrupted sync leaves a readable mirror and the rerun fetches the same rows
+again.
+
+Usage:
+    mirror = AnalyticsMirror()
+    mirror.sync(db_client)                   # incremental
+    cube = PerformanceCube.from_database(mirror)
+
+Any helper that accepts a db_client for scanning completed runners
+(PerformanceCube, CombinationEngine, HorseFormStore.rebuild) accepts an
+AnalyticsMirror in its place.
+"""
+
+import json
+import logging
+import math
+import os
+import struct
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMAT_MAGIC = b'RAMC1'
+MIRROR_VERSION = 1
+
+INT_NULL = -(2 ** 63)
+CODE_NULL = -1
+
+# Column -> storage kind per mirrored table.
+# 'dict:<domain>' = dictionary-encoded int32, 'int' = int64, 'float' = float64,
+# 'str' = compressed JSON list (free text, timestamps)
+TABLE_COLUMNS = {
+    'ra_mst_races': {
+        'id': 'dict:race',
+        'date': 'str',
+        'off_dt': 'str',
+        'course_id': 'dict:course',
+        'region': 'dict:region',
+        'type': 'dict:race_type',
+        'race_class': 'dict:race_class',
+        'distance_f': 'dict:distance_f',
+        'going': 'dict:going',
+        'surface': 'dict:surface',
+        'field_size': 'int',
+        'prize': 'str',
+        'updated_at': 'str',
+    },
+    'ra_mst_runners': {
+        'id': 'int',
+        'race_id': 'dict:race',
+        'horse_id': 'dict:horse',
+        'jockey_id': 'dict:jockey',
+        'trainer_id': 'dict:trainer',
+        'owner_id': 'dict:owner',
+        'sire_id': 'dict:sire',
+        'dam_id': 'dict:dam',
+        'damsire_id': 'dict:damsire',
+        'position': 'int',
+        'draw': 'str',
+        'age': 'int',
+        'sex': 'dict:sex',
+        'weight_lbs': 'int',
+        'ofr': 'int',
+        'rpr': 'int',
+        'prize_won': 'float',
+        'starting_price_decimal': 'float',
+        'finishing_time': 'str',
+        'created_at': 'str',
+        'updated_at': 'str',
+    },
+}
+
+# Row identity used when merging updated rows into a partition
+PRIMARY_KEYS = {
+    'ra_mst_races': ('id',),
+    'ra_mst_runners': ('race_id', 'horse_id'),
+}
+
+UNDATED_PARTITION = 'undated'
+
+
+def default_mirror_dir() -> Path:
+    """Mirror location (ANALYTICS_MIRROR_DIR, default <repo>/data/analytics_mirror)"""
+    env_dir = os.getenv('ANALYTICS_MIRROR_DIR')
+    if env_dir:
+        return Path(env_dir)
+    return Path(__file__).parent.parent / 'data' / 'analytics_mirror'
+
+
+def partition_key(race_date) -> str:
+    """Partition for a race date ('2024-05-18' -> '2024-05')"""
+    if not race_date or len(str(race_date)) < 7:
+        return UNDATED_PARTITION
+    return str(race_date)[:7]
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write via a temp file + rename so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _to_int(value) -> int:
+    if value is None or value == '':
+        return INT_NULL
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return INT_NULL
+
+
+def _to_float(value) -> float:
+    if value is None or value == '':
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class Dictionary:
+    """Append-only string dictionary for one domain (codes never change)"""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = values or []
+        self.codes: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value) -> int:
+        if value is None or value == '':
+            return CODE_NULL
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.dirty = True
+        return code
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+
+def encode_partition(rows: List[Dict], columns: Dict[str, str], dictionaries: Dict[str, Dictionary]) -> bytes:
+    """Encode rows into the columnar partition format"""
+    header = {'rows': len(rows), 'columns': {}}
+    blobs = []
+    offset = 0
+
+    for name, kind in columns.items():
+        values = [row.get(name) for row in rows]
+        if kind.startswith('dict:'):
+            dictionary = dictionaries[kind[5:]]
+            raw = array('i', (dictionary.encode(v) for v in values)).tobytes()
+        elif kind == 'int':
+            raw = array('q', (_to_int(v) for v in values)).tobytes()
+        elif kind == 'float':
+            raw = array('d', (_to_float(v) for v in values)).tobytes()
+        else:
+            raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+
+        blob = zlib.compress(raw, 6)
+        header['columns'][name] = [kind, offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return FORMAT_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + b''.join(blobs)
+
+
+def read_partition_columns(path: Path, columns: Optional[Sequence[str]] = None) -> Tuple[int, Dict[str, Tuple[str, object]]]:
+    """
+    Read raw (still encoded) columns from a partition file
+
+    Returns:
+        (row_count, {column: (kind, values)}) - dict columns are array('i') codes,
+        int columns array('q'), float columns array('d'), str columns lists.
+        Columns missing from the file are omitted.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(FORMAT_MAGIC)) != FORMAT_MAGIC:
+            raise ValueError(f"Not an analytics mirror partition: {path}")
+        header_len = struct.unpack('<I', f.read(4))[0]
+        header = json.loads(f.read(header_len))
+        data_start = f.tell()
+
+        result = {}
+        for name in (columns if columns is not None else header['columns']):
+            spec = header['columns'].get(name)
+            if spec is None:
+                continue
+            kind, offset, length = spec
+            f.seek(data_start + offset)
+            raw = zlib.decompress(f.read(length))
+
+            if kind.startswith('dict:'):
+                values = array('i')
+                values.frombytes(raw)
+            elif kind == 'int':
+                values = array('q')
+                values.frombytes(raw)
+            elif kind == 'float':
+                values = array('d')
+                values.frombytes(raw)
+            else:
+                values = json.loads(raw)
+            result[name] = (kind, values)
+
+    return header['rows'], result
+
+
+class AnalyticsMirror:
+    """Local columnar mirror of ra_mst_races and ra_mst_runners"""
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Initialize mirror
+
+        Args:
+            root: Mirror directory (default: default_mirror_dir())
+        """
+        self.root = Path(root) if root else default_mirror_dir()
+        self.manifest = self._load_manifest()
+        self._dictionaries: Dict[str, Dictionary] = {}
+        self._race_partitions: Optional[array] = None
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict:
+        path = self.root / 'manifest.json'
+        if path.exists():
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MIRROR_VERSION:
+                return manifest
+            logger.warning(f"Mirror version mismatch at {self.root} - a full resync is required")
+        return {
+            'version': MIRROR_VERSION,
+            'watermarks': {},
+            'partitions': {table: {} for table in TABLE_COLUMNS},
+            'partition_ordinals': [],
+            'last_sync': None,
+        }
+
+    @property
+    def exists(self) -> bool:
+        return (self.root / 'manifest.json').exists()
+
+    def dictionary(self, domain: str) -> Dictionary:
+        """String dictionary for a domain (e.g. 'horse', 'course')"""
+        dictionary = self._dictionaries.get(domain)
+        if dictionary is None:
+            path = self.root / 'dictionaries' / f'{domain}.json'
+            values = None
+            if path.exists():
+                with open(path) as f:
+                    values = json.load(f)
+            dictionary = self._dictionaries[domain] = Dictionary(values)
+        return dictionary
+
+    def _all_dictionaries(self) -> Dict[str, Dictionary]:
+        domains = {kind[5:] for columns in TABLE_COLUMNS.values()
+                   for kind in columns.values() if kind.startswith('dict:')}
+        return {domain: self.dictionary(domain) for domain in domains}
+
+    def _race_partition_index(self) -> array:
+        """race code -> partition ordinal (-1 = unknown)"""
+        if self._race_partitions is None:
+            self._race_partitions = array('i')
+            path = self.root / 'race_partitions.bin'
+            if path.exists():
+                self._race_partitions.frombytes(zlib.decompress(path.read_bytes()))
+        return self._race_partitions
+
+    def _partition_ordinal(self, key: str) -> int:
+        ordinals = self.manifest['partition_ordinals']
+        if key not in ordinals:
+            ordinals.append(key)
+        return ordinals.index(key)
+
+    def partitions(self, table: str, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> List[str]:
+        """
+        Partition keys for a table in date order, optionally limited to a date range
+
+        The undated partition is only included when no range is given.
+        """
+        keys = sorted(k for k in self.manifest['partitions'].get(table, {}) if k != UNDATED_PARTITION)
+        if start_date:
+            keys = [k for k in keys if k >= str(start_date)[:7]]
+        if end_date:
+            keys = [k for k in keys if k <= str(end_date)[:7]]
+        if not start_date and not end_date and UNDATED_PARTITION in self.manifest['partitions'].get(table, {}):
+            keys.append(UNDATED_PARTITION)
+        return keys
+
+    def _partition_path(self, table: str, key: str) -> Path:
+        return self.root / table / f'{key}.col'
+
+    # ------------------------------------------------------------------
+    # Reader API
+    # ------------------------------------------------------------------
+
+    def read_columns(self, table: str, columns: Optional[Sequence[str]] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     decode: bool = True) -> Iterator[Tuple[str, int, Dict[str, object]]]:
+        """
+        Stream one partition at a time in columnar form
+
+        Args:
+            table: 'ra_mst_races' or 'ra_mst_runners'
+            columns: Columns to read (default: all mirrored columns)
+            start_date, end_date: Optional race date range (month granularity)
+            decode: Decode dictionary codes / null sentinels to Python values.
+                With decode=False dict columns are returned as array('i') codes
+                (use dictionary(domain) to map back).
+
+        Yields:
+            (partition_key, row_count, {column: values})
+        """
+        for key in self.partitions(table, start_date, end_date):
+            path = self._partition_path(table, key)
+            if not path.exists():
+                continue
+            rows, raw = read_partition_columns(path, columns)
+            if decode:
+                yield key, rows, {name: self._decode(kind, values) for name, (kind, values) in raw.items()}
+            else:
+                yield key, rows, {name: values for name, (_, values) in raw.items()}
+
+    def _decode(self, kind: str, values) -> List:
+        if kind.startswith('dict:'):
+            lookup = self.dictionary(kind[5:]).values
+            return [lookup[c] if c >= 0 else None for c in values]
+        if kind == 'int':
+            return [None if v == INT_NULL else v for v in values]
+        if kind == 'float':
+            return [None if math.isnan(v) else v for v in values]
+        return values
+
+    def scan(self, table: str, columns: Optional[Sequence[str]] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict]:
+        """Stream rows as dicts (same shape as a PostgREST select)"""
+        for _, rows, data in self.read_columns(table, columns, start_date, end_date):
+            names = list(data)
+            for i in range(rows):
+                yield {name: data[name][i] for name in names}
+
+    def iter_completed_runners(self, runner_columns: List[str], race_columns: Optional[List[str]],
+                               page_size: int = 1000) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Mirror-backed equivalent of performance_cube.iter_completed_runners
+
+        Runners are yielded partition by partition (race-date order) rather than
+        by race_id; page_size is accepted for signature compatibility only.
+        """
+        runner_columns = list(dict.fromkeys(list(runner_columns) + ['race_id', 'position']))
+
+        for key in self.partitions('ra_mst_runners'):
+            races = {}
+            if race_columns is not None:
+                for race in self._scan_partition('ra_mst_races', key, list(dict.fromkeys(['id'] + race_columns))):
+                    races[race['id']] = race
+
+            for runner in self._scan_partition('ra_mst_runners', key, runner_columns):
+                if runner.get('position') is None:
+                    continue
+                if race_columns is None:
+                    yield runner, {}
+                    continue
+                race = races.get(runner.get('race_id'))
+                if race:
+                    yield runner, race
+
+    def _scan_partition(self, table: str, key: str, columns: Sequence[str]) -> Iterator[Dict]:
+        path = self._partition_path(table, key)
+        if not path.exists():
+            return
+        rows, raw = read_partition_columns(path, columns)
+        data = {name: self._decode(kind, values) for name, (kind, values) in raw.items()}
+        for i in range(rows):
+            yield {name: data[name][i] for name in data}
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def sync(self, db_client, page_size: int = 1000, full: bool = False) -> Dict:
+        """
+        Bring the mirror up to date from the database
+
+        Rows with updated_at >= the stored watermark are fetched and merged into
+        their partitions by primary key (so re-fetching the boundary row is
+        harmless). Races are synced before runners so every runner can be
+        placed in its race's partition; runners whose race is not mirrored yet
+        are kept in pending_runners.json and placed by a later sync.
+
+        Args:
+            db_client: SupabaseReferenceClient instance
+            page_size: Rows per request (max 1000 for PostgREST)
+            full: Discard the watermarks and re-mirror everything
+
+        Returns:
+            Statistics dictionary
+        """
+        if full:
+            self.manifest['watermarks'] = {}
+
+        stats = {}
+        for table in ('ra_mst_races', 'ra_mst_runners'):
+            stats[table] = self._sync_table(db_client, table, page_size)
+
+        self.manifest['last_sync'] = stats
+        self._save_manifest()
+        return stats
+
+    def _save_manifest(self):
+        _write_atomic(self.root / 'manifest.json', json.dumps(self.manifest, indent=2).encode('utf-8'))
+
+    def _fetch_changed(self, db_client, table: str, page_size: int) -> Iterator[List[Dict]]:
+        """
+        Page through rows changed since the table's watermark
+
+        Pages by keyset on (updated_at, id): many rows share an updated_at
+        (batch upserts), and rows written during the sync would shift offsets.
+        Rows without updated_at sort last and are paged by id alone.
+        """
+        watermark = self.manifest['watermarks'].get(table)
+        columns = ', '.join(TABLE_COLUMNS[table])
+        last = None
+
+        while True:
+            query = db_client.client.table(table).select(columns)
+            if last is None:
+                if watermark:
+                    query = query.gte('updated_at', watermark)
+            elif last.get('updated_at') is None:
+                query = query.is_('updated_at', 'null').gt('id', last['id'])
+            else:
+                updated_at, row_id = last['updated_at'], last['id']
+                query = query.or_(f'updated_at.gt."{updated_at}",'
+                                  f'and(updated_at.eq."{updated_at}",id.gt."{row_id}")')
+            response = query.order('updated_at').order('id').limit(page_size).execute()
+
+            page = response.data or []
+            if page:
+                yield page
+                last = page[-1]
+            if len(page) < page_size:
+                break
+
+    def _load_pending(self) -> List[Dict]:
+        path = self.root / 'pending_runners.json'
+        if not path.exists():
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def _sync_table(self, db_client, table: str, page_size: int) -> Dict:
+        is_races = table == 'ra_mst_races'
+        race_dictionary = self.dictionary('race')
+        race_index = self._race_partition_index()
+
+        changed: Dict[str, List[Dict]] = {}
+        pending: Dict[Tuple, Dict] = {}
+        fetched = 0
+        max_updated_at = self.manifest['watermarks'].get(table)
+
+        def place(row: Dict):
+            if is_races:
+                key = partition_key(row.get('date'))
+                code = race_dictionary.encode(row.get('id'))
+                if code >= len(race_index):
+                    race_index.extend([-1] * (code + 1 - len(race_index)))
+                race_index[code] = self._partition_ordinal(key)
+            else:
+                code = race_dictionary.codes.get(row.get('race_id'), -1)
+                ordinal = race_index[code] if 0 <= code < len(race_index) else -1
+                if ordinal < 0:
+                    # Race not mirrored yet: keep the runner aside and retry next sync
+                    pending[tuple(row.get(c) for c in PRIMARY_KEYS[table])] = row
+                    return
+                key = self.manifest['partition_ordinals'][ordinal]
+            changed.setdefault(key, []).append(row)
+
+        pending_before = 0
+        if not is_races:
+            previous = self._load_pending()
+            pending_before = len(previous)
+            for row in previous:
+                place(row)
+
+        for page in self._fetch_changed(db_client, table, page_size):
+            for row in page:
+                fetched += 1
+                updated_at = row.get('updated_at')
+                if updated_at and (max_updated_at is None or updated_at > max_updated_at):
+                    max_updated_at = updated_at
+                place(row)
+
+            logger.debug(f"{table}: fetched {fetched} changed rows")
+
+        # Encode every value now, so the dictionaries (and the race partition
+        # index) are saved before any partition that uses their codes
+        dictionaries = self._all_dictionaries()
+        for rows in changed.values():
+            for row in rows:
+                for name, kind in TABLE_COLUMNS[table].items():
+                    if kind.startswith('dict:'):
+                        dictionaries[kind[5:]].encode(row.get(name))
+
+        for domain, dictionary in dictionaries.items():
+            if dictionary.dirty:
+                _write_atomic(self.root / 'dictionaries' / f'{domain}.json',
+                              json.dumps(dictionary.values, separators=(',', ':')).encode('utf-8'))
+                dictionary.dirty = False
+        if is_races and changed:
+            _write_atomic(self.root / 'race_partitions.bin', zlib.compress(race_index.tobytes(), 6))
+            self._save_manifest()
+
+        for key, rows in changed.items():
+            self._merge_partition(table, key, rows, dictionaries)
+
+        if not is_races and (pending or pending_before):
+            _write_atomic(self.root / 'pending_runners.json',
+                          json.dumps(list(pending.values()), separators=(',', ':'), default=str).encode('utf-8'))
+
+        if max_updated_at:
+            self.manifest['watermarks'][table] = max_updated_at
+
+        logger.info(f"{table}: {fetched} changed rows merged into {len(changed)} partitions"
+                    + (f" ({len(pending)} runners waiting for their race)" if pending else ""))
+        return {'fetched': fetched, 'partitions_written': len(changed), 'orphans': len(pending)}
+
+    def _merge_partition(self, table: str, key: str, rows: List[Dict], dictionaries: Dict[str, Dictionary]):
+        """Merge changed rows into one partition by primary key and rewrite it"""
+        columns = TABLE_COLUMNS[table]
+        pk = PRIMARY_KEYS[table]
+        path = self._partition_path(table, key)
+
+        merged: Dict[Tuple, Dict] = {}
+        if path.exists():
+            for row in self._scan_partition(table, key, list(columns)):
+                merged[tuple(row.get(c) for c in pk)] = row
+        for row in rows:
+            # A retried pending row may be older than one already merged
+            identity = tuple(row.get(c) for c in pk)
+            existing = merged.get(identity)
+            if existing is None or (row.get('updated_at') or '') >= (existing.get('updated_at') or ''):
+                merged[identity] = row
+
+        ordered = [merged[k] for k in sorted(merged, key=lambda k: tuple(str(v) for v in k))]
+        _write_atomic(path, encode_partition(ordered, columns, dictionaries))
+        self.manifest['partitions'].setdefault(table, {})[key] = len(ordered)
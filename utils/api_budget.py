@@ -0,0 +1,461 @@
+"""
+API Budget - Call estimates, usage ledger and a daily call budget
+
+Endpoint costs differ widely: one /results page holds 50 races, while a
+people-results sweep (jockeys_statistics_worker.py) costs at least one call
+per jockey, plus one per further 50 results. Nothing used to estimate that
+before a job started. This module:
+
+- counts every Racing API call (RacingAPIClient reports each attempt) per
+  day, job and endpoint, together with the number of items returned, in a
+  SQLite ledger shared by all processes on the host. The job is the
+  usage_label(): an explicit track() label, else the JobRunner job, else the
+  script name.
+- records each tracked run (units processed, calls, duration and the
+  estimate it started with), so later estimates use the job's measured
+  calls and seconds per unit instead of a guess
+- checks an estimate against the daily budget (RACING_API_DAILY_BUDGET):
+  backfill and enrichment work may not eat into the reserve kept for live
+  and daily updates (RACING_API_BUDGET_RESERVE). A job that does not fit is
+  refused, or reshaped to the number of units that does fit, so heavy
+  enrichment runs when there is room for it.
+
+Usage:
+    budget = ApiBudget.from_config(get_config())
+    estimate = budget.estimate('jockeys_statistics', len(jockeys), 'jockeys', default_calls_per_unit=3)
+    decision = budget.check(estimate)
+    if decision.allowed:
+        with budget.track('jockeys_statistics', decision.units, 'jockeys', estimate) as run:
+            ...
+"""
+
+import atexit
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from utils.api_scheduler import current_priority
+from utils.job_runner import current_job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'data', 'api_usage.sqlite3')
+
+DEFAULT_DAILY_CALLS = 150000        # 2 req/s for 24h is 172,800
+DEFAULT_RESERVE_CALLS = 20000       # Kept for live and daily updates
+PAGE_SIZE = 50                      # Items per page on the paged endpoints
+
+# Classes that may spend the reserve
+RESERVE_CLASSES = ('live', 'daily')
+
+# Runs of a job used for its calls/seconds per unit
+HISTORY_RUNS = 10
+
+# Seconds between writes of in-memory call counts to the ledger
+FLUSH_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_usage (
+    day TEXT NOT NULL,
+    job TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    items INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, job, endpoint)
+);
+CREATE TABLE IF NOT EXISTS api_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    day TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    unit TEXT,
+    units INTEGER,
+    calls INTEGER,
+    seconds REAL,
+    estimated_calls INTEGER,
+    estimated_seconds REAL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_api_runs_job ON api_runs (job, id);
+"""
+
+
+def endpoint_key(endpoint: str) -> str:
+    """'/jockeys/jky_123/results' -> '/jockeys/{id}/results'"""
+    return re.sub(r'/[a-z]{3}_[^/]+', '/{id}', endpoint.split('?')[0])
+
+
+def count_items(data) -> int:
+    """Items in a response: length of its first list (results, racecards, ...)"""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return len(value)
+        return 1
+    return 0
+
+
+def pages(items: int, page_size: int = PAGE_SIZE) -> int:
+    """Calls needed to page through items (an empty listing still costs one)"""
+    return max(1, math.ceil(items / page_size))
+
+
+# ----------------------------------------------------------------------
+# Job labels
+# ----------------------------------------------------------------------
+
+_local = threading.local()
+_default_label: Optional[str] = None
+
+
+def set_usage_label(label: str):
+    """Job name for calls made outside track() and JobRunner (whole process)"""
+    global _default_label
+    _default_label = label
+
+
+def usage_label() -> str:
+    """Job the current thread's API calls are charged to"""
+    label = getattr(_local, 'label', None)
+    if label:
+        return label
+    job = current_job()
+    if job is not None:
+        return os.path.splitext(job.name)[0]
+    return _default_label or os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+
+
+class charged_to:
+    """Context manager that charges the with-block's API calls to a job (for helper threads)"""
+
+    def __init__(self, label: Optional[str]):
+        self.label = label
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'label', None)
+        _local.label = self.label
+        return self.label
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.label = self.previous
+
+
+# ----------------------------------------------------------------------
+# Usage meter (in-memory counts, flushed to the ledger)
+# ----------------------------------------------------------------------
+
+class UsageMeter:
+    """Process-wide call counts per (day, job, endpoint)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str, str], List[int]] = {}
+        self._totals: Dict[str, int] = {}
+        self._last_flush = time.monotonic()
+        self.ledger: Optional['UsageLedger'] = None
+
+    def record(self, endpoint: str, items: int = 0):
+        key = (date.today().isoformat(), usage_label(), endpoint_key(endpoint))
+        with self._lock:
+            row = self._pending.setdefault(key, [0, 0])
+            row[0] += 1
+            row[1] += items
+            self._totals[key[1]] = self._totals.get(key[1], 0) + 1
+            due = time.monotonic() - self._last_flush > FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def calls(self, job: str) -> int:
+        """Calls charged to job by this process so far"""
+        with self._lock:
+            return self._totals.get(job, 0)
+
+    def flush(self):
+        """Write pending counts to the ledger"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            (self.ledger or get_usage_ledger()).add_usage(pending)
+        except Exception as e:
+            logger.warning(f"Could not write API usage to the ledger: {e}")
+            with self._lock:
+                for key, (calls, items) in pending.items():
+                    row = self._pending.setdefault(key, [0, 0])
+                    row[0] += calls
+                    row[1] += items
+
+
+_meter = UsageMeter()
+atexit.register(_meter.flush)
+
+
+def record_call(endpoint: str, items: int = 0):
+    """Count one API call (called by RacingAPIClient for every attempt)"""
+    _meter.record(endpoint, items)
+
+
+# ----------------------------------------------------------------------
+# Ledger
+# ----------------------------------------------------------------------
+
+class UsageLedger:
+    """SQLite ledger of API calls per day/job/endpoint and of tracked runs"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def add_usage(self, counts: Dict[Tuple[str, str, str], List[int]]):
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.executemany(
+                    "INSERT INTO api_usage (day, job, endpoint, calls, items) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (day, job, endpoint) DO UPDATE SET "
+                    "calls = calls + excluded.calls, items = items + excluded.items",
+                    [(day, job, endpoint, calls, items) for (day, job, endpoint), (calls, items) in counts.items()])
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def used(self, day: Optional[str] = None) -> int:
+        """Calls made on day (default today) by all jobs"""
+        rows = self._query("SELECT COALESCE(SUM(calls), 0) FROM api_usage WHERE day = ?",
+                           (day or date.today().isoformat(),))
+        return rows[0][0]
+
+    def usage(self, day: Optional[str] = None) -> List[Dict]:
+        """Per job and endpoint: calls, items and items per call"""
+        rows = self._query("SELECT job, endpoint, calls, items FROM api_usage WHERE day = ? ORDER BY calls DESC",
+                           (day or date.today().isoformat(),))
+        return [{'job': job, 'endpoint': endpoint, 'calls': calls, 'items': items,
+                 'items_per_call': round(items / calls, 1) if calls else 0.0}
+                for job, endpoint, calls, items in rows]
+
+    def page_fill(self, endpoint: str) -> Optional[float]:
+        """Historical items per call for an endpoint"""
+        rows = self._query("SELECT SUM(calls), SUM(items) FROM api_usage WHERE endpoint = ?", (endpoint_key(endpoint),))
+        calls, items = rows[0]
+        return items / calls if calls else None
+
+    def start_run(self, job: str, unit: str, units: int, estimate: Optional['Estimate']) -> int:
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO api_runs (job, day, started_at, unit, units, estimated_calls, estimated_seconds, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 'running')",
+                (job, date.today().isoformat(), time.time(), unit, units,
+                 estimate.calls if estimate else None, estimate.seconds if estimate else None))
+            return cur.lastrowid
+
+    def finish_run(self, run_id: int, units: int, calls: int, seconds: float, status: str):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE api_runs SET finished_at = ?, units = ?, calls = ?, seconds = ?, status = ? WHERE id = ?",
+                (time.time(), units, calls, round(seconds, 2), status, run_id))
+
+    def runs(self, job: Optional[str] = None, limit: int = HISTORY_RUNS, finished_only: bool = False) -> List[Dict]:
+        """Most recent runs first"""
+        where, params = [], []
+        if job:
+            where.append('job = ?')
+            params.append(job)
+        if finished_only:
+            where.append("status = 'done' AND units > 0")
+        sql = ("SELECT id, job, day, unit, units, calls, seconds, estimated_calls, estimated_seconds, status "
+               "FROM api_runs" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id DESC LIMIT ?")
+        columns = ('id', 'job', 'day', 'unit', 'units', 'calls', 'seconds',
+                   'estimated_calls', 'estimated_seconds', 'status')
+        return [dict(zip(columns, row)) for row in self._query(sql, tuple(params) + (limit,))]
+
+    def close(self):
+        self.conn.close()
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Process-wide ledger (RACING_API_USAGE_LEDGER overrides the path)"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UsageLedger(os.getenv('RACING_API_USAGE_LEDGER', DEFAULT_LEDGER_PATH))
+        return _ledger
+
+
+# ----------------------------------------------------------------------
+# Planner
+# ----------------------------------------------------------------------
+
+@dataclass
+class Estimate:
+    """Expected API cost of a job"""
+    job: str
+    units: int
+    unit: str
+    calls_per_unit: float
+    calls: int
+    seconds: float
+    source: str                 # 'history' (measured runs) or 'default'
+
+    def describe(self) -> str:
+        return (f"{self.job}: {self.units:,} {self.unit} x {self.calls_per_unit:.2f} calls = "
+                f"{self.calls:,} calls, ~{self.seconds / 3600:.1f}h ({self.source})")
+
+
+@dataclass
+class BudgetDecision:
+    """Outcome of ApiBudget.check()"""
+    allowed: bool
+    units: int                  # Units that fit (== estimate.units unless reshaped)
+    remaining: Optional[int]    # Calls left for this priority class today (None = no budget)
+    estimate: Estimate
+    reason: str = ''
+
+    @property
+    def reshaped(self) -> bool:
+        return self.allowed and self.units < self.estimate.units
+
+
+class ApiBudget:
+    """Estimates job costs and enforces the daily call budget"""
+
+    def __init__(self, ledger: Optional[UsageLedger] = None, daily_calls: int = DEFAULT_DAILY_CALLS,
+                 reserve_calls: int = DEFAULT_RESERVE_CALLS, rate: float = 2.0):
+        """
+        Initialize planner
+
+        Args:
+            ledger: Usage ledger (default: process-wide ledger)
+            daily_calls: Calls per day for all jobs (0 = unlimited)
+            reserve_calls: Part of the budget only live/daily work may use
+            rate: Account rate limit (requests per second) for time estimates
+        """
+        self.ledger = ledger or get_usage_ledger()
+        self.daily_calls = daily_calls
+        self.reserve_calls = reserve_calls
+        self.rate = rate
+
+    @classmethod
+    def from_config(cls, config) -> 'ApiBudget':
+        """Budget from config.api (RACING_API_DAILY_BUDGET / RACING_API_BUDGET_RESERVE)"""
+        return cls(daily_calls=config.api.daily_call_budget, reserve_calls=config.api.budget_reserve,
+                   rate=config.api.rate_limit_per_second)
+
+    def estimate(self, job: str, units: int, unit: str = 'items',
+                 default_calls_per_unit: float = 1.0) -> Estimate:
+        """
+        Expected calls and wall time for units of work
+
+        Uses the job's last HISTORY_RUNS finished runs (calls and seconds per
+        unit) when there are any, else default_calls_per_unit at the full rate.
+        """
+        history = self.ledger.runs(job, finished_only=True)
+        history_units = sum(run['units'] for run in history)
+        if history_units:
+            calls_per_unit = sum(run['calls'] or 0 for run in history) / history_units
+            seconds_per_unit = sum(run['seconds'] or 0 for run in history) / history_units
+            source = 'history'
+        else:
+            calls_per_unit = default_calls_per_unit
+            seconds_per_unit = 0.0
+            source = 'default'
+
+        calls = math.ceil(units * calls_per_unit)
+        seconds = max(calls / self.rate, units * seconds_per_unit)
+        return Estimate(job, units, unit, calls_per_unit, calls, seconds, source)
+
+    def remaining(self, priority: Optional[str] = None) -> Optional[int]:
+        """Calls left today for a priority class (None = unlimited)"""
+        if not self.daily_calls:
+            return None
+        _meter.flush()
+        available = self.daily_calls - self.ledger.used()
+        if (priority or current_priority()) not in RESERVE_CLASSES:
+            available -= self.reserve_calls
+        return max(0, available)
+
+    def check(self, estimate: Estimate, priority: Optional[str] = None, reshape: bool = True) -> BudgetDecision:
+        """
+        Does the job fit in today's budget?
+
+        Args:
+            estimate: From estimate()
+            priority: Class the job runs in (default: current_priority())
+            reshape: Allow fewer units when the whole job does not fit
+
+        Returns:
+            BudgetDecision (allowed, units that fit, calls remaining)
+        """
+        remaining = self.remaining(priority)
+        if remaining is None or estimate.calls <= remaining:
+            decision = BudgetDecision(True, estimate.units, remaining, estimate)
+        else:
+            fits = int(remaining // estimate.calls_per_unit) if estimate.calls_per_unit else estimate.units
+            if reshape and fits > 0:
+                decision = BudgetDecision(True, min(fits, estimate.units), remaining, estimate,
+                                          f"only {fits:,} of {estimate.units:,} {estimate.unit} fit")
+            else:
+                decision = BudgetDecision(False, 0, remaining, estimate,
+                                          f"needs {estimate.calls:,} calls, {remaining:,} left today")
+
+        logger.info(f"API budget: {estimate.describe()}; "
+                    f"{'unlimited' if remaining is None else f'{remaining:,} calls left'}"
+                    + (f" - {decision.reason}" if decision.reason else ""))
+        return decision
+
+    @contextmanager
+    def track(self, job: str, units: int, unit: str = 'items', estimate: Optional[Estimate] = None):
+        """
+        Charge the with-block's API calls to job and record the run
+
+        Yields a dict; set run['units'] to the units actually processed if it
+        differs from the planned number.
+        """
+        run = {'job': job, 'units': units, 'unit': unit}
+        run_id = self.ledger.start_run(job, unit, units, estimate)
+        calls_before = _meter.calls(job)
+        started = time.monotonic()
+        status = 'failed'
+        try:
+            with charged_to(job):
+                yield run
+            status = 'done'
+        finally:
+            run['calls'] = _meter.calls(job) - calls_before
+            run['seconds'] = time.monotonic() - started
+            _meter.flush()
+            try:
+                self.ledger.finish_run(run_id, run['units'], run['calls'], run['seconds'], status)
+            except Exception as e:
+                logger.warning(f"Could not record API run {job}: {e}")
+            logger.info(f"API usage {job}: {run['calls']:,} calls for {run['units']:,} {unit} "
+                        f"in {run['seconds']:.0f}s" + (f" (estimated {estimate.calls:,})" if estimate else ""))
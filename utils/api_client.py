@@ -10,6 +10,10 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import logging
 
+from utils.api_budget import count_items, endpoint_key, record_call
+from utils.api_scheduler import get_api_scheduler
+from utils.instrumentation import count, timer
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,15 +31,16 @@ class RacingAPIClient:
             base_url: Base URL for API
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts
-            rate_limit: Maximum requests per second
+            rate_limit: Maximum requests per second (applied to the shared scheduler)
         """
         self.base_url = base_url.rstrip('/')
         self.username = username
         self.password = password
         self.timeout = timeout
         self.max_retries = max_retries
-        self.min_request_interval = 1.0 / rate_limit
-        self.last_request_time = 0
+        # All clients in the process (and other processes on the host) share one
+        # account limit; request slots are handed out by priority class
+        self.scheduler = get_api_scheduler(rate_limit)
 
         # Create auth headers
         credentials = f"{username}:{password}"
@@ -46,6 +51,10 @@ class RacingAPIClient:
             "User-Agent": "RacingAPI-ReferenceFetcher/1.0"
         }
 
+        # Keep-alive session: reused connections skip the TCP/TLS handshake per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
         # Statistics
         self.stats = {
             'requests': 0,
@@ -54,12 +63,8 @@ class RacingAPIClient:
         }
 
     def _rate_limit(self):
-        """Enforce rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            sleep_time = self.min_request_interval - elapsed
-            time.sleep(sleep_time)
-        self.last_request_time = time.time()
+        """Enforce rate limiting (waits for a slot in the calling thread's priority class)"""
+        self.scheduler.acquire()
 
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
         """
@@ -73,19 +78,26 @@ class RacingAPIClient:
             Response data or None on failure
         """
         url = f"{self.base_url}{endpoint}"
+        route = endpoint_key(endpoint)
 
         for attempt in range(self.max_retries):
             try:
                 # Rate limiting
-                self._rate_limit()
+                with timer('api.rate_limit_wait'):
+                    self._rate_limit()
 
                 # Make request
                 self.stats['requests'] += 1
-                response = requests.get(url, headers=self.headers, params=params, timeout=self.timeout)
+                with timer('api.request', endpoint=route):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                count('api.bytes', len(response.content), endpoint=route)
+                with timer('api.decode', endpoint=route):
+                    data = response.json() if response.status_code == 200 else None
+                record_call(endpoint, count_items(data))
 
                 # Check response
                 if response.status_code == 200:
-                    return response.json()
+                    return data
                 elif response.status_code == 404:
                     logger.warning(f"Resource not found: {url}")
                     return None
@@ -98,24 +110,29 @@ class RacingAPIClient:
                     logger.warning(f"Rate limited, waiting {wait_time}s before retry")
                     time.sleep(wait_time)
                     self.stats['retries'] += 1
+                    count('api.retries', reason='429')
                     continue
                 else:
                     logger.warning(f"HTTP {response.status_code} for {url}, attempt {attempt + 1}/{self.max_retries}")
                     self.stats['retries'] += 1
+                    count('api.retries', reason=str(response.status_code))
                     time.sleep((attempt + 1) * 2)
 
             except requests.exceptions.Timeout:
                 logger.warning(f"Request timeout for {url}, attempt {attempt + 1}/{self.max_retries}")
                 self.stats['retries'] += 1
+                count('api.retries', reason='timeout')
                 time.sleep((attempt + 1) * 2)
 
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Request error for {url}: {e}, attempt {attempt + 1}/{self.max_retries}")
                 self.stats['retries'] += 1
+                count('api.retries', reason='connection')
                 time.sleep((attempt + 1) * 2)
 
         # All retries failed
         self.stats['errors'] += 1
+        count('api.failures', endpoint=route)
         logger.error(f"Failed to fetch {url} after {self.max_retries} attempts")
         return None
 
@@ -283,3 +300,7 @@ class RacingAPIClient:
     def get_stats(self) -> Dict:
         """Get client statistics"""
         return self.stats.copy()
+
+    def get_scheduler_metrics(self) -> Dict:
+        """Per-priority-class request, wait and throughput metrics (process-wide)"""
+        return self.scheduler.metrics()
@@ -0,0 +1,345 @@
+"""
+API Scheduler - Priority classes for the shared Racing API rate limit
+
+Every consumer of the Racing API shares one account limit (2 req/s). Without
+prioritisation a long pedigree or results backfill competes request for
+request with the live results fetch. The scheduler hands out request slots by
+priority class:
+
+    live > daily > enrichment > backfill
+
+- Preemption: while live requests are waiting no other class gets a slot.
+  Slots are granted one at a time when they fall due, so a live request never
+  waits behind slots already promised to backfill work.
+- Weighted fair queueing among the remaining classes (start-time fair
+  queueing on a virtual clock): with daily, enrichment and backfill all busy,
+  slots are shared 4:2:1, and no class is starved.
+- Cross-process: with a state file, every process on the host reserves slots
+  from the same schedule (flock), and a process with live requests waiting
+  publishes a short 'live demand' window during which other processes hold
+  back their non-live requests. A backfill started from the command line
+  therefore yields to the scheduled live updates.
+- Metrics per class: requests, wait time (mean, p50, p95, max), current queue
+  depth and throughput over the last minute.
+
+The priority is a property of the work, not of the client: fetchers and their
+RacingAPIClient are shared between jobs, so the class is taken from the
+calling thread (api_priority()), falling back to the process default
+(set_default_priority()), then 'daily'.
+
+Usage:
+    with api_priority('live'):
+        fetcher.fetch_and_store(...)
+
+    set_default_priority('backfill')      # standalone backfill script
+    get_api_scheduler().log_metrics()
+"""
+
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PRIORITY_CLASSES = ('live', 'daily', 'enrichment', 'backfill')
+
+# Fair-share weights for the non-preempting classes
+DEFAULT_WEIGHTS = {'live': 8, 'daily': 4, 'enrichment': 2, 'backfill': 1}
+
+DEFAULT_PRIORITY = 'daily'
+
+# Seconds other processes hold back non-live requests after live demand is published
+LIVE_HOLD_SECONDS = 1.0
+
+# Longest a waiter sleeps before re-checking shared state
+POLL_SECONDS = 0.1
+
+# Waits kept per class for percentiles
+LATENCY_SAMPLES = 1000
+THROUGHPUT_WINDOW = 60.0
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'api_scheduler.json')
+
+
+# ----------------------------------------------------------------------
+# Priority context
+# ----------------------------------------------------------------------
+
+_local = threading.local()
+_default_priority = DEFAULT_PRIORITY
+
+
+def _check(priority: str) -> str:
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown API priority {priority!r} (expected one of {', '.join(PRIORITY_CLASSES)})")
+    return priority
+
+
+def current_priority() -> str:
+    """Priority class of API requests made from this thread"""
+    return getattr(_local, 'priority', None) or _default_priority
+
+
+def set_default_priority(priority: str):
+    """Priority class for threads without an api_priority() block (whole process)"""
+    global _default_priority
+    _default_priority = _check(priority)
+
+
+class api_priority:
+    """
+    Context manager that runs the with-block's API requests in a priority class
+
+    only_lower=True never raises the priority: enrichment triggered from a
+    backfill stays a backfill request.
+    """
+
+    def __init__(self, priority: str, only_lower: bool = False):
+        self.priority = _check(priority)
+        self.only_lower = only_lower
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'priority', None)
+        current = current_priority()
+        if self.only_lower and PRIORITY_CLASSES.index(current) > PRIORITY_CLASSES.index(self.priority):
+            _local.priority = current
+        else:
+            _local.priority = self.priority
+        return _local.priority
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.priority = self.previous
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+class _ClassStats:
+    def __init__(self):
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits = deque(maxlen=LATENCY_SAMPLES)
+        self.granted_at = deque()
+
+    def record(self, wait: float, now: float):
+        self.requests += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.waits.append(wait)
+        self.granted_at.append(now)
+        while self.granted_at and self.granted_at[0] < now - THROUGHPUT_WINDOW:
+            self.granted_at.popleft()
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class ApiScheduler:
+    """Grants request slots at a fixed rate, by priority class"""
+
+    def __init__(self, rate: float = 2.0, weights: Optional[Dict[str, float]] = None,
+                 state_path: Optional[str] = None, live_hold: float = LIVE_HOLD_SECONDS):
+        """
+        Initialize scheduler
+
+        Args:
+            rate: Requests per second for all classes together
+            weights: Fair-share weight per class (default DEFAULT_WEIGHTS)
+            state_path: Shared state file for cross-process scheduling (None = this process only)
+            live_hold: Seconds other processes defer non-live requests after live demand
+        """
+        self.interval = 1.0 / rate
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.state_path = state_path
+        self.live_hold = live_hold
+
+        self._cond = threading.Condition()
+        self._queues = {name: deque() for name in PRIORITY_CLASSES}
+        self._finish = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._virtual = 0.0
+        self._next_slot = 0.0           # Earliest time (monotonic) of the next grant
+        self._stats = {name: _ClassStats() for name in PRIORITY_CLASSES}
+        self._state_fd = None
+
+    def set_rate(self, rate: float):
+        """Lower the shared rate (clients configured with different limits get the strictest)"""
+        with self._cond:
+            self.interval = max(self.interval, 1.0 / rate)
+
+    # ------------------------------------------------------------------
+    # Slot selection
+    # ------------------------------------------------------------------
+
+    def _select(self) -> Optional[str]:
+        """Class whose head-of-line request gets the next slot"""
+        if self._queues['live']:
+            return 'live'
+        busy = [name for name in PRIORITY_CLASSES[1:] if self._queues[name]]
+        if not busy:
+            return None
+        return min(busy, key=lambda name: (max(self._finish[name], self._virtual), PRIORITY_CLASSES.index(name)))
+
+    def _charge(self, name: str):
+        start = max(self._finish[name], self._virtual)
+        self._finish[name] = start + 1.0 / self.weights[name]
+        self._virtual = start
+
+    def _reserve(self, name: str, now: float) -> bool:
+        """Take the slot due now; False if it belongs to another process"""
+        if not self.state_path:
+            self._next_slot = now + self.interval
+            return True
+        try:
+            return self._reserve_shared(name, now)
+        except OSError as e:
+            logger.warning(f"API scheduler state {self.state_path} unavailable, scheduling in-process only: {e}")
+            self.state_path = None
+            return self._reserve(name, now)
+
+    def _reserve_shared(self, name: str, now: float) -> bool:
+        if self._state_fd is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            self._state_fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        fcntl.flock(self._state_fd, fcntl.LOCK_EX)
+        try:
+            raw = os.pread(self._state_fd, 4096, 0)
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            next_slot = float(state.get('next_slot', 0))
+            live_until = float(state.get('live_until', 0))
+            wall = time.time()
+
+            if next_slot > wall:
+                self._next_slot = now + (next_slot - wall)
+                granted = False
+            elif name != 'live' and live_until > wall and state.get('live_pid') != os.getpid():
+                self._next_slot = now + self.interval
+                granted = False
+            else:
+                state['next_slot'] = wall + self.interval
+                self._next_slot = now + self.interval
+                granted = True
+
+            # Publish live demand while live requests are still queued here
+            if len(self._queues['live']) - (1 if granted and name == 'live' else 0) > 0:
+                state['live_until'] = wall + self.live_hold
+                state['live_pid'] = os.getpid()
+
+            data = json.dumps(state).encode()
+            os.ftruncate(self._state_fd, 0)
+            os.pwrite(self._state_fd, data, 0)
+            return granted
+        finally:
+            fcntl.flock(self._state_fd, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def acquire(self, priority: Optional[str] = None) -> float:
+        """
+        Block until this request may be sent
+
+        Args:
+            priority: Class (default: current_priority())
+
+        Returns:
+            Seconds waited
+        """
+        name = _check(priority or current_priority())
+        ticket = object()
+        enqueued = time.monotonic()
+
+        with self._cond:
+            self._queues[name].append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= self._next_slot and self._select() == name and self._queues[name][0] is ticket:
+                        if self._reserve(name, now):
+                            break
+                    delay = self._next_slot - time.monotonic()
+                    self._cond.wait(min(POLL_SECONDS, delay) if delay > 0 else POLL_SECONDS)
+            finally:
+                self._queues[name].remove(ticket)
+                self._cond.notify_all()
+
+            self._charge(name)
+            now = time.monotonic()
+            wait = now - enqueued
+            self._stats[name].record(wait, now)
+        return wait
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Per-class requests, queue depth, throughput (req/s over the last minute) and waits (s)"""
+        with self._cond:
+            now = time.monotonic()
+            result = {}
+            for name in PRIORITY_CLASSES:
+                stats = self._stats[name]
+                recent = len(stats.granted_at) - bisect.bisect_left(stats.granted_at, now - THROUGHPUT_WINDOW)
+                result[name] = {
+                    'requests': stats.requests,
+                    'queued': len(self._queues[name]),
+                    'throughput': round(recent / THROUGHPUT_WINDOW, 3),
+                    'wait_mean': round(stats.wait_total / stats.requests, 3) if stats.requests else 0.0,
+                    'wait_p50': round(_percentile(stats.waits, 50), 3),
+                    'wait_p95': round(_percentile(stats.waits, 95), 3),
+                    'wait_max': round(stats.wait_max, 3),
+                }
+            return result
+
+    def log_metrics(self, log: Optional[logging.Logger] = None):
+        log = log or logger
+        for name, row in self.metrics().items():
+            if row['requests'] or row['queued']:
+                log.info(f"API {name:<10} {row['requests']:>6} req  {row['throughput']:.2f} req/s  "
+                         f"wait p50 {row['wait_p50']:.2f}s p95 {row['wait_p95']:.2f}s max {row['wait_max']:.2f}s  "
+                         f"queued {row['queued']}")
+
+    def close(self):
+        with self._cond:
+            if self._state_fd is not None:
+                os.close(self._state_fd)
+                self._state_fd = None
+
+
+_scheduler: Optional[ApiScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_api_scheduler(rate: Optional[float] = None) -> ApiScheduler:
+    """
+    Process-wide scheduler shared by every RacingAPIClient
+
+    The shared state file defaults to data/api_scheduler.json;
+    RACING_API_SCHEDULER_STATE overrides it ('off' = this process only).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            state_path = os.getenv('RACING_API_SCHEDULER_STATE', DEFAULT_STATE_PATH)
+            if state_path.lower() in ('', 'off', 'none'):
+                state_path = None
+            _scheduler = ApiScheduler(rate=rate or 2.0, state_path=state_path)
+        elif rate:
+            _scheduler.set_rate(rate)
+        return _scheduler
@@ -0,0 +1,319 @@
+"""
+Chunk Ledger - Resumable, parallel processing of date-range chunks
+
+Long backfills (2015 onwards) are split into monthly chunks. The ledger
+records every chunk's state in one JSON file:
+
+    pending -> running -> done
+                       -> failed (retried on the next run)
+
+with attempts, start/finish times, duration, per-chunk counts and the last
+error. A restarted backfill skips done chunks and re-runs everything else;
+chunks left 'running' by a killed process count as not done.
+
+run_chunks() processes several chunks at once. API-bound work still respects
+the account rate limit because all chunks share one RacingAPIClient, whose
+limiter hands out request slots across threads; the parallelism overlaps API
+latency with database writes and entity extraction of other chunks.
+
+Usage:
+    ledger = ChunkLedger('logs/backfill_events_ledger.json')
+    keys = ledger.plan(monthly_chunks(start, end))
+    run_chunks(ledger, keys, lambda start, end: fetcher.fetch_racecards(start, end), workers=3)
+    ledger.log_summary(keys)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.api_budget import charged_to, usage_label
+from utils.api_scheduler import api_priority, current_priority
+from utils.instrumentation import bound_scopes, current_scopes
+from utils.job_runner import JobTimeout, bound_job, checkpoint, current_job
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+
+def monthly_chunks(start: date, end: date) -> List[Tuple[date, date]]:
+    """Split [start, end] into calendar-month ranges"""
+    chunks = []
+    current = start
+    while current <= end:
+        next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        chunks.append((current, min(next_month - timedelta(days=1), end)))
+        current = next_month
+    return chunks
+
+
+def chunk_key(start, end) -> str:
+    """'2015-01-01:2015-01-31'"""
+    return f"{start}:{end}"
+
+
+def chunk_days(entry: Dict) -> int:
+    """Days covered by a ledger entry"""
+    return (datetime.strptime(entry['end_date'], '%Y-%m-%d')
+            - datetime.strptime(entry['start_date'], '%Y-%m-%d')).days + 1
+
+
+class ChunkLedger:
+    """Per-chunk state of a backfill, persisted as JSON after every change"""
+
+    def __init__(self, path: Optional[str] = None, name: Optional[str] = None):
+        """
+        Initialize ledger
+
+        Args:
+            path: JSON file (None = in-memory only, e.g. for one-off runs)
+            name: Label stored in the file
+        """
+        self.path = str(path) if path else None
+        self._lock = threading.RLock()
+        self.data = {'name': name, 'created_at': datetime.utcnow().isoformat(), 'chunks': {}}
+
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self.data = json.load(f)
+                self.data.setdefault('chunks', {})
+                logger.info(f"Loaded chunk ledger {self.path}: {self.counts()}")
+            except Exception as e:
+                logger.error(f"Error loading chunk ledger {self.path}, starting fresh: {e}")
+
+    @property
+    def chunks(self) -> Dict[str, Dict]:
+        return self.data['chunks']
+
+    def save(self):
+        """Write the ledger atomically (a crash mid-write never corrupts it)"""
+        if not self.path:
+            return
+        with self._lock:
+            self.data['updated_at'] = datetime.utcnow().isoformat()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.data, f, indent=2, default=str)
+            os.replace(tmp, self.path)
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def plan(self, ranges: Iterable[Tuple], reset: bool = False) -> List[str]:
+        """
+        Register chunks (date ranges); existing entries keep their state
+
+        Args:
+            ranges: (start, end) date or 'YYYY-MM-DD' pairs
+            reset: Mark the given chunks pending again (fresh run over the same range)
+
+        Returns:
+            Chunk keys in order
+        """
+        keys = []
+        with self._lock:
+            for start, end in ranges:
+                key = chunk_key(start, end)
+                keys.append(key)
+                if key not in self.chunks or reset:
+                    self.chunks[key] = {
+                        'start_date': str(start),
+                        'end_date': str(end),
+                        'status': 'pending',
+                        'attempts': 0,
+                        'counts': {},
+                    }
+            self.save()
+        return keys
+
+    def todo(self, keys: Iterable[str], retry_failed: bool = True) -> List[str]:
+        """Chunks that still need to run (anything not done; failed only if retry_failed)"""
+        with self._lock:
+            return [k for k in keys
+                    if self.chunks[k]['status'] != 'done'
+                    and (retry_failed or self.chunks[k]['status'] != 'failed')]
+
+    # ------------------------------------------------------------------
+    # State changes
+    # ------------------------------------------------------------------
+
+    def start(self, key: str):
+        with self._lock:
+            entry = self.chunks[key]
+            entry.update(status='running', started_at=datetime.utcnow().isoformat(),
+                         finished_at=None, attempts=entry.get('attempts', 0) + 1)
+            self.save()
+
+    def finish(self, key: str, counts: Optional[Dict] = None, duration: Optional[float] = None):
+        with self._lock:
+            self.chunks[key].update(status='done', finished_at=datetime.utcnow().isoformat(),
+                                    duration=round(duration, 2) if duration is not None else None,
+                                    counts=counts or {}, error=None)
+            self.save()
+
+    def fail(self, key: str, error: str, counts: Optional[Dict] = None, duration: Optional[float] = None):
+        with self._lock:
+            self.chunks[key].update(status='failed', finished_at=datetime.utcnow().isoformat(),
+                                    duration=round(duration, 2) if duration is not None else None,
+                                    counts=counts or {}, error=str(error)[:1000])
+            self.save()
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def counts(self, keys: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Number of chunks per status"""
+        with self._lock:
+            entries = [self.chunks[k] for k in keys] if keys is not None else list(self.chunks.values())
+        result = {status: 0 for status in STATUSES}
+        for entry in entries:
+            result[entry['status']] = result.get(entry['status'], 0) + 1
+        return result
+
+    def totals(self, keys: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Sum of numeric per-chunk counts over done chunks"""
+        with self._lock:
+            entries = [self.chunks[k] for k in keys] if keys is not None else list(self.chunks.values())
+        totals: Dict[str, float] = {}
+        for entry in entries:
+            if entry['status'] != 'done':
+                continue
+            for name, value in (entry.get('counts') or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def log_summary(self, keys: Optional[Iterable[str]] = None, log: Optional[logging.Logger] = None):
+        log = log or logger
+        keys = list(keys) if keys is not None else list(self.chunks)
+        counts = self.counts(keys)
+        durations = [self.chunks[k].get('duration') or 0 for k in keys if self.chunks[k]['status'] == 'done']
+        log.info(f"Chunks: {counts['done']}/{len(keys)} done, {counts['failed']} failed, "
+                 f"{counts['pending'] + counts['running']} remaining")
+        if durations:
+            log.info(f"Chunk time: {sum(durations):.0f}s total, {sum(durations) / len(durations):.0f}s average")
+        for name, value in sorted(self.totals(keys).items()):
+            log.info(f"  {name}: {value:,}")
+        for key in keys:
+            if self.chunks[key]['status'] == 'failed':
+                log.info(f"  FAILED {key}: {self.chunks[key].get('error')}")
+
+
+def fit_to_budget(ledger: ChunkLedger, keys: List[str], budget, job: str,
+                  default_calls_per_day: float, retry_failed: bool = True):
+    """
+    Cut the chunks still to run to what fits in today's API budget
+
+    Cost is estimated per day (utils.api_budget, from the job's earlier runs).
+    When the whole range does not fit, the leading chunks that do are kept;
+    the rest stay pending in the ledger for a later run.
+
+    Returns:
+        (keys to pass to run_chunks, Estimate for those chunks, BudgetDecision)
+    """
+    todo = ledger.todo(keys, retry_failed=retry_failed)
+    days = [chunk_days(ledger.chunks[k]) for k in todo]
+    estimate = budget.estimate(job, sum(days), 'days', default_calls_per_day)
+    decision = budget.check(estimate)
+    if not decision.allowed:
+        return [], estimate, decision
+    if not decision.reshaped:
+        return keys, estimate, decision
+
+    fitted, total = [], 0
+    for key, chunk in zip(todo, days):
+        if total + chunk > decision.units:
+            break
+        fitted.append(key)
+        total += chunk
+    logger.warning(f"API budget: running {len(fitted)} of {len(todo)} chunk(s) today ({total:,} days)")
+    return fitted, budget.estimate(job, total, 'days', default_calls_per_day), decision
+
+
+def run_chunks(ledger: ChunkLedger, keys: List[str], func: Callable[[str, str], Dict],
+               workers: int = 1, retry_failed: bool = True) -> Dict:
+    """
+    Process chunks with a thread pool, recording each outcome in the ledger
+
+    Args:
+        ledger: Chunk ledger (chunks must be planned)
+        keys: Chunks to consider; done chunks are skipped
+        func: func(start_date, end_date) -> counts dict; a falsy 'success'
+            or an exception fails the chunk
+        workers: Chunks processed concurrently
+        retry_failed: Re-run chunks that failed in an earlier run
+
+    Returns:
+        {'success', 'ran', 'done', 'failed', 'skipped', 'results': {key: counts}}
+    """
+    todo = ledger.todo(keys, retry_failed=retry_failed)
+    skipped = len(keys) - len(todo)
+    if skipped:
+        logger.info(f"Skipping {skipped} chunk(s) already done" + ("" if retry_failed else " or failed"))
+
+    job = current_job()     # Chunk threads inherit the caller's job deadline
+    priority = current_priority()   # ... and API priority class
+    label = usage_label()           # ... and API usage label
+    scopes = current_scopes()       # ... and instrumentation scopes
+    results: Dict[str, Dict] = {}
+
+    def execute(key: str) -> Tuple[str, bool]:
+        entry = ledger.chunks[key]
+        with bound_job(job), api_priority(priority), charged_to(label), bound_scopes(scopes):
+            checkpoint()
+            ledger.start(key)
+            started = time.monotonic()
+            logger.info(f"[chunk] START {key} (attempt {entry['attempts']})")
+            try:
+                counts = func(entry['start_date'], entry['end_date']) or {}
+            except JobTimeout:
+                ledger.fail(key, 'job timeout', duration=time.monotonic() - started)
+                raise
+            except Exception as e:
+                logger.error(f"[chunk] {key} raised: {e}", exc_info=True)
+                ledger.fail(key, str(e), duration=time.monotonic() - started)
+                return key, False
+
+        duration = time.monotonic() - started
+        results[key] = counts
+        if counts.get('success', True):
+            ledger.finish(key, counts, duration)
+            logger.info(f"[chunk] DONE {key} ({duration:.1f}s)")
+            return key, True
+        ledger.fail(key, counts.get('error') or 'chunk reported failure', counts, duration)
+        logger.error(f"[chunk] FAILED {key}: {counts.get('error')}")
+        return key, False
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='chunk') as pool:
+        futures = [pool.submit(execute, key) for key in todo]
+        try:
+            for index, future in enumerate(as_completed(futures), 1):
+                _, ok = future.result()
+                done += ok
+                failed += not ok
+                logger.info(f"[chunk] Progress: {index}/{len(todo)} ({done} done, {failed} failed)")
+        except BaseException:
+            # Timeout or Ctrl+C: don't start queued chunks, let running ones finish
+            for future in futures:
+                future.cancel()
+            raise
+
+    return {
+        'success': failed == 0,
+        'ran': len(todo),
+        'done': done,
+        'failed': failed,
+        'skipped': skipped,
+        'results': results
+    }
@@ -0,0 +1,252 @@
+"""
+Entity Combination Engine - Single-scan sparse co-occurrence counts
+
+Computes runs / wins / 2nds / 3rds for every requested entity pair type
+(jockey-horse, trainer-horse, owner-horse, jockey-trainer, ...) from ONE scan
+of ra_mst_runners, instead of one full download per pair type.
+
+Entity IDs are interned to integers per entity type (shared across pair types,
+so a horse ID is stored once even when it appears in three pair types). Each
+pair type is a sparse co-occurrence matrix in coordinate form: a dict mapping
+the packed (row, col) code to a slot in four compact count arrays.
+
+Adding a pair type is one PAIR_TYPES entry; pairs whose column lives on
+ra_mst_races (e.g. course_id) trigger the race join automatically.
+"""
+
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.performance_cube import iter_completed_runners
+
+logger = logging.getLogger(__name__)
+
+# pair_type -> ((entity1_type, entity1_column), (entity2_type, entity2_column))
+PAIR_TYPES = {
+    'jockey_horse': (('jockey', 'jockey_id'), ('horse', 'horse_id')),
+    'trainer_horse': (('trainer', 'trainer_id'), ('horse', 'horse_id')),
+    'owner_horse': (('owner', 'owner_id'), ('horse', 'horse_id')),
+    'jockey_trainer': (('jockey', 'jockey_id'), ('trainer', 'trainer_id')),
+    'jockey_course': (('jockey', 'jockey_id'), ('course', 'course_id')),
+    'trainer_course': (('trainer', 'trainer_id'), ('course', 'course_id')),
+}
+
+DEFAULT_PAIR_TYPES = ['jockey_horse', 'trainer_horse', 'owner_horse', 'jockey_trainer']
+
+# Columns that come from ra_mst_races rather than ra_mst_runners
+RACE_LEVEL_COLUMNS = {'course_id'}
+
+_COL_BITS = 32
+
+
+class EntityInterner:
+    """Maps string entity IDs to dense integer codes and back"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: str) -> int:
+        """Get (or assign) the integer code for an ID"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, code: int) -> str:
+        """Get the original ID for a code"""
+        return self.values[code]
+
+
+class SparseCountMatrix:
+    """Sparse (row, col) -> [runs, wins, 2nds, 3rds] matrix in coordinate form"""
+
+    def __init__(self):
+        self.index: Dict[int, int] = {}
+        self.runs = array('I')
+        self.wins = array('I')
+        self.places_2nd = array('I')
+        self.places_3rd = array('I')
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, row: int, col: int, position: Optional[int]):
+        """Record one run for (row, col)"""
+        key = (row << _COL_BITS) | col
+        slot = self.index.get(key)
+        if slot is None:
+            slot = self.index[key] = len(self.runs)
+            self.runs.append(0)
+            self.wins.append(0)
+            self.places_2nd.append(0)
+            self.places_3rd.append(0)
+
+        self.runs[slot] += 1
+        if position == 1:
+            self.wins[slot] += 1
+        elif position == 2:
+            self.places_2nd[slot] += 1
+        elif position == 3:
+            self.places_3rd[slot] += 1
+
+    def items(self, min_runs: int = 1) -> Iterable[Tuple[int, int, int, int, int, int]]:
+        """Yield (row, col, runs, wins, 2nds, 3rds) for cells with min_runs+ runs"""
+        mask = (1 << _COL_BITS) - 1
+        for key, slot in self.index.items():
+            runs = self.runs[slot]
+            if runs >= min_runs:
+                yield (key >> _COL_BITS, key & mask, runs,
+                       self.wins[slot], self.places_2nd[slot], self.places_3rd[slot])
+
+
+def _parse_position(position) -> Optional[int]:
+    """Finishing position as int (None for non-numeric, e.g. PU/F/UR)"""
+    if position is None:
+        return None
+    try:
+        return int(position)
+    except (TypeError, ValueError):
+        return None
+
+
+class CombinationEngine:
+    """Builds sparse co-occurrence matrices for several pair types in one pass"""
+
+    def __init__(self, pair_types: Optional[List[str]] = None):
+        """
+        Initialize engine
+
+        Args:
+            pair_types: Pair types to compute (keys of PAIR_TYPES, default: DEFAULT_PAIR_TYPES)
+        """
+        pair_types = pair_types or DEFAULT_PAIR_TYPES
+        unknown = [p for p in pair_types if p not in PAIR_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown pair type(s): {', '.join(unknown)}")
+
+        self.pair_types = list(pair_types)
+        self.interners: Dict[str, EntityInterner] = {}
+        self.matrices: Dict[str, SparseCountMatrix] = {}
+        self._pairs = []
+
+        for pair_type in self.pair_types:
+            (type1, col1), (type2, col2) = PAIR_TYPES[pair_type]
+            interner1 = self.interners.setdefault(type1, EntityInterner())
+            interner2 = self.interners.setdefault(type2, EntityInterner())
+            matrix = self.matrices[pair_type] = SparseCountMatrix()
+            self._pairs.append((col1, col2, interner1, interner2, matrix))
+
+        self.runners_processed = 0
+
+    @property
+    def needs_races(self) -> bool:
+        """True if any pair type uses a race-level column"""
+        return any(col1 in RACE_LEVEL_COLUMNS or col2 in RACE_LEVEL_COLUMNS
+                   for col1, col2, _, _, _ in self._pairs)
+
+    @property
+    def runner_columns(self) -> List[str]:
+        """Runner columns needed for the scan"""
+        columns = ['race_id', 'position']
+        for col1, col2, _, _, _ in self._pairs:
+            for col in (col1, col2):
+                if col not in RACE_LEVEL_COLUMNS and col not in columns:
+                    columns.append(col)
+        return columns
+
+    def add_runner(self, runner: Dict, race: Optional[Dict] = None):
+        """Add one runner to every pair-type matrix"""
+        position = _parse_position(runner.get('position'))
+        race = race or {}
+
+        for col1, col2, interner1, interner2, matrix in self._pairs:
+            id1 = race.get(col1) if col1 in RACE_LEVEL_COLUMNS else runner.get(col1)
+            id2 = race.get(col2) if col2 in RACE_LEVEL_COLUMNS else runner.get(col2)
+            if not id1 or not id2:
+                continue
+            matrix.add(interner1.intern(id1), interner2.intern(id2), position)
+
+        self.runners_processed += 1
+
+    def records(self, pair_type: str, min_runs: int = 5, canonical_order: bool = False) -> List[Dict]:
+        """
+        Build ra_entity_combinations records for one pair type
+
+        Args:
+            pair_type: Pair type to materialise
+            min_runs: Minimum runs for a combination (applied before building records)
+            canonical_order: Swap entities so entity1_type < entity2_type alphabetically
+                (required by the chk_entity_comb_canonical_order constraint)
+
+        Returns:
+            Records sorted by total_runs (most frequent first)
+        """
+        (type1, _), (type2, _) = PAIR_TYPES[pair_type]
+        interner1, interner2 = self.interners[type1], self.interners[type2]
+        swap = canonical_order and type1 > type2
+        calculated_at = datetime.utcnow().isoformat()
+
+        records = []
+        for row, col, runs, wins, places_2nd, places_3rd in self.matrices[pair_type].items(min_runs):
+            id1, id2 = interner1.lookup(row), interner2.lookup(col)
+            t1, t2 = type1, type2
+            if swap:
+                t1, id1, t2, id2 = t2, id2, t1, id1
+
+            records.append({
+                'entity1_type': t1,
+                'entity1_id': id1,
+                'entity2_type': t2,
+                'entity2_id': id2,
+                'total_runs': runs,
+                'wins': wins,
+                'places_2nd': places_2nd,
+                'places_3rd': places_3rd,
+                'win_percent': round(wins / runs * 100, 2),
+                'place_percent': round((wins + places_2nd + places_3rd) / runs * 100, 2),
+                'ae_index': None,  # Would need odds data to calculate
+                'profit_loss_1u': None,  # Would need odds data to calculate
+                'query_filters': None,
+                'calculated_at': calculated_at
+            })
+
+        records.sort(key=lambda x: x['total_runs'], reverse=True)
+        return records
+
+    def summary(self) -> Dict[str, int]:
+        """Number of non-empty cells per pair type"""
+        return {pair_type: len(matrix) for pair_type, matrix in self.matrices.items()}
+
+    @classmethod
+    def from_database(cls, db_client, pair_types: Optional[List[str]] = None,
+                      page_size: int = 1000) -> 'CombinationEngine':
+        """
+        Build all requested matrices with a single paginated runner scan
+
+        Args:
+            db_client: SupabaseReferenceClient instance
+            pair_types: Pair types to compute
+            page_size: Runners per page (max 1000 for PostgREST)
+
+        Returns:
+            Populated CombinationEngine
+        """
+        engine = cls(pair_types)
+        race_columns = ['id'] + sorted(RACE_LEVEL_COLUMNS) if engine.needs_races else None
+
+        for runner, race in iter_completed_runners(db_client, engine.runner_columns, race_columns, page_size):
+            engine.add_runner(runner, race)
+
+        interned = ', '.join(f"{t}={len(i)}" for t, i in engine.interners.items())
+        logger.info(f"Combination engine: {engine.runners_processed} runners scanned, IDs interned ({interned})")
+        for pair_type, cells in engine.summary().items():
+            logger.info(f"  {pair_type}: {cells} combinations")
+
+        return engine
@@ -0,0 +1,234 @@
+"""
+Coverage Service - Per-date coverage of races, runners and results
+
+Backfill planning and progress monitors used to measure coverage with one
+PostgREST count per year and table, or one runner query per race. The
+coverage functions of migration 033 answer the same questions with grouped
+SQL (one query per date window), and this service caches the answer:
+
+- daily(): races, races with runners, races with a result, runners and
+  runners with a finishing position per race date
+- the cache (JSON) stores every computed date plus a watermark - the latest
+  updated_at over ra_mst_races/ra_mst_runners. On the next call only dates
+  with rows updated after the watermark, and dates never computed, are
+  queried again. Deleted rows are not detected; refresh=True recomputes
+  everything.
+- missing_days(): dates whose races lack runners (or results), and dates
+  with no races at all - the days a backfill actually needs to fetch.
+  Days without racing (e.g. 24/25 December) also show up as having no races.
+- null_rates(): total and NULL counts for several columns in one scan
+- races_missing_ratings(): races with runners lacking every rating
+
+Usage:
+    coverage = CoverageService(db_client)
+    days = coverage.missing_days('2015-01-01', '2025-12-31')
+    coverage.by_year(2015, 2025)
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'coverage_cache.json')
+
+# coverage_daily returns at most one row per date; stay under PostgREST's 1000-row cap
+WINDOW_DAYS = 900
+RPC_PAGE_SIZE = 1000
+
+EMPTY_DAY = {'races': 0, 'races_with_runners': 0, 'races_with_result': 0, 'runners': 0, 'runners_with_position': 0}
+
+
+def _to_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def date_runs(days: Iterable[str]) -> List[Tuple[str, str]]:
+    """Group dates into contiguous (start, end) runs"""
+    runs: List[List[date]] = []
+    for day in sorted({_to_date(d) for d in days}):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [(start.isoformat(), end.isoformat()) for start, end in runs]
+
+
+class CoverageService:
+    """Grouped-SQL coverage with an incremental watermark cache"""
+
+    def __init__(self, db_client, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        """
+        Initialize service
+
+        Args:
+            db_client: SupabaseReferenceClient
+            cache_path: JSON cache file (None = no cache)
+        """
+        self.db_client = db_client
+        self.cache_path = cache_path
+        self.cache = {'watermark': None, 'days': {}}
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.cache_path and os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path) as f:
+                    self.cache = json.load(f)
+                self.cache.setdefault('days', {})
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable coverage cache {self.cache_path}: {e}")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.cache, f)
+        os.replace(tmp, self.cache_path)
+
+    def _rpc(self, name: str, params: Dict):
+        return self.db_client.client.rpc(name, params).execute().data
+
+    def _invalidate_changed(self) -> Optional[str]:
+        """Drop cached dates changed since the watermark; returns the new watermark"""
+        watermark = self._rpc('coverage_watermark', {})
+        if isinstance(watermark, list):
+            watermark = watermark[0] if watermark else None
+        if isinstance(watermark, dict):
+            watermark = next(iter(watermark.values()), None)
+
+        previous = self.cache.get('watermark')
+        if previous and self.cache['days']:
+            if watermark == previous:
+                return watermark
+            changed = self._rpc('coverage_changed_dates', {'p_since': previous}) or []
+            dropped = 0
+            for row in changed:
+                if self.cache['days'].pop(str(row['race_date'])[:10], None) is not None:
+                    dropped += 1
+            logger.info(f"Coverage cache: {dropped} date(s) changed since {previous}")
+        return watermark
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def daily(self, start_date, end_date, refresh: bool = False) -> Dict[str, Dict]:
+        """
+        Coverage per date between start_date and end_date (inclusive)
+
+        Returns:
+            'YYYY-MM-DD' -> {'races', 'races_with_runners', 'races_with_result',
+                             'runners', 'runners_with_position'}
+        """
+        self._load()
+        start, end = _to_date(start_date), _to_date(end_date)
+
+        if refresh:
+            self.cache = {'watermark': None, 'days': {}}
+        # Taken before querying, so changes made meanwhile are caught next time
+        watermark = self._invalidate_changed()
+
+        all_days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+        missing = [day for day in all_days if day not in self.cache['days']]
+
+        for run_start, run_end in date_runs(missing):
+            window_start = _to_date(run_start)
+            run_end = _to_date(run_end)
+            while window_start <= run_end:
+                window_end = min(window_start + timedelta(days=WINDOW_DAYS - 1), run_end)
+                rows = self._rpc('coverage_daily', {'p_start': window_start.isoformat(),
+                                                    'p_end': window_end.isoformat()}) or []
+                found = {str(row['race_date'])[:10]: row for row in rows}
+                day = window_start
+                while day <= window_end:
+                    row = found.get(day.isoformat())
+                    self.cache['days'][day.isoformat()] = (
+                        {key: int(row.get(key) or 0) for key in EMPTY_DAY} if row else dict(EMPTY_DAY)
+                    )
+                    day += timedelta(days=1)
+                window_start = window_end + timedelta(days=1)
+
+        if missing:
+            logger.info(f"Coverage: computed {len(missing)} date(s), {len(all_days) - len(missing)} from cache")
+        self.cache['watermark'] = watermark
+        self._save()
+        return {day: self.cache['days'][day] for day in all_days}
+
+    def missing_days(self, start_date, end_date, require_runners: bool = True,
+                     require_results: bool = False, refresh: bool = False) -> List[str]:
+        """
+        Dates a backfill still needs to fetch
+
+        A date is missing if it has no races, or (require_runners) some races
+        have no runners, or (require_results) some races have no result.
+        """
+        missing = []
+        for day, row in self.daily(start_date, end_date, refresh=refresh).items():
+            if (row['races'] == 0
+                    or (require_runners and row['races_with_runners'] < row['races'])
+                    or (require_results and row['races_with_result'] < row['races'])):
+                missing.append(day)
+        return missing
+
+    def by_year(self, start_year: int, end_year: int, refresh: bool = False) -> Dict[int, Dict]:
+        """Daily coverage summed per year"""
+        end = min(date(end_year, 12, 31), date.today())
+        totals = {year: dict(EMPTY_DAY, days_with_races=0) for year in range(start_year, end_year + 1)}
+        for day, row in self.daily(date(start_year, 1, 1), end, refresh=refresh).items():
+            year_totals = totals[int(day[:4])]
+            for key in EMPTY_DAY:
+                year_totals[key] += row[key]
+            year_totals['days_with_races'] += 1 if row['races'] else 0
+        return totals
+
+    def null_rates(self, table: str, columns: List[str], date_column: Optional[str] = None,
+                   start_date=None, end_date=None) -> Dict[str, Dict]:
+        """
+        NULL counts for columns of an ra_* table (one scan)
+
+        Returns:
+            column -> {'total', 'nulls', 'null_pct'}
+        """
+        rows = self._rpc('coverage_null_rates', {
+            'p_table': table,
+            'p_columns': list(columns),
+            'p_date_column': date_column,
+            'p_start': _to_date(start_date).isoformat() if start_date else None,
+            'p_end': _to_date(end_date).isoformat() if end_date else None,
+        }) or []
+        return {
+            row['column_name']: {
+                'total': row['total_rows'],
+                'nulls': row['null_rows'],
+                'null_pct': round(row['null_rows'] / row['total_rows'] * 100, 2) if row['total_rows'] else 0.0
+            }
+            for row in rows
+        }
+
+    def races_missing_ratings(self, start_date) -> List[str]:
+        """Race IDs since start_date with a runner lacking official rating, RPR and TSR"""
+        race_ids: List[str] = []
+        offset = 0
+        while True:
+            rows = self._rpc('races_missing_ratings', {'p_start': _to_date(start_date).isoformat(),
+                                                       'p_limit': RPC_PAGE_SIZE, 'p_offset': offset}) or []
+            race_ids.extend(row['race_id'] for row in rows)
+            if len(rows) < RPC_PAGE_SIZE:
+                return race_ids
+            offset += RPC_PAGE_SIZE
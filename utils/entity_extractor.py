@@ -13,6 +13,10 @@ import time
 from typing import Dict, List, Set, Tuple, Optional
 from datetime import datetime
 from utils.region_extractor import extract_region_from_name
+from utils.logger import ProgressLogger
+from utils.api_scheduler import api_priority
+from utils.entity_index import EntityIndex
+from utils.instrumentation import count, timed, timer
 
 logger = logging.getLogger(__name__)
 
@@ -20,16 +24,18 @@ logger = logging.getLogger(__name__)
 class EntityExtractor:
     """Extract and store unique entities from race data"""
 
-    def __init__(self, db_client, api_client=None):
+    def __init__(self, db_client, api_client=None, horse_index: Optional[EntityIndex] = None):
         """
         Initialize entity extractor
 
         Args:
             db_client: SupabaseReferenceClient instance
             api_client: RacingAPIClient instance (optional, for Pro enrichment)
+            horse_index: EntityIndex over ra_mst_horses (optional, shared by warm workers)
         """
         self.db_client = db_client
         self.api_client = api_client
+        self.horse_index = horse_index or EntityIndex(db_client, 'ra_mst_horses', region_column='region')
         self.stats = {
             'jockeys': 0,
             'trainers': 0,
@@ -39,6 +45,7 @@ class EntityExtractor:
             'pedigrees_captured': 0
         }
 
+    @timed('entities.extract')
     def extract_from_runners(self, runner_records: List[Dict]) -> Dict[str, List[Dict]]:
         """
         Extract unique entities from runner records
@@ -113,6 +120,7 @@ class EntityExtractor:
             'horses': list(horses.values())
         }
 
+    @timed('entities.lookup_pedigree_horse')
     def _lookup_horse_id_by_name(self, name: str, region: str = None) -> Optional[str]:
         """
         Look up horse_id in database by horse name and optional region
@@ -120,6 +128,8 @@ class EntityExtractor:
         1. Try name + region match (most accurate)
         2. Fallback to name-only match if region not provided or no match found
 
+        Lookups go through the shared horse index (one name query, cached).
+
         Args:
             name: Horse name (e.g., "Masked Marvel (GB)")
             region: Region code (e.g., "GB", "IRE") - optional for better matching
@@ -127,59 +137,14 @@ class EntityExtractor:
         Returns:
             horse_id if found, None otherwise
         """
-        if not name:
-            return None
-
-        try:
-            # Normalize name for matching (remove extra whitespace, lowercase)
-            normalized_name = ' '.join(name.split()).lower()
-
-            # Strategy 1: Try name + region match (if region provided)
-            if region:
-                result = self.db_client.client.table('ra_mst_horses')\
-                    .select('id, name, region')\
-                    .execute()
-
-                # Filter in Python for case-insensitive name and region match
-                for horse in result.data:
-                    horse_name_normalized = ' '.join(horse.get('name', '').split()).lower()
-                    horse_region = horse.get('region', '').upper() if horse.get('region') else None
-
-                    if horse_name_normalized == normalized_name and horse_region == region.upper():
-                        horse_id = horse.get('id')
-                        logger.debug(f"✓ Found horse_id '{horse_id}' for '{name}' (region: {region}) via name+region match")
-                        return horse_id
-
-            # Strategy 2: Fallback to name-only match
-            result = self.db_client.client.table('ra_mst_horses')\
-                .select('id, name')\
-                .execute()
-
-            # Filter in Python for case-insensitive exact name match
-            matches = []
-            for horse in result.data:
-                horse_name_normalized = ' '.join(horse.get('name', '').split()).lower()
-                if horse_name_normalized == normalized_name:
-                    matches.append(horse)
-
-            if len(matches) == 1:
-                # Single match - safe to use
-                horse_id = matches[0].get('id')
-                match_type = "name-only (no region)" if not region else "name-only (region mismatch)"
-                logger.debug(f"✓ Found horse_id '{horse_id}' for '{name}' via {match_type}")
-                return horse_id
-            elif len(matches) > 1:
-                # Multiple matches - ambiguous, skip for safety
-                logger.debug(f"⚠ Multiple horses found for '{name}' ({len(matches)} matches), skipping for safety")
-                return None
-            else:
-                logger.debug(f"No horse_id found for '{name}'" + (f" (region: {region})" if region else ""))
-                return None
-
-        except Exception as e:
-            logger.warning(f"Error looking up horse_id for '{name}': {e}")
-            return None
-
+        horse_id = self.horse_index.lookup(name, region)
+        if horse_id:
+            logger.debug("✓ Found horse_id '%s' for '%s' (region: %s)", horse_id, name, region)
+        elif name:
+            logger.debug("No horse_id found for '%s' (region: %s)", name, region)
+        return horse_id
+
+    @timed('entities.extract_breeding')
     def extract_breeding_from_runners(self, runner_records: List[Dict]) -> Dict[str, List[Dict]]:
         """
         Extract unique breeding entities from runner records
@@ -211,7 +176,7 @@ class EntityExtractor:
                     'updated_at': datetime.utcnow().isoformat()
                 }
                 if sire_horse_id:
-                    logger.debug(f"  ✓ Linked sire '{sire_name}' to horse_id '{sire_horse_id}'")
+                    logger.debug("  ✓ Linked sire '%s' to horse_id '%s'", sire_name, sire_horse_id)
 
             # Extract dam with horse_id lookup (using region-aware matching)
             dam_id = runner.get('dam_id')
@@ -228,7 +193,7 @@ class EntityExtractor:
                     'updated_at': datetime.utcnow().isoformat()
                 }
                 if dam_horse_id:
-                    logger.debug(f"  ✓ Linked dam '{dam_name}' to horse_id '{dam_horse_id}'")
+                    logger.debug("  ✓ Linked dam '%s' to horse_id '%s'", dam_name, dam_horse_id)
 
             # Extract damsire with horse_id lookup (using region-aware matching)
             damsire_id = runner.get('damsire_id')
@@ -245,7 +210,7 @@ class EntityExtractor:
                     'updated_at': datetime.utcnow().isoformat()
                 }
                 if damsire_horse_id:
-                    logger.debug(f"  ✓ Linked damsire '{damsire_name}' to horse_id '{damsire_horse_id}'")
+                    logger.debug("  ✓ Linked damsire '%s' to horse_id '%s'", damsire_name, damsire_horse_id)
 
         return {
             'sires': list(sires.values()),
@@ -253,6 +218,7 @@ class EntityExtractor:
             'damsires': list(damsires.values())
         }
 
+    @timed('entities.store')
     def store_entities(self, entities: Dict[str, List[Dict]]) -> Dict:
         """
         Store extracted entities in database
@@ -341,6 +307,8 @@ class EntityExtractor:
                 # Store enriched horses
                 db_result = self.db_client.insert_horses(enriched_horses)
                 results['horses'] = db_result
+                if not db_result.get('errors'):
+                    self.horse_index.add(h['id'] for h in enriched_horses)
                 self.stats['horses'] += db_result.get('inserted', 0)
                 logger.info(f"Stored {db_result.get('inserted', 0)} horses")
 
@@ -360,16 +328,19 @@ class EntityExtractor:
 
         return results
 
-    def _get_existing_horse_ids(self) -> Set[str]:
+    @timed('entities.existing_horse_ids')
+    def _get_existing_horse_ids(self, horse_ids: List[str]) -> Set[str]:
         """
-        Get set of existing horse IDs from database
+        Get the given horse IDs that already exist in the database
+
+        Args:
+            horse_ids: Horse IDs to check
 
         Returns:
             Set of horse IDs already in database
         """
         try:
-            result = self.db_client.client.table('ra_mst_horses').select('id').execute()
-            return {row['id'] for row in result.data}
+            return self.horse_index.existing(horse_ids)
         except Exception as e:
             logger.error(f"Error fetching existing horse IDs: {e}")
             return set()
@@ -388,9 +359,11 @@ class EntityExtractor:
             return None
 
         try:
-            response = self.api_client.get_horse_details(horse_id, tier='pro')
+            # Enrichment never outranks the work that triggered it
+            with api_priority('enrichment', only_lower=True):
+                response = self.api_client.get_horse_details(horse_id, tier='pro')
             if response:
-                logger.debug(f"Successfully fetched Pro data for {horse_id}")
+                logger.debug("Successfully fetched Pro data for %s", horse_id)
                 return response
             else:
                 logger.warning(f"No data returned from Pro endpoint for {horse_id}")
@@ -399,6 +372,7 @@ class EntityExtractor:
             logger.error(f"Error fetching Pro data for {horse_id}: {e}")
             return None
 
+    @timed('entities.enrich_new_horses')
     def _enrich_new_horses(self, horse_records: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
         """
         Enrich new horses with Pro endpoint data
@@ -414,8 +388,8 @@ class EntityExtractor:
             return horse_records, []
 
         # Get existing horse IDs
-        existing_ids = self._get_existing_horse_ids()
-        logger.info(f"Found {len(existing_ids)} existing horses in database")
+        existing_ids = self._get_existing_horse_ids([h['id'] for h in horse_records])
+        logger.info(f"Found {len(existing_ids)} of {len(horse_records)} horses in database")
 
         # Separate new vs existing horses
         new_horses = [h for h in horse_records if h['id'] not in existing_ids]
@@ -431,10 +405,11 @@ class EntityExtractor:
         pedigree_records = []
 
         logger.info(f"Enriching {len(new_horses)} new horses with Pro endpoint...")
+        progress = ProgressLogger(logger, 'Enriching new horses', total=len(new_horses))
 
         for idx, horse in enumerate(new_horses):
             horse_id = horse['id']
-            logger.info(f"[{idx+1}/{len(new_horses)}] Enriching {horse_id} ({horse.get('name')})...")
+            logger.debug("[%d/%d] Enriching %s (%s)...", idx + 1, len(new_horses), horse_id, horse.get('name'))
 
             # Fetch complete data
             horse_pro = self._fetch_horse_pro(horse_id)
@@ -474,23 +449,31 @@ class EntityExtractor:
                     }
                     pedigree_records.append(pedigree_record)
                     self.stats['pedigrees_captured'] += 1
-                    logger.info(f"  ✓ Pedigree captured for {horse_id}")
+                    logger.debug("  ✓ Pedigree captured for %s", horse_id)
 
                 self.stats['horses_enriched'] += 1
+                count('entities.horses_enriched')
 
                 # Rate limiting: 2 requests/second
-                time.sleep(0.5)
+                with timer('entities.enrich_sleep'):
+                    time.sleep(0.5)
 
             else:
                 # Fallback - keep basic data
-                logger.warning(f"  ✗ Pro fetch failed for {horse_id}, using basic data")
+                logger.warning("  ✗ Pro fetch failed for %s, using basic data", horse_id)
+                count('entities.pro_fetch_failed')
                 enriched_horses.append(horse)
 
+            progress.update()
+
+        progress.finish()
+
         # Combine enriched new horses with existing horses
         all_horses = existing_horses + enriched_horses
 
         return all_horses, pedigree_records
 
+    @timed('entities.extract_and_store')
     def extract_and_store_from_runners(self, runner_records: List[Dict]) -> Dict:
         """
         Extract entities from runners and store them in database
@@ -0,0 +1,160 @@
+"""
+Entity Index - Cached ID existence checks and name lookups for master tables
+
+Entity extraction used to ask the database "which horses exist?" by selecting
+the whole ra_mst_horses id column (truncated at PostgREST's 1000-row page, so
+most horses looked new), and resolved every sire/dam/damsire name by
+downloading id/name rows and filtering in Python. The index instead:
+
+- existing(ids) queries only the IDs it has not seen, in IN (...) batches,
+  and remembers the ones that exist; add() records IDs after an insert
+- lookup(name, region) runs one case-insensitive name query per distinct
+  name and caches the answer (also "not found") for ttl seconds, since other
+  processes insert horses too
+
+One index per table is shared process-wide through utils.resources, so a
+warm worker keeps what earlier ticks learned.
+
+Usage:
+    index = EntityIndex(db_client, 'ra_mst_horses', region_column='region')
+    new = [h for h in horses if h['id'] not in index.existing(h['id'] for h in horses)]
+    sire_horse_id = index.lookup('Frankel (GB)', 'GB')
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from utils.instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+ID_BATCH_SIZE = 200             # IDs per IN (...) query (URL length)
+DEFAULT_NAME_TTL = 6 * 3600     # Seconds a name lookup (hit or miss) is trusted
+
+
+def normalize_name(name: str) -> str:
+    """'Masked  Marvel (GB) ' -> 'masked marvel (gb)'"""
+    return ' '.join((name or '').split()).lower()
+
+
+class EntityIndex:
+    """Known IDs and name -> ID lookups for one table"""
+
+    def __init__(self, db_client, table: str, id_column: str = 'id', name_column: str = 'name',
+                 region_column: Optional[str] = None, name_ttl: float = DEFAULT_NAME_TTL):
+        """
+        Initialize index
+
+        Args:
+            db_client: SupabaseReferenceClient
+            table: Table to index (e.g. ra_mst_horses)
+            id_column: Primary key column
+            name_column: Column for lookup()
+            region_column: Optional column for region-aware lookup()
+            name_ttl: Seconds cached name lookups stay valid
+        """
+        self.db_client = db_client
+        self.table = table
+        self.id_column = id_column
+        self.name_column = name_column
+        self.region_column = region_column
+        self.name_ttl = name_ttl
+
+        self._lock = threading.Lock()
+        self._ids: Set[str] = set()
+        self._names: Dict[Tuple[str, Optional[str]], Tuple[float, Optional[str]]] = {}
+        self.stats = {'id_hits': 0, 'id_queries': 0, 'name_hits': 0, 'name_queries': 0}
+
+    # ------------------------------------------------------------------
+    # IDs
+    # ------------------------------------------------------------------
+
+    def existing(self, ids: Iterable[str]) -> Set[str]:
+        """The given IDs that exist in the table"""
+        wanted = {i for i in ids if i}
+        with self._lock:
+            known = wanted & self._ids
+            unknown = sorted(wanted - known)
+            self.stats['id_hits'] += len(known)
+        count('cache.hits', len(known), cache=f'{self.table}.ids')
+        count('cache.misses', len(unknown), cache=f'{self.table}.ids')
+
+        found: Set[str] = set()
+        for start in range(0, len(unknown), ID_BATCH_SIZE):
+            batch = unknown[start:start + ID_BATCH_SIZE]
+            response = self.db_client.client.table(self.table)\
+                .select(self.id_column)\
+                .in_(self.id_column, batch)\
+                .execute()
+            found.update(row[self.id_column] for row in response.data or [])
+            count('db.rows_read', len(response.data or []), table=self.table)
+            self.stats['id_queries'] += 1
+
+        if found:
+            self.add(found)
+        return known | found
+
+    def add(self, ids: Iterable[str]):
+        """Record IDs known to exist (e.g. just inserted)"""
+        with self._lock:
+            self._ids.update(i for i in ids if i)
+
+    # ------------------------------------------------------------------
+    # Names
+    # ------------------------------------------------------------------
+
+    def lookup(self, name: str, region: Optional[str] = None) -> Optional[str]:
+        """
+        ID for a name: name+region match first, else a unique name-only match
+
+        Ambiguous names (several rows, none matching the region) return None.
+        """
+        if not name:
+            return None
+        key = (normalize_name(name), region.upper() if region else None)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._names.get(key)
+            if cached and now - cached[0] < self.name_ttl:
+                self.stats['name_hits'] += 1
+                count('cache.hits', cache=f'{self.table}.names')
+                return cached[1]
+        count('cache.misses', cache=f'{self.table}.names')
+
+        result = self._query_name(name, key[0], key[1])
+        with self._lock:
+            self._names[key] = (now, result)
+        return result
+
+    def _query_name(self, name: str, normalized: str, region: Optional[str]) -> Optional[str]:
+        columns = f"{self.id_column}, {self.name_column}" + (f", {self.region_column}" if self.region_column else "")
+        # ILIKE without wildcards is a case-insensitive equality; escape LIKE metacharacters
+        pattern = ' '.join(name.split()).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        try:
+            response = self.db_client.client.table(self.table)\
+                .select(columns)\
+                .ilike(self.name_column, pattern)\
+                .execute()
+        except Exception as e:
+            logger.warning(f"Error looking up {self.table} id for '{name}': {e}")
+            return None
+        self.stats['name_queries'] += 1
+        count('db.rows_read', len(response.data or []), table=self.table)
+
+        matches = [row for row in response.data or [] if normalize_name(row.get(self.name_column)) == normalized]
+        if region and self.region_column:
+            for row in matches:
+                if (row.get(self.region_column) or '').upper() == region:
+                    return row[self.id_column]
+        if len(matches) == 1:
+            return matches[0][self.id_column]
+        if len(matches) > 1:
+            logger.debug("Multiple %s rows named '%s' (%d), skipping for safety", self.table, name, len(matches))
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
@@ -0,0 +1,325 @@
+"""
+Freshness - Live data latency measured from race event timestamps
+
+monitors/data_quality_check.py and tests/test_data_freshness.py check the
+newest updated_at against a fixed threshold once. They cannot say how late
+the live path is per race. This module records two lags per race as the
+fetchers write:
+
+- result:   off_dt -> result stored (race row with has_result and its
+            runners written by the results fetcher)
+- racecard: racecard first seen in an API response -> its runners stored
+            (races fetcher)
+
+The Racing API has no racecard publication timestamp. The first time any
+process saw the race in a racecard response is used instead, so the
+racecard lag covers the polling gap to the first fetch that wrote it plus
+entity extraction and writes.
+
+Each race counts once per stream: the first time it is stored. Re-polls that
+rewrite a race do not add samples. Backfills are not live data, so results
+stored more than MAX_RESULT_LAG after the off are skipped, and racecards
+are only sighted while the race is still to run.
+
+Samples from the last WINDOW (24h, RACING_FRESHNESS_WINDOW_HOURS) give
+rolling p50/p90/p95/p99 and the share within the SLO target per stream
+(RACING_FRESHNESS_SLO_RESULT / RACING_FRESHNESS_SLO_RACECARD, seconds).
+State is shared by every process on the host through data/freshness.json
+(flock; RACING_FRESHNESS_STATE overrides, 'off' keeps it in-process), so
+the worker's /metrics endpoint reports lags recorded by a live update
+started from cron. Counters freshness.recorded{stream} and
+freshness.slo_misses{stream} also go into instrumentation, for burn-rate
+alerts.
+
+Usage:
+    freshness.racecards_seen(racecards)             # as racecards are fetched
+    freshness.record_racecards(stored_runners)      # after runners are written
+    freshness.record_results(stored_races)          # after results are written
+
+    register_collector(freshness.metric_families)
+"""
+
+import fcntl
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.instrumentation import count
+from utils.live_schedule import parse_off_dt
+from utils.metrics_server import PREFIX, MetricFamily
+
+logger = logging.getLogger(__name__)
+
+STREAMS = ('result', 'racecard')
+
+# Seconds; default SLO targets per stream
+DEFAULT_SLO = {'result': 20 * 60, 'racecard': 15 * 60}
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+WINDOW = 24 * 3600              # Rolling window for percentiles
+MAX_RESULT_LAG = 12 * 3600      # Results stored later than this after the off are backfill
+FIRST_SEEN_TTL = 3 * 24 * 3600  # Racecards are published a day or two ahead
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'freshness.json')
+
+
+def _slo_target(stream: str) -> float:
+    return float(os.getenv(f'RACING_FRESHNESS_SLO_{stream.upper()}', DEFAULT_SLO[stream]))
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class FreshnessTracker:
+    """Per-race lags per stream over a rolling window, optionally shared through a state file"""
+
+    def __init__(self, state_path: Optional[str] = None, window: float = WINDOW):
+        """
+        Initialize tracker
+
+        Args:
+            state_path: JSON state file shared between processes (None: this process only)
+            window: Seconds of samples kept for percentiles
+        """
+        self.state_path = state_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._state = self._empty()
+
+    @staticmethod
+    def _empty() -> Dict:
+        # first_seen: race_id -> [seen_at, racecard lag recorded]
+        # samples: stream -> race_id -> [stored_at, lag_seconds]
+        return {'first_seen': {}, 'samples': {stream: {} for stream in STREAMS}}
+
+    @contextmanager
+    def _locked(self, write: bool) -> Iterator[Dict]:
+        """Current state under the thread lock (and the file lock when shared)"""
+        with self._lock:
+            if not self.state_path:
+                yield self._state
+                return
+            try:
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+                fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as e:
+                logger.warning(f"Freshness state {self.state_path} unavailable, keeping it in-process: {e}")
+                self.state_path = None
+                yield self._state
+                return
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+                with os.fdopen(os.dup(fd), 'r') as f:
+                    raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else self._empty()
+                except ValueError:
+                    state = self._empty()
+                for stream in STREAMS:
+                    state.setdefault('samples', {}).setdefault(stream, {})
+                state.setdefault('first_seen', {})
+                yield state
+                if write:
+                    data = json.dumps(state).encode()
+                    os.ftruncate(fd, 0)
+                    os.pwrite(fd, data, 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def _prune(self, state: Dict, now: float):
+        state['first_seen'] = {race_id: seen for race_id, seen in state['first_seen'].items()
+                               if seen[0] >= now - FIRST_SEEN_TTL}
+        for stream in STREAMS:
+            state['samples'][stream] = {race_id: sample for race_id, sample in state['samples'][stream].items()
+                                        if sample[0] >= now - self.window}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def racecards_seen(self, racecards: Iterable[Dict], now: Optional[float] = None):
+        """Note when racecards for races not yet off first appeared in an API response"""
+        now = now or time.time()
+        race_ids = []
+        for racecard in racecards:
+            off = parse_off_dt(racecard.get('off_dt'))
+            if racecard.get('race_id') and off is not None and off.timestamp() > now:
+                race_ids.append(racecard['race_id'])
+        if not race_ids:
+            return
+        with self._locked(write=True) as state:
+            for race_id in race_ids:
+                state['first_seen'].setdefault(race_id, [now, False])
+
+    def record(self, stream: str, lags: Dict[str, float], now: Optional[float] = None) -> int:
+        """Add race_id -> lag samples to a stream (races already sampled are ignored)"""
+        now = now or time.time()
+        with self._locked(write=True) as state:
+            return self._add(state, stream, lags, now)
+
+    def _add(self, state: Dict, stream: str, lags: Dict[str, float], now: float) -> int:
+        target = _slo_target(stream)
+        samples = state['samples'][stream]
+        added = misses = 0
+        for race_id, lag in lags.items():
+            if race_id in samples:
+                continue
+            samples[race_id] = [now, round(lag, 1)]
+            added += 1
+            misses += lag > target
+        self._prune(state, now)
+        if added:
+            count('freshness.recorded', added, stream=stream)
+        if misses:
+            count('freshness.slo_misses', misses, stream=stream)
+        return added
+
+    def record_results(self, races: Iterable[Dict], now: Optional[float] = None) -> int:
+        """Result lag (off_dt -> now) for race records just written with their result"""
+        now = now or time.time()
+        lags, skipped = {}, 0
+        for race in races:
+            off = parse_off_dt(race.get('off_dt'))
+            if not race.get('id') or off is None or not race.get('has_result') or race.get('is_abandoned'):
+                continue
+            lag = now - off.timestamp()
+            if 0 <= lag <= MAX_RESULT_LAG:
+                lags[race['id']] = lag
+            else:
+                skipped += 1
+        if skipped:
+            count('freshness.skipped', skipped, stream='result')
+        return self.record('result', lags, now) if lags else 0
+
+    def record_racecards(self, runners: Iterable[Dict], now: Optional[float] = None) -> int:
+        """Racecard lag (first seen -> now) for races whose runners were just written"""
+        now = now or time.time()
+        race_ids = {runner.get('race_id') for runner in runners} - {None}
+        if not race_ids:
+            return 0
+
+        with self._locked(write=True) as state:
+            # The first write after the first sighting counts; later rewrites are updates.
+            # Races never seen before their off (backfills) have no sighting.
+            lags = {}
+            for race_id in race_ids:
+                seen = state['first_seen'].get(race_id)
+                if seen is not None and not seen[1] and seen[0] <= now:
+                    lags[race_id] = now - seen[0]
+                    seen[1] = True
+            return self._add(state, 'racecard', lags, now) if lags else 0
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Per stream: samples, mean, quantiles, max, SLO target and share within it"""
+        now = now or time.time()
+        with self._locked(write=False) as state:
+            samples = {stream: [lag for stored_at, lag in state['samples'][stream].values()
+                                if stored_at >= now - self.window]
+                       for stream in STREAMS}
+
+        result = {}
+        for stream, lags in samples.items():
+            target = _slo_target(stream)
+            row = {'samples': len(lags), 'slo_target_s': target}
+            if lags:
+                ordered = sorted(lags)
+                row.update({
+                    'mean_s': round(sum(ordered) / len(ordered), 1),
+                    'sum_s': round(sum(ordered), 1),
+                    'max_s': ordered[-1],
+                    'within_slo': round(sum(1 for lag in ordered if lag <= target) / len(ordered), 4),
+                })
+                for q in QUANTILES:
+                    row[f'p{int(q * 100)}_s'] = _percentile(ordered, q)
+            result[stream] = row
+        return result
+
+    def reset(self):
+        with self._locked(write=True) as state:
+            state.update(self._empty())
+
+
+_tracker: Optional[FreshnessTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker() -> FreshnessTracker:
+    """
+    Process-wide tracker
+
+    The shared state file defaults to data/freshness.json;
+    RACING_FRESHNESS_STATE overrides it ('off' = this process only).
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            state_path = os.getenv('RACING_FRESHNESS_STATE', DEFAULT_STATE_PATH)
+            if state_path.lower() in ('', 'off', 'none'):
+                state_path = None
+            hours = os.getenv('RACING_FRESHNESS_WINDOW_HOURS')
+            _tracker = FreshnessTracker(state_path, window=float(hours) * 3600 if hours else WINDOW)
+        return _tracker
+
+
+def _safely(func):
+    """Freshness bookkeeping must never fail a fetch"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Freshness tracking failed in {func.__name__}: {e}")
+            return 0
+    return wrapper
+
+
+@_safely
+def racecards_seen(racecards: Iterable[Dict]):
+    """Note the racecards in an API response (first sighting per race)"""
+    get_tracker().racecards_seen(racecards)
+
+
+@_safely
+def record_racecards(runners: Iterable[Dict]) -> int:
+    """Runners just written by the races fetcher"""
+    return get_tracker().record_racecards(runners)
+
+
+@_safely
+def record_results(races: Iterable[Dict]) -> int:
+    """Race records just written with their results"""
+    return get_tracker().record_results(races)
+
+
+def metric_families() -> List[MetricFamily]:
+    """Rolling freshness percentiles and SLO attainment for the metrics endpoint"""
+    lag = MetricFamily(f'{PREFIX}_freshness_lag_seconds', 'summary',
+                       'Per-race data lag over the rolling window (result: off -> stored, '
+                       'racecard: first seen -> runners stored)')
+    target = MetricFamily(f'{PREFIX}_freshness_slo_target_seconds', 'gauge', 'Freshness SLO target')
+    within = MetricFamily(f'{PREFIX}_freshness_within_slo_ratio', 'gauge',
+                          'Share of races within the freshness SLO over the rolling window')
+    for stream, row in get_tracker().summary().items():
+        target.add(row['slo_target_s'], stream=stream)
+        if not row['samples']:
+            continue
+        for q in QUANTILES:
+            lag.add(row[f'p{int(q * 100)}_s'], stream=stream, quantile=str(q))
+        lag.add(row['sum_s'], '_sum', stream=stream)
+        lag.add(row['samples'], '_count', stream=stream)
+        within.add(row['within_slo'], stream=stream)
+    return [lag, target, within]
@@ -0,0 +1,368 @@
+"""
+Horse Form Snapshots - Incrementally maintained per-horse career and form
+
+Maintains ra_horse_form (migration 031): one row per horse with career totals,
+last-N runs, course / distance / going records and best/last ratings.
+
+Snapshots are updated incrementally from each batch of results as it lands
+(ResultsFetcher calls update_horse_form after storing runners), so producing
+racecard-ready form for tomorrow's runners is a primary-key lookup per runner
+rather than a scan of every past run.
+
+Only runners with a finishing position are applied, matching the other
+statistics calculators. Dates are race dates from ra_mst_races.date (not the
+row's created_at).
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from utils.performance_cube import iter_completed_runners, parse_distance_to_yards
+
+logger = logging.getLogger(__name__)
+
+FORM_TABLE = 'ra_horse_form'
+
+# Number of most recent runs kept per horse
+RECENT_RUNS = 10
+
+RUNNER_COLUMNS = ['race_id', 'horse_id', 'position', 'prize_won', 'ofr', 'rpr']
+RACE_COLUMNS = ['id', 'date', 'course_id', 'distance_f', 'going']
+
+
+def _empty_record() -> List[int]:
+    """[runs, wins, 2nds, 3rds]"""
+    return [0, 0, 0, 0]
+
+
+def _add_to_record(records: Dict[str, List[int]], key, position: int):
+    if key is None or key == '':
+        return
+    record = records.setdefault(str(key), _empty_record())
+    record[0] += 1
+    if position in (1, 2, 3):
+        record[position] += 1
+
+
+def _form_figure(position: Optional[int]) -> str:
+    """Racecard form figure: 1-9, or 0 for 10th and worse"""
+    if position is None:
+        return '-'
+    return str(position) if 0 < position < 10 else '0'
+
+
+class HorseForm:
+    """Career and form snapshot for one horse"""
+
+    def __init__(self, horse_id: str, row: Optional[Dict] = None):
+        """
+        Initialize snapshot
+
+        Args:
+            horse_id: Horse ID
+            row: Existing ra_horse_form row (None for a new horse)
+        """
+        row = row or {}
+        self.horse_id = horse_id
+        self.career_runs = row.get('career_runs') or 0
+        self.career_wins = row.get('career_wins') or 0
+        self.career_2nds = row.get('career_2nds') or 0
+        self.career_3rds = row.get('career_3rds') or 0
+        self.career_prize = float(row.get('career_prize') or 0)
+        self.recent_runs: List[Dict] = list(row.get('recent_runs') or [])
+        self.last_win_date: Optional[str] = row.get('last_win_date')
+        self.course_records: Dict[str, List[int]] = dict(row.get('course_records') or {})
+        self.distance_records: Dict[str, List[int]] = dict(row.get('distance_records') or {})
+        self.going_records: Dict[str, List[int]] = dict(row.get('going_records') or {})
+        self.best_ofr = row.get('best_ofr')
+        self.last_ofr = row.get('last_ofr')
+        self.best_rpr = row.get('best_rpr')
+        self.last_rpr = row.get('last_rpr')
+        self.applied_race_ids = set(row.get('applied_race_ids') or [])
+        self._last_rated_date = row.get('last_run_date') or ''
+
+    @property
+    def last_run_date(self) -> Optional[str]:
+        return self.recent_runs[0]['date'] if self.recent_runs else None
+
+    def apply_run(self, run: Dict) -> bool:
+        """
+        Apply one completed run
+
+        Args:
+            run: Dict with race_id, date, position, course_id, distance_f,
+                going, prize_won, ofr, rpr
+
+        Returns:
+            True if the snapshot changed (False if the race was already applied)
+        """
+        race_id = run.get('race_id')
+        position = run.get('position')
+        if not race_id or position is None or race_id in self.applied_race_ids:
+            return False
+
+        position = int(position)
+        run_date = run.get('date') or ''
+        self.applied_race_ids.add(race_id)
+
+        # Career totals
+        self.career_runs += 1
+        if position == 1:
+            self.career_wins += 1
+            if not self.last_win_date or run_date > self.last_win_date:
+                self.last_win_date = run_date or self.last_win_date
+        elif position == 2:
+            self.career_2nds += 1
+        elif position == 3:
+            self.career_3rds += 1
+        self.career_prize += float(run.get('prize_won') or 0)
+
+        # Course / distance / going records
+        yards = parse_distance_to_yards(run.get('distance_f'))
+        _add_to_record(self.course_records, run.get('course_id'), position)
+        _add_to_record(self.distance_records, yards or None, position)
+        _add_to_record(self.going_records, (run.get('going') or '').strip().lower() or None, position)
+
+        # Ratings (last = from the most recent run by race date)
+        ofr, rpr = run.get('ofr'), run.get('rpr')
+        if ofr is not None and (self.best_ofr is None or ofr > self.best_ofr):
+            self.best_ofr = ofr
+        if rpr is not None and (self.best_rpr is None or rpr > self.best_rpr):
+            self.best_rpr = rpr
+        if run_date >= self._last_rated_date:
+            self._last_rated_date = run_date
+            self.last_ofr = ofr if ofr is not None else self.last_ofr
+            self.last_rpr = rpr if rpr is not None else self.last_rpr
+
+        # Recent runs (most recent first, results may arrive out of order)
+        self.recent_runs.append({
+            'race_id': race_id,
+            'date': run_date,
+            'position': position,
+            'course_id': run.get('course_id'),
+            'distance_yards': yards or None,
+            'going': run.get('going'),
+        })
+        self.recent_runs.sort(key=lambda r: (r.get('date') or '', r['race_id']), reverse=True)
+        del self.recent_runs[RECENT_RUNS:]
+
+        return True
+
+    def to_record(self) -> Dict:
+        """Row for ra_horse_form"""
+        last_run = self.recent_runs[0] if self.recent_runs else {}
+        return {
+            'horse_id': self.horse_id,
+            'career_runs': self.career_runs,
+            'career_wins': self.career_wins,
+            'career_2nds': self.career_2nds,
+            'career_3rds': self.career_3rds,
+            'career_prize': round(self.career_prize, 2),
+            'recent_runs': self.recent_runs,
+            'last_positions': '-'.join(_form_figure(r.get('position')) for r in self.recent_runs),
+            'last_run_date': last_run.get('date') or None,
+            'last_win_date': self.last_win_date or None,
+            'last_race_id': last_run.get('race_id'),
+            'course_records': self.course_records,
+            'distance_records': self.distance_records,
+            'going_records': self.going_records,
+            'best_ofr': self.best_ofr,
+            'last_ofr': self.last_ofr,
+            'best_rpr': self.best_rpr,
+            'last_rpr': self.last_rpr,
+            'applied_race_ids': sorted(self.applied_race_ids),
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+
+def racecard_form(row: Dict, as_of: Optional[date] = None, course_id: Optional[str] = None,
+                  distance_f: Optional[str] = None, going: Optional[str] = None) -> Dict:
+    """
+    Racecard-ready form for one runner from its ra_horse_form row
+
+    Args:
+        row: ra_horse_form row
+        as_of: Race date (default: today) for days since last run
+        course_id, distance_f, going: Today's race conditions for C/D/going records
+
+    Returns:
+        Dict with career totals, last positions, days since last run and
+        course / distance / going records for today's race
+    """
+    as_of = as_of or datetime.utcnow().date()
+    last_run_date = row.get('last_run_date')
+    days_since = None
+    if last_run_date:
+        days_since = (as_of - datetime.strptime(str(last_run_date)[:10], '%Y-%m-%d').date()).days
+
+    yards = parse_distance_to_yards(distance_f)
+    going_key = (going or '').strip().lower()
+
+    return {
+        'horse_id': row.get('horse_id'),
+        'career': [row.get('career_runs', 0), row.get('career_wins', 0),
+                   row.get('career_2nds', 0), row.get('career_3rds', 0)],
+        'career_prize': row.get('career_prize'),
+        'last_positions': row.get('last_positions'),
+        'days_since_last_run': days_since,
+        'course_record': (row.get('course_records') or {}).get(course_id or '', _empty_record()),
+        'distance_record': (row.get('distance_records') or {}).get(str(yards), _empty_record()),
+        'going_record': (row.get('going_records') or {}).get(going_key, _empty_record()),
+        'best_ofr': row.get('best_ofr'),
+        'last_ofr': row.get('last_ofr'),
+        'best_rpr': row.get('best_rpr'),
+        'last_rpr': row.get('last_rpr'),
+    }
+
+
+class HorseFormStore:
+    """Loads, updates and queries ra_horse_form snapshots"""
+
+    def __init__(self, db_client, batch_size: int = 500):
+        """
+        Initialize store
+
+        Args:
+            db_client: SupabaseReferenceClient instance
+            batch_size: Horse IDs per lookup query
+        """
+        self.db_client = db_client
+        self.batch_size = batch_size
+
+    def load(self, horse_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Fetch existing snapshot rows for the given horses"""
+        horse_ids = list({h for h in horse_ids if h})
+        rows = {}
+        for i in range(0, len(horse_ids), self.batch_size):
+            response = self.db_client.client.table(FORM_TABLE)\
+                .select('*')\
+                .in_('horse_id', horse_ids[i:i + self.batch_size])\
+                .execute()
+            for row in response.data or []:
+                rows[row['horse_id']] = row
+        return rows
+
+    def apply_runs(self, runs: List[Dict]) -> Dict:
+        """
+        Apply a batch of completed runs and write only the snapshots that changed
+
+        Args:
+            runs: Dicts with horse_id plus the fields HorseForm.apply_run expects
+
+        Returns:
+            Statistics dictionary
+        """
+        runs = [r for r in runs if r.get('horse_id') and r.get('position') is not None]
+        if not runs:
+            return {'runs': 0, 'horses_updated': 0}
+
+        existing = self.load(r['horse_id'] for r in runs)
+        forms: Dict[str, HorseForm] = {}
+        changed = set()
+
+        for run in sorted(runs, key=lambda r: r.get('date') or ''):
+            horse_id = run['horse_id']
+            form = forms.get(horse_id)
+            if form is None:
+                form = forms[horse_id] = HorseForm(horse_id, existing.get(horse_id))
+            if form.apply_run(run):
+                changed.add(horse_id)
+
+        records = [forms[h].to_record() for h in changed]
+        db_stats = self.db_client.upsert_batch(FORM_TABLE, records, 'horse_id') if records else {}
+
+        logger.info(f"Horse form: {len(runs)} runs applied, {len(changed)} snapshots updated")
+        return {
+            'runs': len(runs),
+            'horses_updated': len(changed),
+            'horses_new': sum(1 for h in changed if h not in existing),
+            'db_stats': db_stats
+        }
+
+    def get_form(self, runners: List[Dict], as_of: Optional[date] = None) -> Dict[str, Dict]:
+        """
+        Racecard-ready form for a list of runners (one batched point lookup)
+
+        Args:
+            runners: Dicts with horse_id and optionally course_id, distance_f, going
+            as_of: Race date (default: today)
+
+        Returns:
+            Dict mapping horse_id -> racecard_form() output
+        """
+        rows = self.load(r.get('horse_id') for r in runners)
+        return {
+            r['horse_id']: racecard_form(rows[r['horse_id']], as_of, r.get('course_id'),
+                                         r.get('distance_f'), r.get('going'))
+            for r in runners if r.get('horse_id') in rows
+        }
+
+    def rebuild(self, page_size: int = 1000, source=None) -> Dict:
+        """
+        Rebuild every snapshot from ra_mst_runners + ra_mst_races (initial load)
+
+        Args:
+            page_size: Runners per page
+            source: Where to scan runners from (default: the database;
+                pass an AnalyticsMirror to read from local disk)
+
+        Returns:
+            Statistics dictionary
+        """
+        forms: Dict[str, HorseForm] = {}
+        runs = 0
+
+        for runner, race in iter_completed_runners(source or self.db_client, RUNNER_COLUMNS, RACE_COLUMNS, page_size):
+            horse_id = runner.get('horse_id')
+            if not horse_id:
+                continue
+            form = forms.get(horse_id)
+            if form is None:
+                form = forms[horse_id] = HorseForm(horse_id)
+            form.apply_run(_join_run(runner, race))
+            runs += 1
+
+        logger.info(f"Rebuilt form for {len(forms)} horses from {runs} runs")
+
+        records = [form.to_record() for form in forms.values()]
+        db_stats = self.db_client.upsert_batch(FORM_TABLE, records, 'horse_id') if records else {}
+
+        return {'runs': runs, 'horses_updated': len(forms), 'db_stats': db_stats}
+
+
+def _join_run(runner: Dict, race: Dict) -> Dict:
+    """Combine a runner row and its race row into a HorseForm run"""
+    return {
+        'horse_id': runner.get('horse_id'),
+        'race_id': runner.get('race_id'),
+        'position': runner.get('position'),
+        'prize_won': runner.get('prize_won'),
+        'ofr': runner.get('ofr'),
+        'rpr': runner.get('rpr'),
+        'date': race.get('date'),
+        'course_id': race.get('course_id'),
+        'distance_f': race.get('distance_f'),
+        'going': race.get('going'),
+    }
+
+
+def update_horse_form(db_client, runner_records: List[Dict], race_records: List[Dict]) -> Dict:
+    """
+    Incrementally update ra_horse_form from a batch of freshly stored results
+
+    Args:
+        db_client: SupabaseReferenceClient instance
+        runner_records: ra_mst_runners records just written
+        race_records: ra_mst_races records for the same races
+
+    Returns:
+        Statistics dictionary
+    """
+    races = {race.get('id'): race for race in race_records if race.get('id')}
+    runs = [
+        _join_run(runner, races[runner['race_id']])
+        for runner in runner_records
+        if runner.get('race_id') in races
+    ]
+    return HorseFormStore(db_client).apply_runs(runs)
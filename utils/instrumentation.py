@@ -0,0 +1,342 @@
+"""
+Instrumentation - Hot-path timers, histograms and counters
+
+Fetcher results carried only coarse api_stats/db_stats, so a slow run could
+not be split into API latency, rate-limit waits, transforms, entity
+extraction and PostgREST writes. This module records:
+
+- timers: timer('races.transform_racecard') context manager or @timed(...)
+  decorator; durations go into a histogram (count, total, min, max, buckets)
+- histograms for other values: observe('db.batch_rows', 100)
+- counters: count('api.retries')
+
+Metrics can carry labels (timer('db.upsert', table='ra_mst_runners')); they
+are keyed and reported as name{label=value}.
+
+Every measurement goes into the process registry (registry(), used by the
+metrics endpoint) and into every measure() scope open in the calling
+thread. A scope gives the per-run breakdown that fetchers attach to their
+result dicts (@instrumented_run). Worker threads started by StageDAG and
+run_chunks inherit the caller's scopes (bound_scopes()).
+
+Disabled (RACING_INSTRUMENTATION=off or enable(False)) every call returns
+after one flag check, and timer() hands out a shared no-op context manager.
+
+Usage:
+    with timer('races.validate_pedigree_ids'):
+        runners = self._validate_pedigree_ids(runners)
+
+    @instrumented_run('races')
+    def fetch_and_store(self, ...):
+        ...     # result['instrumentation'] = per-run breakdown
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; upper bounds of the histogram buckets for timers
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Counts (rows, items); upper bounds for observe(..., buckets=SIZE_BUCKETS)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_enabled = os.getenv('RACING_INSTRUMENTATION', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(flag: bool = True):
+    """Switch recording on or off for the whole process"""
+    global _enabled
+    _enabled = flag
+
+
+def metric_key(name: str, labels: Optional[Dict[str, str]] = None) -> Tuple:
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+def format_key(key: Tuple) -> str:
+    """('db.upsert', (('table', 'ra_mst_runners'),)) -> 'db.upsert{table=ra_mst_runners}'"""
+    name, labels = key
+    if not labels:
+        return name
+    return name + '{' + ','.join(f"{k}={v}" for k, v in labels) + '}'
+
+
+# ----------------------------------------------------------------------
+# Metric storage
+# ----------------------------------------------------------------------
+
+class Histogram:
+    """Count, sum, min, max and bucket counts of observed values"""
+
+    __slots__ = ('buckets', 'bucket_counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self, buckets: Sequence[float] = TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)    # Last one is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max for the +Inf bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.bucket_counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """[(upper_bound, observations <= bound)], ending with (inf, count)"""
+        result, seen = [], 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.bucket_counts):
+            seen += n
+            result.append((bound, seen))
+        return result
+
+
+class Metrics:
+    """Thread-safe set of counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple, float] = {}
+        self.histograms: Dict[Tuple, Histogram] = {}
+        self.started = time.time()
+
+    def add(self, key: Tuple, n: float):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, key: Tuple, value: float, buckets: Sequence[float] = TIME_BUCKETS):
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> Tuple[Dict[Tuple, float], Dict[Tuple, Histogram]]:
+        """Copies of the counters and histograms"""
+        with self._lock:
+            histograms = {}
+            for key, h in self.histograms.items():
+                copy = Histogram(h.buckets)
+                copy.bucket_counts = list(h.bucket_counts)
+                copy.count, copy.total, copy.min, copy.max = h.count, h.total, h.min, h.max
+                histograms[key] = copy
+            return dict(self.counters), histograms
+
+    def breakdown(self) -> Dict:
+        """
+        JSON-friendly summary:
+        {'timers': {name: {count, total_s, mean_ms, p95_ms, max_ms}},
+         'values': {name: {count, total, mean, max}}, 'counters': {name: n}}
+        """
+        counters, histograms = self.snapshot()
+        timers, values = {}, {}
+        for key, h in sorted(histograms.items(), key=lambda item: -item[1].total):
+            if h.buckets == TIME_BUCKETS:
+                timers[format_key(key)] = {
+                    'count': h.count,
+                    'total_s': round(h.total, 3),
+                    'mean_ms': round(h.total / h.count * 1000, 2),
+                    'p95_ms': round(h.quantile(0.95) * 1000, 2),
+                    'max_ms': round(h.max * 1000, 2),
+                }
+            else:
+                values[format_key(key)] = {
+                    'count': h.count,
+                    'total': h.total,
+                    'mean': round(h.total / h.count, 2),
+                    'max': h.max,
+                }
+        result = {'timers': timers, 'counters': {format_key(k): v for k, v in sorted(counters.items())}}
+        if values:
+            result['values'] = values
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+
+_registry = Metrics()
+_local = threading.local()
+
+
+def registry() -> Metrics:
+    """Process-wide totals (all threads, all runs)"""
+    return _registry
+
+
+def current_scopes() -> Tuple[Metrics, ...]:
+    """measure() scopes open in this thread"""
+    return getattr(_local, 'scopes', ())
+
+
+def _targets():
+    return (_registry,) + current_scopes()
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+def count(name: str, n: float = 1, **labels):
+    """Increment a counter"""
+    if not _enabled:
+        return
+    key = metric_key(name, labels)
+    for metrics in _targets():
+        metrics.add(key, n)
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = TIME_BUCKETS, **labels):
+    """Record a value in a histogram (seconds by default; pass SIZE_BUCKETS for counts)"""
+    if not _enabled:
+        return
+    key = metric_key(name, labels)
+    for metrics in _targets():
+        metrics.observe(key, value, buckets)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('key', 'started')
+
+    def __init__(self, key: Tuple):
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.started
+        for metrics in _targets():
+            metrics.observe(self.key, elapsed)
+            if exc_type is not None:
+                metrics.add((self.key[0] + '.errors', self.key[1]), 1)
+        return False
+
+
+def timer(name: str, **labels):
+    """Context manager timing the with-block (exceptions also count name.errors)"""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(metric_key(name, labels))
+
+
+def timed(name: Optional[str] = None, **labels) -> Callable:
+    """Decorator timing every call (default name: function's qualified name)"""
+    def decorate(func: Callable) -> Callable:
+        metric = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Timer(metric_key(metric, labels)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ----------------------------------------------------------------------
+# Scopes (per-run breakdowns)
+# ----------------------------------------------------------------------
+
+class measure:
+    """
+    Collect everything recorded by this thread (and threads bound to it) in
+    the with-block into a separate Metrics, on top of the process registry
+    """
+
+    def __init__(self):
+        self.metrics = Metrics()
+
+    def __enter__(self) -> Metrics:
+        _local.scopes = current_scopes() + (self.metrics,)
+        return self.metrics
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        scopes = current_scopes()
+        _local.scopes = tuple(s for s in scopes if s is not self.metrics)
+        return False
+
+
+class bound_scopes:
+    """Run the with-block's measurements into scopes captured in another thread"""
+
+    def __init__(self, scopes: Tuple[Metrics, ...]):
+        self.scopes = scopes
+        self.previous = ()
+
+    def __enter__(self):
+        self.previous = current_scopes()
+        _local.scopes = self.scopes
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.scopes = self.previous
+        return False
+
+
+def instrumented_run(stage: str) -> Callable:
+    """
+    Decorator for fetch_and_store(): times the whole call as '<stage>.run'
+    and adds result['instrumentation'] with the run's breakdown
+    """
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with measure() as run:
+                with _Timer(metric_key(f'{stage}.run')):
+                    result = func(*args, **kwargs)
+            if isinstance(result, dict):
+                result['instrumentation'] = run.breakdown()
+            return result
+        return wrapper
+    return decorate
+
+
+def log_breakdown(breakdown: Dict, log, top: int = 12):
+    """Log the slowest timers of a breakdown"""
+    for name, row in list(breakdown.get('timers', {}).items())[:top]:
+        log.info(f"  {name:<45} {row['total_s']:>9.2f}s  {row['count']:>7}x  "
+                 f"mean {row['mean_ms']:.1f}ms  p95 {row['p95_ms']:.1f}ms  max {row['max_ms']:.1f}ms")
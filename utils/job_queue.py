@@ -0,0 +1,594 @@
+"""
+Job Queue - Durable, lease-based work queue shared by schedulers and workers
+
+Lock files in /tmp only protect a single host, leave stale locks behind when
+a process dies, and give no way to share a backfill between machines. Jobs
+are instead rows in a queue table:
+
+- enqueue() is idempotent: each job carries an idempotency key (e.g.
+  'fetch:races:2015-01-01:2015-01-31'), so re-enqueueing a backfill or a
+  schedule slot never creates duplicate work
+- claim() hands one runnable job to one worker and gives it a lease. On
+  Postgres the candidate row is picked with SELECT ... FOR UPDATE SKIP LOCKED,
+  so any number of workers on any number of hosts can poll the same table
+- a running job renews its lease with heartbeat(); if the worker dies the
+  lease expires and the job is claimable again
+- fail() re-queues the job with exponential backoff until max_attempts,
+  then marks it failed
+- jobs sharing a concurrency key (e.g. one scheduled update) never run at
+  the same time. A running job holds its key until it finishes or is
+  reclaimed, even once its lease has expired. On Postgres a partial unique
+  index enforces this; the claim's NOT EXISTS check alone would let two
+  READ COMMITTED transactions through at once
+
+Backends:
+    PostgresJobQueue - ra_job_queue (migration 032) over psycopg2 via
+                       DATABASE_URL, for workers on several hosts
+    SQLiteJobQueue   - single-file queue for workers on one host
+
+Usage:
+    queue = get_job_queue()
+    queue.enqueue('fetch', {'entity': 'races', 'start_date': '2015-01-01', 'end_date': '2015-01-31'},
+                  idempotency_key=idempotency_key('fetch', 'races', '2015-01-01', '2015-01-31'))
+
+    JobWorker(queue, {'fetch': run_fetch_job}).run()
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from utils.job_runner import JobContext, bound_job
+logger = logging.getLogger(__name__)
+
+TABLE = 'ra_job_queue'
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_HEARTBEAT_SECONDS = 30
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 30        # Seconds before the first retry
+DEFAULT_MAX_RETRY_DELAY = 3600
+DEFAULT_BACKOFF_FACTOR = 2
+CLAIM_RETRIES = 3               # Postgres claims that lost a concurrency-key race
+
+STATUSES = ('pending', 'running', 'done', 'failed', 'cancelled')
+
+
+def idempotency_key(job_type: str, *parts) -> str:
+    """'fetch', 'races', '2015-01-01', '2015-01-31' -> 'fetch:races:2015-01-01:2015-01-31'"""
+    return ':'.join([job_type] + [str(p) for p in parts if p is not None])
+
+
+def default_worker_id() -> str:
+    """host:pid:suffix - unique per worker process"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class Job:
+    """A claimed job"""
+    id: int
+    job_type: str
+    payload: Dict = field(default_factory=dict)
+    attempts: int = 0
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    idempotency_key: Optional[str] = None
+    concurrency_key: Optional[str] = None
+    lease_owner: Optional[str] = None
+
+    @property
+    def last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class JobQueue(ABC):
+    """Backend-independent queue interface and retry policy"""
+
+    def __init__(self, retry_delay: float = DEFAULT_RETRY_DELAY,
+                 max_retry_delay: float = DEFAULT_MAX_RETRY_DELAY,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.backoff_factor = backoff_factor
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds before retry number `attempts` (1-based) may run"""
+        return min(self.retry_delay * (self.backoff_factor ** max(attempts - 1, 0)), self.max_retry_delay)
+
+    @abstractmethod
+    def enqueue(self, job_type: str, payload: Optional[Dict] = None, idempotency_key: Optional[str] = None,
+                concurrency_key: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                delay: float = 0, replace_pending: bool = False) -> Optional[int]:
+        """
+        Add a job
+
+        Args:
+            job_type: Handler name
+            payload: JSON-serialisable job arguments
+            idempotency_key: Jobs with an existing key are not added again
+            concurrency_key: Jobs with the same key never run concurrently
+            max_attempts: Attempts before the job is marked failed
+            delay: Seconds before the job becomes claimable
+            replace_pending: Cancel other pending jobs with the same concurrency key
+                (a newer schedule slot supersedes older ones still waiting)
+
+        Returns:
+            New job ID, or None if the idempotency key already exists
+        """
+
+    @abstractmethod
+    def claim(self, worker_id: str, job_types: Optional[Sequence[str]] = None,
+              lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        """Lease the next runnable job (None = nothing to do)"""
+
+    @abstractmethod
+    def heartbeat(self, job: Job, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a job's lease (False = lease lost to another worker)"""
+
+    @abstractmethod
+    def complete(self, job: Job, result: Optional[Dict] = None) -> bool:
+        """Mark a job done (False = lease lost)"""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str, retry: bool = True) -> str:
+        """Re-queue a job with backoff, or mark it failed; returns the new status"""
+
+    @abstractmethod
+    def counts(self, job_types: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """Number of jobs per status"""
+
+    def close(self):
+        pass
+
+
+# ----------------------------------------------------------------------
+# Postgres
+# ----------------------------------------------------------------------
+
+class PostgresJobQueue(JobQueue):
+    """ra_job_queue over a direct psycopg2 connection"""
+
+    def __init__(self, dsn: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        import psycopg2
+        import psycopg2.errors
+        import psycopg2.extras
+
+        self.dsn = dsn or os.getenv('DATABASE_URL') or os.getenv('DIRECT_CONNECTION')
+        if not self.dsn:
+            raise ValueError("DATABASE_URL (or DIRECT_CONNECTION) is required for the Postgres job queue")
+        self._psycopg2 = psycopg2
+        self._json = psycopg2.extras.Json
+        self._lock = threading.Lock()   # Heartbeat threads share the connection
+        self.conn = psycopg2.connect(self.dsn)
+
+    def _execute(self, sql: str, params: Sequence = (), fetch: bool = False):
+        with self._lock:
+            if self.conn.closed:
+                self.conn = self._psycopg2.connect(self.dsn)
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    rows = cur.fetchall() if fetch else None
+                    rowcount = cur.rowcount
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return rows if fetch else rowcount
+
+    def enqueue(self, job_type, payload=None, idempotency_key=None, concurrency_key=None,
+                max_attempts=DEFAULT_MAX_ATTEMPTS, delay=0, replace_pending=False):
+        if replace_pending and concurrency_key:
+            self._execute(
+                f"UPDATE {TABLE} SET status = 'cancelled', finished_at = NOW() "
+                f"WHERE concurrency_key = %s AND status = 'pending' "
+                f"AND (idempotency_key IS DISTINCT FROM %s)",
+                (concurrency_key, idempotency_key))
+        rows = self._execute(
+            f"INSERT INTO {TABLE} (job_type, payload, idempotency_key, concurrency_key, max_attempts, run_after) "
+            f"VALUES (%s, %s, %s, %s, %s, NOW() + %s * INTERVAL '1 second') "
+            f"ON CONFLICT (idempotency_key) DO NOTHING RETURNING id",
+            (job_type, self._json(payload or {}), idempotency_key, concurrency_key, max_attempts, delay),
+            fetch=True)
+        return rows[0][0] if rows else None
+
+    def claim(self, worker_id, job_types=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        # Jobs whose lease expired on their last attempt can't be retried
+        self._execute(
+            f"UPDATE {TABLE} SET status = 'failed', finished_at = NOW(), "
+            f"last_error = COALESCE(last_error, 'lease expired'), lease_owner = NULL "
+            f"WHERE status = 'running' AND lease_expires_at < NOW() AND attempts >= max_attempts")
+
+        type_filter = "AND q.job_type = ANY(%s)" if job_types else ""
+        params = [worker_id, lease_seconds] + ([list(job_types)] if job_types else [])
+        sql = f"""
+            UPDATE {TABLE} SET
+                status = 'running',
+                lease_owner = %s,
+                lease_expires_at = NOW() + %s * INTERVAL '1 second',
+                heartbeat_at = NOW(),
+                attempts = attempts + 1,
+                started_at = NOW()
+            WHERE id = (
+                SELECT q.id FROM {TABLE} q
+                WHERE ((q.status = 'pending' AND q.run_after <= NOW())
+                       OR (q.status = 'running' AND q.lease_expires_at < NOW()))
+                  {type_filter}
+                  AND (q.concurrency_key IS NULL OR NOT EXISTS (
+                      SELECT 1 FROM {TABLE} r
+                      WHERE r.concurrency_key = q.concurrency_key AND r.id <> q.id
+                        AND r.status = 'running'))
+                ORDER BY q.run_after, q.id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, job_type, payload, attempts, max_attempts, idempotency_key, concurrency_key, lease_owner
+        """
+        rows = None
+        for _ in range(CLAIM_RETRIES):
+            try:
+                rows = self._execute(sql, params, fetch=True)
+                break
+            except self._psycopg2.errors.UniqueViolation:
+                # Another worker claimed a job with the same concurrency key
+                # after our snapshot; the next statement sees its row
+                rows = None
+        if not rows:
+            return None
+        row = rows[0]
+        return Job(id=row[0], job_type=row[1], payload=row[2] or {}, attempts=row[3], max_attempts=row[4],
+                   idempotency_key=row[5], concurrency_key=row[6], lease_owner=row[7])
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._execute(
+            f"UPDATE {TABLE} SET lease_expires_at = NOW() + %s * INTERVAL '1 second', heartbeat_at = NOW() "
+            f"WHERE id = %s AND lease_owner = %s AND status = 'running'",
+            (lease_seconds, job.id, job.lease_owner)) == 1
+
+    def complete(self, job, result=None):
+        return self._execute(
+            f"UPDATE {TABLE} SET status = 'done', result = %s, finished_at = NOW(), "
+            f"lease_owner = NULL, lease_expires_at = NULL, last_error = NULL "
+            f"WHERE id = %s AND lease_owner = %s",
+            (self._json(result or {}), job.id, job.lease_owner)) == 1
+
+    def fail(self, job, error, retry=True):
+        status = 'pending' if retry and not job.last_attempt else 'failed'
+        self._execute(
+            f"UPDATE {TABLE} SET status = %s, last_error = %s, "
+            f"run_after = NOW() + %s * INTERVAL '1 second', "
+            f"finished_at = CASE WHEN %s = 'failed' THEN NOW() ELSE NULL END, "
+            f"lease_owner = NULL, lease_expires_at = NULL "
+            f"WHERE id = %s AND lease_owner = %s",
+            (status, (error or '')[:2000], self.backoff(job.attempts), status, job.id, job.lease_owner))
+        return status
+
+    def counts(self, job_types=None):
+        type_filter = "WHERE job_type = ANY(%s)" if job_types else ""
+        rows = self._execute(f"SELECT status, COUNT(*) FROM {TABLE} {type_filter} GROUP BY status",
+                             [list(job_types)] if job_types else [], fetch=True)
+        return {status: count for status, count in rows}
+
+    def close(self):
+        if not self.conn.closed:
+            self.conn.close()
+
+
+# ----------------------------------------------------------------------
+# SQLite
+# ----------------------------------------------------------------------
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_type TEXT NOT NULL,
+    payload TEXT DEFAULT '{{}}',
+    idempotency_key TEXT UNIQUE,
+    concurrency_key TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    max_attempts INTEGER DEFAULT {DEFAULT_MAX_ATTEMPTS},
+    run_after REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_job_queue_claimable ON {TABLE}(status, run_after, id);
+"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Single-file queue for workers on one host
+
+    SQLite has no row locks; claims run inside BEGIN IMMEDIATE, which
+    serialises writers across processes sharing the file.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def _transaction(self, func: Callable):
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self.conn)
+                self.conn.execute('COMMIT')
+                return result
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def enqueue(self, job_type, payload=None, idempotency_key=None, concurrency_key=None,
+                max_attempts=DEFAULT_MAX_ATTEMPTS, delay=0, replace_pending=False):
+        now = time.time()
+
+        def run(conn):
+            if replace_pending and concurrency_key:
+                conn.execute(
+                    f"UPDATE {TABLE} SET status = 'cancelled', finished_at = ? "
+                    f"WHERE concurrency_key = ? AND status = 'pending' AND idempotency_key IS NOT ?",
+                    (now, concurrency_key, idempotency_key))
+            cur = conn.execute(
+                f"INSERT OR IGNORE INTO {TABLE} (job_type, payload, idempotency_key, concurrency_key, "
+                f"max_attempts, run_after, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_type, json.dumps(payload or {}), idempotency_key, concurrency_key,
+                 max_attempts, now + delay, now))
+            return cur.lastrowid if cur.rowcount == 1 else None
+
+        return self._transaction(run)
+
+    def claim(self, worker_id, job_types=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+
+        def run(conn):
+            conn.execute(
+                f"UPDATE {TABLE} SET status = 'failed', finished_at = ?, "
+                f"last_error = COALESCE(last_error, 'lease expired'), lease_owner = NULL "
+                f"WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts",
+                (now, now))
+
+            type_filter = f"AND q.job_type IN ({','.join('?' * len(job_types))})" if job_types else ""
+            row = conn.execute(f"""
+                SELECT q.id FROM {TABLE} q
+                WHERE ((q.status = 'pending' AND q.run_after <= ?)
+                       OR (q.status = 'running' AND q.lease_expires_at < ?))
+                  {type_filter}
+                  AND (q.concurrency_key IS NULL OR NOT EXISTS (
+                      SELECT 1 FROM {TABLE} r
+                      WHERE r.concurrency_key = q.concurrency_key AND r.id <> q.id
+                        AND r.status = 'running'))
+                ORDER BY q.run_after, q.id
+                LIMIT 1
+            """, [now, now] + list(job_types or [])).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                f"UPDATE {TABLE} SET status = 'running', lease_owner = ?, lease_expires_at = ?, "
+                f"heartbeat_at = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, now, row[0]))
+            job = conn.execute(
+                f"SELECT id, job_type, payload, attempts, max_attempts, idempotency_key, concurrency_key, "
+                f"lease_owner FROM {TABLE} WHERE id = ?", (row[0],)).fetchone()
+            return Job(id=job[0], job_type=job[1], payload=json.loads(job[2] or '{}'), attempts=job[3],
+                       max_attempts=job[4], idempotency_key=job[5], concurrency_key=job[6], lease_owner=job[7])
+
+        return self._transaction(run)
+
+    def heartbeat(self, job, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        return self._transaction(lambda conn: conn.execute(
+            f"UPDATE {TABLE} SET lease_expires_at = ?, heartbeat_at = ? "
+            f"WHERE id = ? AND lease_owner = ? AND status = 'running'",
+            (now + lease_seconds, now, job.id, job.lease_owner)).rowcount == 1)
+
+    def complete(self, job, result=None):
+        return self._transaction(lambda conn: conn.execute(
+            f"UPDATE {TABLE} SET status = 'done', result = ?, finished_at = ?, lease_owner = NULL, "
+            f"lease_expires_at = NULL, last_error = NULL WHERE id = ? AND lease_owner = ?",
+            (json.dumps(result or {}, default=str), time.time(), job.id, job.lease_owner)).rowcount == 1)
+
+    def fail(self, job, error, retry=True):
+        now = time.time()
+        status = 'pending' if retry and not job.last_attempt else 'failed'
+        self._transaction(lambda conn: conn.execute(
+            f"UPDATE {TABLE} SET status = ?, last_error = ?, run_after = ?, finished_at = ?, "
+            f"lease_owner = NULL, lease_expires_at = NULL WHERE id = ? AND lease_owner = ?",
+            (status, (error or '')[:2000], now + self.backoff(job.attempts),
+             now if status == 'failed' else None, job.id, job.lease_owner)))
+        return status
+
+    def counts(self, job_types=None):
+        type_filter = f"WHERE job_type IN ({','.join('?' * len(job_types))})" if job_types else ""
+        with self._lock:
+            rows = self.conn.execute(f"SELECT status, COUNT(*) FROM {TABLE} {type_filter} GROUP BY status",
+                                     list(job_types or [])).fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+def get_job_queue(settings: Optional[Dict] = None, root_dir: Optional[str] = None) -> JobQueue:
+    """
+    Build the configured queue backend
+
+    Args:
+        settings: The scheduler config's `queue` section (backend, sqlite_path,
+            retry_delay, max_retry_delay, backoff_factor). backend 'auto' uses
+            Postgres when DATABASE_URL is set, SQLite otherwise.
+        root_dir: Base for a relative sqlite_path
+    """
+    settings = settings or {}
+    backend = settings.get('backend', 'auto')
+    retry = {
+        'retry_delay': settings.get('retry_delay', DEFAULT_RETRY_DELAY),
+        'max_retry_delay': settings.get('max_retry_delay', DEFAULT_MAX_RETRY_DELAY),
+        'backoff_factor': settings.get('backoff_factor', DEFAULT_BACKOFF_FACTOR),
+    }
+
+    if backend == 'postgres' or (backend == 'auto' and (os.getenv('DATABASE_URL') or os.getenv('DIRECT_CONNECTION'))):
+        return PostgresJobQueue(settings.get('dsn'), **retry)
+
+    path = settings.get('sqlite_path', 'data/job_queue.sqlite3')
+    if root_dir and not os.path.isabs(path):
+        path = os.path.join(root_dir, path)
+    return SQLiteJobQueue(path, **retry)
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+
+class JobWorker:
+    """
+    Claims jobs, runs their handler and reports the outcome
+
+    Handlers take the job payload and return a result dict; a falsy
+    'success' or an exception fails the job (retried with backoff). While a
+    handler runs, a heartbeat thread keeps the lease alive.
+
+    If a heartbeat finds the lease gone (the worker stalled past
+    lease_seconds and another worker reclaimed the job), the handler's
+    JobContext is cancelled: its next checkpoint() raises JobTimeout, and
+    jobs it runs through JobRunner stop too. The outcome is then left to the
+    worker that now holds the lease - no complete(), fail() or retry. Until
+    the handler reaches a checkpoint both workers run the job, so handlers
+    must be idempotent.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict], Dict]],
+                 worker_id: Optional[str] = None, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 heartbeat_seconds: int = DEFAULT_HEARTBEAT_SECONDS):
+        if heartbeat_seconds >= lease_seconds:
+            raise ValueError("heartbeat_seconds must be shorter than lease_seconds")
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stats = {'claimed': 0, 'done': 0, 'retried': 0, 'failed': 0, 'lease_lost': 0}
+
+    def run(self, max_jobs: Optional[int] = None, poll_interval: float = 0,
+            job_types: Optional[Sequence[str]] = None, stop: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        Process jobs
+
+        Args:
+            max_jobs: Stop after this many jobs (None = no limit)
+            poll_interval: Seconds to wait when the queue is empty (0 = return instead)
+            job_types: Claim only these types (default: every type with a handler)
+            stop: Event that ends the loop between jobs
+
+        Returns:
+            Per-job outcome dicts
+        """
+        job_types = list(job_types or self.handlers)
+        outcomes = []
+        while max_jobs is None or len(outcomes) < max_jobs:
+            if stop is not None and stop.is_set():
+                break
+            job = self.queue.claim(self.worker_id, job_types, self.lease_seconds)
+            if job is None:
+                if not poll_interval:
+                    break
+                time.sleep(poll_interval)
+                continue
+            outcomes.append(self.process(job))
+        return outcomes
+
+    def process(self, job: Job) -> Dict:
+        """Run one claimed job to completion"""
+        self.stats['claimed'] += 1
+        logger.info(f"[{self.worker_id}] Job {job.id} {job.job_type} "
+                    f"(attempt {job.attempts}/{job.max_attempts}): {job.idempotency_key or job.payload}")
+
+        context = JobContext(f'job-{job.id}')     # Cancelled when the lease is lost
+        finished = threading.Event()
+
+        def beat():
+            while not finished.wait(self.heartbeat_seconds):
+                try:
+                    if not self.queue.heartbeat(job, self.lease_seconds):
+                        logger.error(f"Lost lease on job {job.id} - another worker may have reclaimed it; "
+                                     f"stopping at the next checkpoint")
+                        context.cancelled.set()
+                        return
+                except Exception as e:
+                    logger.warning(f"Heartbeat for job {job.id} failed: {e}")
+
+        heartbeat = threading.Thread(target=beat, name=f'heartbeat-{job.id}', daemon=True)
+        heartbeat.start()
+        started = time.monotonic()
+        try:
+            handler = self.handlers.get(job.job_type)
+            if handler is None:
+                raise ValueError(f"No handler for job type {job.job_type}")
+            with bound_job(context):
+                result = handler(job.payload) or {}
+            error = None if result.get('success', True) else (result.get('error') or 'job reported failure')
+        except Exception as e:
+            if not context.cancelled.is_set():
+                logger.error(f"Job {job.id} raised: {e}", exc_info=True)
+            result, error = {}, str(e)
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        outcome = {
+            'id': job.id,
+            'job_type': job.job_type,
+            'key': job.idempotency_key,
+            'attempt': job.attempts,
+            'duration': round(time.monotonic() - started, 3),
+            'result': result,
+            'error': error,
+        }
+
+        if context.cancelled.is_set():
+            # The job belongs to whichever worker reclaimed it
+            outcome['status'] = 'lease_lost'
+            outcome['error'] = error or 'lease lost'
+            self.stats['lease_lost'] += 1
+            logger.warning(f"Job {job.id} abandoned after losing its lease; outcome left to its new owner")
+        elif error is None:
+            if not self.queue.complete(job, _jsonable(result)):
+                logger.warning(f"Job {job.id} finished after its lease was lost")
+            outcome['status'] = 'done'
+            self.stats['done'] += 1
+        else:
+            outcome['status'] = self.queue.fail(job, error)
+            self.stats['retried' if outcome['status'] == 'pending' else 'failed'] += 1
+            if outcome['status'] == 'pending':
+                logger.warning(f"Job {job.id} failed ({error}), retry in {self.queue.backoff(job.attempts):.0f}s")
+            else:
+                logger.error(f"Job {job.id} failed permanently after {job.attempts} attempt(s): {error}")
+        return outcome
+
+
+def _jsonable(result: Dict) -> Dict:
+    """Drop values that can't be stored as JSON (datetimes become strings)"""
+    return json.loads(json.dumps(result, default=lambda v: v.isoformat() if isinstance(v, datetime) else None))
@@ -0,0 +1,290 @@
+"""
+Job Runner - Run worker scripts in-process instead of spawning subprocesses
+
+Launching `python3 <script>` per scheduled job pays interpreter startup,
+re-imports supabase/postgrest/requests, re-reads the environment and opens
+fresh API and database connections every time. The JobRunner instead calls
+the script's entry function directly:
+
+- Scripts are looked up in a registry (script file name -> 'module:function').
+  Entry functions take an argv list, exactly like `main(argv)` with argparse;
+  SystemExit is translated into an exit code.
+- Modules stay imported between jobs, and objects registered through
+  shared() (warm fetchers with their API sessions and database clients)
+  are reused by later jobs in the same process.
+- Timeouts are cooperative: the job runs in a worker thread with a
+  JobContext; long loops call checkpoint(), which raises JobTimeout once the
+  deadline has passed. A job that ignores its deadline is reported as timed
+  out and the same job is refused until it finishes. A job started from
+  inside another job (e.g. by a queue worker whose lease was lost) also
+  stops when the outer job is cancelled.
+
+Scripts without a registered entry function still run as a subprocess.
+
+Usage:
+    runner = JobRunner()
+    result = runner.run('scripts/update_live_data.py', ['--races-only'], timeout=300)
+"""
+
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.run_ledger import track_run
+
+logger = logging.getLogger(__name__)
+
+# Script file name -> in-process entry function ('module:function', called with argv)
+DEFAULT_JOBS = {
+    'main.py': 'main:main',
+    'update_live_data.py': 'workers.orchestrators.update_live_data:main',
+    'update_daily_data.py': 'workers.orchestrators.update_daily_data:main',
+    'update_reference_data.py': 'workers.orchestrators.update_reference_data:main',
+    'calculate_jockey_statistics.py': 'workers.statistics.calculate_jockey_statistics:main',
+    'calculate_trainer_statistics.py': 'workers.statistics.calculate_trainer_statistics:main',
+    'calculate_owner_statistics.py': 'workers.statistics.calculate_owner_statistics:main',
+    'calculate_sire_statistics.py': 'workers.statistics.calculate_sire_statistics:main',
+    'calculate_dam_statistics.py': 'workers.statistics.calculate_dam_statistics:main',
+    'calculate_damsire_statistics.py': 'workers.statistics.calculate_damsire_statistics:main',
+}
+
+# Extra time a job gets to reach a checkpoint after its deadline
+TIMEOUT_GRACE_SECONDS = 30
+
+
+class JobTimeout(Exception):
+    """Raised by checkpoint() when the running job has passed its deadline"""
+
+
+class JobContext:
+    """Deadline and cancellation state of the job running on this thread"""
+
+    def __init__(self, name: str, timeout: Optional[float] = None, parent: Optional['JobContext'] = None):
+        self.name = name
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout else None
+        self.cancelled = threading.Event()
+        self.parent = parent
+
+    @property
+    def expired(self) -> bool:
+        return (self.cancelled.is_set() or (self.deadline is not None and time.monotonic() > self.deadline)
+                or (self.parent is not None and self.parent.expired))
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None = no deadline)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise JobTimeout if the job should stop"""
+        if self.expired:
+            raise JobTimeout(f"Job {self.name} exceeded its deadline")
+
+
+_local = threading.local()
+
+
+def current_job() -> Optional[JobContext]:
+    """JobContext of the job running on this thread (None outside the job runner)"""
+    return getattr(_local, 'job', None)
+
+
+class bound_job:
+    """Context manager that runs the with-block under a job's context (for helper threads)"""
+
+    def __init__(self, context: Optional[JobContext]):
+        self.context = context
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = current_job()
+        _local.job = self.context
+        return self.context
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.job = self.previous
+
+
+def checkpoint():
+    """Cooperative timeout point - no-op unless running under JobRunner"""
+    job = current_job()
+    if job is not None:
+        job.check()
+
+
+# ----------------------------------------------------------------------
+# Shared (warm) resources
+# ----------------------------------------------------------------------
+
+_shared: Dict = {}
+_shared_lock = threading.Lock()
+
+
+def shared(key, factory: Callable):
+    """
+    Process-wide object cache for warm resources reused across jobs
+
+    Returns the cached object for key, creating it with factory() on first use.
+    """
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = factory()
+        return _shared[key]
+
+
+def shared_keys() -> list:
+    """Keys of the cached resources"""
+    with _shared_lock:
+        return list(_shared)
+
+
+def clear_shared():
+    """Drop all cached resources (next use re-creates them)"""
+    with _shared_lock:
+        _shared.clear()
+
+
+def in_job_runner() -> bool:
+    """True when called from a job started by JobRunner"""
+    return current_job() is not None
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+class JobRunner:
+    """Runs registered worker scripts in-process with cooperative timeouts"""
+
+    def __init__(self, root_dir: Optional[str] = None, jobs: Optional[Dict[str, str]] = None):
+        """
+        Initialize runner
+
+        Args:
+            root_dir: Project root (scripts without an entry function run from here)
+            jobs: Script file name -> 'module:function' overrides (merged over DEFAULT_JOBS)
+        """
+        self.root_dir = root_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.jobs = dict(DEFAULT_JOBS)
+        self.jobs.update(jobs or {})
+        self._running: Dict[str, threading.Thread] = {}
+
+        if self.root_dir not in sys.path:
+            sys.path.insert(0, self.root_dir)
+
+    def register(self, script: str, entry: str):
+        """Register an in-process entry function ('module:function') for a script"""
+        self.jobs[os.path.basename(script)] = entry
+
+    def resolve(self, script: str) -> Optional[Callable]:
+        """Entry function for a script, or None if it must run as a subprocess"""
+        entry = self.jobs.get(os.path.basename(script))
+        if not entry:
+            return None
+        module_name, func_name = entry.split(':')
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as e:
+            logger.warning(f"Cannot import {module_name} for {script}, falling back to subprocess: {e}")
+            return None
+        return getattr(module, func_name, None)
+
+    def run(self, script: str, args: Optional[List[str]] = None, timeout: Optional[float] = None) -> Dict:
+        """
+        Run a script's job
+
+        Args:
+            script: Script path (relative to root_dir) as in the schedule/population config
+            args: Command-line arguments
+            timeout: Seconds before the job is asked to stop
+
+        Returns:
+            {'success', 'exit_code', 'error', 'duration', 'in_process'}
+        """
+        args = list(args or [])
+        func = self.resolve(script)
+        start = time.monotonic()
+
+        if func is None:
+            result = self._run_subprocess(script, args, timeout)
+        else:
+            result = self._run_in_process(script, func, args, timeout)
+
+        result['duration'] = round(time.monotonic() - start, 3)
+        return result
+
+    def _run_in_process(self, script: str, func: Callable, args: List[str], timeout: Optional[float]) -> Dict:
+        name = os.path.basename(script)
+        previous = self._running.get(name)
+        if previous is not None and previous.is_alive():
+            return {'success': False, 'exit_code': None, 'in_process': True,
+                    'error': f'Previous {name} job is still running past its deadline'}
+
+        context = JobContext(name, timeout, parent=current_job())
+        outcome = {'exit_code': None, 'error': None}
+
+        def target():
+            try:
+                with bound_job(context), track_run(os.path.splitext(name)[0], args=args):
+                    func(args)
+                outcome['exit_code'] = 0
+            except SystemExit as e:
+                code = e.code
+                outcome['exit_code'] = code if isinstance(code, int) else (0 if code is None else 1)
+            except JobTimeout as e:
+                outcome['error'] = str(e)
+            except Exception as e:
+                logger.error(f"Job {name} raised: {e}", exc_info=True)
+                outcome['exit_code'] = 1
+                outcome['error'] = str(e)
+
+        thread = threading.Thread(target=target, name=f'job-{name}', daemon=True)
+        self._running[name] = thread
+        thread.start()
+        thread.join(timeout if timeout else None)
+
+        if thread.is_alive():
+            # Ask the job to stop at its next checkpoint
+            context.cancelled.set()
+            thread.join(TIMEOUT_GRACE_SECONDS)
+            if thread.is_alive():
+                logger.error(f"Job {name} did not stop within {TIMEOUT_GRACE_SECONDS}s of its deadline")
+
+        if context.expired and outcome['exit_code'] != 0:
+            return {'success': False, 'exit_code': outcome['exit_code'], 'in_process': True,
+                    'error': f'Timeout after {timeout}s'}
+
+        return {
+            'success': outcome['exit_code'] == 0,
+            'exit_code': outcome['exit_code'],
+            'error': outcome['error'],
+            'in_process': True
+        }
+
+    def _run_subprocess(self, script: str, args: List[str], timeout: Optional[float]) -> Dict:
+        cmd = [sys.executable, os.path.join(self.root_dir, script)] + args
+        logger.info(f"No in-process entry for {script}, running: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, cwd=self.root_dir, timeout=timeout, capture_output=True, text=True)
+        except subprocess.TimeoutExpired:
+            return {'success': False, 'exit_code': None, 'in_process': False,
+                    'error': f'Timeout after {timeout}s'}
+
+        if result.stdout:
+            logger.info(f"STDOUT:\n{result.stdout}")
+        if result.stderr:
+            logger.warning(f"STDERR:\n{result.stderr}")
+
+        return {
+            'success': result.returncode == 0,
+            'exit_code': result.returncode,
+            'error': None if result.returncode == 0 else (result.stderr[-500:] or f'Exit code {result.returncode}'),
+            'in_process': False
+        }
@@ -0,0 +1,310 @@
+"""
+Live Schedule - Race-time-aware polling plan for live data updates
+
+The fixed live_data cron polls the whole day's racecards and results every
+15 minutes, whether a race is about to run or the next meeting is hours
+away. LiveSchedule plans polls from the day's scheduled off times (off_dt
+in ra_mst_races) instead:
+
+- results: first poll RESULT_FIRST_DELAY after a race's off, then retries
+  starting at RESULT_RETRY_INTERVAL and backing off (x RESULT_BACKOFF_FACTOR,
+  capped at RESULT_MAX_INTERVAL) until the race has a result, is abandoned,
+  or RESULT_GIVE_UP after the off (the daily update reconciles the rest)
+- racecards: every RACECARD_NEAR_INTERVAL while a race is due off within
+  RACECARD_NEAR_WINDOW (non-runners, jockey changes, going), every
+  RACECARD_FAR_INTERVAL otherwise, never once every race is off
+- nothing due: next_wake() is the next event, so a long-running updater
+  sleeps through the gaps between meetings and stops once the day is done
+
+The scheduler runs the updater as a short tick on the live cron instead:
+each tick loads the plan, fetches whatever is due and exits. The polling
+state (last racecard refresh, result retries) survives between ticks in
+data/live_schedule.json. The file is per host; a tick on a host without it
+starts from a fresh plan, which costs extra polls but misses nothing.
+
+Usage:
+    schedule = LiveSchedule.load(db_client, '2025-10-19', state_path=DEFAULT_STATE_PATH)
+    due = schedule.due(now)        # {'racecards': bool, 'results': [race_id, ...]}
+    ... fetch ...
+    schedule.record_racecards(now)
+    schedule.record_results(due['results'], resulted_ids, now)
+    schedule.save(DEFAULT_STATE_PATH)
+    schedule.next_wake(now)
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIRST_DELAY = timedelta(minutes=8)
+RESULT_RETRY_INTERVAL = timedelta(minutes=3)
+RESULT_BACKOFF_FACTOR = 1.6
+RESULT_MAX_INTERVAL = timedelta(minutes=30)
+RESULT_GIVE_UP = timedelta(hours=3)
+
+RACECARD_NEAR_WINDOW = timedelta(minutes=30)
+RACECARD_NEAR_INTERVAL = timedelta(minutes=15)
+RACECARD_FAR_INTERVAL = timedelta(minutes=90)
+
+RACE_COLUMNS = 'id, course_id, off_dt, has_result, is_abandoned'
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'live_schedule.json')
+
+
+def parse_off_dt(value) -> Optional[datetime]:
+    """'2025-10-19T14:30:00+01:00' -> aware UTC datetime (naive values are taken as UTC)"""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RaceState:
+    """Polling state of one race"""
+
+    __slots__ = ('race_id', 'course_id', 'off', 'resulted', 'abandoned', 'attempts', 'next_poll')
+
+    def __init__(self, race_id: str, course_id: Optional[str], off: datetime,
+                 resulted: bool = False, abandoned: bool = False):
+        self.race_id = race_id
+        self.course_id = course_id
+        self.off = off
+        self.resulted = resulted
+        self.abandoned = abandoned
+        self.attempts = 0
+        self.next_poll = off + RESULT_FIRST_DELAY
+
+    @property
+    def pending(self) -> bool:
+        """Still waiting for a result"""
+        return not (self.resulted or self.abandoned)
+
+    def gave_up(self, now: datetime) -> bool:
+        return now - self.off > RESULT_GIVE_UP
+
+    def backoff(self, now: datetime):
+        """Schedule the next result poll after an unsuccessful one"""
+        interval = min(RESULT_RETRY_INTERVAL * (RESULT_BACKOFF_FACTOR ** self.attempts), RESULT_MAX_INTERVAL)
+        self.attempts += 1
+        self.next_poll = now + interval
+
+
+class LiveSchedule:
+    """Polling plan for one racing day"""
+
+    def __init__(self, races: Iterable[RaceState], date: Optional[str] = None):
+        self.races: Dict[str, RaceState] = {race.race_id: race for race in races}
+        self.date = date
+        self.last_racecards: Optional[datetime] = None
+
+    @classmethod
+    def load(cls, db_client, date: str, state_path: Optional[str] = None) -> 'LiveSchedule':
+        """
+        Build the plan from ra_mst_races rows for a date
+
+        Args:
+            db_client: SupabaseReferenceClient instance
+            date: Racing day (YYYY-MM-DD)
+            state_path: Polling state saved by an earlier tick (ignored unless
+                it is for the same date)
+        """
+        response = db_client.client.table('ra_mst_races')\
+            .select(RACE_COLUMNS)\
+            .eq('date', date)\
+            .execute()
+        schedule = cls([], date)
+        schedule.refresh(response.data or [])
+        if state_path:
+            schedule.restore(state_path)
+        return schedule
+
+    # ------------------------------------------------------------------
+    # State between ticks
+    # ------------------------------------------------------------------
+
+    def to_state(self) -> Dict:
+        """Polling state as JSON-serialisable data"""
+        return {
+            'date': self.date,
+            'last_racecards': self.last_racecards.isoformat() if self.last_racecards else None,
+            'races': {r.race_id: {'attempts': r.attempts, 'next_poll': r.next_poll.isoformat(),
+                                  'resulted': r.resulted}
+                      for r in self.races.values() if r.attempts or r.resulted},
+        }
+
+    def apply_state(self, state: Dict):
+        """Take over polling state saved for the same date (other dates are ignored)"""
+        if not state or state.get('date') != self.date:
+            return
+        self.last_racecards = parse_off_dt(state.get('last_racecards'))
+        for race_id, saved in (state.get('races') or {}).items():
+            race = self.races.get(race_id)
+            if race is None:
+                continue
+            race.resulted = race.resulted or bool(saved.get('resulted'))
+            race.attempts = int(saved.get('attempts') or 0)
+            if race.attempts:
+                race.next_poll = parse_off_dt(saved.get('next_poll')) or race.next_poll
+
+    def restore(self, path: str):
+        """Load polling state from a file written by save()"""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Live schedule state {path} unreadable, starting a fresh plan: {e}")
+            return
+        self.apply_state(state)
+
+    def save(self, path: str):
+        """Write polling state for the next tick (atomically)"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.to_state(), f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not save live schedule state to {path}: {e}")
+
+    def refresh(self, rows: List[Dict]):
+        """
+        Merge (re)loaded race rows, keeping polling state of known races
+
+        A result, once seen, stays recorded even if a later racecard upsert
+        resets has_result in the database.
+        """
+        for row in rows:
+            off = parse_off_dt(row.get('off_dt'))
+            if not row.get('id') or off is None:
+                continue
+            race = self.races.get(row['id'])
+            if race is None:
+                self.races[row['id']] = RaceState(
+                    row['id'], row.get('course_id'), off,
+                    resulted=bool(row.get('has_result')),
+                    abandoned=bool(row.get('is_abandoned'))
+                )
+                continue
+            if off != race.off and race.attempts == 0:
+                race.next_poll = off + RESULT_FIRST_DELAY    # Off time moved before we polled
+            race.off = off
+            race.course_id = row.get('course_id') or race.course_id
+            race.resulted = race.resulted or bool(row.get('has_result'))
+            race.abandoned = bool(row.get('is_abandoned'))
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def upcoming(self, now: datetime) -> List[RaceState]:
+        """Races not yet off (and not abandoned), earliest first"""
+        return sorted((r for r in self.races.values() if r.off > now and not r.abandoned), key=lambda r: r.off)
+
+    def racecard_interval(self, now: datetime) -> Optional[timedelta]:
+        """Refresh interval for racecards (None once every race is off)"""
+        upcoming = self.upcoming(now)
+        if not upcoming:
+            return None
+        if upcoming[0].off - now <= RACECARD_NEAR_WINDOW:
+            return RACECARD_NEAR_INTERVAL
+        return RACECARD_FAR_INTERVAL
+
+    def next_racecards(self, now: datetime) -> Optional[datetime]:
+        """When the next racecard refresh is due"""
+        interval = self.racecard_interval(now)
+        if interval is None:
+            return None
+        if self.last_racecards is None:
+            return now
+        due = self.last_racecards + interval
+        # Make sure a far-interval refresh doesn't skip over the near window
+        upcoming = self.upcoming(now)
+        near_start = upcoming[0].off - RACECARD_NEAR_WINDOW
+        if interval == RACECARD_FAR_INTERVAL and near_start < due:
+            due = max(near_start, self.last_racecards + RACECARD_NEAR_INTERVAL)
+        return due
+
+    def results_due(self, now: datetime) -> List[RaceState]:
+        """Pending races whose next result poll is due"""
+        return [r for r in self.races.values()
+                if r.pending and not r.gave_up(now) and r.next_poll <= now]
+
+    def due(self, now: Optional[datetime] = None) -> Dict:
+        """What to fetch now"""
+        now = now or utc_now()
+        next_racecards = self.next_racecards(now)
+        results = self.results_due(now)
+        return {
+            'racecards': next_racecards is not None and next_racecards <= now,
+            'results': [r.race_id for r in results],
+            'result_courses': sorted({r.course_id for r in results if r.course_id}),
+            'racecard_courses': sorted({r.course_id for r in self.upcoming(now) if r.course_id})
+        }
+
+    def next_wake(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Time of the next due event (None = nothing left to do today)"""
+        now = now or utc_now()
+        candidates = [r.next_poll for r in self.races.values() if r.pending and not r.gave_up(r.next_poll)]
+        racecards = self.next_racecards(now)
+        if racecards is not None:
+            candidates.append(racecards)
+        return max(min(candidates), now) if candidates else None
+
+    # ------------------------------------------------------------------
+    # Recording outcomes
+    # ------------------------------------------------------------------
+
+    def record_racecards(self, now: Optional[datetime] = None):
+        self.last_racecards = now or utc_now()
+
+    def record_results(self, polled: Iterable[str], resulted: Iterable[str], now: Optional[datetime] = None):
+        """
+        Record a results poll
+
+        Args:
+            polled: Race IDs the poll was meant to cover
+            resulted: Race IDs that now have a result
+        """
+        now = now or utc_now()
+        resulted = set(resulted)
+        for race_id in resulted:
+            if race_id in self.races:
+                self.races[race_id].resulted = True
+        for race_id in polled:
+            race = self.races.get(race_id)
+            if race is not None and race.pending:
+                race.backoff(now)
+                if race.gave_up(race.next_poll):
+                    logger.warning(f"No result for {race_id} {RESULT_GIVE_UP} after the off - "
+                                   "leaving it to the daily reconciliation")
+
+    def resulted_ids(self) -> List[str]:
+        return [r.race_id for r in self.races.values() if r.resulted]
+
+    def summary(self, now: Optional[datetime] = None) -> Dict:
+        now = now or utc_now()
+        return {
+            'races': len(self.races),
+            'upcoming': len(self.upcoming(now)),
+            'resulted': sum(1 for r in self.races.values() if r.resulted),
+            'abandoned': sum(1 for r in self.races.values() if r.abandoned),
+            'awaiting_result': sum(1 for r in self.races.values()
+                                   if r.pending and r.off <= now and not r.gave_up(now)),
+        }
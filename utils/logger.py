@@ -1,14 +1,135 @@
 """
 Logging utilities for reference data fetchers
 Provides consistent logging across all fetcher modules
+
+All loggers from get_logger() share one pipeline per process:
+
+- the calling thread only puts the LogRecord on a queue (QueueHandler);
+  formatting and I/O happen on a background QueueListener thread, so a
+  slow disk or terminal never stalls a fetch loop
+- one rotating file per process, logs/<script>.log (10 MB x 5 backups),
+  instead of a new timestamped file for every get_logger() call
+- console at INFO (LOG_LEVEL overrides), file at DEBUG
+
+Environment:
+    LOG_LEVEL            Console level (default INFO)
+    RACING_LOG_FILE      'off' disables the file; otherwise a file name in logs/
+    RACING_LOG_MAX_BYTES Rotate after this many bytes (default 10 MB)
+    RACING_LOG_BACKUPS   Rotated files kept (default 5)
+
+For hot loops use ProgressLogger, which logs at most every few seconds.
 """
 
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
 from typing import Optional
 
+DEFAULT_LOG_DIR = Path(__file__).parent.parent / 'logs'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+FILE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock prepare() formats every record in the calling thread. Records
+    only cross threads here (never processes), so they are passed as they
+    are; only arguments that could change before the listener formats them
+    (anything but str/int/float/bool/None) are rendered up front.
+    """
+
+    IMMUTABLE = (str, int, float, bool, type(None))
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            # A dict is either a single dict argument or %(name)s arguments - render it now
+            if isinstance(record.args, dict) or not all(isinstance(arg, self.IMMUTABLE) for arg in record.args):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+
+class _Pipeline:
+    """Process-wide queue, listener and handlers"""
+
+    def __init__(self, log_dir: Path, log_to_file: bool):
+        self.queue = queue.SimpleQueue()
+        self.handler = _LazyQueueHandler(self.queue)
+        self.handler.setLevel(logging.DEBUG)
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        console.setFormatter(logging.Formatter(CONSOLE_FORMAT, datefmt=DATE_FORMAT))
+        handlers = [console]
+
+        self.log_file = None
+        file_name = os.getenv('RACING_LOG_FILE', '')
+        if log_to_file and file_name.lower() != 'off':
+            log_dir.mkdir(parents=True, exist_ok=True)
+            self.log_file = log_dir / (file_name or f"{_process_name()}.log")
+            file_handler = logging.handlers.RotatingFileHandler(
+                self.log_file,
+                maxBytes=int(os.getenv('RACING_LOG_MAX_BYTES', DEFAULT_MAX_BYTES)),
+                backupCount=int(os.getenv('RACING_LOG_BACKUPS', DEFAULT_BACKUPS)),
+                encoding='utf-8',
+                delay=True
+            )
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(logging.Formatter(FILE_FORMAT, datefmt=DATE_FORMAT))
+            handlers.append(file_handler)
+
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush queued records and close the handlers"""
+        if self.running:
+            self.running = False
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+
+
+_pipeline: Optional[_Pipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def _process_name() -> str:
+    script = os.path.basename(sys.argv[0] or '') if sys.argv else ''
+    name = os.path.splitext(script)[0]
+    return name if name and name not in ('-c', '-m') else 'racing'
+
+
+def _get_pipeline(log_dir: Optional[Path] = None, log_to_file: bool = True) -> _Pipeline:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = _Pipeline(log_dir or DEFAULT_LOG_DIR, log_to_file)
+        return _pipeline
+
+
+def shutdown_logging():
+    """Drain the queue and close the log file (also runs at exit)"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.stop()
+            _pipeline = None
+
 
 class FetcherLogger:
     """Custom logger for reference data fetchers"""
@@ -19,41 +140,16 @@ class FetcherLogger:
 
         Args:
             name: Logger name (usually module name)
-            log_dir: Directory for log files
+            log_dir: Directory for log files (first logger in the process decides)
             log_to_file: Whether to log to file in addition to console
         """
+        pipeline = _get_pipeline(log_dir, log_to_file)
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.DEBUG)
-        self.logger.handlers.clear()
-
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
-
-        # File handler
-        if log_to_file:
-            log_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            log_file = log_dir / f"{name}_{timestamp}.log"
-
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.DEBUG)
-            file_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(file_handler)
-
-            self.log_file = log_file
-        else:
-            self.log_file = None
+        if pipeline.handler not in self.logger.handlers:
+            self.logger.handlers.clear()
+            self.logger.addHandler(pipeline.handler)
+        self.log_file = pipeline.log_file
 
     def get_logger(self) -> logging.Logger:
         """Get the logger instance"""
@@ -70,13 +166,56 @@ def get_logger(name: str, log_dir: Optional[Path] = None) -> logging.Logger:
 
     Args:
         name: Logger name
-        log_dir: Directory for log files (default: current dir / logs)
+        log_dir: Directory for log files (default: project root / logs)
 
     Returns:
         Logger instance
     """
-    if log_dir is None:
-        log_dir = Path(__file__).parent.parent / 'logs'
-
-    fetcher_logger = FetcherLogger(name, log_dir)
+    fetcher_logger = FetcherLogger(name, log_dir or DEFAULT_LOG_DIR)
     return fetcher_logger.get_logger()
+
+
+class ProgressLogger:
+    """
+    Rate-limited progress lines for hot loops
+
+    update() is cheap; a line is logged at most every `interval` seconds
+    (and by finish()), instead of one line per item.
+
+    Usage:
+        progress = ProgressLogger(logger, 'Enriching horses', total=len(horses))
+        for horse in horses:
+            ...
+            progress.update()
+        progress.finish()
+    """
+
+    def __init__(self, logger: logging.Logger, label: str, total: Optional[int] = None,
+                 interval: float = 10.0, level: int = logging.INFO):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.level = level
+        self.done = 0
+        self.started = time.monotonic()
+        self._next_log = self.started + interval
+
+    def update(self, n: int = 1):
+        self.done += n
+        now = time.monotonic()
+        if now >= self._next_log:
+            self._next_log = now + self.interval
+            self._log(now)
+
+    def finish(self):
+        self._log(time.monotonic())
+
+    def _log(self, now: float):
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            self.logger.log(self.level, "%s: %d/%d (%.0f%%, %.1f/s)", self.label, self.done, self.total,
+                            100.0 * self.done / self.total, rate)
+        else:
+            self.logger.log(self.level, "%s: %d (%.1f/s)", self.label, self.done, rate)
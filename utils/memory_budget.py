@@ -0,0 +1,251 @@
+"""
+Memory Budget - RSS tracking and spill-to-disk for long aggregations
+
+Full-history aggregations (the performance cube behind the Phase 2 tables,
+entity enrichment) hold partial results in dicts that grow with the data
+rather than the batch size, and can run a 2 GB instance out of memory.
+
+MemoryBudget samples the process RSS every `check_every` calls. The first
+time it is over the limit, the caller's current number of partial
+aggregates becomes the cap, and the caller spills every time it reaches
+the cap. The cap is halved if RSS is still over the limit after a spill.
+Capping the item count, not re-reading RSS after every spill, matters
+because CPython rarely returns freed dict memory to the OS.
+
+SortedRuns writes each spill as one sorted run file (pickled chunks). At
+the end, merge() streams the runs and the in-memory remainder in key order
+and combines equal keys. Runs are combined oldest first, so order-sensitive
+aggregates still see the values in scan order.
+
+The defaults suit aggregations holding many thousands of partials. A
+caller that already flushes a small buffer on its own (the enrichment
+cache holds at most a few hundred records) uses BUFFER_CHECK_EVERY and
+BUFFER_MIN_ITEMS instead, or the budget would never get to sample RSS
+while over MIN_ITEMS.
+
+The budget comes from RACING_MEMORY_BUDGET_MB. If that is unset, it is 70%
+of the container's cgroup memory limit. If neither exists, there is no
+budget and nothing spills.
+
+Usage:
+    budget = MemoryBudget.from_env()
+    runs = SortedRuns('performance_cube')
+    for row in rows:
+        ...     # update partials[key]
+        if budget and budget.should_spill(len(partials)):
+            runs.spill(partials)
+            partials = {}
+            budget.spilled()
+    for key, value in runs.merge(partials, combine):
+        ...
+    runs.close()
+"""
+
+import gc
+import heapq
+import logging
+import os
+import pickle
+import resource
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from utils.instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CGROUP_FRACTION = 0.7   # Share of the container limit used when no budget is configured
+DEFAULT_CHECK_EVERY = 10000     # should_spill() calls between RSS samples
+MIN_ITEMS = 10000               # Never spill runs smaller than this
+CHUNK_ITEMS = 5000              # Items per pickled chunk in a run file
+
+BUFFER_CHECK_EVERY = 1          # Small self-flushing buffers: sample RSS on every call
+BUFFER_MIN_ITEMS = 1            # ... and flush whatever is buffered
+
+_CGROUP_LIMITS = ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+
+
+def current_rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def container_limit_mb() -> Optional[float]:
+    """cgroup (v2 or v1) memory limit, None when unlimited or not in a container"""
+    for path in _CGROUP_LIMITS:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value) / (1024 * 1024)
+    return None
+
+
+class MemoryBudget:
+    """RSS limit for one aggregation, turned into a cap on partial aggregates"""
+
+    def __init__(self, limit_mb: float, check_every: int = DEFAULT_CHECK_EVERY, min_items: int = MIN_ITEMS):
+        """
+        Initialize budget
+
+        Args:
+            limit_mb: RSS above which the caller should spill
+            check_every: should_spill() calls between RSS samples
+            min_items: Smallest cap (spills below this are not worth the I/O)
+        """
+        self.limit_mb = limit_mb
+        self.check_every = check_every
+        self.min_items = min_items
+        self.max_items: Optional[int] = None
+        self.peak_mb = 0.0
+        self.spills = 0
+        self._calls = 0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional['MemoryBudget']:
+        """RACING_MEMORY_BUDGET_MB, else a share of the container limit, else None (kwargs: see __init__)"""
+        configured = os.getenv('RACING_MEMORY_BUDGET_MB')
+        if configured:
+            return cls(float(configured), **kwargs) if float(configured) > 0 else None
+        limit = container_limit_mb()
+        return cls(round(limit * DEFAULT_CGROUP_FRACTION), **kwargs) if limit else None
+
+    def sample(self) -> float:
+        rss = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss)
+        return rss
+
+    def should_spill(self, items: int) -> bool:
+        """True when the caller holding `items` partial aggregates should spill them"""
+        if self.max_items is not None and items >= self.max_items:
+            return True
+        self._calls += 1
+        if self._calls % self.check_every:
+            return False
+        if self.sample() <= self.limit_mb or items < self.min_items:
+            return False
+        if self.max_items is None:
+            self.max_items = items
+            logger.info(f"RSS {self.peak_mb:.0f} MB over the {self.limit_mb:.0f} MB budget - "
+                        f"spilling every {items:,} partial aggregates")
+        return True
+
+    def spilled(self):
+        """Record a spill; halve the cap if memory did not come back under the budget"""
+        self.spills += 1
+        gc.collect()
+        rss = self.sample()
+        if self.max_items and rss > self.limit_mb and self.max_items > self.min_items:
+            self.max_items = max(self.min_items, self.max_items // 2)
+            logger.info(f"RSS still {rss:.0f} MB after spill - cap lowered to {self.max_items:,}")
+
+    def summary(self) -> Dict:
+        return {'limit_mb': self.limit_mb, 'peak_mb': round(self.peak_mb, 1), 'spills': self.spills,
+                'max_items': self.max_items}
+
+
+def none_last(key: Tuple) -> Tuple:
+    """Sort key for tuples that may contain None (None sorts after any value)"""
+    return tuple((False, value) if value is not None else (True, 0) for value in key)
+
+
+class SortedRuns:
+    """On-disk sorted runs of (key, value) pairs, merged back in key order"""
+
+    def __init__(self, name: str, directory: Optional[str] = None,
+                 sort_key: Callable[[Any], Any] = none_last):
+        """
+        Initialize run store
+
+        Args:
+            name: Used in file names, logs and metrics
+            directory: Where run files go (default RACING_SPILL_DIR or the temp dir)
+            sort_key: Key function over the aggregate keys (default: tuples, None last)
+        """
+        self.name = name
+        self.directory = directory or os.getenv('RACING_SPILL_DIR') or tempfile.gettempdir()
+        self.sort_key = sort_key
+        self.paths: List[str] = []
+        self.spilled_items = 0
+        self.spilled_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __enter__(self) -> 'SortedRuns':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def spill(self, items: Dict[Hashable, Any]) -> int:
+        """Write items as one sorted run (the caller then drops them)"""
+        if not items:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=f"{self.name}-", suffix='.run', dir=self.directory)
+        ordered = sorted(items.items(), key=lambda item: self.sort_key(item[0]))
+        with os.fdopen(fd, 'wb') as f:
+            for i in range(0, len(ordered), CHUNK_ITEMS):
+                pickle.dump(ordered[i:i + CHUNK_ITEMS], f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = f.tell()
+
+        self.paths.append(path)
+        self.spilled_items += len(ordered)
+        self.spilled_bytes += size
+        count('memory.spills', store=self.name)
+        count('memory.spilled_items', len(ordered), store=self.name)
+        logger.info(f"{self.name}: spilled run {len(self.paths)} ({len(ordered):,} items, {size / 1048576:.1f} MB)")
+        return len(ordered)
+
+    def _read(self, path: str) -> Iterator[Tuple[Hashable, Any]]:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    return
+                yield from chunk
+
+    def merge(self, remaining: Dict[Hashable, Any],
+              combine: Callable[[Any, Any], Any]) -> Iterator[Tuple[Hashable, Any]]:
+        """
+        Stream all runs plus the in-memory remainder in key order
+
+        Equal keys are folded with combine(earlier, later), which may update
+        and return `earlier`; values are folded in spill order with the
+        remainder last, so in-memory values are never modified.
+        """
+        sources = [self._read(path) for path in self.paths]
+        sources.append(iter(sorted(remaining.items(), key=lambda item: self.sort_key(item[0]))))
+        merged = heapq.merge(*sources, key=lambda item: self.sort_key(item[0]))
+
+        current_key, current = None, None
+        started = False
+        for key, value in merged:
+            if started and key == current_key:
+                current = combine(current, value)
+                continue
+            if started:
+                yield current_key, current
+            current_key, current, started = key, value, True
+        if started:
+            yield current_key, current
+
+    def close(self):
+        """Delete the run files"""
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.paths = []
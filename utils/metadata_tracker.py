@@ -11,8 +11,10 @@ Maintains a metadata table with:
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
-from supabase import Client
+from typing import TYPE_CHECKING, Dict, Optional, List
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,7 @@ class MetadataTracker:
     # Metadata table name
     METADATA_TABLE = 'ra_collection_metadata'
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: 'Client'):
         """
         Initialize metadata tracker
 
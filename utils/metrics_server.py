@@ -0,0 +1,275 @@
+"""
+Metrics Server - Prometheus text-format endpoint for long-running workers
+
+The worker's throughput and freshness were only visible after the fact
+(health_check.py polls the database, view_update_history.py reads logs).
+This module serves GET /metrics in the Prometheus exposition format from
+inside the process, so a local Prometheus can scrape it directly:
+
+- every instrumentation timer, histogram and counter (utils.instrumentation),
+  e.g. racing_api_request_seconds{endpoint=...}, racing_api_retries_total{reason="429"},
+  racing_api_rate_limit_wait_seconds, racing_db_upsert_seconds{table=...},
+  racing_db_rows_written_total{table=...}
+- last success / failure timestamp, duration and run counts per job
+  (mark_job())
+- anything added with register_collector(), e.g. API scheduler queue depths,
+  cache hit counts and rolling freshness lags (utils.freshness)
+
+The exposition is rendered with the standard library; prometheus-client is
+not needed. GET /healthz answers 'ok'.
+
+Usage:
+    server = start_metrics_server()          # METRICS_PORT (default 9108), 'off' disables
+    mark_job('daily_fetch', success=True, duration=812.4)
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils import instrumentation
+from utils.instrumentation import TIME_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'racing'
+DEFAULT_PORT = 9108
+DEFAULT_HOST = '127.0.0.1'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Help text for the main instrumentation metrics (others get a generic one)
+HELP = {
+    'api.request': 'Racing API request latency',
+    'api.rate_limit_wait': 'Time spent waiting for a Racing API rate-limit slot',
+    'api.decode': 'Racing API response decode time',
+    'api.retries': 'Racing API request retries by reason (429 = rate limited)',
+    'api.failures': 'Racing API requests that failed after all retries',
+    'db.upsert': 'PostgREST upsert batch latency',
+    'db.insert': 'PostgREST insert batch latency',
+    'db.batch_rows': 'Rows per database write batch',
+    'db.rows_written': 'Rows written per table',
+    'db.rows_failed': 'Rows in failed write batches per table',
+    'freshness.recorded': 'Races with a freshness lag recorded per stream',
+    'freshness.slo_misses': 'Races stored later than the freshness SLO target per stream',
+    'freshness.skipped': 'Races not counted towards freshness (backfills) per stream',
+}
+
+
+@dataclass
+class MetricFamily:
+    """One metric name with its type, help text and samples (suffix, labels, value)"""
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[str, Dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = '', **labels):
+        self.samples.append((suffix, labels, value))
+        return self
+
+
+# ----------------------------------------------------------------------
+# Job outcomes
+# ----------------------------------------------------------------------
+
+_jobs: Dict[str, Dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def mark_job(job: str, success: bool, duration: Optional[float] = None):
+    """Record the outcome of a job run (last success/failure time, duration, counts)"""
+    now = time.time()
+    with _jobs_lock:
+        entry = _jobs.setdefault(job, {'success': 0, 'failure': 0, 'last_success': None,
+                                       'last_failure': None, 'last_duration': None})
+        entry['success' if success else 'failure'] += 1
+        entry['last_success' if success else 'last_failure'] = now
+        if duration is not None:
+            entry['last_duration'] = duration
+
+
+def _job_families() -> List[MetricFamily]:
+    with _jobs_lock:
+        jobs = {name: dict(entry) for name, entry in _jobs.items()}
+    runs = MetricFamily(f'{PREFIX}_job_runs_total', 'counter', 'Job runs by outcome')
+    last_success = MetricFamily(f'{PREFIX}_job_last_success_timestamp_seconds', 'gauge',
+                                'Unix time of the last successful run')
+    last_failure = MetricFamily(f'{PREFIX}_job_last_failure_timestamp_seconds', 'gauge',
+                                'Unix time of the last failed run')
+    duration = MetricFamily(f'{PREFIX}_job_last_duration_seconds', 'gauge', 'Duration of the last run')
+    for name, entry in sorted(jobs.items()):
+        runs.add(entry['success'], job=name, status='success')
+        runs.add(entry['failure'], job=name, status='failure')
+        if entry['last_success'] is not None:
+            last_success.add(entry['last_success'], job=name)
+        if entry['last_failure'] is not None:
+            last_failure.add(entry['last_failure'], job=name)
+        if entry['last_duration'] is not None:
+            duration.add(entry['last_duration'], job=name)
+    return [runs, last_success, last_failure, duration]
+
+
+# ----------------------------------------------------------------------
+# Collectors
+# ----------------------------------------------------------------------
+
+_collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def register_collector(func: Callable[[], Iterable[MetricFamily]]):
+    """Add a callable producing metric families at scrape time"""
+    _collectors.append(func)
+    return func
+
+
+def metric_name(name: str, suffix: str = '') -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', f"{PREFIX}_{name}{suffix}")
+
+
+def _instrumentation_families() -> List[MetricFamily]:
+    counters, histograms = instrumentation.registry().snapshot()
+    families: Dict[str, MetricFamily] = {}
+
+    for (name, labels), value in counters.items():
+        full = metric_name(name, '_total')
+        family = families.setdefault(full, MetricFamily(full, 'counter', HELP.get(name, f'Counter {name}')))
+        family.add(value, **dict(labels))
+
+    for (name, labels), histogram in histograms.items():
+        timed = histogram.buckets == TIME_BUCKETS
+        full = metric_name(name, '_seconds' if timed else '')
+        family = families.setdefault(full, MetricFamily(
+            full, 'histogram', HELP.get(name, f"{'Timer' if timed else 'Histogram'} {name}")))
+        labels = dict(labels)
+        for bound, cumulative in histogram.cumulative():
+            family.add(cumulative, '_bucket', **labels, le='+Inf' if bound == float('inf') else repr(float(bound)))
+        family.add(histogram.total, '_sum', **labels)
+        family.add(histogram.count, '_count', **labels)
+
+    return [families[name] for name in sorted(families)]
+
+
+def _process_families() -> List[MetricFamily]:
+    return [
+        MetricFamily(f'{PREFIX}_process_start_time_seconds', 'gauge', 'Unix time the process started')
+        .add(_started),
+        MetricFamily(f'{PREFIX}_instrumentation_enabled', 'gauge', 'Whether hot-path instrumentation is recording')
+        .add(1 if instrumentation.enabled() else 0),
+    ]
+
+
+_started = time.time()
+
+
+# ----------------------------------------------------------------------
+# Exposition
+# ----------------------------------------------------------------------
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    families = _process_families() + _instrumentation_families() + _job_families()
+    for collector in list(_collectors):
+        try:
+            families.extend(collector())
+        except Exception as e:
+            logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+
+    # One HELP/TYPE block per name: families a collector repeats are merged,
+    # a name reused with another type is dropped
+    merged: Dict[str, MetricFamily] = {}
+    for family in families:
+        first = merged.get(family.name)
+        if first is None:
+            merged[family.name] = MetricFamily(family.name, family.type, family.help, list(family.samples))
+        elif first.type == family.type:
+            first.samples.extend(family.samples)
+        else:
+            logger.warning(f"Metric {family.name} reported as both {first.type} and {family.type}; "
+                           f"keeping the {first.type}")
+
+    lines = []
+    for family in merged.values():
+        if not family.samples:
+            continue
+        lines.append(f"# HELP {family.name} {_escape(family.help)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for suffix, labels, value in family.samples:
+            label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{family.name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{family.name}{suffix} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body, status, content_type = render().encode(), 200, CONTENT_TYPE
+        elif path == '/healthz':
+            body, status, content_type = b'ok\n', 200, 'text/plain'
+        else:
+            body, status, content_type = b'not found\n', 404, 'text/plain'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"metrics {self.address_string()} {format % args}")
+
+
+class MetricsServer:
+    """HTTP server for /metrics on a daemon thread"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+
+    def start(self) -> 'MetricsServer':
+        self.thread.start()
+        logger.info(f"Metrics endpoint: http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[MetricsServer]:
+    """
+    Start the endpoint (METRICS_PORT / METRICS_HOST, default 127.0.0.1:9108)
+
+    Returns None when disabled (METRICS_PORT=off) or the port cannot be bound;
+    the worker keeps running without metrics.
+    """
+    if port is None:
+        setting = os.getenv('METRICS_PORT', str(DEFAULT_PORT))
+        if setting.lower() in ('', 'off', 'none', '0'):
+            return None
+        port = int(setting)
+    host = host or os.getenv('METRICS_HOST', DEFAULT_HOST)
+    try:
+        return MetricsServer(host, port).start()
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
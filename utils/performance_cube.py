@@ -0,0 +1,495 @@
+"""
+Performance Cube - Shared single-scan aggregation for performance tables
+
+Builds one multi-dimensional cube from ra_mst_runners + ra_mst_races:
+
+    entity type x entity x distance (yards) x course x going x surface
+
+Each cell holds streaming moments (count, wins, placings, mean/variance of
+finishing time and starting price) instead of raw per-run lists, so memory is
+bounded by the number of distinct cells rather than the number of runs.
+
+Given a MemoryBudget, the cube spills its cells to sorted runs on disk
+when the process goes over budget. rollup() and iter_entity_rollups() then
+merge the runs back in key order; the latter holds only one entity's
+cells at a time.
+
+The following tables are materialised from the same cube:
+- ra_performance_by_distance (rollup over distance + going)
+- ra_performance_by_venue (rollup over course)
+- ra_runner_statistics (horse career/course/distance/going/surface rollups)
+"""
+
+import logging
+import math
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from utils.memory_budget import MemoryBudget, SortedRuns
+
+logger = logging.getLogger(__name__)
+
+# Cube dimensions below the (entity_type, entity_id) pair, in key order
+CUBE_DIMENSIONS = ('distance_yards', 'course_id', 'going', 'surface')
+
+# Entity types tracked by default and the runner column holding their ID
+ENTITY_COLUMNS = {
+    'horse': 'horse_id',
+    'jockey': 'jockey_id',
+    'trainer': 'trainer_id',
+}
+
+# Columns required from each table to populate a cube cell
+RUNNER_COLUMNS = [
+    'race_id', 'horse_id', 'jockey_id', 'trainer_id', 'position',
+    'finishing_time', 'starting_price_decimal', 'prize_won'
+]
+RACE_COLUMNS = ['id', 'date', 'course_id', 'distance_f', 'going', 'surface']
+
+
+def parse_distance_to_yards(distance_str: str) -> int:
+    """
+    Parse distance string to yards
+
+    Examples:
+    - "16f" -> 3520 yards (16 * 220)
+    - "2m" -> 3520 yards (2 miles * 1760)
+    - "2m4f" -> 4400 yards (2 miles + 4 furlongs)
+    - "1m2f110y" -> 2090 yards
+    """
+    if not distance_str:
+        return 0
+
+    yards = 0
+    distance_str = str(distance_str).strip().lower()
+
+    # Extract miles
+    miles_match = re.search(r'(\d+)m', distance_str)
+    if miles_match:
+        yards += int(miles_match.group(1)) * 1760
+
+    # Extract furlongs
+    furlongs_match = re.search(r'(\d+)f', distance_str)
+    if furlongs_match:
+        yards += int(furlongs_match.group(1)) * 220
+
+    # Extract yards
+    yards_match = re.search(r'(\d+)y', distance_str)
+    if yards_match:
+        yards += int(yards_match.group(1))
+
+    return yards
+
+
+def parse_finishing_time(time_str: str) -> Optional[float]:
+    """
+    Parse finishing time to seconds
+
+    Examples:
+    - "1:48.55" -> 108.55
+    - "2:05.32" -> 125.32
+    """
+    if not time_str:
+        return None
+
+    try:
+        parts = str(time_str).split(':')
+        if len(parts) == 2:
+            return int(parts[0]) * 60 + float(parts[1])
+        elif len(parts) == 1:
+            return float(parts[0])
+    except (TypeError, ValueError):
+        return None
+
+    return None
+
+
+class RunningMoments:
+    """
+    Streaming count/mean/variance (Welford) plus min, max and latest value
+
+    The latest value is the one observed at the greatest `at` (a race date),
+    ties broken by the larger value, so it does not depend on scan or merge
+    order.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'minimum', 'maximum', 'last', 'last_at')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.last = None
+        self.last_at = None
+
+    def add(self, value: float, at: Optional[str] = None):
+        """Add a single observation (at: when it was observed, e.g. the race date)"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self._observe_last(value, at)
+
+    def _observe_last(self, value: Optional[float], at: Optional[str]):
+        if self.last is None or (at or '', value) >= (self.last_at or '', self.last):
+            self.last, self.last_at = value, at
+
+    def merge(self, other: 'RunningMoments'):
+        """Merge another set of moments into this one (Chan et al.)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            self.last, self.last_at = other.last, other.last_at
+            return
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._observe_last(other.last, other.last_at)
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance (None with fewer than 2 observations)"""
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation"""
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+
+class CellStats:
+    """Aggregated performance for one cube cell"""
+
+    __slots__ = (
+        'runs', 'wins', 'places_2nd', 'places_3rd', 'prize',
+        'time', 'sp', 'expected_wins', 'profit_loss'
+    )
+
+    def __init__(self):
+        self.runs = 0
+        self.wins = 0
+        self.places_2nd = 0
+        self.places_3rd = 0
+        self.prize = 0.0
+        self.time = RunningMoments()
+        self.sp = RunningMoments()
+        self.expected_wins = 0.0  # sum(1 / SP) - denominator of A/E
+        self.profit_loss = 0.0    # 1 unit level stakes at SP
+
+    def add(self, position, finishing_time: Optional[float] = None,
+            starting_price: Optional[float] = None, prize: float = 0.0,
+            race_date: Optional[str] = None):
+        """Add a single run"""
+        self.runs += 1
+        if position == 1:
+            self.wins += 1
+        elif position == 2:
+            self.places_2nd += 1
+        elif position == 3:
+            self.places_3rd += 1
+
+        self.prize += prize
+
+        if finishing_time:
+            self.time.add(finishing_time, race_date)
+
+        if starting_price and starting_price > 0:
+            self.sp.add(starting_price, race_date)
+            self.expected_wins += 1 / starting_price
+            self.profit_loss += (starting_price - 1) if position == 1 else -1
+
+    def merge(self, other: 'CellStats'):
+        """Merge another cell into this one"""
+        self.runs += other.runs
+        self.wins += other.wins
+        self.places_2nd += other.places_2nd
+        self.places_3rd += other.places_3rd
+        self.prize += other.prize
+        self.time.merge(other.time)
+        self.sp.merge(other.sp)
+        self.expected_wins += other.expected_wins
+        self.profit_loss += other.profit_loss
+
+    @property
+    def places(self) -> int:
+        """Top-three finishes including wins"""
+        return self.wins + self.places_2nd + self.places_3rd
+
+    @property
+    def win_percent(self) -> float:
+        return (self.wins / self.runs * 100) if self.runs > 0 else 0
+
+    @property
+    def place_percent(self) -> float:
+        return (self.places / self.runs * 100) if self.runs > 0 else 0
+
+    @property
+    def ae_index(self) -> Optional[float]:
+        """Actual / expected wins (None without SP data)"""
+        if self.expected_wins > 0:
+            return round(self.wins / self.expected_wins, 2)
+        return None
+
+
+class PerformanceCube:
+    """Sparse cube of CellStats keyed by (entity_type, entity_id, *CUBE_DIMENSIONS)"""
+
+    def __init__(self, entity_columns: Optional[Dict[str, str]] = None,
+                 budget: Optional[MemoryBudget] = None):
+        """
+        Initialize cube
+
+        Args:
+            entity_columns: Mapping of entity type -> runner ID column
+                (default: horse, jockey, trainer)
+            budget: Spill cells to disk when the process exceeds this budget
+        """
+        self.entity_columns = entity_columns or ENTITY_COLUMNS
+        self.cells: Dict[Tuple, CellStats] = {}
+        self.runners_processed = 0
+        self.budget = budget
+        self.runs: Optional[SortedRuns] = None
+
+    def __len__(self) -> int:
+        """Cells held (an upper bound once spilled: a cell may be in several runs)"""
+        return len(self.cells) + (self.runs.spilled_items if self.runs else 0)
+
+    @property
+    def spilled(self) -> bool:
+        return bool(self.runs)
+
+    def add_runner(self, runner: Dict, race: Dict):
+        """Add one completed runner (with its race context) to every entity cell"""
+        yards = parse_distance_to_yards(race.get('distance_f'))
+        course_id = race.get('course_id')
+        going = race.get('going') or 'Unknown'
+        surface = race.get('surface') or 'Unknown'
+        race_date = race.get('date')
+
+        position = runner.get('position')
+        finishing_time = parse_finishing_time(runner.get('finishing_time'))
+        starting_price = runner.get('starting_price_decimal')
+        starting_price = float(starting_price) if starting_price else None
+        prize = float(runner.get('prize_won') or 0)
+
+        for entity_type, column in self.entity_columns.items():
+            entity_id = runner.get(column)
+            if not entity_id:
+                continue
+
+            key = (entity_type, entity_id, yards, course_id, going, surface)
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = CellStats()
+            cell.add(position, finishing_time, starting_price, prize, race_date)
+
+        self.runners_processed += 1
+        if self.budget is not None and self.budget.should_spill(len(self.cells)):
+            self.spill()
+
+    def spill(self):
+        """Write the in-memory cells to a sorted run on disk"""
+        if self.runs is None:
+            self.runs = SortedRuns('performance_cube')
+        self.runs.spill(self.cells)
+        self.cells = {}
+        if self.budget is not None:
+            self.budget.spilled()
+
+    def iter_cells(self) -> Iterator[Tuple[Tuple, CellStats]]:
+        """All (key, cell) pairs; in key order, merged across runs, once spilled"""
+        if not self.runs:
+            return iter(self.cells.items())
+        return self.runs.merge(self.cells, _merge_cells)
+
+    def close(self):
+        """Delete spilled runs"""
+        if self.runs is not None:
+            self.runs.close()
+
+    def rollup(self, entity_type: str, dimensions: Sequence[str] = ()) -> Dict[Tuple, CellStats]:
+        """
+        Aggregate cells for one entity type, keeping only the given dimensions
+
+        Args:
+            entity_type: Entity type to roll up (e.g. 'jockey')
+            dimensions: Dimensions to keep, from CUBE_DIMENSIONS
+
+        Returns:
+            Dict mapping (entity_id, *dimension_values) -> merged CellStats
+        """
+        indexes = [CUBE_DIMENSIONS.index(d) + 2 for d in dimensions]
+        result: Dict[Tuple, CellStats] = {}
+
+        for key, cell in self.iter_cells():
+            if key[0] != entity_type:
+                continue
+
+            rolled_key = (key[1],) + tuple(key[i] for i in indexes)
+            merged = result.get(rolled_key)
+            if merged is None:
+                merged = result[rolled_key] = CellStats()
+            merged.merge(cell)
+
+        return result
+
+    def iter_entity_rollups(self, entity_type: str,
+                            dimensions: Sequence[str] = ()) -> Iterator[Tuple[str, Dict[Tuple, CellStats]]]:
+        """
+        rollup() grouped by entity: yields (entity_id, {dimension_values: CellStats})
+
+        Once spilled, cells are merged from disk in key order, so only one
+        entity's rollup is in memory at a time.
+        """
+        indexes = [CUBE_DIMENSIONS.index(d) + 2 for d in dimensions]
+
+        if not self.runs:
+            grouped: Dict[str, Dict[Tuple, CellStats]] = {}
+            for rolled_key, cell in self.rollup(entity_type, dimensions).items():
+                grouped.setdefault(rolled_key[0], {})[rolled_key[1:]] = cell
+            yield from grouped.items()
+            return
+
+        entity_id, group = None, {}
+        for key, cell in self.iter_cells():
+            if key[0] != entity_type:
+                continue
+            if key[1] != entity_id:
+                if group:
+                    yield entity_id, group
+                entity_id, group = key[1], {}
+            rolled_key = tuple(key[i] for i in indexes)
+            merged = group.get(rolled_key)
+            if merged is None:
+                merged = group[rolled_key] = CellStats()
+            merged.merge(cell)
+        if group:
+            yield entity_id, group
+
+    @classmethod
+    def from_database(cls, db_client, entity_columns: Optional[Dict[str, str]] = None,
+                      page_size: int = 1000,
+                      on_runner: Optional[Callable[[Dict, Dict], None]] = None,
+                      extra_runner_columns: Iterable[str] = (),
+                      budget: Optional[MemoryBudget] = None) -> 'PerformanceCube':
+        """
+        Build a cube with a single paginated scan of completed runners
+
+        Args:
+            db_client: SupabaseReferenceClient instance
+            entity_columns: Entity type -> runner ID column mapping
+            page_size: Runners per page (max 1000 for PostgREST)
+            on_runner: Optional callback receiving each (runner, race) pair, so
+                callers can collect extra per-runner state from the same scan
+            extra_runner_columns: Additional runner columns needed by on_runner
+            budget: Memory budget for the cells (spill to disk when exceeded)
+
+        Returns:
+            Populated PerformanceCube
+        """
+        cube = cls(entity_columns, budget)
+        columns = list(dict.fromkeys(
+            RUNNER_COLUMNS + list(cube.entity_columns.values()) + list(extra_runner_columns)
+        ))
+
+        for runner, race in iter_completed_runners(db_client, columns, RACE_COLUMNS, page_size):
+            cube.add_runner(runner, race)
+            if on_runner:
+                on_runner(runner, race)
+
+        logger.info(f"Performance cube built: {cube.runners_processed} runners -> {len(cube)} cells"
+                    + (f" ({len(cube.runs)} runs spilled to disk)" if cube.spilled else ''))
+        return cube
+
+
+def _merge_cells(cell: CellStats, other: CellStats) -> CellStats:
+    cell.merge(other)
+    return cell
+
+
+def iter_completed_runners(db_client, runner_columns: List[str], race_columns: Optional[List[str]],
+                           page_size: int = 1000) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Stream completed runners page by page, joined to their race context
+
+    Runners are paged by keyset on (race_id, id), so every runner is read
+    exactly once and no page costs an offset scan. Race rows are fetched once
+    per page and only the race spanning a page boundary is carried over. At
+    most one page of runners and its races are held in memory at a time.
+
+    Pass race_columns=None to skip the race join entirely (race is then {}).
+
+    db_client may also be an AnalyticsMirror, in which case the scan is served
+    from local disk instead of the database.
+
+    Yields:
+        (runner, race) tuples for runners with a position and a known race
+    """
+    if hasattr(db_client, 'iter_completed_runners'):
+        yield from db_client.iter_completed_runners(runner_columns, race_columns, page_size)
+        return
+
+    select_columns = list(dict.fromkeys(list(runner_columns) + ['race_id', 'id']))
+    race_cache: Dict[str, Dict] = {}
+    last_key = None
+    scanned = 0
+
+    while True:
+        query = db_client.client.table('ra_mst_runners')\
+            .select(', '.join(select_columns))\
+            .not_.is_('position', 'null')
+        if last_key is not None:
+            race_id, runner_id = last_key
+            query = query.or_(f'race_id.gt."{race_id}",and(race_id.eq."{race_id}",id.gt.{runner_id})')
+        response = query.order('race_id').order('id').limit(page_size).execute()
+
+        page = response.data or []
+        if not page:
+            break
+        scanned += len(page)
+        last_key = (page[-1]['race_id'], page[-1]['id'])
+
+        if race_columns is None:
+            for runner in page:
+                yield runner, {}
+            if len(page) < page_size:
+                break
+            continue
+
+        missing = list({r['race_id'] for r in page if r.get('race_id') and r['race_id'] not in race_cache})
+        for i in range(0, len(missing), page_size):
+            race_batch = db_client.client.table('ra_mst_races')\
+                .select(', '.join(race_columns))\
+                .in_('id', missing[i:i + page_size])\
+                .execute()
+            for race in race_batch.data or []:
+                race_cache[race['id']] = race
+
+        for runner in page:
+            race = race_cache.get(runner.get('race_id'))
+            if race:
+                yield runner, race
+
+        logger.debug(f"Scanned {scanned} runners")
+
+        last_race_id = page[-1].get('race_id')
+        race_cache = {last_race_id: race_cache[last_race_id]} if last_race_id in race_cache else {}
+
+        if len(page) < page_size:
+            break
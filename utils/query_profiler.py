@@ -0,0 +1,521 @@
+"""
+Query Profiler - Slow-query capture, query plans and index recommendations
+
+The statistics workers build large SQL strings (per-entity lifetime stats,
+COUNT(CASE ...) pivots, recent form CTEs) and run them through psycopg2.
+Their logs say only how long the whole run took, so a missing index looks
+the same as a slow network. QueryProfiler wraps cursor.execute() and, per
+query fingerprint (SQL with literals replaced by ?), records:
+
+- calls, total/mean/max duration and rows returned (also timer('db.query')
+  and count('db.query_rows') in instrumentation)
+- the access pattern on the watched tables (ra_mst_runners, ra_mst_races,
+  ra_races): which columns the query filters and joins them on
+- optionally (explain=True, RACING_EXPLAIN_SLOW_QUERIES=on), the
+  EXPLAIN (ANALYZE, BUFFERS) plan of the first call over slow_ms
+  (RACING_SLOW_QUERY_MS, default 500). ANALYZE runs the query a second time,
+  so only read-only statements are explained, once per fingerprint, inside a
+  savepoint
+
+report() turns this into index recommendations. Plans count the most: they
+show seq scans on watched tables that discard most rows or run once per
+outer row. Without a plan, the report falls back to equality predicates
+that frequent or slow queries use, marked as unverified. Existing indexes
+(pg_indexes) that already lead with the recommended columns are reported
+instead of a duplicate CREATE INDEX.
+
+psycopg2 is imported only by connect(); execute() works on any DB-API cursor.
+
+Usage:
+    profiler = QueryProfiler(explain=True)
+    rows = profiler.execute(cursor, query, label='jockeys_recent_form')
+    ...
+    profiler.write_report('update_recent_form_statistics', conn)   # logs/query_profiles/
+"""
+
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.instrumentation import count, observe
+
+logger = logging.getLogger(__name__)
+
+WATCHED_TABLES = ('ra_mst_runners', 'ra_mst_races', 'ra_races')
+
+DEFAULT_SLOW_MS = 500
+DEFAULT_REPORT_DIR = Path(__file__).parent.parent / 'logs' / 'query_profiles'
+
+SELECTIVE_SCAN = 0.1        # Seq scans returning at most this share of the rows they read
+MIN_ROWS_REMOVED = 1000     # ... and discarding at least this many rows
+MIN_UNVERIFIED_CALLS = 100  # Unverified (no plan) candidates need this many calls or a slow call
+SAMPLE_SQL_CHARS = 2000
+
+_COMMENT = re.compile(r'--[^\n]*')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+_KEYWORDS = {
+    'on', 'where', 'join', 'left', 'right', 'inner', 'outer', 'full', 'cross', 'group', 'order',
+    'having', 'limit', 'using', 'natural', 'lateral', 'union', 'select', 'with', 'as',
+}
+_TABLE_REF = re.compile(r'\b(?:from|join)\s+(\w+)(?:\s+(?:as\s+)?(\w+))?', re.I)
+_CLAUSE = re.compile(
+    r'\b(where|on)\b(.*?)(?=\b(?:left|right|inner|full|cross|join|where|group|order|having|limit|union)\b'
+    r'|\)\s*select\b|\)\s*,\s*\w+\s+as\s*\(|$)',
+    re.I | re.S
+)
+_OPERATOR = r'(=|<>|!=|>=|<=|<|>|\bnot\s+like\b|\blike\b|\bin\b|\bbetween\b|\bis\s+not\s+null\b|\bis\s+null\b)'
+_QUALIFIED_PREDICATE = re.compile(r'\b(\w+)\.(\w+)\s*' + _OPERATOR, re.I)
+# Plan conditions: "((jockey_id)::text = 'jky_1'::text)", "(rn.race_id = r.id)", "(date >= ...)"
+_PLAN_PREDICATE = re.compile(
+    r'\(*(?:(\w+)\.)?(\w+)\)*(?:::[\w ]+?)?\s*(=|<>|>=|<=|<|>|!~~|~~|IS NOT NULL|IS NULL)', re.I)
+
+_EQUALITY = {'=', 'in'}
+_RANGE = {'>=', '<=', '<', '>', 'between', 'like', '~~'}
+
+
+def fingerprint(query: str) -> str:
+    """SQL with comments dropped, literals replaced by ? and whitespace collapsed"""
+    text = _COMMENT.sub(' ', query)
+    text = _STRING.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    return _SPACE.sub(' ', text).strip().rstrip(';')
+
+
+def _read_only(query: str) -> bool:
+    text = _COMMENT.sub(' ', query).strip().lower()
+    if not (text.startswith('select') or text.startswith('with')):
+        return False
+    return not re.search(r'\b(insert|update|delete|merge)\b', _STRING.sub('', text))
+
+
+def _operator(raw: str) -> str:
+    return _SPACE.sub(' ', raw.lower())
+
+
+def sql_access_patterns(query: str, tables: Sequence[str] = WATCHED_TABLES) -> Dict[str, Dict[str, set]]:
+    """{table: {column: {operators}}} from WHERE and ON clauses referencing the watched tables"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(query):
+        table = table.lower()
+        aliases[table] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias.lower()] = table
+
+    patterns: Dict[str, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+    for _, clause in _CLAUSE.findall(_STRING.sub("''", _COMMENT.sub(' ', query))):
+        for alias, column, op in _QUALIFIED_PREDICATE.findall(clause):
+            table = aliases.get(alias.lower())
+            if table in tables:
+                patterns[table][column.lower()].add(_operator(op))
+    return {table: dict(columns) for table, columns in patterns.items()}
+
+
+# ----------------------------------------------------------------------
+# Plans
+# ----------------------------------------------------------------------
+
+def _walk(node: Dict, parent: Optional[Dict] = None) -> Iterable[Tuple[Dict, Optional[Dict]]]:
+    yield node, parent
+    for child in node.get('Plans', []):
+        yield from _walk(child, node)
+
+
+def _plan_columns(condition: str, aliases: Dict[str, str], default_table: Optional[str]) -> List[Tuple[str, str, str]]:
+    """(table, column, operator) for each comparison in a plan condition"""
+    found = []
+    for alias, column, op in _PLAN_PREDICATE.findall(condition or ''):
+        table = aliases.get(alias.lower()) if alias else default_table
+        if table:
+            found.append((table, column.lower(), _operator(op).replace('~~', 'like')))
+    return found
+
+
+def analyze_plan(plan: Dict, tables: Sequence[str] = WATCHED_TABLES) -> List[Dict]:
+    """
+    Scans of watched tables in an EXPLAIN (ANALYZE, FORMAT JSON) plan
+
+    Returns one finding per scan node: table, node type, index used, filter
+    columns, rows returned/removed, loops, time and buffers read.
+    """
+    root = plan.get('Plan', plan)
+    aliases = {}
+    for node, _ in _walk(root):
+        if node.get('Relation Name'):
+            aliases[(node.get('Alias') or node['Relation Name']).lower()] = node['Relation Name'].lower()
+
+    findings = []
+    for node, parent in _walk(root):
+        table = (node.get('Relation Name') or '').lower()
+        if table not in tables:
+            continue
+        loops = node.get('Actual Loops', 1) or 1
+        # Parallel workers each report a loop; they run side by side, not once per outer row
+        parallel = bool(node.get('Parallel Aware'))
+        conditions = [node.get(key) for key in ('Filter', 'Index Cond', 'Recheck Cond') if node.get(key)]
+        if parent is not None and parent.get('Join Filter'):
+            conditions.append(parent['Join Filter'])
+        columns = []
+        for condition in conditions:
+            columns += [(column, op) for t, column, op in _plan_columns(condition, aliases, table) if t == table]
+        findings.append({
+            'table': table,
+            'node': node.get('Node Type'),
+            'index': node.get('Index Name'),
+            'columns': sorted(set(columns)),
+            'rows': (node.get('Actual Rows') or 0) * loops,
+            'rows_removed': (node.get('Rows Removed by Filter') or 0) * loops,
+            'loops': 1 if parallel else loops,
+            'time_ms': round((node.get('Actual Total Time') or 0) * (1 if parallel else loops), 1),
+            'shared_read_blocks': node.get('Shared Read Blocks', 0),
+            'nested_under': parent.get('Node Type') if parent else None,
+        })
+    return findings
+
+
+def _index_columns(columns: Iterable[Tuple[str, str]]) -> Tuple[str, ...]:
+    """Equality columns first, then at most one range column; None when nothing indexable"""
+    equality = sorted({column for column, op in columns if op in _EQUALITY})
+    ranges = sorted({column for column, op in columns if op in _RANGE} - set(equality))
+    return tuple(equality + ranges[:1])
+
+
+# ----------------------------------------------------------------------
+# Profiler
+# ----------------------------------------------------------------------
+
+class QueryStats:
+    """Calls, timing, rows and plan for one query fingerprint"""
+
+    __slots__ = ('label', 'calls', 'total_s', 'max_s', 'rows', 'slow_calls', 'sample_sql',
+                 'patterns', 'plan', 'plan_ms', 'findings')
+
+    def __init__(self, label: str, sql: str):
+        self.label = label
+        self.calls = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.rows = 0
+        self.slow_calls = 0
+        self.sample_sql = sql[:SAMPLE_SQL_CHARS]
+        self.patterns = sql_access_patterns(sql)
+        self.plan: Optional[Dict] = None
+        self.plan_ms: Optional[float] = None
+        self.findings: List[Dict] = []
+
+    def to_dict(self) -> Dict:
+        return {
+            'label': self.label,
+            'calls': self.calls,
+            'total_s': round(self.total_s, 3),
+            'mean_ms': round(self.total_s / self.calls * 1000, 1) if self.calls else 0.0,
+            'max_ms': round(self.max_s * 1000, 1),
+            'rows': self.rows,
+            'slow_calls': self.slow_calls,
+            'access_patterns': {table: {column: sorted(ops) for column, ops in columns.items()}
+                                for table, columns in self.patterns.items()},
+            'plan_ms': self.plan_ms,
+            'plan_findings': self.findings,
+            'plan': self.plan,
+            'sql': self.sample_sql,
+        }
+
+
+class QueryProfiler:
+    """Wraps psycopg2 cursor.execute() with timing, row counts and optional EXPLAIN capture"""
+
+    def __init__(self, slow_ms: Optional[float] = None, explain: Optional[bool] = None):
+        """
+        Initialize profiler
+
+        Args:
+            slow_ms: Queries at or over this many milliseconds are slow
+                (default RACING_SLOW_QUERY_MS or 500)
+            explain: Capture EXPLAIN (ANALYZE, BUFFERS) for the first slow call
+                per fingerprint (default RACING_EXPLAIN_SLOW_QUERIES)
+        """
+        if slow_ms is None:
+            slow_ms = float(os.getenv('RACING_SLOW_QUERY_MS', DEFAULT_SLOW_MS))
+        if explain is None:
+            explain = os.getenv('RACING_EXPLAIN_SLOW_QUERIES', 'off').lower() in ('1', 'on', 'true', 'yes')
+        self.slow_s = slow_ms / 1000
+        self.explain = explain
+        self.queries: Dict[str, QueryStats] = {}
+
+    def execute(self, cursor, query: str, params=None, label: Optional[str] = None) -> List:
+        """Run a query on the cursor and return fetchall() (an empty list for statements without rows)"""
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        rows = cursor.fetchall() if cursor.description is not None else []
+        elapsed = time.perf_counter() - started
+
+        key = fingerprint(query)
+        stats = self.queries.get(key)
+        if stats is None:
+            stats = self.queries[key] = QueryStats(label or self._default_label(key), query)
+        stats.calls += 1
+        stats.total_s += elapsed
+        stats.max_s = max(stats.max_s, elapsed)
+        stats.rows += len(rows) if cursor.description is not None else max(cursor.rowcount, 0)
+
+        observe('db.query', elapsed, query=stats.label)
+        count('db.query_rows', len(rows), query=stats.label)
+
+        if elapsed >= self.slow_s:
+            stats.slow_calls += 1
+            count('db.slow_queries', query=stats.label)
+            if stats.slow_calls == 1:
+                logger.info(f"Slow query {stats.label}: {elapsed * 1000:.0f} ms, {len(rows):,} rows")
+            if self.explain and stats.plan is None and _read_only(query):
+                self._capture_plan(cursor, query, params, stats)
+        return rows
+
+    @staticmethod
+    def _default_label(key: str) -> str:
+        match = re.search(r'\bfrom\s+(\w+)', key, re.I)
+        return f"{match.group(1) if match else 'query'}:{zlib.crc32(key.encode()) % 10000:04d}"
+
+    def _capture_plan(self, cursor, query: str, params, stats: QueryStats):
+        """EXPLAIN (ANALYZE, BUFFERS) inside a savepoint, so a failure cannot abort the caller's transaction"""
+        connection = getattr(cursor, 'connection', None)
+        in_transaction = connection is not None and not getattr(connection, 'autocommit', True)
+        try:
+            if in_transaction:
+                cursor.execute('SAVEPOINT query_profiler_explain')
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + query, params)
+            row = cursor.fetchone()
+            plan = row['QUERY PLAN'] if isinstance(row, dict) else row[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            if in_transaction:
+                cursor.execute('RELEASE SAVEPOINT query_profiler_explain')
+        except Exception as e:
+            logger.warning(f"EXPLAIN failed for {stats.label}: {e}")
+            if in_transaction:
+                try:
+                    cursor.execute('ROLLBACK TO SAVEPOINT query_profiler_explain')
+                except Exception:
+                    pass
+            return
+
+        stats.plan = plan[0] if isinstance(plan, list) else plan
+        stats.plan_ms = stats.plan.get('Execution Time')
+        stats.findings = analyze_plan(stats.plan)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def existing_indexes(conn, tables: Sequence[str] = WATCHED_TABLES) -> Dict[str, List[Tuple[str, Tuple[str, ...]]]]:
+        """{table: [(index_name, columns)]} from pg_indexes"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT tablename, indexname, indexdef FROM pg_indexes WHERE tablename = ANY(%s)',
+                           (list(tables),))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        indexes = defaultdict(list)
+        for row in rows:
+            table, name, definition = (row['tablename'], row['indexname'], row['indexdef']) \
+                if isinstance(row, dict) else row
+            match = re.search(r'\((.*)\)', definition)
+            columns = tuple(c.strip().strip('"').split(' ')[0].lower()
+                            for c in match.group(1).split(',')) if match else ()
+            indexes[table].append((name, columns))
+        return dict(indexes)
+
+    def recommendations(self, indexes: Optional[Dict[str, List[Tuple[str, Tuple[str, ...]]]]] = None) -> List[Dict]:
+        """Index candidates on the watched tables, most time at stake first"""
+        candidates: Dict[Tuple[str, Tuple[str, ...]], Dict] = {}
+
+        def candidate(table: str, columns: Tuple[str, ...], stats: QueryStats, evidence: str, weight_s: float,
+                      verified: bool):
+            entry = candidates.setdefault((table, columns), {
+                'table': table, 'columns': list(columns), 'verified': False,
+                'queries': [], 'evidence': [], 'time_at_stake_s': 0.0,
+            })
+            entry['verified'] |= verified
+            if stats.label not in entry['queries']:
+                entry['queries'].append(stats.label)
+            entry['evidence'].append(evidence)
+            entry['time_at_stake_s'] += weight_s
+
+        for stats in self.queries.values():
+            planned = set()
+            for finding in stats.findings:
+                if finding['node'] != 'Seq Scan':
+                    continue
+                scanned = finding['rows'] + finding['rows_removed']
+                repeated = finding['loops'] > 1
+                selective = (finding['rows_removed'] >= MIN_ROWS_REMOVED
+                             and scanned and finding['rows'] / scanned <= SELECTIVE_SCAN)
+                columns = _index_columns(finding['columns'])
+                if not columns or not (repeated or selective):
+                    continue
+                share = finding['time_ms'] / stats.plan_ms if stats.plan_ms else 1.0
+                reason = (f"seq scan kept {finding['rows']:,} of {scanned:,} rows" if selective else
+                          f"seq scan run {finding['loops']:,} times")
+                candidate(finding['table'], columns, stats,
+                          f"{stats.label}: {reason}, {finding['time_ms']:.0f} ms of {stats.plan_ms or 0:.0f} ms",
+                          stats.total_s * min(share, 1.0), verified=True)
+                planned.add(finding['table'])
+
+            # No plan for this table: fall back to the SQL's equality predicates
+            if stats.calls < MIN_UNVERIFIED_CALLS and not stats.slow_calls:
+                continue
+            for table, columns in stats.patterns.items():
+                if table in planned or stats.findings:
+                    continue
+                equality = _index_columns((column, op) for column, ops in columns.items()
+                                          for op in ops if op in _EQUALITY)
+                if equality:
+                    candidate(table, equality, stats,
+                              f"{stats.label}: {stats.calls:,} calls filter on {', '.join(equality)} (no plan)",
+                              stats.total_s, verified=False)
+
+        result = []
+        for (table, columns), entry in candidates.items():
+            covering = [name for name, existing in (indexes or {}).get(table, [])
+                        if existing[:len(columns)] == columns]
+            entry['time_at_stake_s'] = round(entry['time_at_stake_s'], 3)
+            entry['existing_index'] = covering[0] if covering else None
+            name = f"idx_{table}_{'_'.join(columns)}"[:63]
+            entry['sql'] = None if covering else \
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)});"
+            result.append(entry)
+        return sorted(result, key=lambda e: (not e['verified'], -e['time_at_stake_s']))
+
+    def report(self, conn=None) -> Dict:
+        """Per-query stats, access patterns per watched table, and index recommendations"""
+        indexes = None
+        if conn is not None:
+            try:
+                indexes = self.existing_indexes(conn)
+            except Exception as e:
+                logger.warning(f"Could not read existing indexes: {e}")
+
+        access = defaultdict(lambda: defaultdict(lambda: {'operators': set(), 'calls': 0, 'total_s': 0.0}))
+        for stats in self.queries.values():
+            for table, columns in stats.patterns.items():
+                for column, ops in columns.items():
+                    entry = access[table][column]
+                    entry['operators'] |= ops
+                    entry['calls'] += stats.calls
+                    entry['total_s'] += stats.total_s
+
+        queries = sorted(self.queries.values(), key=lambda s: -s.total_s)
+        return {
+            'generated_at': datetime.utcnow().isoformat(),
+            'slow_ms': self.slow_s * 1000,
+            'explain': self.explain,
+            'queries': [stats.to_dict() for stats in queries],
+            'access_patterns': {
+                table: {column: {'operators': sorted(entry['operators']), 'calls': entry['calls'],
+                                 'total_s': round(entry['total_s'], 3)}
+                        for column, entry in sorted(columns.items(), key=lambda item: -item[1]['total_s'])}
+                for table, columns in access.items()
+            },
+            'existing_indexes': {table: [{'name': name, 'columns': list(columns)} for name, columns in rows]
+                                 for table, rows in (indexes or {}).items()},
+            'recommendations': self.recommendations(indexes),
+        }
+
+    def log_summary(self, log: Optional[logging.Logger] = None, top: int = 10):
+        log = log or logger
+        queries = sorted(self.queries.values(), key=lambda s: -s.total_s)[:top]
+        if not queries:
+            return
+        log.info(f"{'Query':<36} {'Calls':>8} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9} {'Rows':>10} {'Slow':>6}")
+        for stats in queries:
+            log.info(f"{stats.label[:36]:<36} {stats.calls:>8,} {stats.total_s:>9.1f} "
+                     f"{stats.total_s / stats.calls * 1000:>9.1f} {stats.max_s * 1000:>9.1f} "
+                     f"{stats.rows:>10,} {stats.slow_calls:>6,}")
+
+    def write_report(self, name: str, conn=None, output_dir: Optional[Path] = None) -> Path:
+        """Write <name>-<time>.json and a readable .txt to logs/query_profiles/"""
+        output_dir = Path(output_dir or DEFAULT_REPORT_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        report = self.report(conn)
+
+        path = output_dir / f"{name}-{stamp}.json"
+        path.write_text(json.dumps(report, indent=2, default=str))
+        path.with_suffix('.txt').write_text('\n'.join(format_report(report)) + '\n')
+        logger.info(f"Query profile: {path} ({len(report['queries'])} queries, "
+                    f"{len(report['recommendations'])} index recommendations)")
+        return path
+
+
+def format_report(report: Dict, top: int = 15) -> List[str]:
+    """Readable summary of report()"""
+    lines = [f"Queries by total time (slow >= {report['slow_ms']:.0f} ms, "
+             f"EXPLAIN {'on' if report['explain'] else 'off'})", '']
+    lines.append(f"  {'Query':<36} {'Calls':>8} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9} {'Rows':>10} {'Slow':>6}")
+    for query in report['queries'][:top]:
+        lines.append(f"  {query['label'][:36]:<36} {query['calls']:>8,} {query['total_s']:>9.1f} "
+                     f"{query['mean_ms']:>9.1f} {query['max_ms']:>9.1f} {query['rows']:>10,} {query['slow_calls']:>6,}")
+
+    lines += ['', 'Access patterns (columns filtered or joined on)']
+    for table, columns in report['access_patterns'].items():
+        lines.append(f"  {table}")
+        for column, entry in columns.items():
+            lines.append(f"    {column:<24} {' '.join(entry['operators']):<16} "
+                         f"{entry['calls']:>8,} calls {entry['total_s']:>9.1f} s")
+
+    lines += ['', 'Index recommendations']
+    if not report['recommendations']:
+        lines.append('  none')
+    for entry in report['recommendations']:
+        status = 'plan' if entry['verified'] else 'unverified'
+        lines.append(f"  [{status}] {entry['table']} ({', '.join(entry['columns'])}) "
+                     f"- {entry['time_at_stake_s']:.1f} s at stake")
+        if entry['existing_index']:
+            lines.append(f"      covered by {entry['existing_index']} - check the planner's estimates (ANALYZE)")
+        else:
+            lines.append(f"      {entry['sql']}")
+        for evidence in entry['evidence'][:3]:
+            lines.append(f"      {evidence}")
+    return lines
+
+
+# ----------------------------------------------------------------------
+# Connections
+# ----------------------------------------------------------------------
+
+def database_url() -> Optional[str]:
+    """Direct PostgreSQL connection string (DATABASE_URL or DIRECT_CONNECTION)"""
+    return os.getenv('DATABASE_URL') or os.getenv('DIRECT_CONNECTION')
+
+
+class ProfiledConnection:
+    """psycopg2 connection whose query() goes through a QueryProfiler (rows as dicts)"""
+
+    def __init__(self, dsn: str, profiler: Optional[QueryProfiler] = None):
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+
+        self.conn = psycopg2.connect(dsn)
+        self.conn.autocommit = True     # Reads only; a failed query must not abort the next one
+        self.cursor_factory = RealDictCursor
+        self.profiler = profiler or QueryProfiler()
+
+    def query(self, query: str, params=None, label: Optional[str] = None) -> List[Dict]:
+        with self.conn.cursor(cursor_factory=self.cursor_factory) as cursor:
+            return [dict(row) for row in self.profiler.execute(cursor, query, params, label)]
+
+    def write_report(self, name: str) -> Path:
+        return self.profiler.write_report(name, self.conn)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,138 @@
+"""
+Resources - Process-wide registry of warm clients and caches
+
+Every fetcher used to build its own RacingAPIClient (HTTP session) and
+SupabaseReferenceClient (connection pool), and a long-running worker built
+all of them again on every scheduled tick. The registry hands out one
+instance of each per process, created on first use and kept warm through
+job_runner.shared():
+
+    api_client()      RacingAPIClient - one keep-alive HTTP session
+    db_client()       SupabaseReferenceClient - one HTTP/2 connection pool
+    api_scheduler()   the process-wide API rate limiter / priority scheduler
+    horse_index()     EntityIndex over ra_mst_horses (known IDs, name lookups)
+
+metric_families() reports scheduler queues and horse index lookups to the
+metrics endpoint (utils.metrics_server).
+
+Clients are safe to share between threads; the per-client statistics
+(api_client().get_stats()) are therefore process totals. clear() drops
+everything (e.g. after rotating credentials); the next use re-creates it.
+
+Usage:
+    from utils import resources
+    self.api_client = resources.api_client()
+    self.db_client = resources.db_client()
+"""
+
+import logging
+import time
+from typing import Dict, List
+
+from config.config import get_config
+from utils.api_client import RacingAPIClient
+from utils.api_scheduler import get_api_scheduler
+from utils.entity_index import EntityIndex
+from utils.job_runner import clear_shared, shared, shared_keys
+from utils.metrics_server import PREFIX, MetricFamily
+from utils.supabase_client import SupabaseReferenceClient
+
+logger = logging.getLogger(__name__)
+
+
+def api_client() -> RacingAPIClient:
+    """Shared Racing API client"""
+    def create():
+        config = get_config()
+        return RacingAPIClient(
+            username=config.api.username,
+            password=config.api.password,
+            base_url=config.api.base_url,
+            timeout=config.api.timeout,
+            max_retries=config.api.max_retries,
+            rate_limit=config.api.rate_limit_per_second
+        )
+    return shared(('resource', 'api_client'), create)
+
+
+def db_client() -> SupabaseReferenceClient:
+    """Shared Supabase client"""
+    def create():
+        config = get_config()
+        return SupabaseReferenceClient(
+            url=config.supabase.url,
+            service_key=config.supabase.service_key,
+            batch_size=config.supabase.batch_size
+        )
+    return shared(('resource', 'db_client'), create)
+
+
+def api_scheduler():
+    """Process-wide API rate limiter"""
+    return get_api_scheduler()
+
+
+def horse_index() -> EntityIndex:
+    """Shared ra_mst_horses index (existing IDs, sire/dam name lookups)"""
+    db = db_client()    # Outside the factory: shared() holds a non-reentrant lock while creating
+    return shared(('resource', 'horse_index'),
+                  lambda: EntityIndex(db, 'ra_mst_horses', region_column='region'))
+
+
+def warm_up() -> float:
+    """Create the shared clients up front; returns seconds taken"""
+    started = time.monotonic()
+    api_client()
+    db_client()
+    horse_index()
+    elapsed = time.monotonic() - started
+    logger.info(f"Shared resources ready in {elapsed:.2f}s")
+    return elapsed
+
+
+def stats() -> Dict:
+    """API, database and index statistics of the shared resources"""
+    return {
+        'api': api_client().get_stats(),
+        'api_scheduler': api_scheduler().metrics(),
+        'db': db_client().get_stats(),
+        'horse_index': dict(horse_index().stats),
+    }
+
+
+def metric_families() -> List[MetricFamily]:
+    """Scheduler queue depths/waits and horse index lookups for the metrics endpoint"""
+    queued = MetricFamily(f'{PREFIX}_api_scheduler_queued', 'gauge', 'API requests waiting for a slot')
+    granted = MetricFamily(f'{PREFIX}_api_scheduler_requests_total', 'counter', 'API request slots granted')
+    throughput = MetricFamily(f'{PREFIX}_api_scheduler_throughput', 'gauge',
+                              'API requests per second over the last minute')
+    wait = MetricFamily(f'{PREFIX}_api_scheduler_wait_seconds', 'summary', 'Wait for an API request slot')
+    for priority, row in api_scheduler().metrics().items():
+        queued.add(row['queued'], priority=priority)
+        granted.add(row['requests'], priority=priority)
+        throughput.add(row['throughput'], priority=priority)
+        wait.add(row['wait_p50'], priority=priority, quantile='0.5')
+        wait.add(row['wait_p95'], priority=priority, quantile='0.95')
+        wait.add(row['wait_mean'] * row['requests'], '_sum', priority=priority)
+        wait.add(row['requests'], '_count', priority=priority)
+    families = [queued, granted, throughput, wait]
+
+    # Only report caches that exist; scraping must not create clients.
+    # Per-cache hit/miss counts (in ids) come from the instrumentation
+    # counters racing_cache_{hits,misses}_total; these count index lookups
+    # and the database queries behind the misses, under their own names.
+    if ('resource', 'horse_index') in shared_keys():
+        stats = horse_index().stats
+        hits = MetricFamily(f'{PREFIX}_horse_index_hits_total', 'counter',
+                            'Horse index lookups answered without a database query')
+        queries = MetricFamily(f'{PREFIX}_horse_index_queries_total', 'counter',
+                               'Database queries made by the horse index on a miss')
+        hits.add(stats['id_hits'], lookup='ids').add(stats['name_hits'], lookup='names')
+        queries.add(stats['id_queries'], lookup='ids').add(stats['name_queries'], lookup='names')
+        families += [hits, queries]
+    return families
+
+
+def clear():
+    """Drop all shared resources and warm objects"""
+    clear_shared()
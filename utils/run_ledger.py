@@ -0,0 +1,282 @@
+"""
+Run Ledger - One structured JSON record per job run, and regression checks
+
+MetadataTracker.record_update() stores row counts per operation, and
+checkpoint/stats JSON files in logs/ are ad hoc per script. The ledger
+appends one JSON line per job run to data/run_ledger.jsonl
+(RACING_RUN_LEDGER overrides) with:
+
+    job, run_id, host, pid, started_at, finished_at, duration_s, status, error
+    api:    calls, bytes, retries (by reason), failures, request_s, rate_limit_wait_s
+    db:     rows_read / rows_written / rows_failed / write_s per table
+    cache:  hits, misses and hit_rate per cache
+    stages: instrumentation timers (count, total_s, mean_ms, p95_ms, max_ms)
+    peak_rss_mb, counts (job-specific result counts)
+
+Everything comes from the instrumentation recorded while the run was open
+(a measure() scope), so runs of different jobs in one process do not mix.
+
+find_regressions() compares a run with the median of the same job's earlier
+runs (e.g. "fetch_results: duration 40% above the 7-day median");
+monitors/compare_runs.py is the command-line front end.
+
+Usage:
+    with track_run('fetch_results') as run:
+        result = fetcher.fetch_and_store(...)
+        run['counts'] = {'races': result['fetched']}
+        run['status'] = 'success' if result['success'] else 'failed'
+"""
+
+import fcntl
+import json
+import logging
+import os
+import resource
+import socket
+import statistics
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from utils.instrumentation import Metrics, measure
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'data', 'run_ledger.jsonl')
+
+# Run metrics compared by find_regressions() (path, label); higher is worse
+COMPARED_METRICS = (
+    ('duration_s', 'duration'),
+    ('api.calls', 'API calls'),
+    ('api.retries_total', 'API retries'),
+    ('api.rate_limit_wait_s', 'rate-limit wait'),
+    ('db.write_s_total', 'DB write time'),
+    ('peak_rss_mb', 'peak RSS'),
+)
+
+DEFAULT_THRESHOLD = 0.25        # Flag runs 25% worse than the median
+DEFAULT_WINDOW_DAYS = 7
+MIN_HISTORY = 3                 # Earlier runs needed before comparing
+MIN_ABSOLUTE = {'duration_s': 5.0, 'api.rate_limit_wait_s': 5.0, 'db.write_s_total': 2.0}
+
+
+def peak_rss_mb() -> float:
+    """Process peak resident set size (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# ----------------------------------------------------------------------
+# Summaries
+# ----------------------------------------------------------------------
+
+def summarize(metrics: Metrics) -> Dict:
+    """api / db / cache / stages sections from a run's instrumentation"""
+    counters, histograms = metrics.snapshot()
+
+    def by_label(name: str, label: str, source: Dict) -> Dict[str, float]:
+        result = {}
+        for (metric, labels), value in source.items():
+            if metric == name:
+                key = dict(labels).get(label, 'all')
+                result[key] = result.get(key, 0) + value
+        return result
+
+    def hist_total(name: str, label: Optional[str] = None) -> Dict[str, float]:
+        return {key: round(value, 3) for key, value in
+                by_label(name, label, {k: h.total for k, h in histograms.items()}).items()}
+
+    def hist_count(name: str) -> int:
+        return sum(h.count for (metric, _), h in histograms.items() if metric == name)
+
+    retries = by_label('api.retries', 'reason', counters)
+    api = {
+        'calls': hist_count('api.request'),
+        'bytes': int(sum(by_label('api.bytes', 'endpoint', counters).values())),
+        'retries': retries,
+        'retries_total': int(sum(retries.values())),
+        'failures': int(sum(by_label('api.failures', 'endpoint', counters).values())),
+        'request_s': round(sum(hist_total('api.request', 'endpoint').values()), 3),
+        'rate_limit_wait_s': round(sum(hist_total('api.rate_limit_wait').values()), 3),
+    }
+
+    write_s = hist_total('db.upsert', 'table')
+    for table, seconds in hist_total('db.insert', 'table').items():
+        write_s[table] = round(write_s.get(table, 0) + seconds, 3)
+    db = {
+        'rows_read': {k: int(v) for k, v in by_label('db.rows_read', 'table', counters).items()},
+        'rows_written': {k: int(v) for k, v in by_label('db.rows_written', 'table', counters).items()},
+        'rows_failed': {k: int(v) for k, v in by_label('db.rows_failed', 'table', counters).items()},
+        'write_s': write_s,
+        'write_s_total': round(sum(write_s.values()), 3),
+    }
+
+    cache = {}
+    hits = by_label('cache.hits', 'cache', counters)
+    misses = by_label('cache.misses', 'cache', counters)
+    for name in sorted(set(hits) | set(misses)):
+        h, m = int(hits.get(name, 0)), int(misses.get(name, 0))
+        cache[name] = {'hits': h, 'misses': m, 'hit_rate': round(h / (h + m), 3) if h + m else None}
+
+    return {'api': api, 'db': db, 'cache': cache, 'stages': metrics.breakdown()['timers']}
+
+
+def metric_value(run: Dict, path: str) -> Optional[float]:
+    """run['api']['calls'] for 'api.calls'"""
+    value = run
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) else None
+
+
+# ----------------------------------------------------------------------
+# Ledger
+# ----------------------------------------------------------------------
+
+class RunLedger:
+    """Append-only JSON-lines file of run records"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('RACING_RUN_LEDGER', DEFAULT_LEDGER_PATH)
+
+    def append(self, record: Dict):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        line = json.dumps(record, default=str, separators=(',', ':')) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(line)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def runs(self, job: Optional[str] = None, since: Optional[datetime] = None,
+             limit: Optional[int] = None) -> List[Dict]:
+        """Runs oldest first, optionally for one job, since a time, at most `limit` (newest)"""
+        if not os.path.exists(self.path):
+            return []
+        cutoff = since.isoformat() if since else None
+        result = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    continue    # Torn line from a crashed writer
+                if job and run.get('job') != job:
+                    continue
+                if cutoff and run.get('started_at', '') < cutoff:
+                    continue
+                result.append(run)
+        return result[-limit:] if limit else result
+
+    def jobs(self) -> List[str]:
+        return sorted({run.get('job') for run in self.runs() if run.get('job')})
+
+    @contextmanager
+    def track(self, job: str, **meta) -> Iterator[Dict]:
+        """
+        Record one run of job; the yielded dict may be given 'status', 'error'
+        and 'counts'. An exception marks the run failed and propagates.
+        """
+        run = {'job': job, 'run_id': uuid.uuid4().hex[:12], 'host': socket.gethostname(), 'pid': os.getpid(),
+               'started_at': datetime.utcnow().isoformat(timespec='seconds'), 'status': None}
+        run.update(meta)
+        started = time.monotonic()
+        with measure() as metrics:
+            try:
+                yield run
+            except SystemExit as e:
+                if e.code not in (None, 0):
+                    run['status'] = 'failed'
+                    run['error'] = run.get('error') or f"exit code {e.code}"
+                raise
+            except BaseException as e:
+                run['status'] = 'failed'
+                run['error'] = run.get('error') or f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                run['finished_at'] = datetime.utcnow().isoformat(timespec='seconds')
+                run['duration_s'] = round(time.monotonic() - started, 3)
+                run['status'] = run['status'] or 'success'
+                run.update(summarize(metrics))
+                run['peak_rss_mb'] = peak_rss_mb()
+                try:
+                    self.append(run)
+                except OSError as e:
+                    logger.warning(f"Could not write run ledger {self.path}: {e}")
+
+
+_ledger: Optional[RunLedger] = None
+
+
+def get_run_ledger() -> RunLedger:
+    global _ledger
+    if _ledger is None:
+        _ledger = RunLedger()
+    return _ledger
+
+
+def track_run(job: str, **meta):
+    """get_run_ledger().track(job) - see RunLedger.track"""
+    return get_run_ledger().track(job, **meta)
+
+
+# ----------------------------------------------------------------------
+# Regressions
+# ----------------------------------------------------------------------
+
+def find_regressions(run: Dict, history: List[Dict], threshold: float = DEFAULT_THRESHOLD,
+                     window_days: int = DEFAULT_WINDOW_DAYS) -> List[Dict]:
+    """
+    Metrics of run that are more than `threshold` above the median of the
+    job's successful runs in the preceding window
+
+    Returns:
+        [{'metric', 'label', 'value', 'median', 'change', 'message'}]
+    """
+    cutoff = (datetime.fromisoformat(run['started_at']) - timedelta(days=window_days)).isoformat()
+    earlier = [r for r in history
+               if r.get('job') == run.get('job') and r.get('run_id') != run.get('run_id')
+               and r.get('status') == 'success' and cutoff <= r.get('started_at', '') < run['started_at']]
+    if len(earlier) < MIN_HISTORY:
+        return []
+
+    regressions = []
+    for path, label in COMPARED_METRICS:
+        value = metric_value(run, path)
+        values = [v for v in (metric_value(r, path) for r in earlier) if v is not None]
+        if value is None or len(values) < MIN_HISTORY:
+            continue
+        median = statistics.median(values)
+        if median <= 0 or value - median < MIN_ABSOLUTE.get(path, 0):
+            continue
+        change = value / median - 1
+        if change > threshold:
+            regressions.append({
+                'metric': path, 'label': label, 'value': value, 'median': median, 'change': round(change, 3),
+                'message': f"{run['job']}: {label} {change:.0%} above the {window_days}-day median "
+                           f"({value:,.1f} vs {median:,.1f}, {len(values)} runs)"
+            })
+
+    # Stages that got slower (only those that matter for the run's duration)
+    for stage, row in (run.get('stages') or {}).items():
+        totals = [r['stages'][stage]['total_s'] for r in earlier if stage in (r.get('stages') or {})]
+        if len(totals) < MIN_HISTORY:
+            continue
+        median = statistics.median(totals)
+        if median > 0 and row['total_s'] - median >= MIN_ABSOLUTE['duration_s'] \
+                and row['total_s'] / median - 1 > threshold:
+            change = row['total_s'] / median - 1
+            regressions.append({
+                'metric': f'stages.{stage}', 'label': stage, 'value': row['total_s'], 'median': median,
+                'change': round(change, 3),
+                'message': f"{run['job']}: stage {stage} {change:.0%} slower than the {window_days}-day median "
+                           f"({row['total_s']:.1f}s vs {median:.1f}s)"
+            })
+    return regressions
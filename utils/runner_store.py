@@ -0,0 +1,321 @@
+"""
+Runner Store - Compact in-memory runner table for statistics calculators
+
+A runner held as a PostgREST dict (string keys, 'jky_123456'-style IDs) costs
+several hundred bytes; 1-2 million of them cost gigabytes. RunnerStore keeps
+the same data as a struct-of-arrays table instead:
+
+- entity IDs (race, horse, jockey, trainer, owner, sire, dam, damsire) are
+  interned to int32 codes via one EntityInterner per entity type
+- position is a uint8 (0 = no position), prize a float64
+- race date is an int32 day ordinal and race class a uint8, stored once
+  per race rather than once per runner
+
+Lookups by entity column use a lazily built CSR index (entity code ->
+contiguous slice of row numbers), so "all runners for jockey X" costs one
+slice instead of a table scan.
+
+The store implements the same two lookups as DatabaseRunnerSource, so the
+workers/statistics calculators run on either:
+
+    store = RunnerStore.from_database(db_client)      # or from_mirror(mirror)
+    calculator = JockeyStatisticsCalculator(db_client, runner_source=store)
+"""
+
+import logging
+import math
+import re
+import sys
+from array import array
+from datetime import date
+from typing import Dict, Iterable, List, Sequence
+
+from utils.combination_engine import EntityInterner
+
+logger = logging.getLogger(__name__)
+
+# Runner ID column -> entity type (interner)
+ENTITY_COLUMNS = {
+    'race_id': 'race',
+    'horse_id': 'horse',
+    'jockey_id': 'jockey',
+    'trainer_id': 'trainer',
+    'owner_id': 'owner',
+    'sire_id': 'sire',
+    'dam_id': 'dam',
+    'damsire_id': 'damsire',
+}
+
+RUNNER_COLUMNS = list(ENTITY_COLUMNS) + ['position', 'prize_won']
+RACE_COLUMNS = ['id', 'date', 'race_class']
+
+NULL_CODE = -1
+
+
+def _parse_race_class(value) -> int:
+    """'Class 4' -> 4 (0 = unknown)"""
+    if value is None:
+        return 0
+    match = re.search(r'\d+', str(value))
+    return int(match.group()) if match else 0
+
+
+def _parse_date_ordinal(value) -> int:
+    """'2024-05-18' -> day ordinal (0 = unknown)"""
+    if not value:
+        return 0
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+class DatabaseRunnerSource:
+    """Runner lookups served by PostgREST queries (the calculators' default)"""
+
+    def __init__(self, db_client):
+        self.db_client = db_client
+
+    def runners(self, column: str, ids: Sequence[str], columns: Sequence[str]) -> List[Dict]:
+        """Runners whose column matches any of ids"""
+        query = self.db_client.client.table('ra_mst_runners').select(', '.join(columns))
+        if len(ids) == 1:
+            query = query.eq(column, ids[0])
+        else:
+            query = query.in_(column, list(ids))
+        return query.execute().data or []
+
+    def race_dates(self, race_ids: Sequence[str]) -> Dict[str, str]:
+        """race_id -> race date ('YYYY-MM-DD')"""
+        if not race_ids:
+            return {}
+        races = self.db_client.client.table('ra_mst_races')\
+            .select('id, date')\
+            .in_('id', list(race_ids))\
+            .execute()
+        return {r['id']: r['date'] for r in races.data}
+
+
+class RunnerStore:
+    """Struct-of-arrays runner table with interned entity IDs"""
+
+    def __init__(self):
+        self.interners: Dict[str, EntityInterner] = {
+            entity_type: EntityInterner() for entity_type in set(ENTITY_COLUMNS.values())
+        }
+        # Per-runner columns
+        self.codes: Dict[str, array] = {column: array('i') for column in ENTITY_COLUMNS}
+        self.position = array('B')
+        self.prize_won = array('d')
+        # Per-race columns, indexed by race code
+        self.race_date = array('i')
+        self.race_class = array('B')
+
+        self._indexes: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def _intern(self, column: str, value) -> int:
+        if not value:
+            return NULL_CODE
+        return self.interners[ENTITY_COLUMNS[column]].intern(value)
+
+    def _race_slot(self, race_code: int):
+        """Grow the per-race arrays to cover race_code"""
+        missing = race_code + 1 - len(self.race_date)
+        if missing > 0:
+            self.race_date.extend([0] * missing)
+            self.race_class.extend([0] * missing)
+
+    def add_runner(self, runner: Dict):
+        """Append one runner row"""
+        for column, codes in self.codes.items():
+            codes.append(self._intern(column, runner.get(column)))
+
+        position = runner.get('position')
+        try:
+            position = int(position) if position is not None else 0
+        except (TypeError, ValueError):
+            position = 0
+        self.position.append(position if 0 < position < 256 else 0)
+
+        prize = runner.get('prize_won')
+        try:
+            self.prize_won.append(float(prize) if prize is not None else math.nan)
+        except (TypeError, ValueError):
+            self.prize_won.append(math.nan)
+
+        self._indexes.clear()
+
+    def add_race(self, race: Dict):
+        """Record race-level columns for one race"""
+        race_code = self._intern('race_id', race.get('id'))
+        if race_code == NULL_CODE:
+            return
+        self._race_slot(race_code)
+        self.race_date[race_code] = _parse_date_ordinal(race.get('date'))
+        self.race_class[race_code] = _parse_race_class(race.get('race_class'))
+
+    def finalize(self):
+        """Make sure every race referenced by a runner has a race slot"""
+        self._race_slot(len(self.interners['race']) - 1)
+
+    @classmethod
+    def from_rows(cls, runners: Iterable[Dict], races: Iterable[Dict]) -> 'RunnerStore':
+        """Build a store from runner and race dicts"""
+        store = cls()
+        for runner in runners:
+            store.add_runner(runner)
+        for race in races:
+            store.add_race(race)
+        store.finalize()
+        return store
+
+    @classmethod
+    def from_database(cls, db_client, page_size: int = 1000) -> 'RunnerStore':
+        """
+        Load every runner and race with keyset-paginated scans
+
+        Each page continues after the last id seen (id > last ORDER BY id),
+        so a page costs an index range scan rather than an offset skip, and
+        rows inserted during the load can't shift rows between pages.
+
+        Args:
+            db_client: SupabaseReferenceClient instance
+            page_size: Rows per page (max 1000 for PostgREST)
+        """
+        store = cls()
+        for table, columns, add in (('ra_mst_runners', RUNNER_COLUMNS, store.add_runner),
+                                    ('ra_mst_races', RACE_COLUMNS, store.add_race)):
+            select = ', '.join(dict.fromkeys(['id'] + columns))
+            last_id = None
+            loaded = 0
+            while True:
+                query = db_client.client.table(table).select(select)
+                if last_id is not None:
+                    query = query.gt('id', last_id)
+                response = query.order('id').limit(page_size).execute()
+                page = response.data or []
+                for row in page:
+                    add(row)
+                loaded += len(page)
+                if len(page) < page_size:
+                    break
+                last_id = page[-1]['id']
+            logger.debug(f"Loaded {table}: {loaded} rows")
+
+        store.finalize()
+        logger.info(f"Runner store loaded: {len(store)} runners, {store.memory_usage()['total_mb']} MB")
+        return store
+
+    @classmethod
+    def from_mirror(cls, mirror) -> 'RunnerStore':
+        """
+        Load from a local AnalyticsMirror, one partition at a time
+
+        Args:
+            mirror: utils.analytics_mirror.AnalyticsMirror
+        """
+        store = cls()
+        for _, rows, data in mirror.read_columns('ra_mst_runners', RUNNER_COLUMNS):
+            names = list(data)
+            for i in range(rows):
+                store.add_runner({name: data[name][i] for name in names})
+        for race in mirror.scan('ra_mst_races', RACE_COLUMNS):
+            store.add_race(race)
+
+        store.finalize()
+        logger.info(f"Runner store loaded from mirror: {len(store)} runners, {store.memory_usage()['total_mb']} MB")
+        return store
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _index(self, column: str):
+        """CSR index for an entity column: (offsets, rows) so code c owns rows[offsets[c]:offsets[c+1]]"""
+        index = self._indexes.get(column)
+        if index is None:
+            codes = self.codes[column]
+            offsets = array('I', [0]) * (len(self.interners[ENTITY_COLUMNS[column]]) + 1)
+            for code in codes:
+                if code >= 0:
+                    offsets[code + 1] += 1
+            for i in range(1, len(offsets)):
+                offsets[i] += offsets[i - 1]
+
+            rows = array('I', [0]) * offsets[-1]
+            fill = array('I', offsets)
+            for row, code in enumerate(codes):
+                if code >= 0:
+                    rows[fill[code]] = row
+                    fill[code] += 1
+
+            index = self._indexes[column] = (offsets, rows)
+        return index
+
+    def rows_for(self, column: str, ids: Sequence[str]) -> List[int]:
+        """Row numbers of runners whose column matches any of ids"""
+        offsets, rows = self._index(column)
+        codes = self.interners[ENTITY_COLUMNS[column]].codes
+        result = []
+        for entity_id in ids:
+            code = codes.get(entity_id)
+            if code is not None:
+                result.extend(rows[offsets[code]:offsets[code + 1]])
+        return result
+
+    def value(self, column: str, row: int):
+        """Decoded value of one cell"""
+        if column in self.codes:
+            code = self.codes[column][row]
+            return self.interners[ENTITY_COLUMNS[column]].lookup(code) if code >= 0 else None
+        if column == 'position':
+            return self.position[row] or None
+        if column == 'prize_won':
+            prize = self.prize_won[row]
+            return None if math.isnan(prize) else prize
+        raise KeyError(f"Column not in runner store: {column}")
+
+    def runners(self, column: str, ids: Sequence[str], columns: Sequence[str]) -> List[Dict]:
+        """Runners whose column matches any of ids, as dicts (DatabaseRunnerSource compatible)"""
+        return [{c: self.value(c, row) for c in columns} for row in self.rows_for(column, ids)]
+
+    def race_dates(self, race_ids: Sequence[str]) -> Dict[str, str]:
+        """race_id -> race date ('YYYY-MM-DD') (DatabaseRunnerSource compatible)"""
+        codes = self.interners['race'].codes
+        result = {}
+        for race_id in race_ids:
+            code = codes.get(race_id)
+            if code is not None and self.race_date[code]:
+                result[race_id] = date.fromordinal(self.race_date[code]).isoformat()
+        return result
+
+    # ------------------------------------------------------------------
+    # Diagnostics
+    # ------------------------------------------------------------------
+
+    def memory_usage(self) -> Dict:
+        """Approximate bytes used by columns, indexes and interners"""
+        columns = sum(a.itemsize * len(a) for a in self.codes.values())
+        columns += sum(a.itemsize * len(a) for a in (self.position, self.prize_won, self.race_date, self.race_class))
+        indexes = sum(o.itemsize * len(o) + r.itemsize * len(r) for o, r in self._indexes.values())
+        interners = 0
+        for interner in self.interners.values():
+            interners += sys.getsizeof(interner.codes) + sys.getsizeof(interner.values)
+            interners += sum(sys.getsizeof(v) for v in interner.values)
+
+        total = columns + indexes + interners
+        return {
+            'columns': columns,
+            'indexes': indexes,
+            'interners': interners,
+            'total': total,
+            'total_mb': round(total / 1024 / 1024, 1),
+            'bytes_per_runner': round(total / len(self), 1) if len(self) else 0
+        }
@@ -0,0 +1,308 @@
+"""
+Stage DAG - Dependency-aware parallel execution of ingestion/population stages
+
+Each Stage declares the tables it reads (inputs) and writes (outputs) plus the
+shared resources it consumes ('api', 'db'). Dependencies are derived from
+those declarations:
+
+- B depends on A if B reads a table A writes
+- if A and B write the same table, the one declared later waits for the
+  earlier one (keeps upserts to a table in their original order)
+
+Independent stages run concurrently, limited by per-resource budgets (e.g.
+one Racing API consumer at a time because of the account's rate limit, a few
+concurrent database writers). By default a stage whose upstream failed is
+skipped; with skip_on_failure=False it still runs, after its upstream finishes.
+
+The run report gives per-stage timings, the critical path (the chain of
+dependent stages that determined the wall-clock time) and the speed-up over
+running the same stages serially.
+
+Usage:
+    dag = StageDAG(budgets={'api': 1, 'db': 4})
+    dag.add(Stage('courses', fetch_courses, outputs=['ra_mst_courses'], resources=['api', 'db']))
+    dag.add(Stage('bookmakers', fetch_bookmakers, outputs=['ra_mst_bookmakers'], resources=['db']))
+    dag.add(Stage('races', fetch_races, inputs=['ra_mst_courses'], outputs=['ra_mst_races'], resources=['api', 'db']))
+    report = dag.run()
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from utils.api_budget import charged_to, usage_label
+from utils.api_scheduler import api_priority, current_priority
+from utils.instrumentation import bound_scopes, current_scopes
+from utils.job_runner import bound_job, current_job
+
+logger = logging.getLogger(__name__)
+
+# Default concurrency per shared resource
+DEFAULT_BUDGETS = {
+    'api': 1,   # Racing API rate limit is per account, not per client
+    'db': 4,
+}
+
+
+@dataclass
+class Stage:
+    """One unit of work in the DAG"""
+    name: str
+    func: Callable[[], Dict]
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+    resources: Sequence[str] = ()
+    after: Sequence[str] = ()       # Explicit extra dependencies (stage names)
+    description: str = ''
+
+
+@dataclass
+class StageResult:
+    """Outcome and timings of one stage"""
+    name: str
+    status: str = 'pending'         # success / failed / skipped
+    result: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+    ready_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def waited(self) -> float:
+        """Time spent ready but waiting for a resource budget"""
+        if self.ready_at is None or self.started_at is None:
+            return 0.0
+        return self.started_at - self.ready_at
+
+
+class StageDAG:
+    """Runs stages in dependency order with bounded concurrency"""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, max_workers: int = 8,
+                 skip_on_failure: bool = True):
+        """
+        Initialize DAG
+
+        Args:
+            budgets: Max concurrent stages per resource (merged over DEFAULT_BUDGETS)
+            max_workers: Max stages running at once
+            skip_on_failure: Skip stages whose upstream failed (False = run them anyway,
+                e.g. when existing data from a previous run is good enough)
+        """
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.max_workers = max_workers
+        self.skip_on_failure = skip_on_failure
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, stage: Stage) -> Stage:
+        """Add a stage (declaration order breaks write-write ties)"""
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        self.stages[stage.name] = stage
+        return stage
+
+    def dependencies(self) -> Dict[str, List[str]]:
+        """stage name -> names of stages it waits for"""
+        deps: Dict[str, List[str]] = {name: [] for name in self.stages}
+        names = list(self.stages)
+
+        for i, name in enumerate(names):
+            stage = self.stages[name]
+            for other_name in names:
+                if other_name == name:
+                    continue
+                other = self.stages[other_name]
+                reads_output = set(stage.inputs) & set(other.outputs)
+                writes_same = set(stage.outputs) & set(other.outputs) and names.index(other_name) < i
+                if reads_output or writes_same:
+                    deps[name].append(other_name)
+
+            for other_name in stage.after:
+                if other_name not in self.stages:
+                    raise ValueError(f"Stage {name} depends on unknown stage {other_name}")
+                if other_name not in deps[name]:
+                    deps[name].append(other_name)
+
+        self._check_acyclic(deps)
+        return deps
+
+    @staticmethod
+    def _check_acyclic(deps: Dict[str, List[str]]):
+        state: Dict[str, int] = {}
+
+        def visit(name: str, path: List[str]):
+            if state.get(name) == 1:
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for dep in deps[name]:
+                visit(dep, path + [name])
+            state[name] = 2
+
+        for name in deps:
+            visit(name, [])
+
+    def run(self) -> 'DagReport':
+        """Execute all stages and return the run report"""
+        deps = self.dependencies()
+        for stage in self.stages.values():
+            unknown = [r for r in stage.resources if r not in self.budgets]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} uses unbudgeted resource(s): {', '.join(unknown)}")
+
+        semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in self.budgets.items()}
+        results = {name: StageResult(name) for name in self.stages}
+        remaining = {name: set(d) for name, d in deps.items()}
+        origin = time.monotonic()
+        job = current_job()     # Stage threads inherit the caller's job deadline
+        priority = current_priority()   # ... and API priority class
+        label = usage_label()           # ... and API usage label
+        scopes = current_scopes()       # ... and instrumentation scopes
+
+        def execute(stage: Stage):
+            record = results[stage.name]
+            held = []
+            try:
+                # Acquire in a fixed order so two stages can never deadlock
+                for resource in sorted(set(stage.resources)):
+                    semaphores[resource].acquire()
+                    held.append(resource)
+                record.started_at = time.monotonic() - origin
+                logger.info(f"[dag] START {stage.name}")
+
+                with bound_job(job), api_priority(priority), charged_to(label), bound_scopes(scopes):
+                    result = stage.func() or {}
+                record.result = result
+                if result.get('success', True):
+                    record.status = 'success'
+                else:
+                    record.status = 'failed'
+                    record.error = result.get('error') or 'stage reported failure'
+            except Exception as e:
+                logger.error(f"[dag] {stage.name} raised: {e}", exc_info=True)
+                record.status = 'failed'
+                record.error = str(e)
+            finally:
+                record.finished_at = time.monotonic() - origin
+                for resource in held:
+                    semaphores[resource].release()
+            logger.info(f"[dag] {record.status.upper()} {stage.name} ({record.duration:.1f}s)")
+
+        wall_start = datetime.utcnow()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage') as pool:
+            running = {}
+
+            def submit_ready():
+                for name in list(remaining):
+                    if remaining[name]:
+                        continue
+                    del remaining[name]
+                    failed_upstream = [d for d in deps[name] if results[d].status != 'success']
+                    if failed_upstream and self.skip_on_failure:
+                        results[name].status = 'skipped'
+                        results[name].error = f"upstream failed: {', '.join(failed_upstream)}"
+                        logger.warning(f"[dag] SKIP {name} ({results[name].error})")
+                        release(name)
+                        continue
+                    results[name].ready_at = time.monotonic() - origin
+                    running[pool.submit(execute, self.stages[name])] = name
+
+            def release(done: str):
+                for name in remaining:
+                    remaining[name].discard(done)
+
+            submit_ready()
+            while running or remaining:
+                if not running:
+                    # Only reachable if skips unblocked more stages
+                    submit_ready()
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    release(running.pop(future))
+                submit_ready()
+
+        return DagReport(results, deps, wall_start, time.monotonic() - origin, self.stages)
+
+
+class DagReport:
+    """Timings, critical path and outcome of a DAG run"""
+
+    def __init__(self, results: Dict[str, StageResult], deps: Dict[str, List[str]],
+                 started: datetime, wall_seconds: float, stages: Dict[str, Stage]):
+        self.results = results
+        self.deps = deps
+        self.started = started
+        self.wall_seconds = wall_seconds
+        self.stages = stages
+
+    @property
+    def success(self) -> bool:
+        return all(r.status == 'success' for r in self.results.values())
+
+    def critical_path(self) -> List[str]:
+        """Chain of dependent stages with the largest total duration"""
+        best: Dict[str, tuple] = {}
+
+        def longest(name: str) -> tuple:
+            if name not in best:
+                upstream = [longest(d) for d in self.deps[name]]
+                total, path = max(upstream, default=(0.0, []))
+                best[name] = (total + self.results[name].duration, path + [name])
+            return best[name]
+
+        return max((longest(name) for name in self.results), default=(0.0, []))[1]
+
+    def to_dict(self) -> Dict:
+        serial = sum(r.duration for r in self.results.values())
+        path = self.critical_path()
+        return {
+            'started': self.started.isoformat(),
+            'wall_seconds': round(self.wall_seconds, 2),
+            'serial_seconds': round(serial, 2),
+            'speedup': round(serial / self.wall_seconds, 2) if self.wall_seconds > 0 else None,
+            'critical_path': path,
+            'critical_path_seconds': round(sum(self.results[n].duration for n in path), 2),
+            'stages': {
+                name: {
+                    'status': r.status,
+                    'start': round(r.started_at, 2) if r.started_at is not None else None,
+                    'duration': round(r.duration, 2),
+                    'waited_for_budget': round(r.waited, 2),
+                    'depends_on': self.deps[name],
+                    'resources': list(self.stages[name].resources),
+                    'error': r.error,
+                }
+                for name, r in self.results.items()
+            }
+        }
+
+    def log(self, log: Optional[logging.Logger] = None):
+        """Write the run report to a logger"""
+        log = log or logger
+        report = self.to_dict()
+
+        log.info("=" * 80)
+        log.info("STAGE RUN REPORT")
+        log.info("=" * 80)
+        log.info(f"{'Stage':<28} {'Status':<8} {'Start':>8} {'Duration':>9} {'Waited':>8}")
+        for name, stage in sorted(report['stages'].items(), key=lambda kv: kv[1]['start'] or 0):
+            start = f"{stage['start']:.1f}s" if stage['start'] is not None else '-'
+            log.info(f"{name:<28} {stage['status']:<8} {start:>8} {stage['duration']:>8.1f}s "
+                     f"{stage['waited_for_budget']:>7.1f}s")
+        log.info(f"\nWall time: {report['wall_seconds']}s (serial: {report['serial_seconds']}s, "
+                 f"speed-up x{report['speedup']})")
+        log.info(f"Critical path ({report['critical_path_seconds']}s): {' -> '.join(report['critical_path'])}")
+        log.info("=" * 80)
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Any
 from supabase import create_client, Client
 from datetime import datetime
 
+from utils.instrumentation import SIZE_BUCKETS, count, observe, timer
+
 logger = logging.getLogger(__name__)
 
 
@@ -103,17 +105,21 @@ class SupabaseReferenceClient:
 
             try:
                 # Upsert with on_conflict handling
-                result = self.client.table(table).upsert(
-                    batch,
-                    on_conflict=unique_key
-                ).execute()
+                with timer('db.upsert', table=table):
+                    result = self.client.table(table).upsert(
+                        batch,
+                        on_conflict=unique_key
+                    ).execute()
 
                 # Count as successful
                 batch_stats['inserted'] += len(batch)
-                logger.debug(f"Upserted {len(batch)} records to {table}")
+                count('db.rows_written', len(batch), table=table)
+                observe('db.batch_rows', len(batch), SIZE_BUCKETS, table=table)
+                logger.debug("Upserted %d records to %s", len(batch), table)
 
             except Exception as e:
                 batch_stats['errors'] += len(batch)
+                count('db.rows_failed', len(batch), table=table)
                 logger.error(f"Error upserting batch to {table}: {e}")
 
         return batch_stats
@@ -144,18 +150,95 @@ class SupabaseReferenceClient:
 
             try:
                 # Simple insert without ON CONFLICT
-                result = self.client.table(table).insert(batch).execute()
+                with timer('db.insert', table=table):
+                    result = self.client.table(table).insert(batch).execute()
 
                 # Count as successful
                 batch_stats['inserted'] += len(batch)
-                logger.debug(f"Inserted {len(batch)} records to {table}")
+                count('db.rows_written', len(batch), table=table)
+                logger.debug("Inserted %d records to %s", len(batch), table)
 
             except Exception as e:
                 batch_stats['errors'] += len(batch)
+                count('db.rows_failed', len(batch), table=table)
                 logger.error(f"Error inserting batch to {table}: {e}")
 
         return batch_stats
 
+    # Columns rewritten on every fetch - ignored when diffing against stored rows
+    VOLATILE_COLUMNS = {'created_at', 'updated_at', 'result_updated_at', 'fetched_at'}
+
+    def filter_changed(self, table: str, records: List[Dict], unique_key: str = 'id',
+                       preserve: tuple = (), include_changed: bool = True) -> List[Dict]:
+        """
+        Keep only records that are new or differ from the stored row
+
+        Args:
+            table: Table name
+            records: Records about to be written
+            unique_key: Key column(s), comma separated
+            preserve: Columns whose stored value wins when set (e.g. has_result,
+                which racecard records always carry as False)
+            include_changed: False = only records with no stored row at all
+
+        Returns:
+            Records to write (preserved columns filled from the stored row)
+        """
+        if not records:
+            return []
+
+        key_columns = unique_key.split(',')
+        columns = set(key_columns)
+        for record in records:
+            columns.update(record)
+        columns -= self.VOLATILE_COLUMNS
+
+        stored = {}
+        first_keys = sorted({r.get(key_columns[0]) for r in records if r.get(key_columns[0]) is not None})
+        for i in range(0, len(first_keys), 100):
+            offset = 0
+            while True:
+                with timer('db.diff_read', table=table):
+                    response = self.client.table(table)\
+                        .select(', '.join(sorted(columns)))\
+                        .in_(key_columns[0], first_keys[i:i + 100])\
+                        .range(offset, offset + 999)\
+                        .execute()
+                count('db.rows_read', len(response.data or []), table=table)
+                for row in response.data or []:
+                    stored[tuple(row.get(k) for k in key_columns)] = row
+                if len(response.data or []) < 1000:
+                    break
+                offset += 1000
+
+        to_write = []
+        for record in records:
+            row = stored.get(tuple(record.get(k) for k in key_columns))
+            if row is None:
+                to_write.append(record)
+                continue
+            if not include_changed:
+                continue
+            record = dict(record)
+            for column in preserve:
+                if row.get(column):
+                    record[column] = row[column]
+            if any(not _same_value(value, row.get(column))
+                   for column, value in record.items() if column not in self.VOLATILE_COLUMNS):
+                to_write.append(record)
+
+        count('db.diff_skipped', len(records) - len(to_write), table=table)
+        logger.debug("%s: %d of %d records new or changed", table, len(to_write), len(records))
+        return to_write
+
+    def upsert_changed(self, table: str, records: List[Dict], unique_key: str = 'id',
+                       preserve: tuple = ()) -> Dict:
+        """Upsert only records that are new or differ from the stored row (see filter_changed)"""
+        changed = self.filter_changed(table, records, unique_key, preserve)
+        stats = self.upsert_batch(table, changed, unique_key) if changed else {'inserted': 0, 'updated': 0, 'errors': 0}
+        stats['unchanged'] = len(records) - len(changed)
+        return stats
+
     def insert_courses(self, courses: List[Dict]) -> Dict:
         """
         Insert/update courses with coordinate preservation
@@ -330,3 +413,25 @@ class SupabaseReferenceClient:
             'errors': 0,
             'skipped': 0
         }
+
+
+def _same_value(a, b) -> bool:
+    """Compare a record value with its stored counterpart, tolerating PostgREST typing"""
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return a == b
+    if isinstance(a, bool) or isinstance(b, bool):
+        return str(a).lower() == str(b).lower()
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        pass
+    if a == b or str(a) == str(b):
+        return True
+    # Timestamps come back normalised to UTC
+    try:
+        return datetime.fromisoformat(str(a).replace('Z', '+00:00')) == \
+            datetime.fromisoformat(str(b).replace('Z', '+00:00'))
+    except ValueError:
+        return False
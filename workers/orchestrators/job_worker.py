@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Job Queue Worker
+Shares backfill and statistics work between worker processes and hosts
+through the durable job queue (utils/job_queue.py).
+
+Producers enqueue idempotent jobs (re-running an enqueue command never
+duplicates work); any number of workers claim them with a lease, heartbeat
+while running, and retry failures with backoff. A worker that dies loses its
+lease and its job is picked up by another worker.
+
+Job types:
+    fetch  - one fetcher over a date range (ReferenceDataOrchestrator)
+    script - a worker script through the job runner (in-process when registered)
+
+Usage:
+    # Queue a monthly-sharded races/results backfill
+    python3 workers/orchestrators/job_worker.py enqueue-backfill --entities races results \\
+        --start-date 2015-01-01 --end-date 2025-12-31
+
+    # Queue all statistics calculators for today
+    python3 workers/orchestrators/job_worker.py enqueue-statistics
+
+    # Run a worker (start one per process/host)
+    python3 workers/orchestrators/job_worker.py work
+    python3 workers/orchestrators/job_worker.py work --types fetch --poll 30
+
+    # Queue status
+    python3 workers/orchestrators/job_worker.py status
+"""
+
+import os
+import sys
+import argparse
+import signal
+import threading
+import yaml
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config.config import get_config
+from utils.logger import get_logger
+from utils.job_runner import JobRunner
+from utils.job_queue import JobWorker, get_job_queue, idempotency_key
+from utils.chunk_ledger import monthly_chunks
+from utils.api_scheduler import api_priority
+
+logger = get_logger('job_worker')
+
+STATISTICS_SCRIPTS = [
+    'workers/statistics/calculate_jockey_statistics.py',
+    'workers/statistics/calculate_trainer_statistics.py',
+    'workers/statistics/calculate_owner_statistics.py',
+    'workers/statistics/calculate_sire_statistics.py',
+    'workers/statistics/calculate_dam_statistics.py',
+    'workers/statistics/calculate_damsire_statistics.py',
+]
+
+# Entities whose fetchers take start_date/end_date
+DATE_RANGE_ENTITIES = ['races', 'results']
+
+
+def load_queue_settings() -> Tuple[Dict, str]:
+    """The scheduler config's `queue` section and the project root"""
+    config = get_config()
+    root_dir = str(config.paths.base_dir)
+    try:
+        with open(os.path.join(root_dir, 'config', 'scheduler_config.yaml')) as f:
+            return (yaml.safe_load(f) or {}).get('queue', {}), root_dir
+    except Exception as e:
+        logger.warning(f"Could not read queue settings, using defaults: {e}")
+        return {}, root_dir
+
+
+# ----------------------------------------------------------------------
+# Handlers
+# ----------------------------------------------------------------------
+
+class JobHandlers:
+    """Handlers for the job types this worker runs (fetchers are created once per process)"""
+
+    def __init__(self, root_dir: str):
+        self.job_runner = JobRunner(root_dir=root_dir)
+        self._orchestrator = None
+
+    @property
+    def orchestrator(self):
+        if self._orchestrator is None:
+            from main import ReferenceDataOrchestrator
+            self._orchestrator = ReferenceDataOrchestrator()
+        return self._orchestrator
+
+    def fetch(self, payload: Dict) -> Dict:
+        """{'entity', 'start_date', 'end_date', ...fetcher options}"""
+        entity = payload['entity']
+        options = {k: v for k, v in payload.items() if k != 'entity'}
+        with api_priority('backfill'):
+            results = self.orchestrator.run_fetch(entities=[entity], custom_configs={entity: options})
+        result = results.get(entity, {})
+        return {
+            'success': result.get('success', False),
+            'fetched': result.get('fetched', 0),
+            'inserted': result.get('inserted', 0),
+            'error': result.get('error')
+        }
+
+    def script(self, payload: Dict) -> Dict:
+        """{'script', 'args', 'timeout'}"""
+        return self.job_runner.run(payload['script'], payload.get('args', []), timeout=payload.get('timeout'))
+
+    def as_dict(self) -> Dict:
+        return {'fetch': self.fetch, 'script': self.script}
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+
+def enqueue_backfill(queue, settings: Dict, entities: List[str], start: date, end: date,
+                     concurrency_key: Optional[str] = None) -> Dict:
+    """Queue one fetch job per entity and calendar month"""
+    queued = existing = 0
+    for entity in entities:
+        for chunk_start, chunk_end in monthly_chunks(start, end):
+            job_id = queue.enqueue(
+                'fetch',
+                {'entity': entity, 'start_date': chunk_start.isoformat(), 'end_date': chunk_end.isoformat()},
+                idempotency_key=idempotency_key('fetch', entity, chunk_start.isoformat(), chunk_end.isoformat()),
+                concurrency_key=concurrency_key,
+                max_attempts=settings.get('max_attempts', 3)
+            )
+            if job_id is None:
+                existing += 1
+            else:
+                queued += 1
+    logger.info(f"Backfill {', '.join(entities)} {start} to {end}: {queued} job(s) queued, "
+                f"{existing} already in the queue")
+    return {'queued': queued, 'existing': existing}
+
+
+def enqueue_statistics(queue, settings: Dict, run_date: str, timeout: int) -> Dict:
+    """Queue every statistics calculator once for run_date"""
+    queued = existing = 0
+    for script in STATISTICS_SCRIPTS:
+        name = os.path.splitext(os.path.basename(script))[0]
+        job_id = queue.enqueue(
+            'script',
+            {'script': script, 'args': [], 'timeout': timeout},
+            idempotency_key=idempotency_key('script', name, run_date),
+            concurrency_key=name,
+            max_attempts=settings.get('max_attempts', 3)
+        )
+        if job_id is None:
+            existing += 1
+        else:
+            queued += 1
+    logger.info(f"Statistics for {run_date}: {queued} job(s) queued, {existing} already in the queue")
+    return {'queued': queued, 'existing': existing}
+
+
+def work(queue, settings: Dict, root_dir: str, job_types: Optional[List[str]], poll: float,
+         max_jobs: Optional[int]) -> Dict:
+    """Claim and run jobs until the queue is empty (or forever with --poll)"""
+    handlers = JobHandlers(root_dir).as_dict()
+    worker = JobWorker(
+        queue, handlers,
+        lease_seconds=settings.get('lease_seconds', 120),
+        heartbeat_seconds=settings.get('heartbeat_seconds', 30)
+    )
+
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info("Stop requested - finishing the current job")
+        stop.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info(f"Worker {worker.worker_id} started (types: {', '.join(job_types or handlers)})")
+    outcomes = worker.run(max_jobs=max_jobs, poll_interval=poll, job_types=job_types, stop=stop)
+    logger.info(f"Worker {worker.worker_id} finished: {len(outcomes)} job(s), {worker.stats}")
+    return worker.stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Durable job queue producer and worker')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    backfill = sub.add_parser('enqueue-backfill', help='Queue monthly fetch jobs for a date range')
+    backfill.add_argument('--entities', nargs='+', default=DATE_RANGE_ENTITIES, choices=DATE_RANGE_ENTITIES)
+    backfill.add_argument('--start-date', required=True, help='YYYY-MM-DD')
+    backfill.add_argument('--end-date', help='YYYY-MM-DD (default: yesterday)')
+    backfill.add_argument('--concurrency-key', help='Run these jobs one at a time across all workers '
+                                                    '(e.g. racing_api to respect the account rate limit)')
+
+    stats = sub.add_parser('enqueue-statistics', help='Queue all statistics calculators')
+    stats.add_argument('--date', help='Run date used as idempotency key (default: today)')
+    stats.add_argument('--timeout', type=int, default=3600)
+
+    worker = sub.add_parser('work', help='Claim and run jobs')
+    worker.add_argument('--types', nargs='+', choices=['fetch', 'script'], help='Job types to claim')
+    worker.add_argument('--poll', type=float, default=0,
+                        help='Seconds between polls when idle (default: exit when the queue is empty)')
+    worker.add_argument('--max-jobs', type=int, help='Exit after this many jobs')
+
+    sub.add_parser('status', help='Job counts per status')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings, root_dir = load_queue_settings()
+    queue = get_job_queue(settings, root_dir)
+
+    try:
+        if args.command == 'enqueue-backfill':
+            start = datetime.strptime(args.start_date, '%Y-%m-%d').date()
+            end = (datetime.strptime(args.end_date, '%Y-%m-%d').date() if args.end_date
+                   else date.today() - timedelta(days=1))
+            enqueue_backfill(queue, settings, args.entities, start, end, args.concurrency_key)
+
+        elif args.command == 'enqueue-statistics':
+            enqueue_statistics(queue, settings, args.date or date.today().isoformat(), args.timeout)
+
+        elif args.command == 'work':
+            stats = work(queue, settings, root_dir, args.types, args.poll, args.max_jobs)
+            sys.exit(1 if stats['failed'] else 0)
+
+        elif args.command == 'status':
+            counts = queue.counts()
+            for status in ('pending', 'running', 'done', 'failed', 'cancelled'):
+                logger.info(f"{status:<10} {counts.get(status, 0)}")
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -42,6 +42,10 @@ Usage:
 
     # Status report only (no execution)
     python3 scripts/population_workers/master_populate_all_ra_tables.py --status
+
+Full population runs as a dependency graph (utils/stage_dag.py): scripts
+that produce several tables run once, and database-only calculators whose
+inputs are ready run concurrently (--db-concurrency, default 4).
 """
 
 import sys
@@ -50,13 +54,14 @@ import json
 import argparse
 from datetime import datetime
 from typing import Dict, List, Optional
-import subprocess
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.stage_dag import Stage, StageDAG
+from utils.job_runner import JobRunner
 
 logger = get_logger('master_population')
 
@@ -243,17 +248,40 @@ POPULATION_SCRIPTS = {
     }
 }
 
+# Tables each category reads and the shared resources its scripts use (for run_all's StageDAG)
+CATEGORY_STAGE_IO = {
+    'core': {
+        'inputs': [],
+        'resources': ['api', 'db']
+    },
+    'pedigree': {
+        'inputs': ['ra_mst_horses', 'ra_mst_runners', 'ra_mst_races', 'ra_mst_race_results'],
+        'resources': ['db']
+    },
+    'statistics': {
+        'inputs': ['ra_mst_runners', 'ra_mst_races', 'ra_mst_race_results'],
+        'resources': ['db']
+    },
+    'supplementary': {
+        'inputs': ['ra_mst_runners', 'ra_mst_races', 'ra_mst_race_results', 'ra_mst_horses',
+                   'ra_mst_jockeys', 'ra_mst_trainers', 'ra_mst_owners'],
+        'resources': ['db']
+    },
+}
+
 
 class MasterPopulator:
     """Master coordinator for populating all ra_ tables"""
 
-    def __init__(self, test_mode: bool = False):
+    def __init__(self, test_mode: bool = False, budgets: Optional[Dict[str, int]] = None):
         self.config = get_config()
         self.db = SupabaseReferenceClient(
             self.config.supabase.url,
             self.config.supabase.service_key
         )
         self.test_mode = test_mode
+        self.budgets = budgets
+        self.job_runner = JobRunner()   # Registered scripts run in-process, others as subprocesses
         self.results = {}
 
     def get_table_status(self, table: str) -> Dict:
@@ -292,49 +320,31 @@ class MasterPopulator:
         logger.info(f"Running: {description}")
         logger.info(f"Script: {script}")
 
+        # Split "path --flags" into the script and its arguments
+        parts = script.split()
+        if parts[0] == 'python3':
+            parts = parts[1:]
+        script_path, args = parts[0], parts[1:]
+
+        if self.test_mode and '--test' not in args:
+            args.append('--test')
+
         try:
-            # Build command
-            if script.startswith('python3') or script.endswith('.py'):
-                cmd = f"python3 {script}" if not script.startswith('python3') else script
-            else:
-                cmd = f"python3 {script}"
-
-            if self.test_mode and '--test' not in cmd:
-                cmd += ' --test'
-
-            # Execute
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=3600  # 1 hour timeout
-            )
-
-            if result.returncode == 0:
-                logger.info(f"✅ Success: {description}")
-                return {
-                    'success': True,
-                    'stdout': result.stdout[-500:] if len(result.stdout) > 500 else result.stdout,
-                    'stderr': result.stderr[-500:] if len(result.stderr) > 500 else result.stderr
-                }
-            else:
-                logger.error(f"❌ Failed: {description}")
-                logger.error(f"Error: {result.stderr}")
-                return {
-                    'success': False,
-                    'stdout': result.stdout[-500:] if len(result.stdout) > 500 else result.stdout,
-                    'stderr': result.stderr[-500:] if len(result.stderr) > 500 else result.stderr,
-                    'returncode': result.returncode
-                }
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"⏱️ Timeout: {description}")
-            return {'success': False, 'error': 'Timeout after 1 hour'}
+            result = self.job_runner.run(script_path, args, timeout=3600)  # 1 hour timeout
         except Exception as e:
             logger.error(f"❌ Error: {description} - {e}")
             return {'success': False, 'error': str(e)}
 
+        if result['success']:
+            logger.info(f"✅ Success: {description}")
+        elif (result.get('error') or '').startswith('Timeout'):
+            logger.error(f"⏱️ Timeout: {description}")
+            result['error'] = 'Timeout after 1 hour'
+        else:
+            logger.error(f"❌ Failed: {description}")
+            logger.error(f"Error: {result.get('error')}")
+        return result
+
     def populate_category(self, category: str):
         """Populate all tables in a category"""
         if category not in POPULATION_SCRIPTS:
@@ -386,6 +396,45 @@ class MasterPopulator:
                 logger.info(f"    Columns: {status.get('total_columns', 0)}")
                 logger.info(f"    Script: {config['script']}")
 
+    def build_dag(self, categories: List[str]) -> StageDAG:
+        """
+        Build the population StageDAG for the given categories
+
+        Tables sharing a script (e.g. races/runners/horses/pedigree all come
+        from 'main.py --entities races') become a single stage that outputs
+        all of them. Statistics keys ('ra_mst_jockeys_stats') output the
+        master table they update.
+        """
+        dag = StageDAG(budgets=self.budgets, skip_on_failure=False)
+        self._stage_tables: Dict[str, List[str]] = {}
+        stage_by_script: Dict[str, Stage] = {}
+
+        for category in categories:
+            io = CATEGORY_STAGE_IO[category]
+            for table, config in POPULATION_SCRIPTS[category].items():
+                output = table[:-len('_stats')] if table.endswith('_stats') else table
+                stage = stage_by_script.get(config['script'])
+                if stage is None:
+                    script, description = config['script'], config['description']
+                    stage = dag.add(Stage(
+                        name=table,
+                        func=lambda script=script, description=description: self.run_script(script, description),
+                        inputs=list(io['inputs']),
+                        outputs=[],
+                        resources=[] if script.startswith('#') else list(io['resources']),
+                        description=description
+                    ))
+                    stage_by_script[config['script']] = stage
+                    self._stage_tables[stage.name] = []
+                stage.outputs.append(output)
+                self._stage_tables[stage.name].append(table)
+
+        # A stage never waits on itself for a table it both reads and writes
+        for stage in dag.stages.values():
+            stage.inputs = [t for t in stage.inputs if t not in stage.outputs]
+
+        return dag
+
     def run_all(self):
         """Run all population scripts"""
         start_time = datetime.now()
@@ -397,11 +446,14 @@ class MasterPopulator:
         logger.info(f"Start: {start_time}")
         logger.info("=" * 80)
 
-        # Execute in order
+        # Execute as a dependency graph
         categories = ['core', 'pedigree', 'statistics', 'supplementary']
+        report = self.build_dag(categories).run()
 
-        for category in categories:
-            self.populate_category(category)
+        for stage_name, stage_result in report.results.items():
+            result = stage_result.result or {'success': False, 'error': stage_result.error}
+            for table in self._stage_tables[stage_name]:
+                self.results[table] = result
 
         # Summary
         duration = datetime.now() - start_time
@@ -419,6 +471,7 @@ class MasterPopulator:
         logger.info(f"Failed: {fail_count}")
         logger.info(f"Duration: {duration}")
         logger.info("=" * 80)
+        report.log(logger)
 
         # Save results
         results_file = f"logs/master_population_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -426,7 +479,8 @@ class MasterPopulator:
             json.dump({
                 'start_time': start_time.isoformat(),
                 'duration': str(duration),
-                'results': self.results
+                'results': self.results,
+                'stages': report.to_dict()
             }, f, indent=2)
         logger.info(f"Results saved to: {results_file}")
 
@@ -438,10 +492,12 @@ def main():
     parser.add_argument('--table', help='Populate specific table only')
     parser.add_argument('--test', action='store_true', help='Test mode (limited data)')
     parser.add_argument('--status', action='store_true', help='Show status only (no execution)')
+    parser.add_argument('--db-concurrency', type=int, default=4,
+                       help='Max database-only scripts running at once (full population only)')
 
     args = parser.parse_args()
 
-    populator = MasterPopulator(test_mode=args.test)
+    populator = MasterPopulator(test_mode=args.test, budgets={'db': args.db_concurrency})
 
     if args.status:
         populator.show_status()
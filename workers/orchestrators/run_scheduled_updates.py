@@ -6,10 +6,18 @@ Main orchestrator that manages all scheduled data updates.
 This script:
 - Reads configuration from scheduler_config.yaml
 - Determines which updates to run based on schedule
-- Manages concurrent execution (prevents overlaps)
+- Manages concurrent execution through the durable job queue
+  (utils/job_queue.py): each due update becomes a leased job keyed by its
+  schedule slot, so overlapping runs are prevented across hosts, a crashed
+  run is picked up again once its lease expires, and failures are retried
+  with backoff
 - Provides centralized logging and monitoring
 - Can be run via cron or as a continuous daemon
 
+Update scripts with a registered entry function (utils/job_runner.py) run
+in-process, reusing imported modules and warm API/database clients across
+updates; anything else is still launched as a subprocess.
+
 Usage:
     python run_scheduled_updates.py               # Check schedule and run appropriate updates
     python run_scheduled_updates.py --force-all   # Force run all update types
@@ -17,12 +25,8 @@ Usage:
 """
 
 import sys
-import os
 import argparse
 import yaml
-import fcntl
-import time
-import subprocess
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
@@ -33,65 +37,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.config import get_config
 from utils.logger import get_logger
+from utils.job_runner import JobRunner
+from utils.job_queue import JobWorker, get_job_queue, idempotency_key
 
 logger = get_logger('scheduler')
 
 
-class UpdateLock:
-    """Context manager for update locks to prevent concurrent execution"""
-
-    def __init__(self, lock_name: str, lock_dir: str = "/tmp", stale_timeout: int = 3600):
-        """
-        Initialize update lock
-
-        Args:
-            lock_name: Name of the lock (e.g., 'update_daily_data')
-            lock_dir: Directory for lock files
-            stale_timeout: Remove locks older than this (seconds)
-        """
-        self.lock_file = Path(lock_dir) / f"darkhorses_update_{lock_name}.lock"
-        self.lock_fd = None
-        self.stale_timeout = stale_timeout
-
-    def __enter__(self):
-        """Acquire lock"""
-        # Check for stale lock
-        if self.lock_file.exists():
-            lock_age = time.time() - self.lock_file.stat().st_mtime
-            if lock_age > self.stale_timeout:
-                logger.warning(f"Removing stale lock (age: {lock_age:.0f}s): {self.lock_file}")
-                try:
-                    self.lock_file.unlink()
-                except Exception as e:
-                    logger.warning(f"Failed to remove stale lock: {e}")
-
-        # Try to acquire lock
-        try:
-            self.lock_fd = open(self.lock_file, 'w')
-            fcntl.flock(self.lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-            self.lock_fd.write(f"{os.getpid()}\n{datetime.utcnow().isoformat()}")
-            self.lock_fd.flush()
-            return self
-        except IOError:
-            # Lock already held
-            if self.lock_fd:
-                self.lock_fd.close()
-            raise RuntimeError(f"Another instance is already running (lock: {self.lock_file})")
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Release lock"""
-        if self.lock_fd:
-            try:
-                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
-                self.lock_fd.close()
-            except Exception as e:
-                logger.warning(f"Failed to release lock: {e}")
-            try:
-                self.lock_file.unlink()
-            except Exception as e:
-                logger.warning(f"Failed to remove lock file: {e}")
-
-
 class ScheduledUpdatesOrchestrator:
     """Orchestrator for scheduled data updates"""
 
@@ -108,9 +59,11 @@ class ScheduledUpdatesOrchestrator:
 
         # Load scheduler configuration
         if config_path is None:
-            config_path = self.config.paths.root_dir / 'config' / 'scheduler_config.yaml'
+            config_path = self.config.paths.base_dir / 'config' / 'scheduler_config.yaml'
 
         self.scheduler_config = self._load_scheduler_config(config_path)
+        self.job_runner = JobRunner(root_dir=str(self.config.paths.base_dir))
+        self._queue = None
 
         # Statistics
         self.stats = {
@@ -136,9 +89,17 @@ class ScheduledUpdatesOrchestrator:
             return {
                 'intervals': {},
                 'retry': {'max_attempts': 3, 'initial_delay': 5},
-                'concurrency': {'enabled': True}
+                'concurrency': {'enabled': True},
+                'queue': {}
             }
 
+    @property
+    def queue(self):
+        """Durable job queue (opened on first use)"""
+        if self._queue is None:
+            self._queue = get_job_queue(self.scheduler_config.get('queue'), str(self.config.paths.base_dir))
+        return self._queue
+
     def run(self, force_all: bool = False, specific_update: Optional[str] = None):
         """
         Run scheduled updates
@@ -166,10 +127,14 @@ class ScheduledUpdatesOrchestrator:
                 updates_to_run = self._determine_due_updates()
                 logger.info(f"Updates due: {updates_to_run if updates_to_run else 'None'}")
 
-            # Run each update
+            # Queue each update, then run everything claimable (including
+            # retries of earlier failed slots whose backoff has passed)
             for update_name in updates_to_run:
                 self._run_update(update_name)
 
+            if not self.dry_run:
+                self._drain_queue()
+
             # Print summary
             self._print_summary()
 
@@ -300,13 +265,13 @@ class ScheduledUpdatesOrchestrator:
 
     def _run_update(self, update_name: str):
         """
-        Run a specific update
+        Queue a specific update for the current schedule slot
 
         Args:
             update_name: Name of the update (from config)
         """
         logger.info("\n" + "=" * 80)
-        logger.info(f"RUNNING UPDATE: {update_name}")
+        logger.info(f"QUEUING UPDATE: {update_name}")
         logger.info("=" * 80)
 
         update_config = self.scheduler_config['intervals'].get(update_name, {})
@@ -319,102 +284,125 @@ class ScheduledUpdatesOrchestrator:
             self.stats['errors'] += 1
             return
 
-        # Build command
-        script_path = self.config.paths.root_dir / script
-        cmd = [sys.executable, str(script_path)]
-
-        if args:
-            cmd.extend(args.split())
+        # Build arguments
+        job_args = args.split() if args else []
 
         if self.dry_run:
-            cmd.append('--dry-run')
+            job_args.append('--dry-run')
 
-        logger.info(f"Command: {' '.join(cmd)}")
+        logger.info(f"Job: {script} {' '.join(job_args)}".rstrip())
         logger.info(f"Timeout: {timeout}s")
 
-        # Use lock to prevent concurrent execution
-        lock_name = update_name
+        if self.dry_run:
+            self._record(update_name, self._execute_update(script, job_args, timeout), 0.0)
+            return
+
+        # One job per update and schedule slot; jobs sharing the update name as
+        # concurrency key never overlap, on this host or any other
+        concurrency_key = update_name
         if not self.scheduler_config.get('concurrency', {}).get('enabled', True):
-            logger.info("Concurrency control disabled, running without lock")
-            lock_name = None
+            logger.info("Concurrency control disabled, updates may overlap")
+            concurrency_key = None
 
-        update_start = time.time()
+        queue_config = self.scheduler_config.get('queue', {})
+        slot = self.stats['start_time'].strftime('%Y-%m-%dT%H:%M')
 
         try:
-            if lock_name:
-                lock_dir = self.scheduler_config.get('concurrency', {}).get('lock_dir', '/tmp')
-                stale_timeout = self.scheduler_config.get('concurrency', {}).get('stale_timeout', 3600)
-
-                with UpdateLock(lock_name, lock_dir=lock_dir, stale_timeout=stale_timeout):
-                    result = self._execute_update(cmd, timeout)
-            else:
-                result = self._execute_update(cmd, timeout)
-
-            # Record results
-            update_duration = time.time() - update_start
-            self.stats['updates_run'].append({
-                'name': update_name,
-                'success': result['success'],
-                'duration': update_duration,
-                'exit_code': result.get('exit_code'),
-                'error': result.get('error')
-            })
-
-            if result['success']:
-                logger.info(f"Update completed successfully in {update_duration:.2f}s")
+            job_id = self.queue.enqueue(
+                'scheduled_update',
+                {'update': update_name, 'script': script, 'args': job_args, 'timeout': timeout},
+                idempotency_key=idempotency_key('scheduled_update', update_name, slot),
+                concurrency_key=concurrency_key,
+                max_attempts=queue_config.get('max_attempts', 3),
+                replace_pending=concurrency_key is not None
+            )
+            if job_id is None:
+                logger.info(f"Update {update_name} already queued for slot {slot}")
             else:
-                logger.error(f"Update failed: {result.get('error')}")
-                self.stats['errors'] += 1
+                logger.info(f"Queued {update_name} as job {job_id} (slot {slot})")
+        except Exception as e:
+            logger.error(f"Failed to queue update {update_name}: {e}", exc_info=True)
+            self.stats['errors'] += 1
 
-        except RuntimeError as e:
-            logger.warning(f"Update skipped: {e}")
-            # Not counted as error - just already running
+    def _drain_queue(self):
+        """Run claimable scheduled-update jobs until none are left"""
+        queue_config = self.scheduler_config.get('queue', {})
+        worker = JobWorker(
+            self.queue,
+            {'scheduled_update': self._handle_job},
+            lease_seconds=queue_config.get('lease_seconds', 120),
+            heartbeat_seconds=queue_config.get('heartbeat_seconds', 30)
+        )
+
+        try:
+            outcomes = worker.run()
         except Exception as e:
-            logger.error(f"Update execution failed: {e}", exc_info=True)
+            logger.error(f"Job queue failed: {e}", exc_info=True)
+            self.stats['errors'] += 1
+            return
+
+        for outcome in outcomes:
+            name = (outcome['key'] or '').split(':')[1] if outcome['key'] else str(outcome['id'])
+            result = dict(outcome['result'] or {})
+            result.setdefault('success', outcome['status'] == 'done')
+            result['error'] = outcome['error']
+            result['job_status'] = outcome['status']
+            self._record(name, result, outcome['duration'])
+
+        pending = self.queue.counts(['scheduled_update']).get('pending', 0)
+        if pending:
+            logger.info(f"{pending} scheduled update job(s) waiting (retry backoff or running elsewhere)")
+
+    def _handle_job(self, payload: Dict) -> Dict:
+        """Job queue handler for 'scheduled_update' jobs"""
+        logger.info(f"RUNNING UPDATE: {payload.get('update')}")
+        return self._execute_update(payload['script'], payload.get('args', []), payload.get('timeout', 900))
+
+    def _record(self, update_name: str, result: Dict, duration: float):
+        """Record one update's outcome"""
+        self.stats['updates_run'].append({
+            'name': update_name,
+            'success': result.get('success', False),
+            'duration': duration,
+            'exit_code': result.get('exit_code'),
+            'in_process': result.get('in_process'),
+            'job_status': result.get('job_status'),
+            'error': result.get('error')
+        })
+
+        if result.get('success'):
+            logger.info(f"Update {update_name} completed successfully in {duration:.2f}s")
+        elif result.get('job_status') == 'pending':
+            logger.warning(f"Update {update_name} failed, will be retried: {result.get('error')}")
+            self.stats['errors'] += 1
+        elif result.get('job_status') == 'lease_lost':
+            logger.warning(f"Update {update_name} stopped: its lease was lost and another worker took it over")
+        else:
+            logger.error(f"Update {update_name} failed: {result.get('error')}")
             self.stats['errors'] += 1
 
-    def _execute_update(self, cmd: List[str], timeout: int) -> Dict:
+    def _execute_update(self, script: str, args: List[str], timeout: int) -> Dict:
         """
-        Execute update script
+        Execute update script via the job runner
 
         Args:
-            cmd: Command to execute
+            script: Script path relative to the project root
+            args: Script arguments
             timeout: Timeout in seconds
 
         Returns:
             Result dictionary
         """
         if self.dry_run:
-            logger.info("[DRY RUN] Would execute: " + ' '.join(cmd))
+            logger.info(f"[DRY RUN] Would execute: {script} {' '.join(args)}")
             return {'success': True, 'exit_code': 0}
 
         try:
-            result = subprocess.run(
-                cmd,
-                timeout=timeout,
-                capture_output=True,
-                text=True
-            )
-
-            # Log output
-            if result.stdout:
-                logger.info(f"STDOUT:\n{result.stdout}")
-            if result.stderr:
-                logger.warning(f"STDERR:\n{result.stderr}")
+            result = self.job_runner.run(script, args, timeout=timeout)
+            if result.get('error') and 'Timeout' in result['error']:
+                logger.error(f"Update timed out after {timeout}s")
+            return result
 
-            return {
-                'success': result.returncode == 0,
-                'exit_code': result.returncode,
-                'stdout': result.stdout,
-                'stderr': result.stderr
-            }
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"Update timed out after {timeout}s")
-            return {
-                'success': False,
-                'error': f'Timeout after {timeout}s'
-            }
         except Exception as e:
             logger.error(f"Execution failed: {e}", exc_info=True)
             return {
@@ -21,6 +21,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from config.config import get_config
 from utils.logger import get_logger
+from utils.api_scheduler import api_priority
 from main import ReferenceDataOrchestrator
 
 logger = get_logger('update_daily_data')
@@ -245,7 +246,7 @@ class DailyDataUpdater:
         logger.info("=" * 80)
 
 
-def main():
+def main(argv=None):
     """Main entry point"""
     parser = argparse.ArgumentParser(
         description='Daily data update script for racing data'
@@ -283,7 +284,7 @@ def main():
         help='Test mode - fetch data but do not write to database'
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Validate arguments
     if args.racecards_only and args.results_only:
@@ -292,13 +293,14 @@ def main():
 
     try:
         updater = DailyDataUpdater(dry_run=args.dry_run)
-        stats = updater.run(
-            racecards_only=args.racecards_only,
-            results_only=args.results_only,
-            days_ahead=args.days_ahead,
-            days_back=args.days_back,
-            weekly=args.weekly
-        )
+        with api_priority('daily'):
+            stats = updater.run(
+                racecards_only=args.racecards_only,
+                results_only=args.results_only,
+                days_ahead=args.days_ahead,
+                days_back=args.days_back,
+                weekly=args.weekly
+            )
 
         # Exit with appropriate code
         if stats.get('errors', 0) > 0:
@@ -7,6 +7,18 @@ Runs every 5-15 minutes during racing hours to update:
 - Results as they become official
 
 This script is designed to be idempotent and safe to run multiple times.
+
+With --adaptive it polls on a plan built from the day's off times
+(utils/live_schedule.py) instead: results shortly after each off with backoff
+until official, racecards more often near the off, nothing between meetings.
+Each run is one short tick - fetch whatever the plan says is due, save the
+plan's state and exit - so the scheduler's live cron drives it without a
+long job holding the queue. --follow keeps a dedicated process polling until
+every race is resulted.
+
+Polls can be targeted (--courses / --race-ids, and always in --adaptive
+mode): only the given courses are fetched, through the API's course filter,
+and only races/runners that differ from the stored rows are written.
 """
 
 import sys
@@ -14,13 +26,17 @@ import argparse
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, List, Optional
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config.config import get_config
 from utils.logger import get_logger
+from utils.supabase_client import SupabaseReferenceClient
+from utils.live_schedule import DEFAULT_STATE_PATH, LiveSchedule, RACE_COLUMNS, utc_now
+from utils.job_runner import checkpoint
+from utils.api_scheduler import api_priority, get_api_scheduler
 from main import ReferenceDataOrchestrator
 
 logger = get_logger('update_live_data')
@@ -45,19 +61,25 @@ class LiveDataUpdater:
             'runners_updated': 0,
             'results_updated': 0,
             'api_calls': 0,
+            'racecard_polls': 0,
+            'result_polls': 0,
             'errors': 0
         }
+        self._db_client = None
 
         if dry_run:
             logger.warning("DRY RUN MODE - No database writes will occur")
 
-    def run(self, races_only: bool = False, results_only: bool = False) -> Dict:
+    def run(self, races_only: bool = False, results_only: bool = False,
+            course_ids: Optional[List[str]] = None, race_ids: Optional[List[str]] = None) -> Dict:
         """
         Run live data update
 
         Args:
             races_only: Only update races (skip results)
             results_only: Only update results (skip races)
+            course_ids: Targeted refresh of these courses only
+            race_ids: Targeted refresh of these races only (their courses are looked up)
 
         Returns:
             Statistics dictionary
@@ -69,13 +91,16 @@ class LiveDataUpdater:
         logger.info("=" * 80)
 
         try:
+            if race_ids and not course_ids:
+                course_ids = self._courses_for_races(race_ids)
+
             # Update today's races (unless results_only)
             if not results_only:
-                self._update_todays_races()
+                self._update_todays_races(course_ids, race_ids)
 
             # Update results (unless races_only)
             if not races_only:
-                self._update_todays_results()
+                self._update_todays_results(course_ids, race_ids)
 
             # Calculate execution time
             self.stats['end_time'] = datetime.utcnow()
@@ -94,7 +119,117 @@ class LiveDataUpdater:
             self.stats['error'] = str(e)
             return self.stats
 
-    def _update_todays_races(self):
+    @property
+    def db_client(self) -> SupabaseReferenceClient:
+        if self._db_client is None:
+            self._db_client = SupabaseReferenceClient(
+                url=self.config.supabase.url,
+                service_key=self.config.supabase.service_key,
+                batch_size=self.config.supabase.batch_size
+            )
+        return self._db_client
+
+    def run_adaptive(self, follow: bool = False, state_path: Optional[str] = DEFAULT_STATE_PATH) -> Dict:
+        """
+        Poll today's races on a race-time-aware plan
+
+        Args:
+            follow: Keep polling until the day is done (default: one tick)
+            state_path: Polling state carried between ticks (None = start fresh)
+
+        Returns:
+            Statistics dictionary
+        """
+        today = utc_now().strftime('%Y-%m-%d')
+        logger.info("=" * 80)
+        logger.info(f"ADAPTIVE LIVE UPDATE - {today}" + (" (follow)" if follow else ""))
+        logger.info("=" * 80)
+
+        try:
+            schedule = LiveSchedule.load(self.db_client, today, state_path)
+            if not schedule.races:
+                # No racecards stored yet - fetch them once and plan from those
+                self._update_todays_races()
+                schedule.record_racecards(utc_now())
+                schedule.refresh(self._load_races(today))
+            logger.info(f"Plan: {schedule.summary()}")
+
+            while True:
+                checkpoint()
+                now = utc_now()
+                if now.strftime('%Y-%m-%d') != today:
+                    logger.info("Racing day over")
+                    break
+
+                if self._poll_due(schedule, now):
+                    logger.info(f"Plan: {schedule.summary()}")
+                if state_path:
+                    schedule.save(state_path)
+
+                wake = schedule.next_wake(utc_now())
+                if wake is None:
+                    logger.info("No races left to poll today")
+                    break
+                if not follow:
+                    logger.info(f"Next poll due at {wake.strftime('%H:%M:%S')} UTC")
+                    break
+                self._sleep_until(wake)
+
+        except Exception as e:
+            logger.error(f"Adaptive live update failed: {e}", exc_info=True)
+            self.stats['errors'] += 1
+            self.stats['error'] = str(e)
+
+        self.stats['end_time'] = datetime.utcnow()
+        self.stats['duration_seconds'] = (self.stats['end_time'] - self.stats['start_time']).total_seconds()
+        self._print_summary()
+        return self.stats
+
+    def _poll_due(self, schedule: LiveSchedule, now: datetime) -> bool:
+        """Fetch whatever the plan says is due at now (False = nothing was)"""
+        due = schedule.due(now)
+        if due['racecards']:
+            self._update_todays_races(course_ids=due['racecard_courses'] or None)
+            self.stats['racecard_polls'] += 1
+            schedule.record_racecards(now)
+            schedule.refresh(self._load_races(schedule.date))
+
+        if due['results']:
+            self._update_todays_results(course_ids=due['result_courses'] or None, race_ids=due['results'])
+            self.stats['result_polls'] += 1
+            rows = self._load_races(schedule.date)
+            schedule.refresh(rows)
+            schedule.record_results(due['results'], [r['id'] for r in rows if r.get('has_result')], now)
+
+        return bool(due['racecards'] or due['results'])
+
+    def _load_races(self, date: str) -> List[Dict]:
+        """Today's race rows (off times and result flags)"""
+        response = self.db_client.client.table('ra_mst_races')\
+            .select(RACE_COLUMNS)\
+            .eq('date', date)\
+            .execute()
+        return response.data or []
+
+    def _courses_for_races(self, race_ids: List[str]) -> List[str]:
+        """Course IDs of the given races (for the API's course filter)"""
+        response = self.db_client.client.table('ra_mst_races')\
+            .select('id, course_id')\
+            .in_('id', list(race_ids))\
+            .execute()
+        return sorted({r['course_id'] for r in response.data or [] if r.get('course_id')})
+
+    def _sleep_until(self, wake: datetime):
+        """Sleep until wake, in short steps so job timeouts still apply"""
+        logger.info(f"Idle until {wake.strftime('%H:%M:%S')} UTC")
+        while True:
+            remaining = (wake - utc_now()).total_seconds()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 30))
+            checkpoint()
+
+    def _update_todays_races(self, course_ids: Optional[List[str]] = None, race_ids: Optional[List[str]] = None):
         """Update current day's race information"""
         logger.info("\n" + "=" * 80)
         logger.info("UPDATING TODAY'S RACES")
@@ -103,7 +238,7 @@ class LiveDataUpdater:
         today = datetime.utcnow().date()
         today_str = today.strftime('%Y-%m-%d')
 
-        logger.info(f"Fetching racecards for: {today_str}")
+        logger.info(f"Fetching racecards for: {today_str}" + (f" (courses: {', '.join(course_ids)})" if course_ids else ''))
 
         if self.dry_run:
             logger.info("[DRY RUN] Would fetch racecards for today")
@@ -119,6 +254,14 @@ class LiveDataUpdater:
                 }
             }
 
+            # Targeted refresh: only these courses/races, write only what changed
+            if course_ids or race_ids:
+                custom_configs['races'].update({
+                    'course_ids': course_ids,
+                    'race_ids': race_ids,
+                    'only_changed': True
+                })
+
             result = self.orchestrator.run_fetch(
                 entities=['races'],
                 custom_configs=custom_configs
@@ -138,7 +281,7 @@ class LiveDataUpdater:
             logger.error(f"Error updating races: {e}", exc_info=True)
             self.stats['errors'] += 1
 
-    def _update_todays_results(self):
+    def _update_todays_results(self, course_ids: Optional[List[str]] = None, race_ids: Optional[List[str]] = None):
         """Update today's results (as they become official)"""
         logger.info("\n" + "=" * 80)
         logger.info("UPDATING TODAY'S RESULTS")
@@ -147,7 +290,7 @@ class LiveDataUpdater:
         today = datetime.utcnow().date()
         today_str = today.strftime('%Y-%m-%d')
 
-        logger.info(f"Fetching results for: {today_str}")
+        logger.info(f"Fetching results for: {today_str}" + (f" (courses: {', '.join(course_ids)})" if course_ids else ''))
 
         if self.dry_run:
             logger.info("[DRY RUN] Would fetch results for today")
@@ -163,6 +306,14 @@ class LiveDataUpdater:
                 }
             }
 
+            # Targeted refresh: only these courses/races, write only what changed
+            if course_ids or race_ids:
+                custom_configs['results'].update({
+                    'course_ids': course_ids,
+                    'race_ids': race_ids,
+                    'only_changed': True
+                })
+
             result = self.orchestrator.run_fetch(
                 entities=['results'],
                 custom_configs=custom_configs
@@ -194,7 +345,10 @@ class LiveDataUpdater:
         logger.info(f"Races updated: {self.stats['races_updated']}")
         logger.info(f"Results updated: {self.stats['results_updated']}")
         logger.info(f"API calls: {self.stats['api_calls']}")
+        if self.stats['racecard_polls'] or self.stats['result_polls']:
+            logger.info(f"Racecard polls: {self.stats['racecard_polls']}, result polls: {self.stats['result_polls']}")
         logger.info(f"Errors: {self.stats['errors']}")
+        get_api_scheduler().log_metrics(logger)
 
         if self.dry_run:
             logger.info("")
@@ -203,7 +357,7 @@ class LiveDataUpdater:
         logger.info("=" * 80)
 
 
-def main():
+def main(argv=None):
     """Main entry point"""
     parser = argparse.ArgumentParser(
         description='Live data update script for racing data'
@@ -218,13 +372,33 @@ def main():
         action='store_true',
         help='Only update results (skip races)'
     )
+    parser.add_argument(
+        '--courses',
+        nargs='+',
+        help='Targeted refresh of these course IDs only (writes only changed rows)'
+    )
+    parser.add_argument(
+        '--race-ids',
+        nargs='+',
+        help='Targeted refresh of these race IDs only (writes only changed rows)'
+    )
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Poll around scheduled off times: fetch what is due now and exit'
+    )
+    parser.add_argument(
+        '--follow',
+        action='store_true',
+        help='With --adaptive, keep polling until the day is done (dedicated process)'
+    )
     parser.add_argument(
         '--dry-run',
         action='store_true',
         help='Test mode - fetch data but do not write to database'
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Validate arguments
     if args.races_only and args.results_only:
@@ -233,10 +407,17 @@ def main():
 
     try:
         updater = LiveDataUpdater(dry_run=args.dry_run)
-        stats = updater.run(
-            races_only=args.races_only,
-            results_only=args.results_only
-        )
+        # Live requests preempt daily, enrichment and backfill traffic
+        with api_priority('live'):
+            if args.adaptive:
+                stats = updater.run_adaptive(follow=args.follow)
+            else:
+                stats = updater.run(
+                    races_only=args.races_only,
+                    results_only=args.results_only,
+                    course_ids=args.courses,
+                    race_ids=args.race_ids
+                )
 
         # Exit with appropriate code
         if stats.get('errors', 0) > 0:
@@ -195,7 +195,7 @@ class ReferenceDataUpdater:
         logger.info("=" * 80)
 
 
-def main():
+def main(argv=None):
     """Main entry point"""
     parser = argparse.ArgumentParser(
         description='Reference data update script for racing data'
@@ -216,7 +216,7 @@ def main():
         help='Test mode - fetch data but do not write to database'
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Validate arguments
     if args.courses_only and args.bookmakers_only:
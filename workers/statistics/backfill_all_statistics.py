@@ -60,6 +60,7 @@ from config.config import get_config
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('backfill_all_statistics')
 
@@ -665,4 +666,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
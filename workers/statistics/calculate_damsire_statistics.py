@@ -58,6 +58,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.runner_store import DatabaseRunnerSource, RunnerStore
+from utils.analytics_mirror import AnalyticsMirror
+from utils.profiling import run_profiled
 
 logger = get_logger('calculate_damsire_statistics')
 
@@ -68,8 +71,15 @@ BATCH_SIZE = 100
 class DamsireStatisticsCalculator:
     """Calculate damsire statistics from database"""
 
-    def __init__(self, db_client: SupabaseReferenceClient):
+    def __init__(self, db_client: SupabaseReferenceClient, runner_source=None):
+        """
+        Args:
+            db_client: Database client (entity lists, pedigree, updates)
+            runner_source: Runner lookups - a RunnerStore to run in memory
+                (default: DatabaseRunnerSource, one query per entity)
+        """
         self.db_client = db_client
+        self.runner_source = runner_source or DatabaseRunnerSource(db_client)
         self.stats = {
             'processed': 0,
             'updated': 0,
@@ -85,12 +95,9 @@ class DamsireStatisticsCalculator:
         """
         try:
             # Get all races where this damsire raced
-            runners = self.db_client.client.table('ra_mst_runners')\
-                .select('position, prize_won, race_id')\
-                .eq('horse_id', damsire_id)\
-                .execute()
+            runners = self.runner_source.runners('horse_id', [damsire_id], ['position', 'prize_won', 'race_id'])
 
-            if not runners.data:
+            if not runners:
                 return {
                     'own_race_runs': 0,
                     'own_race_wins': 0,
@@ -103,25 +110,18 @@ class DamsireStatisticsCalculator:
                 }
 
             # Get race dates
-            race_ids = [r['race_id'] for r in runners.data if r.get('race_id')]
-            if race_ids:
-                races = self.db_client.client.table('ra_mst_races')\
-                    .select('id, date')\
-                    .in_('id', race_ids)\
-                    .execute()
-                race_dates = {r['id']: r['date'] for r in races.data}
-            else:
-                race_dates = {}
+            race_ids = [r['race_id'] for r in runners if r.get('race_id')]
+            race_dates = self.runner_source.race_dates(race_ids)
 
             # Calculate statistics
-            total_runs = len(runners.data)
+            total_runs = len(runners)
             wins = 0
             places = 0
             total_prize = 0.0
             positions = []
             dates = []
 
-            for runner in runners.data:
+            for runner in runners:
                 pos = runner.get('position')
                 if pos:
                     try:
@@ -192,12 +192,9 @@ class DamsireStatisticsCalculator:
             total_grandoffspring = len(grandoffspring_ids)
 
             # Get all races for these grandoffspring
-            runners = self.db_client.client.table('ra_mst_runners')\
-                .select('position, prize_won')\
-                .in_('horse_id', grandoffspring_ids)\
-                .execute()
+            runners = self.runner_source.runners('horse_id', grandoffspring_ids, ['position', 'prize_won'])
 
-            if not runners.data:
+            if not runners:
                 return {
                     'total_grandoffspring': total_grandoffspring,
                     'grandoffspring_total_runs': 0,
@@ -210,13 +207,13 @@ class DamsireStatisticsCalculator:
                 }
 
             # Calculate grandoffspring statistics
-            total_runs = len(runners.data)
+            total_runs = len(runners)
             wins = 0
             places = 0
             total_prize = 0.0
             positions = []
 
-            for runner in runners.data:
+            for runner in runners:
                 pos = runner.get('position')
                 if pos:
                     try:
@@ -314,12 +311,14 @@ def save_checkpoint(index: int, stats: Dict):
         logger.error(f"Error saving checkpoint: {e}")
 
 
-def main():
+def main(argv=None):
     """Main execution function"""
     parser = argparse.ArgumentParser(description='Calculate and populate damsire statistics')
     parser.add_argument('--limit', type=int, help='Limit number of damsires to process (for testing)')
     parser.add_argument('--resume', action='store_true', help='Resume from last checkpoint')
-    args = parser.parse_args()
+    parser.add_argument('--in-memory', action='store_true', help='Load all runners once into a compact in-memory store')
+    parser.add_argument('--from-mirror', action='store_true', help='Load the in-memory store from the local analytics mirror')
+    args = parser.parse_args(argv)
 
     logger.info("=" * 80)
     logger.info("DAMSIRE STATISTICS CALCULATOR")
@@ -333,7 +332,13 @@ def main():
     )
 
     # Initialize calculator
-    calculator = DamsireStatisticsCalculator(db_client)
+    runner_source = None
+    if args.from_mirror:
+        runner_source = RunnerStore.from_mirror(AnalyticsMirror())
+    elif args.in_memory:
+        runner_source = RunnerStore.from_database(db_client)
+
+    calculator = DamsireStatisticsCalculator(db_client, runner_source=runner_source)
 
     # Load checkpoint if resuming
     checkpoint = {'last_processed_index': 0, 'stats': {}}
@@ -416,4 +421,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -58,6 +58,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.runner_store import DatabaseRunnerSource, RunnerStore
+from utils.analytics_mirror import AnalyticsMirror
+from utils.profiling import run_profiled
 
 logger = get_logger('calculate_jockey_statistics')
 
@@ -68,8 +71,15 @@ BATCH_SIZE = 100
 class JockeyStatisticsCalculator:
     """Calculate jockey statistics from database"""
 
-    def __init__(self, db_client: SupabaseReferenceClient):
+    def __init__(self, db_client: SupabaseReferenceClient, runner_source=None):
+        """
+        Args:
+            db_client: Database client (entity lists, pedigree, updates)
+            runner_source: Runner lookups - a RunnerStore to run in memory
+                (default: DatabaseRunnerSource, one query per entity)
+        """
         self.db_client = db_client
+        self.runner_source = runner_source or DatabaseRunnerSource(db_client)
         self.stats = {
             'processed': 0,
             'updated': 0,
@@ -84,12 +94,9 @@ class JockeyStatisticsCalculator:
         """Calculate all statistics for a single jockey"""
         try:
             # Get all runners for this jockey
-            runners = self.db_client.client.table('ra_mst_runners')\
-                .select('position, race_id')\
-                .eq('jockey_id', jockey_id)\
-                .execute()
+            runners = self.runner_source.runners('jockey_id', [jockey_id], ['position', 'race_id'])
 
-            if not runners.data:
+            if not runners:
                 return {
                     'id': jockey_id,
                     'total_rides': 0,
@@ -113,18 +120,11 @@ class JockeyStatisticsCalculator:
                 }
 
             # Get race dates
-            race_ids = list(set([r['race_id'] for r in runners.data if r.get('race_id')]))
-            if race_ids:
-                races = self.db_client.client.table('ra_mst_races')\
-                    .select('id, date')\
-                    .in_('id', race_ids)\
-                    .execute()
-                race_dates = {r['id']: r['date'] for r in races.data}
-            else:
-                race_dates = {}
+            race_ids = list(set([r['race_id'] for r in runners if r.get('race_id')]))
+            race_dates = self.runner_source.race_dates(race_ids)
 
             # Initialize counters
-            total_rides = len(runners.data)
+            total_rides = len(runners)
             total_wins = 0
             total_places = 0
             total_seconds = 0
@@ -137,7 +137,7 @@ class JockeyStatisticsCalculator:
             recent_30d_wins = 0
 
             # Process each runner
-            for runner in runners.data:
+            for runner in runners:
                 pos = runner.get('position')
                 race_id = runner.get('race_id')
                 race_date_str = race_dates.get(race_id)
@@ -266,12 +266,14 @@ def save_checkpoint(index: int, stats: Dict):
         logger.error(f"Error saving checkpoint: {e}")
 
 
-def main():
+def main(argv=None):
     """Main execution function"""
     parser = argparse.ArgumentParser(description='Calculate and populate jockey statistics')
     parser.add_argument('--limit', type=int, help='Limit number of jockeys to process (for testing)')
     parser.add_argument('--resume', action='store_true', help='Resume from last checkpoint')
-    args = parser.parse_args()
+    parser.add_argument('--in-memory', action='store_true', help='Load all runners once into a compact in-memory store')
+    parser.add_argument('--from-mirror', action='store_true', help='Load the in-memory store from the local analytics mirror')
+    args = parser.parse_args(argv)
 
     logger.info("=" * 80)
     logger.info("JOCKEY STATISTICS CALCULATOR")
@@ -285,7 +287,13 @@ def main():
     )
 
     # Initialize calculator
-    calculator = JockeyStatisticsCalculator(db_client)
+    runner_source = None
+    if args.from_mirror:
+        runner_source = RunnerStore.from_mirror(AnalyticsMirror())
+    elif args.in_memory:
+        runner_source = RunnerStore.from_database(db_client)
+
+    calculator = JockeyStatisticsCalculator(db_client, runner_source=runner_source)
 
     # Load checkpoint if resuming
     checkpoint = {'last_processed_index': 0, 'stats': {}}
@@ -366,4 +374,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -55,6 +55,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.runner_store import DatabaseRunnerSource, RunnerStore
+from utils.analytics_mirror import AnalyticsMirror
+from utils.profiling import run_profiled
 
 logger = get_logger('calculate_sire_statistics')
 
@@ -65,8 +68,15 @@ BATCH_SIZE = 100
 class SireStatisticsCalculator:
     """Calculate sire statistics from database"""
 
-    def __init__(self, db_client: SupabaseReferenceClient):
+    def __init__(self, db_client: SupabaseReferenceClient, runner_source=None):
+        """
+        Args:
+            db_client: Database client (entity lists, pedigree, updates)
+            runner_source: Runner lookups - a RunnerStore to run in memory
+                (default: DatabaseRunnerSource, one query per entity)
+        """
         self.db_client = db_client
+        self.runner_source = runner_source or DatabaseRunnerSource(db_client)
         self.stats = {
             'processed': 0,
             'updated': 0,
@@ -82,12 +92,9 @@ class SireStatisticsCalculator:
         """
         try:
             # Get all races where this sire raced
-            runners = self.db_client.client.table('ra_mst_runners')\
-                .select('position, prize_won, race_id')\
-                .eq('horse_id', sire_id)\
-                .execute()
+            runners = self.runner_source.runners('horse_id', [sire_id], ['position', 'prize_won', 'race_id'])
 
-            if not runners.data:
+            if not runners:
                 return {
                     'own_race_runs': 0,
                     'own_race_wins': 0,
@@ -100,25 +107,18 @@ class SireStatisticsCalculator:
                 }
 
             # Get race dates
-            race_ids = [r['race_id'] for r in runners.data if r.get('race_id')]
-            if race_ids:
-                races = self.db_client.client.table('ra_mst_races')\
-                    .select('id, date')\
-                    .in_('id', race_ids)\
-                    .execute()
-                race_dates = {r['id']: r['date'] for r in races.data}
-            else:
-                race_dates = {}
+            race_ids = [r['race_id'] for r in runners if r.get('race_id')]
+            race_dates = self.runner_source.race_dates(race_ids)
 
             # Calculate statistics
-            total_runs = len(runners.data)
+            total_runs = len(runners)
             wins = 0
             places = 0
             total_prize = 0.0
             positions = []
             dates = []
 
-            for runner in runners.data:
+            for runner in runners:
                 pos = runner.get('position')
                 if pos:
                     try:
@@ -189,12 +189,9 @@ class SireStatisticsCalculator:
             total_progeny = len(progeny_ids)
 
             # Get all races for these progeny
-            runners = self.db_client.client.table('ra_mst_runners')\
-                .select('position, prize_won')\
-                .in_('horse_id', progeny_ids)\
-                .execute()
+            runners = self.runner_source.runners('horse_id', progeny_ids, ['position', 'prize_won'])
 
-            if not runners.data:
+            if not runners:
                 return {
                     'total_progeny': total_progeny,
                     'progeny_total_runs': 0,
@@ -207,13 +204,13 @@ class SireStatisticsCalculator:
                 }
 
             # Calculate progeny statistics
-            total_runs = len(runners.data)
+            total_runs = len(runners)
             wins = 0
             places = 0
             total_prize = 0.0
             positions = []
 
-            for runner in runners.data:
+            for runner in runners:
                 pos = runner.get('position')
                 if pos:
                     try:
@@ -311,12 +308,14 @@ def save_checkpoint(index: int, stats: Dict):
         logger.error(f"Error saving checkpoint: {e}")
 
 
-def main():
+def main(argv=None):
     """Main execution function"""
     parser = argparse.ArgumentParser(description='Calculate and populate sire statistics')
     parser.add_argument('--limit', type=int, help='Limit number of sires to process (for testing)')
     parser.add_argument('--resume', action='store_true', help='Resume from last checkpoint')
-    args = parser.parse_args()
+    parser.add_argument('--in-memory', action='store_true', help='Load all runners once into a compact in-memory store')
+    parser.add_argument('--from-mirror', action='store_true', help='Load the in-memory store from the local analytics mirror')
+    args = parser.parse_args(argv)
 
     logger.info("=" * 80)
     logger.info("SIRE STATISTICS CALCULATOR")
@@ -330,7 +329,13 @@ def main():
     )
 
     # Initialize calculator
-    calculator = SireStatisticsCalculator(db_client)
+    runner_source = None
+    if args.from_mirror:
+        runner_source = RunnerStore.from_mirror(AnalyticsMirror())
+    elif args.in_memory:
+        runner_source = RunnerStore.from_database(db_client)
+
+    calculator = SireStatisticsCalculator(db_client, runner_source=runner_source)
 
     # Load checkpoint if resuming
     checkpoint = {'last_processed_index': 0, 'stats': {}}
@@ -413,4 +418,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
@@ -48,6 +48,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from config.config import get_config
 from utils.supabase_client import SupabaseReferenceClient
 from utils.logger import get_logger
+from utils.profiling import run_profiled
 
 logger = get_logger('daily_statistics_update')
 
@@ -530,4 +531,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
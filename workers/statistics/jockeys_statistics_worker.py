@@ -27,6 +27,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from config.config import get_config
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
+from utils.api_budget import ApiBudget
+from utils.api_scheduler import set_default_priority
+from utils.profiling import run_profiled
 
 # Setup logging
 logging.basicConfig(
@@ -222,8 +225,12 @@ def main():
     """Main execution function"""
     parser = argparse.ArgumentParser(description='Calculate and update jockey statistics')
     parser.add_argument('--limit', type=int, help='Limit number of jockeys to process (for testing)')
+    parser.add_argument('--ignore-budget', action='store_true', help='Run even if the daily API budget is exceeded')
     args = parser.parse_args()
 
+    # One results sweep per jockey: enrichment work, behind live and daily updates
+    set_default_priority('enrichment')
+
     logger.info("=" * 80)
     logger.info("JOCKEYS STATISTICS WORKER")
     logger.info("=" * 80)
@@ -261,6 +268,18 @@ def main():
         logger.error(f"Error fetching jockeys: {e}")
         return
 
+    # Estimate the sweep's API calls and fit it into today's budget
+    budget = ApiBudget.from_config(config)
+    estimate = budget.estimate('jockeys_statistics', len(jockeys), 'jockeys', default_calls_per_unit=3)
+    if not args.ignore_budget:
+        decision = budget.check(estimate)
+        if not decision.allowed:
+            logger.warning(f"Skipping run - daily API budget: {decision.reason}")
+            return
+        if decision.reshaped:
+            logger.warning(f"Daily API budget: processing {decision.units} of {len(jockeys)} jockeys")
+            jockeys = jockeys[:decision.units]
+
     # Process in batches
     batch_size = 100
     total_stats = {
@@ -272,20 +291,21 @@ def main():
 
     start_time = datetime.utcnow()
 
-    for i in range(0, len(jockeys), batch_size):
-        batch = jockeys[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-        total_batches = (len(jockeys) + batch_size - 1) // batch_size
+    with budget.track('jockeys_statistics', len(jockeys), 'jockeys', estimate):
+        for i in range(0, len(jockeys), batch_size):
+            batch = jockeys[i:i + batch_size]
+            batch_num = (i // batch_size) + 1
+            total_batches = (len(jockeys) + batch_size - 1) // batch_size
 
-        logger.info(f"\nProcessing batch {batch_num}/{total_batches} ({len(batch)} jockeys)...")
+            logger.info(f"\nProcessing batch {batch_num}/{total_batches} ({len(batch)} jockeys)...")
 
-        batch_stats = process_jockeys_batch(batch, api_client, db_client)
+            batch_stats = process_jockeys_batch(batch, api_client, db_client)
 
-        # Accumulate stats
-        for key in total_stats:
-            total_stats[key] += batch_stats[key]
+            # Accumulate stats
+            for key in total_stats:
+                total_stats[key] += batch_stats[key]
 
-        logger.info(f"Batch {batch_num} complete: {batch_stats['updated']} updated, {batch_stats['errors']} errors")
+            logger.info(f"Batch {batch_num} complete: {batch_stats['updated']} updated, {batch_stats['errors']} errors")
 
     # Final summary
     end_time = datetime.utcnow()
@@ -303,4 +323,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
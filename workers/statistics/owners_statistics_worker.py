@@ -27,6 +27,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from config.config import get_config
 from utils.api_client import RacingAPIClient
 from utils.supabase_client import SupabaseReferenceClient
+from utils.api_budget import ApiBudget
+from utils.api_scheduler import set_default_priority
+from utils.profiling import run_profiled
 
 # Setup logging
 logging.basicConfig(
@@ -218,8 +221,12 @@ def main():
     """Main execution function"""
     parser = argparse.ArgumentParser(description='Calculate and update owner statistics')
     parser.add_argument('--limit', type=int, help='Limit number of owners to process (for testing)')
+    parser.add_argument('--ignore-budget', action='store_true', help='Run even if the daily API budget is exceeded')
     args = parser.parse_args()
 
+    # One results sweep per owner: enrichment work, behind live and daily updates
+    set_default_priority('enrichment')
+
     logger.info("=" * 80)
     logger.info("OWNERS STATISTICS WORKER")
     logger.info("=" * 80)
@@ -257,6 +264,18 @@ def main():
         logger.error(f"Error fetching owners: {e}")
         return
 
+    # Estimate the sweep's API calls and fit it into today's budget
+    budget = ApiBudget.from_config(config)
+    estimate = budget.estimate('owners_statistics', len(owners), 'owners', default_calls_per_unit=3)
+    if not args.ignore_budget:
+        decision = budget.check(estimate)
+        if not decision.allowed:
+            logger.warning(f"Skipping run - daily API budget: {decision.reason}")
+            return
+        if decision.reshaped:
+            logger.warning(f"Daily API budget: processing {decision.units} of {len(owners)} owners")
+            owners = owners[:decision.units]
+
     # Process in batches
     batch_size = 100
     total_stats = {
@@ -268,20 +287,21 @@ def main():
 
     start_time = datetime.utcnow()
 
-    for i in range(0, len(owners), batch_size):
-        batch = owners[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-        total_batches = (len(owners) + batch_size - 1) // batch_size
+    with budget.track('owners_statistics', len(owners), 'owners', estimate):
+        for i in range(0, len(owners), batch_size):
+            batch = owners[i:i + batch_size]
+            batch_num = (i // batch_size) + 1
+            total_batches = (len(owners) + batch_size - 1) // batch_size
 
-        logger.info(f"\nProcessing batch {batch_num}/{total_batches} ({len(batch)} owners)...")
+            logger.info(f"\nProcessing batch {batch_num}/{total_batches} ({len(batch)} owners)...")
 
-        batch_stats = process_owners_batch(batch, api_client, db_client)
+            batch_stats = process_owners_batch(batch, api_client, db_client)
 
-        # Accumulate stats
-        for key in total_stats:
-            total_stats[key] += batch_stats[key]
+            # Accumulate stats
+            for key in total_stats:
+                total_stats[key] += batch_stats[key]
 
-        logger.info(f"Batch {batch_num} complete: {batch_stats['updated']} updated, {batch_stats['errors']} errors")
+            logger.info(f"Batch {batch_num} complete: {batch_stats['updated']} updated, {batch_stats['errors']} errors")
 
     # Final summary
     end_time = datetime.utcnow()
@@ -299,4 +319,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)
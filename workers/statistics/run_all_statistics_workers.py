@@ -22,6 +22,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from scripts.statistics_workers import jockeys_statistics_worker
 from scripts.statistics_workers import trainers_statistics_worker
 from scripts.statistics_workers import owners_statistics_worker
+from utils.profiling import run_profiled
 
 # Setup logging
 logging.basicConfig(
@@ -121,4 +122,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main)